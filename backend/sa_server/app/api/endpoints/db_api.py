@@ -3,12 +3,20 @@ from app.db.db import get_db
 from fastapi import APIRouter
 from fastapi import Query, Depends
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+from pydantic_core import to_jsonable_python
 from app.response.error_code import ErrorCode
 from app.response.response_model import ResponseModel, api_exception_handler
+from app.db.repository import ColumnarPage
 
 
 from app.services.db_services.stock_service.stock_financial.express_service import query_express_data
+from app.services.db_services.stock_service.stock_financial.income_service import query_income_data
+from app.services.db_services.stock_service.stock_financial.balancesheet_service import query_balancesheet_data
+from app.services.db_services.stock_service.stock_financial.cashflow_service import query_cashflow_data
+from app.services.db_services.stock_service.stock_financial.fina_indicator_service import query_fina_indicator_data
+from app.services.db_services.stock_service.hitting_limit_up.kpl_list_service import query_kpl_list_data
+from app.services.db_services.hk_stock_service.hk_mins_service import query_hk_mins_data
 
 # 在文件开头的导入语句之后添加
 print("Debug: ResponseModel type:", type(ResponseModel))
@@ -20,6 +28,8 @@ stock_router_prefix= "/stocks"
 stock_basic_router_prefix = "/stock_basic"
 fund_flows_router_prefix = "/fund_flows"
 stock_financial_router_prefix = "/stock_financial"
+hitting_limit_up_router_prefix = "/hitting_limit_up"
+hk_stock_router_prefix = "/hk_stock"
 
 
 stock_basic_router = APIRouter(prefix=stock_router_prefix, tags=["股票基本信息"])
@@ -27,6 +37,47 @@ stock_basic_router = APIRouter(prefix=stock_router_prefix, tags=["股票基本
 
 
 
+def split_list_param(values: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    解析列表类查询参数（如字段投影fields），支持 fields=a&fields=b 和 fields=a,b 两种写法
+    """
+    if not values:
+        return None
+    parsed = []
+    for item in values:
+        for field in item.split(','):
+            field = field.strip()
+            if field and field not in parsed:
+                parsed.append(field)
+    return parsed or None
+
+
+def serialize_items(items: Any) -> Any:
+    """
+    将查询结果转换为JSON兼容的数据，模型对象、字典和按列组织的结果使用相同的序列化规则
+
+    字典和按列组织的结果整体交给pydantic-core一次性转换，不经过逐行的模型转换
+    """
+    if isinstance(items, ColumnarPage):
+        return to_jsonable_python(items.columns)
+    if items and isinstance(items[0], BaseModel):
+        return [item.model_dump(mode='json') for item in items]
+    return to_jsonable_python(list(items))
+
+
+# 读接口的结果格式：records为逐行字典，columns为 {字段: 值列表}，均直接由数据库记录生成
+RESULT_FORMAT_PATTERN = "^(records|columns)$"
+RESULT_FORMAT_DESCRIPTION = "结果格式：records返回逐行数据，columns返回按列组织的数据 {字段: 值列表}，体积更小"
+RAW_DESCRIPTION = "是否直接返回数据库记录（按result_format组织），不做逐行的模型校验；为false时按数据模型校验后返回"
+
+
+def read_result_format(raw: bool, result_format: str) -> str:
+    """
+    读接口的raw参数转换为查询函数的结果格式，raw为false时走模型校验
+    """
+    return result_format if raw else 'model'
+
+
 # 查询参数文档（用于文档和验证）
 class ExpressQueryParams(BaseModel):
     """业绩快报查询参数模型"""
@@ -44,6 +95,9 @@ class ExpressQueryParams(BaseModel):
     )
     limit: Optional[int] = Field(20, ge=1, le=20, description="返回记录数限制")
     offset: Optional[int] = Field(0, ge=0, description="分页偏移量")
+    cursor: Optional[str] = Field(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset")
+    fields: Optional[List[str]] = Field(None, description="只返回的字段，如['ts_code', 'end_date', 'revenue']，为空时返回全部字段")
+    result_format: str = Field("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION)
 
 
 # 前端调用示例（JavaScript/Axios）
@@ -88,6 +142,9 @@ async def get_express_data(
     order_by: Optional[List[str]] = Query(None, description="排序字段，支持多个字段排序，前缀'-'表示降序，如['-ann_date', 'ts_code']"),
     limit: int = Query(20, ge=1, le=20, description="返回记录数限制"),
     offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,revenue"),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
     db = Depends(get_db)
 ):
     """
@@ -99,6 +156,9 @@ async def get_express_data(
         - 比较操作: ann_date__gt=20220101
         - 排序: order_by=-ann_date,ts_code
         - 分页: limit=20, offset=0
+        - 游标分页: 将响应中的next_cursor作为下一次请求的cursor，深分页与第一页开销相同
+        - 字段投影: fields=ts_code,end_date,revenue，只查询和返回指定字段
+        - 结果格式: result_format=columns 返回按列组织的数据
     """
     try:
         # 构建过滤条件
@@ -121,20 +181,27 @@ async def get_express_data(
             filters=filters,
             order_by=order_by,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor,
+            fields=split_list_param(fields),
+            result_format=result_format
         )
 
         if not express_data:
             return ResponseModel.error(ErrorCode.DATA_NOT_EXISTS, "未找到快报数据")
         
-        result = [item.model_dump(mode='json') for item in express_data]
+        result = serialize_items(express_data)
 
         return ResponseModel(
             code=ErrorCode.SUCCESS.code,
             success=True,
             message="操作成功",
-            data=result
+            data=result,
+            next_cursor=express_data.next_cursor
         )
+    except ValueError as e:
+        # 无效的过滤字段、排序字段或分页游标
+        return ResponseModel.error(ErrorCode.INVALID_PARAMETER, str(e))
     except Exception as e:
         # 打印详细异常信息
         import traceback
@@ -146,4 +213,271 @@ async def get_express_data(
         )
 
 
+async def query_with_response(query_func: Callable,
+                                    db,
+                                    filters: Dict[str, Any],
+                                    order_by: Optional[List[str]],
+                                    limit: int,
+                                    offset: int,
+                                    cursor: Optional[str],
+                                    fields: Optional[List[str]],
+                                    result_format: str,
+                                    not_found_message: str) -> ResponseModel:
+    """
+    动态查询类读接口的公共处理：字段投影、游标分页和统一的错误响应
+    """
+    try:
+        data = await query_func(db,
+            filters=filters,
+            order_by=order_by,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            fields=split_list_param(fields),
+            result_format=result_format
+        )
+
+        if not data:
+            return ResponseModel.error(ErrorCode.DATA_NOT_EXISTS, not_found_message)
+
+        return ResponseModel(
+            code=ErrorCode.SUCCESS.code,
+            success=True,
+            message="操作成功",
+            data=serialize_items(data),
+            next_cursor=data.next_cursor
+        )
+    except ValueError as e:
+        # 无效的过滤字段、投影字段或分页游标
+        return ResponseModel.error(ErrorCode.INVALID_PARAMETER, str(e))
+    except Exception as e:
+        import traceback
+        print(f"查询异常: {traceback.format_exc()}")
+        return ResponseModel.error(
+            ErrorCode.DATABASE_ERROR, 
+            f"查询失败: {str(e)}"
+        )
+
+
+def financial_statement_filters(ts_code: Optional[str],
+                                ts_code__in: Optional[List[str]],
+                                end_date: Optional[str],
+                                end_date__ge: Optional[str],
+                                end_date__le: Optional[str],
+                                ann_date__ge: Optional[str],
+                                ann_date__le: Optional[str]) -> Dict[str, Any]:
+    """
+    构建财务报表类查询的过滤条件，忽略未传入的参数
+    """
+    filters = {
+        'ts_code': ts_code,
+        'ts_code__in': split_list_param(ts_code__in),
+        'end_date': end_date,
+        'end_date__ge': end_date__ge,
+        'end_date__le': end_date__le,
+        'ann_date__ge': ann_date__ge,
+        'ann_date__le': ann_date__le,
+    }
+    return {key: value for key, value in filters.items() if value}
+
+
+@api_exception_handler
+@stock_basic_router.get(stock_financial_router_prefix + "/get_income_data", response_model=ResponseModel)
+async def get_income_data(
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    end_date: Optional[str] = Query(None, description="报告期，格式YYYYMMDD"),
+    end_date__ge: Optional[str] = Query(None, description="报告期不早于指定值，格式YYYYMMDD"),
+    end_date__le: Optional[str] = Query(None, description="报告期不晚于指定值，格式YYYYMMDD"),
+    ann_date__ge: Optional[str] = Query(None, description="公告日期不早于指定值，格式YYYYMMDD"),
+    ann_date__le: Optional[str] = Query(None, description="公告日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['-end_date', 'ts_code']"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,revenue,n_income"),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询利润表数据
+
+        利润表每行有上百个数值字段，只需少量指标时（如图表）应通过fields指定字段，
+        数据库只读取、接口只序列化这些列，例如 fields=ts_code,end_date,revenue,n_income
+    """
+    filters = financial_statement_filters(
+        ts_code, ts_code__in, end_date, end_date__ge, end_date__le, ann_date__ge, ann_date__le
+    )
+    return await query_with_response(
+        query_income_data, db, filters, order_by, limit, offset, cursor, fields, result_format, "未找到利润表数据"
+    )
+
 
+@api_exception_handler
+@stock_basic_router.get(stock_financial_router_prefix + "/get_balancesheet_data", response_model=ResponseModel)
+async def get_balancesheet_data(
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    end_date: Optional[str] = Query(None, description="报告期，格式YYYYMMDD"),
+    end_date__ge: Optional[str] = Query(None, description="报告期不早于指定值，格式YYYYMMDD"),
+    end_date__le: Optional[str] = Query(None, description="报告期不晚于指定值，格式YYYYMMDD"),
+    ann_date__ge: Optional[str] = Query(None, description="公告日期不早于指定值，格式YYYYMMDD"),
+    ann_date__le: Optional[str] = Query(None, description="公告日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['-end_date', 'ts_code']"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,total_assets,total_liab"),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询资产负债表数据
+
+        资产负债表每行有上百个数值字段，只需少量指标时（如图表）应通过fields指定字段，
+        数据库只读取、接口只序列化这些列，例如 fields=ts_code,end_date,total_assets,total_liab
+    """
+    filters = financial_statement_filters(
+        ts_code, ts_code__in, end_date, end_date__ge, end_date__le, ann_date__ge, ann_date__le
+    )
+    return await query_with_response(
+        query_balancesheet_data, db, filters, order_by, limit, offset, cursor, fields, result_format, "未找到资产负债表数据"
+    )
+
+
+@api_exception_handler
+@stock_basic_router.get(stock_financial_router_prefix + "/get_cashflow_data", response_model=ResponseModel)
+async def get_cashflow_data(
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    end_date: Optional[str] = Query(None, description="报告期，格式YYYYMMDD"),
+    end_date__ge: Optional[str] = Query(None, description="报告期不早于指定值，格式YYYYMMDD"),
+    end_date__le: Optional[str] = Query(None, description="报告期不晚于指定值，格式YYYYMMDD"),
+    ann_date__ge: Optional[str] = Query(None, description="公告日期不早于指定值，格式YYYYMMDD"),
+    ann_date__le: Optional[str] = Query(None, description="公告日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['-end_date', 'ts_code']"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,n_cashflow_act,free_cashflow"),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询现金流量表数据
+
+        现金流量表每行有上百个数值字段，只需少量指标时（如图表）应通过fields指定字段，
+        数据库只读取、接口只序列化这些列，例如 fields=ts_code,end_date,n_cashflow_act,free_cashflow
+    """
+    filters = financial_statement_filters(
+        ts_code, ts_code__in, end_date, end_date__ge, end_date__le, ann_date__ge, ann_date__le
+    )
+    return await query_with_response(
+        query_cashflow_data, db, filters, order_by, limit, offset, cursor, fields, result_format, "未找到现金流量表数据"
+    )
+
+
+@api_exception_handler
+@stock_basic_router.get(stock_financial_router_prefix + "/get_fina_indicator_data", response_model=ResponseModel)
+async def get_fina_indicator_data(
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    end_date: Optional[str] = Query(None, description="报告期，格式YYYYMMDD"),
+    end_date__ge: Optional[str] = Query(None, description="报告期不早于指定值，格式YYYYMMDD"),
+    end_date__le: Optional[str] = Query(None, description="报告期不晚于指定值，格式YYYYMMDD"),
+    ann_date__ge: Optional[str] = Query(None, description="公告日期不早于指定值，格式YYYYMMDD"),
+    ann_date__le: Optional[str] = Query(None, description="公告日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['-end_date', 'ts_code']"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,roe,grossprofit_margin"),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询财务指标数据
+
+        财务指标每行有上百个数值字段，只需少量指标时（如图表）应通过fields指定字段，
+        数据库只读取、接口只序列化这些列，例如 fields=ts_code,end_date,roe,grossprofit_margin
+    """
+    filters = financial_statement_filters(
+        ts_code, ts_code__in, end_date, end_date__ge, end_date__le, ann_date__ge, ann_date__le
+    )
+    return await query_with_response(
+        query_fina_indicator_data, db, filters, order_by, limit, offset, cursor, fields, result_format, "未找到财务指标数据"
+    )
+
+
+@api_exception_handler
+@stock_basic_router.get(hitting_limit_up_router_prefix + "/get_kpl_list_data", response_model=ResponseModel)
+async def get_kpl_list_data(
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    trade_date: Optional[str] = Query(None, description="交易日期，格式YYYYMMDD"),
+    trade_date__ge: Optional[str] = Query(None, description="交易日期不早于指定值，格式YYYYMMDD"),
+    trade_date__le: Optional[str] = Query(None, description="交易日期不晚于指定值，格式YYYYMMDD"),
+    tag: Optional[str] = Query(None, description="板单类型，如涨停、炸板、跌停"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['-trade_date', '-pct_chg']"),
+    limit: int = Query(100, ge=1, le=5000, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=ts_code,trade_date,pct_chg"),
+    raw: bool = Query(True, description=RAW_DESCRIPTION),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询开盘啦涨停板列表数据
+
+        单个交易日的榜单可达数千行，默认raw=true直接序列化数据库记录；
+        图表类调用可再指定 result_format=columns 返回按列组织的数据
+    """
+    filters = {
+        'ts_code': ts_code,
+        'ts_code__in': split_list_param(ts_code__in),
+        'trade_date': trade_date,
+        'trade_date__ge': trade_date__ge,
+        'trade_date__le': trade_date__le,
+        'tag': tag,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    return await query_with_response(
+        query_kpl_list_data, db, filters, order_by, limit, offset, cursor, fields,
+        read_result_format(raw, result_format), "未找到涨停板列表数据"
+    )
+
+
+@api_exception_handler
+@stock_basic_router.get(hk_stock_router_prefix + "/get_hk_mins_data", response_model=ResponseModel)
+async def get_hk_mins_data(
+    ts_code: str = Query(..., description="股票代码，如00700.HK"),
+    freq: str = Query("1min", description="分钟频度（1min/5min/15min/30min/60min）"),
+    trade_time__ge: Optional[str] = Query(None, description="交易时间不早于指定值，格式YYYY-MM-DD HH:MM:SS"),
+    trade_time__le: Optional[str] = Query(None, description="交易时间不晚于指定值，格式YYYY-MM-DD HH:MM:SS"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，默认按交易时间升序"),
+    limit: int = Query(1000, ge=1, le=5000, description="返回记录数限制"),
+    offset: int = Query(0, ge=0, description="分页偏移量"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的next_cursor，传入时忽略offset"),
+    fields: Optional[List[str]] = Query(None, description="只返回的字段，可重复传入或以逗号分隔，如fields=trade_time,close,vol"),
+    raw: bool = Query(True, description=RAW_DESCRIPTION),
+    result_format: str = Query("records", pattern=RESULT_FORMAT_PATTERN, description=RESULT_FORMAT_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        查询香港股票分钟行情数据
+
+        分钟行情按页返回上千行，默认raw=true直接序列化数据库记录；
+        绘制K线时可指定 result_format=columns 返回按列组织的数据
+    """
+    filters = {
+        'ts_code': ts_code,
+        'freq': freq,
+        'trade_time__ge': trade_time__ge,
+        'trade_time__le': trade_time__le,
+    }
+    filters = {key: value for key, value in filters.items() if value}
+    return await query_with_response(
+        query_hk_mins_data, db, filters, order_by or ['trade_time'], limit, offset, cursor, fields,
+        read_result_format(raw, result_format), "未找到分钟行情数据"
+    )
@@ -0,0 +1,227 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.db.db import get_db
+from app.db.repository import ColumnarPage, ModelMetadata
+from app.response.error_code import ErrorCode
+from app.response.response_model import ResponseModel
+from app.utils.stream_encoders import EXPORT_FORMATS, StreamEncoders
+from app.api.endpoints.db_api import split_list_param, financial_statement_filters
+from app.db.crud.hk_stock_crud.hk_daily_crud import HkDailyCRUD
+from app.db.crud.hk_stock_crud.hk_mins_crud import HkMinsCRUD
+from app.db.crud.stock_crud.fund_flows.moneyflow_crud import MoneyflowCRUD
+from app.db.crud.stock_crud.stock_financial.income_crud import IncomeCRUD
+from app.db.crud.stock_crud.stock_financial.balancesheet_crud import BalancesheetCRUD
+from app.db.crud.stock_crud.stock_financial.cashflow_crud import CashflowCRUD
+from app.db.crud.stock_crud.stock_financial.fina_indicator_crud import FinaIndicatorCRUD
+from app.data.db_modules.hk_stock_modules.hk_daily import HkDailyData
+from app.data.db_modules.hk_stock_modules.hk_mins import HkMinsData
+from app.data.db_modules.stock_modules.fund_flows.moneyflow import MoneyflowData
+from app.data.db_modules.stock_modules.stock_financial.income import IncomeData
+from app.data.db_modules.stock_modules.stock_financial.balancesheet import BalancesheetData
+from app.data.db_modules.stock_modules.stock_financial.cashflow import CashflowData
+from app.data.db_modules.stock_modules.stock_financial.fina_indicator import FinaIndicatorData
+
+
+export_router = APIRouter(prefix="/export", tags=["数据导出"])
+
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv|arrow)$"
+EXPORT_FORMAT_DESCRIPTION = "导出格式：ndjson每行一个JSON对象，csv带表头，arrow为Arrow IPC流（需安装pyarrow）"
+CHUNK_SIZE_DESCRIPTION = "服务端游标每次读取并编码的行数，越大吞吐越高、占用内存越多"
+
+# 财务报表导出：表名 -> (CRUD类, 流式读取方法名, 模型)
+FINANCIAL_EXPORT_TABLES = {
+    'income': (IncomeCRUD, 'stream_income', IncomeData),
+    'balancesheet': (BalancesheetCRUD, 'stream_balancesheet', BalancesheetData),
+    'cashflow': (CashflowCRUD, 'stream_cashflow', CashflowData),
+    'fina_indicator': (FinaIndicatorCRUD, 'stream_fina_indicator', FinaIndicatorData),
+}
+
+
+def _drop_empty(filters: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in filters.items() if value}
+
+
+async def stream_export(pages: AsyncIterator[ColumnarPage],
+                        export_format: str,
+                        model: Type[BaseModel],
+                        filename: str,
+                        fields: Optional[List[str]] = None):
+    """
+    将CRUD层的流式读取结果编码为分块传输的导出响应
+
+    先在返回响应前读取第一块，参数错误（无效字段、无效日期等）和数据库错误
+    仍以统一的错误响应返回；开始传输后内存中只保留当前块。
+    客户端断开或传输结束时关闭读取生成器，及时归还数据库连接。
+
+    参数:
+        pages: CRUD层stream_*方法返回的异步生成器（result_format='columns'）
+        export_format: 导出格式，见EXPORT_FORMATS
+        model: 表对应的Pydantic模型，用于确定Arrow列类型
+        filename: 下载文件名（不含扩展名）
+        fields: 请求的字段，结果为空时作为CSV表头
+    """
+    if export_format == 'arrow' and not StreamEncoders.arrow_available():
+        await pages.aclose()
+        return ResponseModel.error(ErrorCode.BAD_REQUEST, "服务端未安装pyarrow，无法导出arrow格式")
+
+    try:
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        # 无效的过滤字段、排序字段或投影字段
+        await pages.aclose()
+        return ResponseModel.error(ErrorCode.INVALID_PARAMETER, str(e))
+    except Exception as e:
+        import traceback
+        print(f"导出异常: {traceback.format_exc()}")
+        await pages.aclose()
+        return ResponseModel.error(ErrorCode.DATABASE_ERROR, f"导出失败: {str(e)}")
+
+    async def chunks():
+        try:
+            if first is None:
+                return
+            yield first.columns
+            async for page in pages:
+                yield page.columns
+        except Exception as e:
+            # 响应头已发送，只能中断传输
+            print(f"{filename} 导出中断: {str(e)}")
+            raise
+        finally:
+            await pages.aclose()
+
+    header = fields or [field for field in ModelMetadata.for_model(model).fields if field != 'id']
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        StreamEncoders.encode(chunks(), export_format, model, header),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{extension}"'}
+    )
+
+
+@export_router.get("/hk_daily", response_model=None)
+async def export_hk_daily(
+    ts_code: Optional[str] = Query(None, description="股票代码，如00700.HK"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    trade_date__ge: Optional[str] = Query(None, description="交易日期不早于指定值，格式YYYYMMDD"),
+    trade_date__le: Optional[str] = Query(None, description="交易日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，默认['ts_code', '-trade_date']"),
+    fields: Optional[List[str]] = Query(None, description="只导出的字段，可重复传入或以逗号分隔，为空时导出全部字段"),
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    chunk_size: int = Query(5000, ge=100, le=50000, description=CHUNK_SIZE_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        导出香港股票日线数据
+
+        不分页，通过服务端游标一次请求导出全部匹配的数据
+    """
+    filters = _drop_empty({
+        'ts_code': ts_code,
+        'ts_code__in': split_list_param(ts_code__in),
+        'trade_date__ge': trade_date__ge,
+        'trade_date__le': trade_date__le,
+    })
+    fields = split_list_param(fields)
+    pages = HkDailyCRUD(db).stream_hk_daily(
+        filters=filters, order_by=order_by, fields=fields, chunk_size=chunk_size, result_format='columns'
+    )
+    return await stream_export(pages, format, HkDailyData, "hk_daily", fields)
+
+
+@export_router.get("/hk_mins", response_model=None)
+async def export_hk_mins(
+    ts_code: Optional[str] = Query(None, description="股票代码，如00700.HK"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    freq: Optional[str] = Query(None, description="分钟频度，如1min、5min、15min、30min、60min"),
+    trade_time__ge: Optional[str] = Query(None, description="交易时间不早于指定值，如2024-01-02 09:30:00"),
+    trade_time__le: Optional[str] = Query(None, description="交易时间不晚于指定值，如2024-12-31 16:00:00"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，默认['ts_code', 'freq', 'trade_time']"),
+    fields: Optional[List[str]] = Query(None, description="只导出的字段，可重复传入或以逗号分隔，为空时导出全部字段"),
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    chunk_size: int = Query(5000, ge=100, le=50000, description=CHUNK_SIZE_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        导出香港股票分钟行情数据
+
+        一年的1分钟线可在一次请求中导出，例如
+        /export/hk_mins?ts_code=00700.HK&freq=1min&trade_time__ge=2024-01-01&format=arrow
+    """
+    filters = _drop_empty({
+        'ts_code': ts_code,
+        'ts_code__in': split_list_param(ts_code__in),
+        'freq': freq,
+        'trade_time__ge': trade_time__ge,
+        'trade_time__le': trade_time__le,
+    })
+    fields = split_list_param(fields)
+    pages = HkMinsCRUD(db).stream_hk_mins(
+        filters=filters, order_by=order_by, fields=fields, chunk_size=chunk_size, result_format='columns'
+    )
+    return await stream_export(pages, format, HkMinsData, "hk_mins", fields)
+
+
+@export_router.get("/moneyflow", response_model=None)
+async def export_moneyflow(
+    ts_code: Optional[str] = Query(None, description="股票代码，如600000.SH"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    trade_date__ge: Optional[str] = Query(None, description="交易日期不早于指定值，格式YYYYMMDD"),
+    trade_date__le: Optional[str] = Query(None, description="交易日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，默认['ts_code', 'trade_date']"),
+    fields: Optional[List[str]] = Query(None, description="只导出的字段，可重复传入或以逗号分隔，为空时导出全部字段"),
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    chunk_size: int = Query(5000, ge=100, le=50000, description=CHUNK_SIZE_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        导出个股资金流向数据
+    """
+    filters = _drop_empty({
+        'ts_code': ts_code,
+        'ts_code__in': split_list_param(ts_code__in),
+        'trade_date__ge': trade_date__ge,
+        'trade_date__le': trade_date__le,
+    })
+    fields = split_list_param(fields)
+    pages = MoneyflowCRUD(db).stream_moneyflow(
+        filters=filters, order_by=order_by, fields=fields, chunk_size=chunk_size, result_format='columns'
+    )
+    return await stream_export(pages, format, MoneyflowData, "moneyflow", fields)
+
+
+@export_router.get("/stock_financial/{table}", response_model=None)
+async def export_financial_statement(
+    table: str = Path(..., pattern="^(income|balancesheet|cashflow|fina_indicator)$",
+                      description="财务报表：income利润表，balancesheet资产负债表，cashflow现金流量表，fina_indicator财务指标"),
+    ts_code: Optional[str] = Query(None, description="股票代码"),
+    ts_code__in: Optional[List[str]] = Query(None, description="股票代码列表，可重复传入或以逗号分隔"),
+    end_date: Optional[str] = Query(None, description="报告期，格式YYYYMMDD"),
+    end_date__ge: Optional[str] = Query(None, description="报告期不早于指定值，格式YYYYMMDD"),
+    end_date__le: Optional[str] = Query(None, description="报告期不晚于指定值，格式YYYYMMDD"),
+    ann_date__ge: Optional[str] = Query(None, description="公告日期不早于指定值，格式YYYYMMDD"),
+    ann_date__le: Optional[str] = Query(None, description="公告日期不晚于指定值，格式YYYYMMDD"),
+    order_by: Optional[List[str]] = Query(None, description="排序字段，前缀'-'表示降序，如['ts_code', 'end_date']"),
+    fields: Optional[List[str]] = Query(None, description="只导出的字段，可重复传入或以逗号分隔，如fields=ts_code,end_date,revenue"),
+    format: str = Query("ndjson", pattern=EXPORT_FORMAT_PATTERN, description=EXPORT_FORMAT_DESCRIPTION),
+    chunk_size: int = Query(5000, ge=100, le=50000, description=CHUNK_SIZE_DESCRIPTION),
+    db = Depends(get_db)
+):
+    """
+        导出财务报表数据（利润表、资产负债表、现金流量表、财务指标）
+
+        财务报表字段很多，建议通过fields只导出需要的指标
+    """
+    crud_class, stream_method, model = FINANCIAL_EXPORT_TABLES[table]
+    filters = financial_statement_filters(
+        ts_code, ts_code__in, end_date, end_date__ge, end_date__le, ann_date__ge, ann_date__le
+    )
+    fields = split_list_param(fields)
+    pages = getattr(crud_class(db), stream_method)(
+        filters=filters, order_by=order_by, fields=fields, chunk_size=chunk_size, result_format='columns'
+    )
+    return await stream_export(pages, format, model, table, fields)
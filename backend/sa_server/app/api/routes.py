@@ -1,6 +1,6 @@
 # app/api/routes.py
 from fastapi import APIRouter
-from app.api.endpoints import stock, market, db_api
+from app.api.endpoints import stock, market, db_api, export_api
 
 api_router = APIRouter()
 
@@ -21,4 +21,10 @@ api_router.include_router(
     db_api.stock_basic_router,
     prefix="/db_api",
     tags=["db_api"],
+)
+
+api_router.include_router(
+    export_api.export_router,
+    prefix="/db_api",
+    tags=["db_api"],
 )
\ No newline at end of file
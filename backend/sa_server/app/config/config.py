@@ -1,3 +1,4 @@
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,12 +7,60 @@ class Settings(BaseSettings):
     APP_NAME: str = "Stock Analysis Platform"
     # 数据库配置
     DATABASE_URL: str
+    # 连接池配置
+    DB_POOL_MIN_SIZE: int = 5
+    DB_POOL_MAX_SIZE: int = 20
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_MAX_INACTIVE_LIFETIME: float = 300.0
+    # 导入时同时写入的批次数（每个批次占用一个连接）
+    DB_IMPORT_CONCURRENCY: int = 4
+    # 按月分区表提前创建的分区月数
+    DB_PARTITION_MONTHS_AHEAD: int = 3
+    # 按月分区表的保留月数，例如 {"realtime_tick": 3, "hk_mins": 24}，未配置的表不自动分离
+    DB_PARTITION_RETENTION_MONTHS: Dict[str, int] = {}
+    # 每日导入流水线：同时执行的节点数、节点失败后的重试次数及首次重试前的等待秒数（之后每次翻倍）
+    PIPELINE_CONCURRENCY: int = 4
+    PIPELINE_MAX_RETRIES: int = 2
+    PIPELINE_RETRY_DELAY: float = 30.0
     
     # 应用配置
     DEBUG: bool = False
 
     # tushare token
     tushare_token: str
+    # Tushare调用线程池大小（同时在途的请求数）
+    TUSHARE_MAX_WORKERS: int = 4
+    # 每次Tushare请求在线程中实际执行的超时秒数，不含限频等待和重试退避，每次重试单独计时，0表示不限
+    TUSHARE_TIMEOUT: float = 300.0
+    # 每个接口默认每分钟调用次数，按积分档位配置
+    TUSHARE_CALLS_PER_MINUTE: int = 200
+    # 单独设置的接口限频，例如 {"daily": 500, "stk_mins": 10}
+    TUSHARE_RATE_LIMITS: Dict[str, int] = {}
+    # 令牌桶容量（允许的突发调用数）
+    TUSHARE_BURST: int = 1
+    # 频次超限和网络错误的重试次数及退避时间（秒）
+    TUSHARE_MAX_RETRIES: int = 5
+    TUSHARE_BACKOFF_BASE: float = 2.0
+    TUSHARE_BACKOFF_MAX: float = 60.0
+    # Tushare/yfinance响应缓存：off 不缓存；on 有效期内读缓存；replay 只读缓存不访问网络；refresh 总是请求并更新缓存
+    RESPONSE_CACHE_MODE: str = "off"
+    # 缓存目录，默认 app/storage/response_cache
+    RESPONSE_CACHE_DIR: str = ""
+    # 按接口类别（calendar/financial/reference/quote）覆盖缓存有效期（秒），例如 {"quote": 600}
+    RESPONSE_CACHE_TTLS: Dict[str, int] = {}
+    # 本地Tushare替身：设置为录制目录时get_tushare_client返回读取录制数据的FakeProApi，不访问网络
+    TUSHARE_FAKE_DIR: str = ""
+    # 录制目录：设置时真实接口的响应同时保存为替身可读取的录制数据
+    TUSHARE_RECORD_DIR: str = ""
+    # 替身每次调用的模拟延迟及随机抖动（秒）
+    TUSHARE_FAKE_LATENCY: float = 0.0
+    TUSHARE_FAKE_JITTER: float = 0.0
+    # 替身每个接口每分钟允许的调用次数，超过时返回频次超限错误，0表示不限
+    TUSHARE_FAKE_QUOTA_PER_MINUTE: int = 0
+    # 替身返回网络错误的概率
+    TUSHARE_FAKE_ERROR_RATE: float = 0.0
+    # 替身单次返回的行数上限，默认取tushare_chunking中各接口的限量，例如 {"hk_daily": 1000}
+    TUSHARE_FAKE_ROW_LIMITS: Dict[str, int] = {}
     
     # SQL日志配置
     ENABLE_SQL_LOG: bool = False
@@ -0,0 +1,487 @@
+import asyncio
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+import pandas as pd
+from pydantic import BaseModel
+from app.config.config import settings
+from app.db.partitions import PARTITIONED_TABLES, ensure_partitions_for_values
+from app.utils.frame_validators import FrameValidators
+
+
+# 表名 -> {列名: 列类型}，每张表只查询一次pg_catalog
+_column_type_cache: Dict[str, Dict[str, str]] = {}
+
+
+class BulkUpsertError(Exception):
+    """分批写入时有批次失败，result为已成功写入批次的统计"""
+
+    def __init__(self, table_name: str, failed_batches: int, batch_count: int, result: 'UpsertResult'):
+        super().__init__(f"{table_name}: {failed_batches}/{batch_count} 个批次写入失败")
+        self.table_name = table_name
+        self.failed_batches = failed_batches
+        self.batch_count = batch_count
+        self.result = result
+
+
+@dataclass
+class UpsertResult:
+    """批量upsert的结果统计"""
+    inserted: int = 0
+    updated: int = 0
+    # 校验未通过而未写入的记录数
+    rejected: int = 0
+    # 与库中已有数据完全相同而跳过的记录数
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        """实际写入（新增或更新）的记录数"""
+        return self.inserted + self.updated
+
+    @property
+    def processed(self) -> int:
+        """参与合并的记录数，包括未变化的记录"""
+        return self.inserted + self.updated + self.unchanged
+
+    def __add__(self, other: 'UpsertResult') -> 'UpsertResult':
+        return UpsertResult(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.rejected + other.rejected,
+            self.unchanged + other.unchanged
+        )
+
+
+async def get_table_column_types(conn, table_name: str) -> Dict[str, str]:
+    """
+    获取表中所有列的数据类型，结果按表名缓存
+
+    参数:
+        conn: 数据库连接
+        table_name: 表名（可带schema前缀）
+
+    返回:
+        字典，键为列名，值为数据类型（如 'numeric(20,4)'）
+    """
+    column_types = _column_type_cache.get(table_name)
+    if column_types is not None:
+        return column_types
+
+    rows = await conn.fetch("""
+        SELECT a.attname, pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type
+        FROM pg_catalog.pg_attribute a
+        WHERE a.attrelid = $1::regclass
+        AND a.attnum > 0
+        AND NOT a.attisdropped
+        ORDER BY a.attnum
+    """, table_name)
+
+    column_types = {row['attname']: row['data_type'] for row in rows}
+    _column_type_cache[table_name] = column_types
+    return column_types
+
+
+def clear_column_type_cache(table_name: Optional[str] = None):
+    """
+    清除列类型缓存，表结构变更（如迁移）后调用
+
+    参数:
+        table_name: 表名，为None时清除全部
+    """
+    if table_name is None:
+        _column_type_cache.clear()
+    else:
+        _column_type_cache.pop(table_name, None)
+
+
+@lru_cache(maxsize=256)
+def _build_merge_sql(table_name: str,
+                     temp_table: str,
+                     columns: Tuple[str, ...],
+                     conflict_keys: Tuple[str, ...],
+                     update_columns: Tuple[str, ...],
+                     compare_exprs: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """
+    生成从临时表合并到目标表的SQL，同一表结构只生成一次
+
+    通过RETURNING (xmax = 0)区分新插入与更新的行。
+    compare_exprs非空时只更新内容有变化的行：
+    DO UPDATE ... WHERE (target.列, ...) IS DISTINCT FROM (EXCLUDED.列, ...)，
+    内容相同的行不产生新的元组版本，也不写WAL和索引，不出现在RETURNING中。
+
+    参数:
+        compare_exprs: 比较内容时使用的(目标表表达式, 新数据表达式)
+    """
+    column_list = ', '.join(columns)
+    if update_columns:
+        update_clause = ', '.join(f"{col} = EXCLUDED.{col}" for col in update_columns)
+        conflict_action = f"DO UPDATE SET {update_clause}"
+        if compare_exprs:
+            current = ', '.join(target for target, _ in compare_exprs)
+            incoming = ', '.join(excluded for _, excluded in compare_exprs)
+            # 单列时ROW()保证两侧都是行值
+            conflict_action += f" WHERE ROW({current}) IS DISTINCT FROM ROW({incoming})"
+    else:
+        conflict_action = "DO NOTHING"
+
+    return f"""
+        WITH upserted AS (
+            INSERT INTO {table_name} AS target ({column_list})
+            SELECT {column_list} FROM {temp_table}
+            ON CONFLICT ({', '.join(conflict_keys)}) {conflict_action}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            COUNT(*) FILTER (WHERE inserted) AS inserted,
+            COUNT(*) FILTER (WHERE NOT inserted) AS updated
+        FROM upserted
+    """
+
+
+def _compare_exprs(update_columns: Sequence[str], column_types: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    """
+    内容比较表达式，json类型没有相等运算符，转为jsonb后比较
+    """
+    exprs = []
+    for col in update_columns:
+        if column_types.get(col) == 'json':
+            exprs.append((f"target.{col}::jsonb", f"EXCLUDED.{col}::jsonb"))
+        else:
+            exprs.append((f"target.{col}", f"EXCLUDED.{col}"))
+    return tuple(exprs)
+
+
+def dedupe_records(records: Iterable[Sequence[Any]],
+                   columns: Sequence[str],
+                   conflict_keys: Sequence[str]) -> List[Sequence[Any]]:
+    """
+    按冲突键去重，重复键保留最后一条记录
+
+    同一批次中出现重复键会导致ON CONFLICT DO UPDATE报错，因此需要先去重
+    """
+    try:
+        key_indexes = [columns.index(key) for key in conflict_keys]
+    except ValueError:
+        raise ValueError(f"冲突键 {list(conflict_keys)} 必须包含在写入列 {list(columns)} 中")
+
+    unique_records = {}
+    for record in records:
+        unique_records[tuple(record[i] for i in key_indexes)] = record
+    return list(unique_records.values())
+
+
+async def merge_temp_table(conn,
+                           table_name: str,
+                           temp_table: str,
+                           columns: Sequence[str],
+                           conflict_keys: Sequence[str],
+                           update_columns: Optional[Sequence[str]] = None,
+                           skip_unchanged: bool = True,
+                           record_count: Optional[int] = None) -> UpsertResult:
+    """
+    将临时表中的数据合并到目标表，供自行创建临时表的导入流程使用，须在创建临时表的事务中调用
+
+    参数:
+        conn: 数据库连接
+        table_name: 目标表名
+        temp_table: 临时表名
+        columns: 合并的列名
+        conflict_keys: 冲突键（目标表上的唯一约束列）
+        update_columns: 冲突时更新的列，默认为除冲突键外的全部列；传入空列表表示冲突时忽略
+        skip_unchanged: 是否跳过与库中内容完全相同的记录
+        record_count: 临时表中的记录数，为None时查询临时表
+
+    返回:
+        UpsertResult: 新增、更新和未变化的记录数
+    """
+    columns = list(columns)
+    if update_columns is None:
+        update_columns = [col for col in columns if col not in conflict_keys]
+
+    column_types = await get_table_column_types(conn, table_name)
+    compare_exprs = _compare_exprs(update_columns, column_types) if skip_unchanged else ()
+    merge_sql = _build_merge_sql(
+        table_name, temp_table, tuple(columns), tuple(conflict_keys), tuple(update_columns), compare_exprs
+    )
+    row = await conn.fetchrow(merge_sql)
+    if record_count is None:
+        record_count = await conn.fetchval(f"SELECT COUNT(*) FROM {temp_table}")
+
+    # 未出现在RETURNING中的记录与库中已有数据相同（DO NOTHING时为已存在的记录）
+    unchanged = record_count - row['inserted'] - row['updated']
+    return UpsertResult(inserted=row['inserted'], updated=row['updated'], unchanged=unchanged)
+
+
+async def bulk_upsert(db,
+                      table_name: str,
+                      columns: Sequence[str],
+                      records: Iterable[Sequence[Any]],
+                      conflict_keys: Sequence[str],
+                      update_columns: Optional[Sequence[str]] = None,
+                      dedupe: bool = True,
+                      skip_unchanged: bool = True) -> UpsertResult:
+    """
+    使用临时表 + COPY + INSERT ... ON CONFLICT 批量插入或更新数据
+
+    参数:
+        db: 数据库对象（app.db.connection.Database）
+        table_name: 目标表名
+        columns: 写入的列名，顺序与records中每条记录一致
+        records: 记录序列，每条记录为元组或列表
+        conflict_keys: 冲突键（目标表上的唯一约束列）
+        update_columns: 冲突时更新的列，默认为除冲突键外的全部列；传入空列表表示冲突时忽略
+        dedupe: 是否按冲突键去重，调用方已去重时可传False
+        skip_unchanged: 是否跳过与库中内容完全相同的记录；为False时冲突的记录总是重写
+
+    返回:
+        UpsertResult: 新增、更新和未变化的记录数
+    """
+    columns = list(columns)
+    unique_records = dedupe_records(records, columns, conflict_keys) if dedupe else list(records)
+    if not unique_records:
+        return UpsertResult()
+
+    if update_columns is None:
+        update_columns = [col for col in columns if col not in conflict_keys]
+
+    # 按月分区的表先补建数据所在月份缺失的分区
+    partition_spec = PARTITIONED_TABLES.get(table_name)
+    if partition_spec is not None and partition_spec.column in columns:
+        column_idx = columns.index(partition_spec.column)
+        await ensure_partitions_for_values(db, table_name, (record[column_idx] for record in unique_records))
+
+    temp_table = f"temp_{table_name.replace('.', '_')}"
+
+    async with db.transaction() as conn:
+        column_types = await get_table_column_types(conn, table_name)
+        column_defs = ', '.join(f"{col} {column_types.get(col, 'TEXT')}" for col in columns)
+
+        # 临时表只包含待写入的列，不带id列和任何约束
+        await conn.execute(f"CREATE TEMP TABLE {temp_table} ({column_defs}) ON COMMIT DROP")
+        await conn.copy_records_to_table(temp_table, records=unique_records, columns=columns)
+
+        return await merge_temp_table(
+            conn, table_name, temp_table, columns, conflict_keys, update_columns,
+            skip_unchanged=skip_unchanged, record_count=len(unique_records)
+        )
+
+
+async def bulk_upsert_models(db,
+                             table_name: str,
+                             models: Sequence[BaseModel],
+                             conflict_keys: Sequence[str],
+                             update_columns: Optional[Sequence[str]] = None,
+                             exclude: Optional[Set[str]] = None) -> UpsertResult:
+    """
+    将Pydantic模型列表批量写入数据库，参见bulk_upsert
+
+    参数:
+        db: 数据库对象
+        table_name: 目标表名
+        models: Pydantic模型列表
+        conflict_keys: 冲突键
+        update_columns: 冲突时更新的列，默认为除冲突键外的全部列
+        exclude: 不写入的字段，默认排除由数据库生成的id字段
+
+    返回:
+        UpsertResult: 新增、更新和未变化的记录数
+    """
+    if not models:
+        return UpsertResult()
+
+    if exclude is None:
+        exclude = {'id'}
+
+    columns = [name for name in type(models[0]).model_fields if name not in exclude]
+    include = set(columns)
+    records = []
+    for model in models:
+        data = model.model_dump(include=include)
+        records.append(tuple(data[col] for col in columns))
+
+    return await bulk_upsert(db, table_name, columns, records, conflict_keys, update_columns)
+
+
+def _report_rejects(table_name: str, model: Type[BaseModel], rejects: pd.DataFrame, sample_size: int):
+    """
+    打印被拒绝记录的数量，并仅对少量样本运行Pydantic校验以给出具体原因
+    """
+    print(f"{table_name}: 跳过了 {len(rejects)} 条无效记录")
+    sample = rejects.head(sample_size)
+    sample = sample.astype(object).where(sample.notna(), None)
+    for record in sample.to_dict('records'):
+        try:
+            model(**record)
+            reason = "必填字段为空"
+        except Exception as e:
+            reason = str(e)
+        print(f"  无效记录 {record}: {reason}")
+
+
+def _prepare_frame(table_name: str,
+                   df: pd.DataFrame,
+                   model: Type[BaseModel],
+                   conflict_keys: Sequence[str],
+                   exclude: Set[str],
+                   required_fields: Optional[Sequence[str]],
+                   reject_sample_size: int) -> Tuple[pd.DataFrame, List[str], int]:
+    """
+    整列校验DataFrame并按冲突键去重（重复键保留最后一条）
+
+    返回:
+        Tuple[pd.DataFrame, List[str], int]: (有效数据, 写入列, 被拒绝的记录数)
+    """
+    valid, rejects = FrameValidators.validate(df, model, required_fields)
+    if not rejects.empty:
+        _report_rejects(table_name, model, rejects, reject_sample_size)
+
+    columns = [col for col in valid.columns if col not in exclude]
+    valid = valid.drop_duplicates(subset=list(conflict_keys), keep='last')
+    return valid, columns, len(rejects)
+
+
+async def bulk_upsert_frame(db,
+                            table_name: str,
+                            df: pd.DataFrame,
+                            model: Type[BaseModel],
+                            conflict_keys: Sequence[str],
+                            update_columns: Optional[Sequence[str]] = None,
+                            exclude: Optional[Set[str]] = None,
+                            required_fields: Optional[Sequence[str]] = None,
+                            reject_sample_size: int = 5) -> UpsertResult:
+    """
+    将DataFrame整列校验和转换后直接通过COPY写入，跳过逐行构造Pydantic模型
+
+    日期解析、数值NaN转NULL、必填键校验均为列操作（见FrameValidators.validate），
+    COPY记录直接由列数组拼接而成。Pydantic模型只用于打印被拒绝记录的样本原因。
+
+    参数:
+        db: 数据库对象
+        table_name: 目标表名
+        df: 原始数据，例如Tushare接口返回的DataFrame
+        model: 对应的Pydantic模型类，用于确定字段类型和必填字段
+        conflict_keys: 冲突键
+        update_columns: 冲突时更新的列，默认为除冲突键外的全部列
+        exclude: 不写入的字段，默认排除由数据库生成的id字段
+        required_fields: 必填字段，默认取模型的必填字段
+        reject_sample_size: 打印原因的被拒绝记录样本数
+
+    返回:
+        UpsertResult: 新增、更新、未变化和被拒绝的记录数
+    """
+    if df is None or df.empty:
+        return UpsertResult()
+
+    if exclude is None:
+        exclude = {'id'}
+
+    valid, columns, rejected = _prepare_frame(
+        table_name, df, model, conflict_keys, exclude, required_fields, reject_sample_size
+    )
+    records = FrameValidators.to_records(valid, model, columns)
+
+    result = await bulk_upsert(db, table_name, columns, records, conflict_keys, update_columns, dedupe=False)
+    result.rejected = rejected
+    return result
+
+
+async def pipelined_upsert_frame(db,
+                                 table_name: str,
+                                 df: pd.DataFrame,
+                                 model: Type[BaseModel],
+                                 conflict_keys: Sequence[str],
+                                 batch_size: int = 1000,
+                                 concurrency: Optional[int] = None,
+                                 update_columns: Optional[Sequence[str]] = None,
+                                 exclude: Optional[Set[str]] = None,
+                                 required_fields: Optional[Sequence[str]] = None,
+                                 reject_sample_size: int = 5,
+                                 raise_errors: bool = False) -> UpsertResult:
+    """
+    流水线方式分批写入DataFrame：一个生产者准备批次，最多concurrency个批次同时在各自的连接上写入
+
+    整表先按冲突键全局去重并排序，每个键只会出现在一个批次中，
+    因此并发批次之间不会争用同一行，不存在同一键被先后覆盖的顺序问题；
+    按键排序后各批次覆盖不相交的键区间，也减少了索引页上的锁竞争。
+    批次的记录转换在线程中执行，与其他批次的COPY和合并重叠进行。
+    单个批次失败只打印错误，不影响其余批次；raise_errors为True时全部批次结束后抛出BulkUpsertError。
+
+    参数:
+        db: 数据库对象
+        table_name: 目标表名
+        df: 原始数据
+        model: 对应的Pydantic模型类
+        conflict_keys: 冲突键
+        batch_size: 每批记录数
+        concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY，不超过连接池大小
+        update_columns: 冲突时更新的列，默认为除冲突键外的全部列
+        exclude: 不写入的字段，默认排除由数据库生成的id字段
+        required_fields: 必填字段，默认取模型的必填字段
+        reject_sample_size: 打印原因的被拒绝记录样本数
+        raise_errors: 有批次写入失败时是否抛出BulkUpsertError，默认只打印错误并返回成功批次的统计
+
+    返回:
+        UpsertResult: 新增、更新、未变化和被拒绝的记录数
+    """
+    if df is None or df.empty:
+        return UpsertResult()
+
+    if exclude is None:
+        exclude = {'id'}
+    if concurrency is None:
+        concurrency = settings.DB_IMPORT_CONCURRENCY
+    pool_size = getattr(db, 'max_size', None)
+    if pool_size:
+        concurrency = min(concurrency, pool_size)
+    concurrency = max(1, concurrency)
+
+    valid, columns, rejected = _prepare_frame(
+        table_name, df, model, conflict_keys, exclude, required_fields, reject_sample_size
+    )
+    valid = valid.sort_values(list(conflict_keys), kind='stable')
+
+    batch_count = (len(valid) + batch_size - 1) // batch_size
+    # 队列长度与并发数一致，生产者最多领先写入方一轮，控制内存占用
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    result = UpsertResult(rejected=rejected)
+    failed_batches = 0
+
+    async def produce():
+        try:
+            for batch_idx, start in enumerate(range(0, len(valid), batch_size)):
+                batch_df = valid.iloc[start:start + batch_size]
+                records = await asyncio.to_thread(FrameValidators.to_records, batch_df, model, columns)
+                await queue.put((batch_idx, records))
+        finally:
+            # 每个写入方一个结束标记
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def consume():
+        nonlocal result, failed_batches
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch_idx, records = item
+            try:
+                batch_result = await bulk_upsert(
+                    db, table_name, columns, records, conflict_keys, update_columns, dedupe=False
+                )
+                result = result + batch_result
+                print(f"{table_name} 批次 {batch_idx + 1}/{batch_count} 写入完成: "
+                      f"新增 {batch_result.inserted} 条, 更新 {batch_result.updated} 条, "
+                      f"未变化 {batch_result.unchanged} 条")
+            except Exception as e:
+                failed_batches += 1
+                print(f"{table_name} 批次 {batch_idx + 1}/{batch_count} 写入失败: {str(e)}")
+
+    await asyncio.gather(produce(), *(consume() for _ in range(concurrency)))
+
+    if failed_batches:
+        error = BulkUpsertError(table_name, failed_batches, batch_count, result)
+        print(str(error))
+        if raise_errors:
+            raise error
+    return result
@@ -1,22 +1,58 @@
 import asyncpg
+from contextlib import asynccontextmanager
+
 
 class Database:
 
-  def __init__(self, dsn: str):
+  def __init__(self,
+               dsn: str,
+               min_size: int = 10,
+               max_size: int = 10,
+               statement_cache_size: int = 100,
+               max_inactive_connection_lifetime: float = 300.0):
+    """
+    
+    :param dsn: 数据库连接串
+    :param min_size: 连接池最小连接数
+    :param max_size: 连接池最大连接数
+    :param statement_cache_size: 每个连接的预编译语句缓存大小，asyncpg按SQL文本缓存，同一SQL在每个连接上只prepare一次
+    :param max_inactive_connection_lifetime: 空闲连接的最长存活时间（秒），超时后关闭
+    """
     self.dsn = dsn
+    self.min_size = min_size
+    self.max_size = max_size
+    self.statement_cache_size = statement_cache_size
+    self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
     self.pool = None
 
   async def connect(self):
-    self.pool = await asyncpg.create_pool(self.dsn)
+    self.pool = await asyncpg.create_pool(
+      self.dsn,
+      min_size=self.min_size,
+      max_size=self.max_size,
+      statement_cache_size=self.statement_cache_size,
+      max_inactive_connection_lifetime=self.max_inactive_connection_lifetime
+    )
   
   async def close(self):
     if self.pool:
       await self.pool.close()
+      self.pool = None
   
   async def execute(self, query, *args):
     async with self.pool.acquire() as conn:
       return await conn.execute(query, *args)
   
+  async def executemany(self, query, args):
+    """
+    
+    使用同一条SQL批量执行多组参数
+    :param query: SQL文本
+    :param args: 参数序列，每个元素为一组参数
+    """
+    async with self.pool.acquire() as conn:
+      return await conn.executemany(query, args)
+  
   async def fetch(self, query, *args):
     async with self.pool.acquire() as conn:
       return await conn.fetch(query, *args)
@@ -24,3 +60,60 @@ class Database:
   async def fetchrow(self, query, *args):
     async with self.pool.acquire() as conn:
       return await conn.fetchrow(query, *args)
+  
+  async def fetchval(self, query, *args, column=0):
+    async with self.pool.acquire() as conn:
+      return await conn.fetchval(query, *args, column=column)
+  
+  async def stream(self, query, *args, chunk_size=1000):
+    """
+    
+    通过服务端游标分块读取查询结果，内存中最多只保留一个块
+    服务端游标必须位于事务中，整个读取过程占用一个连接并保持事务打开，
+    提前结束迭代时应关闭生成器（如使用contextlib.aclosing）以尽快归还连接
+    :param query: SQL文本
+    :param args: 查询参数
+    :param chunk_size: 每次从服务端取回的行数
+    
+    用法:
+      async for rows in db.stream("SELECT * FROM hk_mins WHERE ts_code = $1", ts_code, chunk_size=5000):
+        process(rows)
+    """
+    async with self.pool.acquire() as conn:
+      async with conn.transaction(readonly=True):
+        cursor = await conn.cursor(query, *args)
+        while True:
+          rows = await cursor.fetch(chunk_size)
+          if not rows:
+            break
+          yield rows
+  
+  @asynccontextmanager
+  async def transaction(self, **kwargs):
+    """
+    
+    获取一个连接并在其上开启事务，退出时提交，发生异常时回滚
+    :param kwargs: 透传给asyncpg的事务参数，如isolation、readonly
+    
+    用法:
+      async with db.transaction() as conn:
+        await conn.execute(...)
+        await conn.copy_records_to_table(...)
+    """
+    async with self.pool.acquire() as conn:
+      async with conn.transaction(**kwargs):
+        yield conn
+  
+  async def copy_records_to_table(self, table_name, *, records, columns=None, schema_name=None):
+    """
+    
+    使用COPY协议将记录批量写入表
+    :param table_name: 目标表名
+    :param records: 记录序列，每条记录为与columns顺序一致的元组
+    :param columns: 列名列表
+    :param schema_name: 模式名
+    """
+    async with self.pool.acquire() as conn:
+      return await conn.copy_records_to_table(
+        table_name, records=records, columns=columns, schema_name=schema_name
+      )
@@ -1,5 +1,6 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from app.data.db_modules.hk_stock_modules.hk_tradecal import HkTradecalData
+from app.db.repository import ModelRepository
 
 
 class HkTradecalCRUD:
@@ -270,7 +271,10 @@ class HkTradecalCRUD:
                             filters: Optional[Dict[str, Any]] = None, 
                             order_by: Optional[List[str]] = None,
                             limit: Optional[int] = None,
-                            offset: Optional[int] = None) -> List[HkTradecalData]:
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model') -> List[HkTradecalData]:
         """
         动态查询香港交易日历数据，支持任意字段过滤和自定义排序
         
@@ -288,113 +292,35 @@ class HkTradecalCRUD:
             order_by: 排序字段列表，可以在字段前加"-"表示降序，例如['-cal_date']
             limit: 最大返回记录数
             offset: 跳过前面的记录数（用于分页）
+            cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+            fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+            result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
             
         返回:
             List[HkTradecalData]: 符合条件的香港交易日历数据列表
         """
-        # 初始化查询部分
-        query_parts = ["SELECT * FROM hk_tradecal"]
-        params = []
-        param_idx = 1
-        
-        # 处理过滤条件
-        if filters and len(filters) > 0:
-            where_conditions = []
-            
-            for key, value in filters.items():
-                # 解析操作符后缀（如果有）
-                if '__' in key:
-                    field, op = key.split('__', 1)
-                else:
-                    field, op = key, 'eq'
-                
-                # 验证字段是否有效（避免SQL注入）
-                valid_fields = [f.name for f in HkTradecalData.model_fields.values()]
-                if field not in valid_fields and field != 'id':
-                    raise ValueError(f"无效的字段名: {field}")
-                
-                # 根据操作符构建条件
-                if op == 'eq':
-                    condition = f"{field} = ${param_idx}"
-                elif op == 'ne':
-                    condition = f"{field} != ${param_idx}"
-                elif op == 'gt':
-                    condition = f"{field} > ${param_idx}"
-                elif op == 'ge':
-                    condition = f"{field} >= ${param_idx}"
-                elif op == 'lt':
-                    condition = f"{field} < ${param_idx}"
-                elif op == 'le':
-                    condition = f"{field} <= ${param_idx}"
-                elif op == 'in':
-                    # 对于IN操作符，需要特殊处理参数
-                    if not isinstance(value, (list, tuple)):
-                        raise ValueError(f"IN操作符需要列表或元组类型的值: {key}={value}")
-                    placeholders = [f"${param_idx + i}" for i in range(len(value))]
-                    condition = f"{field} IN ({', '.join(placeholders)})"
-                    params.extend(value)
-                    param_idx += len(value)
-                    continue  # 跳过下面的单参数添加
-                else:
-                    raise ValueError(f"不支持的操作符: {op}")
-                
-                # 特殊处理日期字段，确保格式正确
-                if field in ['cal_date', 'pretrade_date'] and value is not None:
-                    # 如果是YYYYMMDD格式，转换为ISO格式
-                    if isinstance(value, str) and value.isdigit() and len(value) == 8:
-                        formatted_value = f"{value[:4]}-{value[4:6]}-{value[6:8]}"
-                        params.append(formatted_value)
-                        condition = f"{field}::date {condition.split(' ', 1)[1]}"
-                    else:
-                        params.append(value)
-                else:
-                    params.append(value)
-                
-                where_conditions.append(condition)
-                param_idx += 1
-            
-            if where_conditions:
-                query_parts.append("WHERE " + " AND ".join(where_conditions))
-        
-        # 处理排序
-        if order_by and len(order_by) > 0:
-            order_clauses = []
-            
-            for field in order_by:
-                # 处理降序排序（字段前加"-"）
-                if field.startswith('-'):
-                    actual_field = field[1:]
-                    direction = "DESC"
-                else:
-                    actual_field = field
-                    direction = "ASC"
-                
-                # 验证字段是否有效
-                valid_fields = [f.name for f in HkTradecalData.model_fields.values()]
-                if actual_field not in valid_fields and actual_field != 'id':
-                    raise ValueError(f"无效的排序字段: {actual_field}")
-                
-                order_clauses.append(f"{actual_field} {direction}")
-            
-            if order_clauses:
-                query_parts.append("ORDER BY " + ", ".join(order_clauses))
-        else:
-            # 默认排序：按日期
-            query_parts.append("ORDER BY cal_date")
-        
-        # 添加LIMIT和OFFSET
-        if limit is not None:
-            query_parts.append(f"LIMIT ${param_idx}")
-            params.append(limit)
-            param_idx += 1
-        
-        if offset is not None:
-            query_parts.append(f"OFFSET ${param_idx}")
-            params.append(offset)
-            param_idx += 1
-        
-        # 构建最终查询并执行
-        query = " ".join(query_parts)
-        rows = await self.db.fetch(query, *params)
-        
-        return [HkTradecalData.model_validate(dict(row)) for row in rows]
\ No newline at end of file
+        repository = ModelRepository(self.db, 'hk_tradecal', HkTradecalData, default_order_by=['cal_date'])
+        return await repository.get(filters, order_by, limit, offset, cursor, fields, result_format)
+
+    async def stream_hk_tradecal(self,
+                                 filters: Optional[Dict[str, Any]] = None,
+                                 order_by: Optional[List[str]] = None,
+                                 fields: Optional[List[str]] = None,
+                                 chunk_size: int = 5000,
+                                 result_format: str = 'records') -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        通过服务端游标分块读取香港交易日历数据，过滤、排序和投影规则与get_hk_tradecal相同
+
+        参数:
+            filters: 过滤条件字典，同get_hk_tradecal
+            order_by: 排序字段列表，同get_hk_tradecal
+            fields: 只查询并返回的字段列表，为空时返回全部字段
+            chunk_size: 每块的记录数
+            result_format: 每块的结果格式，默认'records'为字典列表，'columns'为ColumnarPage
+
+        返回:
+            异步生成器，每次产出一块数据
+        """
+        repository = ModelRepository(self.db, 'hk_tradecal', HkTradecalData, default_order_by=['cal_date'])
+        async for chunk in repository.stream(filters, order_by, fields, chunk_size, result_format):
+            yield chunk
\ No newline at end of file
@@ -1,5 +1,6 @@
-from app.data.db_modules.stock_modules.fund_flows import MoneyflowData
-from typing import List, Optional
+from app.data.db_modules.stock_modules.fund_flows.moneyflow import MoneyflowData
+from app.db.repository import ModelRepository
+from typing import List, Optional, Dict, Any, AsyncIterator
 import datetime
 
 
@@ -261,4 +262,57 @@ class MoneyflowCRUD:
             LIMIT $2
         """
         rows = await self.db.fetch(query, parsed_date, limit)
-        return [MoneyflowData(**row) for row in rows]
\ No newline at end of file
+        return [MoneyflowData(**row) for row in rows]
+
+    def _repository(self) -> ModelRepository:
+        # moneyflow表没有id列，以主键(ts_code, trade_date)作为排序的唯一列
+        return ModelRepository(self.db, 'moneyflow', MoneyflowData,
+                               default_order_by=['ts_code', 'trade_date'],
+                               tie_breaker=['ts_code', 'trade_date'])
+
+    async def get_moneyflow(self,
+                            filters: Optional[Dict[str, Any]] = None,
+                            order_by: Optional[List[str]] = None,
+                            limit: Optional[int] = None,
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model') -> List[MoneyflowData]:
+        """
+        动态查询个股资金流向数据，支持任意字段过滤和自定义排序
+
+        参数:
+            filters: 过滤条件字典，键为 字段名[__运算符]，例如 {'ts_code': '600000.SH', 'net_mf_amount__gt': 1000}
+            order_by: 排序字段列表，可以在字段前加"-"表示降序，例如['-trade_date', 'ts_code']
+            limit: 最大返回记录数
+            offset: 跳过前面的记录数（用于分页）
+            cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+            fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+            result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
+
+        返回:
+            List[MoneyflowData]: 符合条件的个股资金流向数据列表
+        """
+        return await self._repository().get(filters, order_by, limit, offset, cursor, fields, result_format)
+
+    async def stream_moneyflow(self,
+                               filters: Optional[Dict[str, Any]] = None,
+                               order_by: Optional[List[str]] = None,
+                               fields: Optional[List[str]] = None,
+                               chunk_size: int = 5000,
+                               result_format: str = 'records') -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        通过服务端游标分块读取个股资金流向数据，过滤、排序和投影规则与get_moneyflow相同
+
+        参数:
+            filters: 过滤条件字典，同get_moneyflow
+            order_by: 排序字段列表，同get_moneyflow
+            fields: 只查询并返回的字段列表，为空时返回全部字段
+            chunk_size: 每块的记录数
+            result_format: 每块的结果格式，默认'records'为字典列表，'columns'为ColumnarPage
+
+        返回:
+            异步生成器，每次产出一块数据
+        """
+        async for chunk in self._repository().stream(filters, order_by, fields, chunk_size, result_format):
+            yield chunk
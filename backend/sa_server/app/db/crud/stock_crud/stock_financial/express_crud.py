@@ -1,7 +1,6 @@
-from app.config.config import settings
-from typing import List, Optional, Dict, Any
-from app.utils.sql_query_formater import format_sql_query
+from typing import List, Optional, Dict, Any, AsyncIterator
 from app.data.db_modules.stock_modules.stock_financial.express import ExpressData
+from app.db.repository import ModelRepository
 
 
 class ExpressCRUD:
@@ -222,7 +221,10 @@ class ExpressCRUD:
                          filters: Optional[Dict[str, Any]] = None, 
                          order_by: Optional[List[str]] = None,
                          limit: Optional[int] = None,
-                         offset: Optional[int] = None) -> List[ExpressData]:
+                         offset: Optional[int] = None,
+                         cursor: Optional[str] = None,
+                         fields: Optional[List[str]] = None,
+                         result_format: str = 'model') -> List[ExpressData]:
         """
         动态查询业绩快报数据，支持任意字段过滤和自定义排序
         
@@ -242,120 +244,35 @@ class ExpressCRUD:
             order_by: 排序字段列表，可以在字段前加"-"表示降序，例如['-end_date', 'ts_code']
             limit: 最大返回记录数
             offset: 跳过前面的记录数（用于分页）
+            cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+            fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+            result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
             
         返回:
             List[ExpressData]: 符合条件的业绩快报数据列表
         """
-        # 初始化查询部分
-        query_parts = ["SELECT * FROM express"]
-        params = []
-        param_idx = 1
-        
-        # 处理过滤条件
-        if filters and len(filters) > 0:
-            where_conditions = []
-            
-            for key, value in filters.items():
-                # 解析操作符后缀（如果有）
-                if '__' in key:
-                    field, op = key.split('__', 1)
-                else:
-                    field, op = key, 'eq'
-                
-                # 验证字段是否有效（避免SQL注入）
-                valid_fields = list(ExpressData.model_fields.keys())
-                if field not in valid_fields and field != 'id':
-                    raise ValueError(f"无效的字段名: {field}. 可用字段包括: {', '.join(valid_fields)}")
-                
-                # 根据操作符构建条件
-                if op == 'eq':
-                    condition = f"{field} = ${param_idx}"
-                elif op == 'ne':
-                    condition = f"{field} != ${param_idx}"
-                elif op == 'gt':
-                    condition = f"{field} > ${param_idx}"
-                elif op == 'ge':
-                    condition = f"{field} >= ${param_idx}"
-                elif op == 'lt':
-                    condition = f"{field} < ${param_idx}"
-                elif op == 'le':
-                    condition = f"{field} <= ${param_idx}"
-                elif op == 'like':
-                    condition = f"{field} LIKE ${param_idx}"
-                elif op == 'ilike':
-                    condition = f"{field} ILIKE ${param_idx}"
-                elif op == 'in':
-                    # 对于IN操作符，需要特殊处理参数
-                    if not isinstance(value, (list, tuple)):
-                        raise ValueError(f"IN操作符需要列表或元组类型的值: {key}={value}")
-                    placeholders = [f"${param_idx + i}" for i in range(len(value))]
-                    condition = f"{field} IN ({', '.join(placeholders)})"
-                    params.extend(value)
-                    param_idx += len(value)
-                    continue  # 跳过下面的单参数添加
-                else:
-                    raise ValueError(f"不支持的操作符: {op}")
-                
-                # 特殊处理日期字段，确保格式正确
-                if field in ['ann_date', 'end_date'] and value is not None:
-                    # 如果是YYYYMMDD格式，转换为ISO格式
-                    if isinstance(value, str) and value.isdigit() and len(value) == 8:
-                        formatted_value = f"{value[:4]}-{value[4:6]}-{value[6:8]}"
-                        params.append(formatted_value)
-                        condition = f"{field}::date {condition.split(' ', 1)[1]}"
-                    else:
-                        params.append(value)
-                else:
-                    params.append(value)
-                
-                where_conditions.append(condition)
-                param_idx += 1
-            
-            if where_conditions:
-                query_parts.append("WHERE " + " AND ".join(where_conditions))
-        
-        # 处理排序
-        if order_by and len(order_by) > 0:
-            order_clauses = []
-            
-            for field in order_by:
-                # 处理降序排序（字段前加"-"）
-                if field.startswith('-'):
-                    actual_field = field[1:]
-                    direction = "DESC"
-                else:
-                    actual_field = field
-                    direction = "ASC"
-                
-                # 验证字段是否有效（避免SQL注入）
-                valid_fields = list(ExpressData.model_fields.keys())
-                if field not in valid_fields and field != 'id':
-                    raise ValueError(f"无效的字段名: {field}. 可用字段包括: {', '.join(valid_fields)}")
-                
-                order_clauses.append(f"{actual_field} {direction}")
-            
-            if order_clauses:
-                query_parts.append("ORDER BY " + ", ".join(order_clauses))
-        
-        # 添加LIMIT和OFFSET
-        if limit is not None:
-            query_parts.append(f"LIMIT ${param_idx}")
-            params.append(limit)
-            param_idx += 1
-        
-        if offset is not None:
-            query_parts.append(f"OFFSET ${param_idx}")
-            params.append(offset)
-            param_idx += 1
-        
-        # 构建最终查询并执行
-        query = " ".join(query_parts)
+        repository = ModelRepository(self.db, 'express', ExpressData)
+        return await repository.get(filters, order_by, limit, offset, cursor, fields, result_format)
 
-        # 开发环境可以打印
-        if settings.DEBUG:
-            formatted_query = format_sql_query(query, params)
-            print(f"Generated SQL: {formatted_query}")
+    async def stream_express(self,
+                             filters: Optional[Dict[str, Any]] = None,
+                             order_by: Optional[List[str]] = None,
+                             fields: Optional[List[str]] = None,
+                             chunk_size: int = 5000,
+                             result_format: str = 'records') -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        通过服务端游标分块读取业绩快报数据，过滤、排序和投影规则与get_express相同
 
-        rows = await self.db.fetch(query, *params)
-        
-        return [ExpressData.model_validate(dict(row)) for row in rows]
\ No newline at end of file
+        参数:
+            filters: 过滤条件字典，同get_express
+            order_by: 排序字段列表，同get_express
+            fields: 只查询并返回的字段列表，为空时返回全部字段
+            chunk_size: 每块的记录数
+            result_format: 每块的结果格式，默认'records'为字典列表，'columns'为ColumnarPage
+
+        返回:
+            异步生成器，每次产出一块数据
+        """
+        repository = ModelRepository(self.db, 'express', ExpressData)
+        async for chunk in repository.stream(filters, order_by, fields, chunk_size, result_format):
+            yield chunk
\ No newline at end of file
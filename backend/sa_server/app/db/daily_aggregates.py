@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from app.utils.frame_validators import FrameValidators
+
+
+@dataclass(frozen=True)
+class DailyAggregate:
+    """按交易日预聚合的统计表，建表语句见 database/migrations/0002_daily_aggregates.sql"""
+    table_name: str
+    # 聚合语句，$1为要刷新的交易日数组，只聚合这些交易日的数据
+    refresh_sql: str
+
+
+# 原始表 -> 由其聚合的统计表，导入原始表后按写入的交易日刷新
+DAILY_AGGREGATES: Dict[str, Tuple[DailyAggregate, ...]] = {
+    'kpl_list': (
+        DailyAggregate('agg_kpl_list_daily', """
+            INSERT INTO agg_kpl_list_daily (
+                trade_date, limit_up_count, first_limit_up_count, continuous_limit_up_count,
+                blown_board_count, avg_limit_up_pct, avg_turnover_rate, avg_amount
+            )
+            SELECT
+                trade_date,
+                COUNT(*) FILTER (WHERE tag = '涨停'),
+                COUNT(*) FILTER (WHERE tag = '涨停' AND status = '1'),
+                COUNT(*) FILTER (WHERE tag = '涨停' AND status != '1' AND status ~ '^[0-9]+$'),
+                COUNT(*) FILTER (WHERE tag = '炸板'),
+                AVG(pct_chg) FILTER (WHERE tag = '涨停'),
+                AVG(turnover_rate) FILTER (WHERE tag = '涨停'),
+                AVG(amount) FILTER (WHERE tag = '涨停')
+            FROM kpl_list
+            WHERE trade_date = ANY($1::date[])
+            GROUP BY trade_date
+        """),
+        DailyAggregate('agg_kpl_list_dist_daily', """
+            INSERT INTO agg_kpl_list_dist_daily (trade_date, dimension, bucket, count, sort_key)
+            SELECT trade_date, 'theme', theme, COUNT(*), 0
+            FROM kpl_list
+            WHERE trade_date = ANY($1::date[]) AND tag = '涨停' AND theme IS NOT NULL AND theme != ''
+            GROUP BY trade_date, theme
+            UNION ALL
+            SELECT trade_date, 'status', status, COUNT(*),
+                   CASE WHEN status ~ '^[0-9]+$' THEN CAST(status AS INTEGER) ELSE 0 END
+            FROM kpl_list
+            WHERE trade_date = ANY($1::date[]) AND tag = '涨停' AND status IS NOT NULL AND status != ''
+            GROUP BY trade_date, status
+            UNION ALL
+            SELECT trade_date, 'time_period', time_period, COUNT(*), MIN(sort_key)
+            FROM (
+                SELECT trade_date,
+                       CASE
+                           WHEN lu_time <= '10:00:00' THEN '10点前'
+                           WHEN lu_time <= '11:30:00' THEN '上午'
+                           WHEN lu_time <= '14:00:00' THEN '14点前'
+                           WHEN lu_time <= '15:00:00' THEN '收盘前'
+                           ELSE '其他'
+                       END AS time_period,
+                       CASE
+                           WHEN lu_time <= '10:00:00' THEN 1
+                           WHEN lu_time <= '11:30:00' THEN 2
+                           WHEN lu_time <= '14:00:00' THEN 3
+                           WHEN lu_time <= '15:00:00' THEN 4
+                           ELSE 5
+                       END AS sort_key
+                FROM kpl_list
+                WHERE trade_date = ANY($1::date[]) AND tag = '涨停' AND lu_time IS NOT NULL
+            ) periods
+            GROUP BY trade_date, time_period
+        """),
+    ),
+    'moneyflow': (
+        DailyAggregate('agg_moneyflow_daily', """
+            INSERT INTO agg_moneyflow_daily (
+                trade_date, total_net_amount, total_stocks, inflow_stocks, outflow_stocks,
+                small_net, medium_net, large_net, extra_large_net
+            )
+            SELECT
+                trade_date,
+                SUM(net_mf_amount),
+                COUNT(*),
+                COUNT(*) FILTER (WHERE net_mf_amount > 0),
+                COUNT(*) FILTER (WHERE net_mf_amount < 0),
+                SUM(buy_sm_amount - sell_sm_amount),
+                SUM(buy_md_amount - sell_md_amount),
+                SUM(buy_lg_amount - sell_lg_amount),
+                SUM(buy_elg_amount - sell_elg_amount)
+            FROM moneyflow
+            WHERE trade_date = ANY($1::date[])
+            GROUP BY trade_date
+        """),
+        DailyAggregate('agg_moneyflow_industry_daily', """
+            INSERT INTO agg_moneyflow_industry_daily (
+                trade_date, industry, stock_count, total_net_amount, avg_net_amount,
+                inflow_stocks, outflow_stocks, large_buy_amount, large_sell_amount
+            )
+            SELECT
+                mf.trade_date,
+                sb.industry,
+                COUNT(*),
+                SUM(mf.net_mf_amount),
+                AVG(mf.net_mf_amount),
+                COUNT(*) FILTER (WHERE mf.net_mf_amount > 0),
+                COUNT(*) FILTER (WHERE mf.net_mf_amount < 0),
+                SUM(mf.buy_lg_amount + mf.buy_elg_amount),
+                SUM(mf.sell_lg_amount + mf.sell_elg_amount)
+            FROM moneyflow mf
+            JOIN stock_basic sb ON mf.ts_code = sb.ts_code
+            WHERE mf.trade_date = ANY($1::date[])
+            GROUP BY mf.trade_date, sb.industry
+        """),
+    ),
+    'kpl_concept': (
+        DailyAggregate('agg_kpl_concept_daily', """
+            INSERT INTO agg_kpl_concept_daily (trade_date, concept_count, z_t_total, max_z_t_num)
+            SELECT trade_date, COUNT(*), SUM(z_t_num), MAX(z_t_num)
+            FROM kpl_concept
+            WHERE trade_date = ANY($1::date[])
+            GROUP BY trade_date
+        """),
+    ),
+}
+
+
+def to_trade_dates(values: Iterable[Any]) -> List[datetime.date]:
+    """
+    将交易日期转换为去重排序后的date列表
+
+    参数:
+        values: YYYYMMDD或YYYY-MM-DD字符串、date/datetime/Timestamp对象，空值和无法解析的值被忽略
+    """
+    series = FrameValidators.to_datetime_series(pd.Series(list(values), dtype=object)).dropna()
+    return sorted(set(series.dt.date))
+
+
+def parse_trade_date(trade_date: Any) -> Optional[datetime.date]:
+    """将单个交易日期转换为date，无法解析时返回None"""
+    dates = to_trade_dates([trade_date])
+    return dates[0] if dates else None
+
+
+async def refresh_daily_aggregates(db, source_table: str, trade_dates: Iterable[Any]) -> Dict[str, int]:
+    """
+    重新聚合原始表在指定交易日的统计数据
+
+    每个交易日的聚合结果整体替换（先删除再聚合），在一个事务中完成，查询方不会读到半刷新的数据。
+    同一原始表的刷新通过事务级advisory lock串行执行。
+
+    参数:
+        db: 数据库对象
+        source_table: 原始表名，见DAILY_AGGREGATES
+        trade_dates: 刚写入的交易日期
+
+    返回:
+        Dict[str, int]: 统计表名 -> 写入的聚合行数
+    """
+    aggregates = DAILY_AGGREGATES.get(source_table)
+    if aggregates is None:
+        raise ValueError(f"{source_table} 没有按交易日聚合的统计表. 可用表包括: {', '.join(DAILY_AGGREGATES)}")
+
+    dates = to_trade_dates(trade_dates)
+    if not dates:
+        return {}
+
+    summary = {}
+    async with db.transaction() as conn:
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"daily_aggregates:{source_table}")
+        for aggregate in aggregates:
+            await conn.execute(f"DELETE FROM {aggregate.table_name} WHERE trade_date = ANY($1::date[])", dates)
+            status = await conn.execute(aggregate.refresh_sql, dates)
+            # asyncpg返回 "INSERT 0 <行数>"
+            summary[aggregate.table_name] = int(status.split()[-1])
+
+    print(f"{source_table} 聚合刷新完成: {len(dates)} 个交易日, "
+          + ", ".join(f"{table} {count} 行" for table, count in summary.items()))
+    return summary
+
+
+async def refresh_safely(db, source_table: str, trade_dates: Iterable[Any]) -> Dict[str, int]:
+    """
+    导入流程中使用的刷新：失败时只打印错误，不影响已完成的导入（如统计表尚未创建）
+    """
+    try:
+        return await refresh_daily_aggregates(db, source_table, trade_dates)
+    except Exception as e:
+        print(f"{source_table} 聚合刷新失败: {str(e)}")
+        return {}
+
+
+async def refresh_missing_aggregates(db, source_table: str, trade_dates: Iterable[Any]) -> Dict[str, int]:
+    """
+    查询时补算统计表中缺少的交易日（统计表引入之前导入的数据），只刷新原始表中有数据的交易日
+
+    原始表没有数据的交易日（非交易日、尚未导入）聚合后也没有统计行，直接跳过，
+    不会在每次查询这些日期时重复执行删除和聚合的事务。
+
+    参数:
+        db: 数据库对象
+        source_table: 原始表名，见DAILY_AGGREGATES
+        trade_dates: 统计表中没有数据的交易日期
+
+    返回:
+        Dict[str, int]: 统计表名 -> 写入的聚合行数，没有需要刷新的交易日时为空
+    """
+    if source_table not in DAILY_AGGREGATES:
+        raise ValueError(f"{source_table} 没有按交易日聚合的统计表. 可用表包括: {', '.join(DAILY_AGGREGATES)}")
+
+    dates = to_trade_dates(trade_dates)
+    if not dates:
+        return {}
+    rows = await db.fetch(f"""
+        SELECT d.trade_date FROM unnest($1::date[]) AS d(trade_date)
+        WHERE EXISTS (SELECT 1 FROM {source_table} s WHERE s.trade_date = d.trade_date)
+    """, dates)
+    if not rows:
+        return {}
+    return await refresh_daily_aggregates(db, source_table, [row['trade_date'] for row in rows])
+
+
+async def rebuild_daily_aggregates(db, source_table: str,
+                                   start_date: Optional[str] = None,
+                                   end_date: Optional[str] = None,
+                                   chunk_days: int = 60) -> int:
+    """
+    按原始表中已有的交易日重建统计数据，用于新建统计表后回补历史或行业分类调整后重算
+
+    参数:
+        db: 数据库对象
+        source_table: 原始表名
+        start_date: 开始日期（YYYYMMDD），默认不限
+        end_date: 结束日期（YYYYMMDD），默认不限
+        chunk_days: 每个事务刷新的交易日数
+
+    返回:
+        int: 刷新的交易日数
+    """
+    if source_table not in DAILY_AGGREGATES:
+        raise ValueError(f"{source_table} 没有按交易日聚合的统计表. 可用表包括: {', '.join(DAILY_AGGREGATES)}")
+
+    rows = await db.fetch(f"""
+        SELECT DISTINCT trade_date FROM {source_table}
+        WHERE ($1::date IS NULL OR trade_date >= $1) AND ($2::date IS NULL OR trade_date <= $2)
+        ORDER BY trade_date
+    """, parse_trade_date(start_date) if start_date else None, parse_trade_date(end_date) if end_date else None)
+    dates = [row['trade_date'] for row in rows]
+
+    for start in range(0, len(dates), chunk_days):
+        await refresh_daily_aggregates(db, source_table, dates[start:start + chunk_days])
+    return len(dates)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="重建按交易日预聚合的统计表")
+    parser.add_argument('--table', action='append', choices=list(DAILY_AGGREGATES),
+                        help="原始表，可重复指定，默认全部")
+    parser.add_argument('--start', help="开始日期（YYYYMMDD），默认不限")
+    parser.add_argument('--end', help="结束日期（YYYYMMDD），默认不限")
+    args = parser.parse_args()
+
+    from app.db.db import get_db, close_db
+
+    db = await get_db()
+    try:
+        for source_table in args.table or DAILY_AGGREGATES:
+            count = await rebuild_daily_aggregates(db, source_table, args.start, args.end)
+            print(f"{source_table}: 已重建 {count} 个交易日的统计数据")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
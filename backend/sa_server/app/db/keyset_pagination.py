@@ -0,0 +1,252 @@
+import base64
+import datetime
+import json
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Sequence, Tuple, Type, Union
+from pydantic import BaseModel
+
+
+class KeysetPage(list):
+    """
+    查询结果列表，附带下一页游标
+
+    继承自list，原有按列表使用查询结果的调用方不受影响
+    """
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+class KeysetPagination:
+    """
+    基于排序字段的keyset（seek）分页
+
+    游标记录上一页最后一行在各排序字段上的取值，下一页通过
+    WHERE (排序字段) > (游标值) 定位起点，代替LIMIT/OFFSET。
+    无论翻到第几页，数据库都只需沿索引定位并读取一页数据。
+
+    排序字段末尾自动追加id作为唯一性兜底，保证翻页时不重不漏；
+    没有id列的表（如以(ts_code, trade_date)为主键的moneyflow）可以传入唯一键的各列。
+    游标中同时记录排序字段，排序方式改变后旧游标会被拒绝。
+    """
+
+    # 游标中值的类型标记
+    _TYPE_DATE = 'd'
+    _TYPE_DATETIME = 't'
+    _TYPE_DECIMAL = 'n'
+
+    def __init__(self, model: Type[BaseModel], order_by: Optional[Sequence[str]] = None,
+                 cursor: Optional[str] = None, tie_breaker: Union[str, Sequence[str]] = 'id'):
+        """
+        参数:
+            model: 表对应的Pydantic模型，用于校验排序字段
+            order_by: 排序字段列表，字段前加"-"表示降序，例如['-trade_date', 'ts_code']
+            cursor: 上一页返回的next_cursor，为None时从第一页开始
+            tie_breaker: 追加在排序字段末尾的唯一列，或组成唯一键的多列
+        """
+        tie_breaker = self.normalize_tie_breaker(tie_breaker)
+        self.model = model
+        self.order_keys = self.parse_order_by(model, order_by, tie_breaker)
+        self.cursor = cursor
+        self.not_null = self._not_null_fields(model, tie_breaker)
+
+    @staticmethod
+    def normalize_tie_breaker(tie_breaker: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+        """将唯一列统一为元组形式"""
+        if isinstance(tie_breaker, str):
+            return (tie_breaker,)
+        return tuple(tie_breaker)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _not_null_fields(model: Type[BaseModel], tie_breaker: Tuple[str, ...]) -> FrozenSet[str]:
+        """模型中的必填字段在表中均为NOT NULL，可以使用行比较"""
+        fields = {name for name, field in model.model_fields.items() if field.is_required()}
+        fields.update(tie_breaker)
+        return frozenset(fields)
+
+    @staticmethod
+    def parse_order_by(model: Type[BaseModel], order_by: Optional[Sequence[str]],
+                       tie_breaker: Union[str, Sequence[str]] = 'id') -> List[Tuple[str, bool]]:
+        """
+        解析并校验排序字段
+
+        返回:
+            List[Tuple[str, bool]]: (字段名, 是否降序) 列表，末尾包含唯一列
+        """
+        tie_breaker = KeysetPagination.normalize_tie_breaker(tie_breaker)
+        valid_fields = set(model.model_fields.keys())
+        valid_fields.update(tie_breaker)
+
+        order_keys = []
+        for item in order_by or []:
+            descending = item.startswith('-')
+            field = item[1:] if descending else item
+            if field not in valid_fields:
+                raise ValueError(f"无效的排序字段: {field}")
+            order_keys.append((field, descending))
+
+        ordered_fields = [field for field, _ in order_keys]
+        for field in tie_breaker:
+            if field not in ordered_fields:
+                order_keys.append((field, False))
+        return order_keys
+
+    @property
+    def order_spec(self) -> List[str]:
+        """排序字段的字符串形式，写入游标用于校验"""
+        return [f"-{field}" if descending else field for field, descending in self.order_keys]
+
+    def order_clause(self) -> str:
+        """生成ORDER BY子句"""
+        return "ORDER BY " + ", ".join(
+            f"{field} {'DESC' if descending else 'ASC'}" for field, descending in self.order_keys
+        )
+
+    @classmethod
+    def _encode_value(cls, value: Any) -> Any:
+        if isinstance(value, datetime.datetime):
+            return [cls._TYPE_DATETIME, value.isoformat()]
+        if isinstance(value, datetime.date):
+            return [cls._TYPE_DATE, value.isoformat()]
+        if isinstance(value, Decimal):
+            return [cls._TYPE_DECIMAL, str(value)]
+        return value
+
+    @classmethod
+    def _decode_value(cls, value: Any) -> Any:
+        if isinstance(value, list) and len(value) == 2:
+            kind, text = value
+            if kind == cls._TYPE_DATETIME:
+                return datetime.datetime.fromisoformat(text)
+            if kind == cls._TYPE_DATE:
+                return datetime.date.fromisoformat(text)
+            if kind == cls._TYPE_DECIMAL:
+                return Decimal(text)
+        return value
+
+    def encode_cursor(self, row: Any) -> str:
+        """
+        由一行数据（asyncpg Record、字典或模型）生成游标
+        """
+        if isinstance(row, BaseModel):
+            values = [getattr(row, field) for field, _ in self.order_keys]
+        else:
+            values = [row[field] for field, _ in self.order_keys]
+        payload = {'k': self.order_spec, 'v': [self._encode_value(value) for value in values]}
+        text = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+        return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        """
+        解析游标，返回各排序字段的取值
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            keys, values = payload['k'], payload['v']
+        except Exception:
+            raise ValueError("无效的分页游标")
+
+        if keys != self.order_spec or len(values) != len(self.order_keys):
+            raise ValueError("分页游标与当前排序字段不匹配")
+        # 唯一列不可能为空，否则游标无法定位
+        if values[-1] is None:
+            raise ValueError("无效的分页游标")
+        return [self._decode_value(value) for value in values]
+
+    def cursor_values(self) -> List[Any]:
+        """解析当前游标，返回各排序字段的取值"""
+        return self.decode_cursor(self.cursor)
+
+    def condition_sql(self, nulls: Sequence[bool], param_idx: int) -> str:
+        """
+        生成定位到游标之后的WHERE条件
+
+        所有排序字段方向一致且均为NOT NULL时使用行比较 (a, b) > ($1, $2)，可直接走复合索引；
+        否则展开为 a > $1 OR (a = $1 AND b > $2) ... 的形式，并按PostgreSQL默认的
+        NULL排序规则（升序NULL在最后，降序NULL在最前）处理空值。
+
+        条件只取决于游标中哪些值为空，参数依次为游标中的非空值（见keyset_condition）。
+
+        参数:
+            nulls: 游标中各排序字段的值是否为空
+            param_idx: 第一个参数的序号
+        """
+        directions = {descending for _, descending in self.order_keys}
+        all_not_null = all(field in self.not_null for field, _ in self.order_keys)
+
+        if len(directions) == 1 and all_not_null and not any(nulls):
+            operator = '<' if directions.pop() else '>'
+            fields = ', '.join(field for field, _ in self.order_keys)
+            placeholders = ', '.join(f"${param_idx + i}" for i in range(len(nulls)))
+            return f"({fields}) {operator} ({placeholders})"
+
+        # 每个非空游标值只占用一个参数
+        placeholders = {}
+        for i, is_null in enumerate(nulls):
+            if not is_null:
+                placeholders[i] = f"${param_idx + len(placeholders)}"
+
+        branches = []
+        for i, (field, descending) in enumerate(self.order_keys):
+            # 前面的排序字段取值相等
+            parts = [
+                f"{prev_field} IS NULL" if nulls[j] else f"{prev_field} = {placeholders[j]}"
+                for j, (prev_field, _) in enumerate(self.order_keys[:i])
+            ]
+
+            # 当前排序字段位于游标之后
+            if descending:
+                if nulls[i]:
+                    after = f"{field} IS NOT NULL"
+                else:
+                    after = f"{field} < {placeholders[i]}"
+            else:
+                if nulls[i]:
+                    # 升序时NULL排在最后，该字段上不存在更靠后的值
+                    continue
+                after = f"{field} > {placeholders[i]}"
+                if field not in self.not_null:
+                    after = f"({after} OR {field} IS NULL)"
+
+            parts.append(after)
+            branches.append("(" + " AND ".join(parts) + ")")
+
+        return "(" + " OR ".join(branches) + ")"
+
+    def keyset_condition(self, param_idx: int) -> Tuple[str, List[Any]]:
+        """
+        生成定位到游标之后的WHERE条件及其参数
+
+        返回:
+            Tuple[str, List]: (条件SQL, 参数列表)
+        """
+        values = self.cursor_values()
+        condition = self.condition_sql([value is None for value in values], param_idx)
+        return condition, [value for value in values if value is not None]
+
+    def next_cursor(self, rows: Sequence[Any], limit: Optional[int]) -> Optional[str]:
+        """
+        结果数达到limit时由最后一行生成下一页游标，否则返回None
+
+        参数:
+            rows: 数据库返回的原始行
+            limit: 本次查询的LIMIT
+        """
+        if limit and rows and len(rows) >= limit:
+            return self.encode_cursor(rows[-1])
+        return None
+
+    def page(self, rows: Sequence[Any], items: Sequence[Any], limit: Optional[int]) -> KeysetPage:
+        """
+        包装查询结果并附带下一页游标
+
+        参数:
+            rows: 数据库返回的原始行
+            items: 转换后的结果
+            limit: 本次查询的LIMIT
+        """
+        return KeysetPage(items, self.next_cursor(rows, limit))
@@ -0,0 +1,339 @@
+import argparse
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+# 建表脚本和迁移脚本所在目录
+DATABASE_DIR = Path(__file__).resolve().parents[2] / 'database'
+# 各表的建表脚本（基线），每个文件一张表
+BASELINE_DIR = DATABASE_DIR / 'tushare_db'
+# 基线之后的增量迁移，文件名以序号开头，如 0001_tune_time_series_indexes.sql
+MIGRATIONS_DIR = DATABASE_DIR / 'migrations'
+
+# 按月分区版本的建表脚本后缀，默认不执行，通过partitioned参数替换对应的普通版本
+PARTITIONED_SUFFIX = '_partitioned'
+
+# 迁移脚本首行包含此标记时逐条执行且不开启事务（如CREATE INDEX CONCURRENTLY）
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+
+# 防止多个进程同时执行迁移的advisory lock键
+MIGRATION_LOCK_KEY = 7406210413
+
+VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        execution_ms INT,
+        -- applied: 已执行; existing: 执行前表已存在，只记录版本
+        status VARCHAR(20) NOT NULL DEFAULT 'applied'
+    )
+"""
+
+_CREATE_TABLE_PATTERN = re.compile(r"\bCREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)", re.IGNORECASE)
+_REFERENCES_PATTERN = re.compile(r"\bREFERENCES\s+([\w.]+)", re.IGNORECASE)
+
+
+@dataclass
+class MigrationFile:
+    """一个待执行的SQL文件"""
+    version: str
+    path: Path
+    sql: str
+    checksum: str
+    # 文件中创建的表
+    tables: List[str] = field(default_factory=list)
+    # 文件中外键引用的表
+    references: Set[str] = field(default_factory=set)
+    # 是否为基线建表脚本
+    baseline: bool = True
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+
+def strip_comments(sql: str) -> str:
+    """去掉SQL中的 -- 行注释和 /* */ 块注释（不处理字符串中的注释符号）"""
+    sql = re.sub(r"/\*.*?\*/", ' ', sql, flags=re.DOTALL)
+    return re.sub(r"--[^\n]*", ' ', sql)
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    按分号拆分SQL语句，跳过字符串、$$块和注释中的分号，用于不开启事务逐条执行的迁移
+    """
+    statements = []
+    current = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            end = length if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char == "'":
+            end = i + 1
+            while end < length:
+                if sql[end] == "'" and sql.startswith("''", end):
+                    end += 2
+                    continue
+                if sql[end] == "'":
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        tag = re.match(r"\$\w*\$", sql[i:])
+        if tag:
+            end = sql.find(tag.group(0), i + len(tag.group(0)))
+            end = length if end == -1 else end + len(tag.group(0))
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char == ';':
+            statement = ''.join(current).strip()
+            if strip_comments(statement).strip():
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+
+    statement = ''.join(current).strip()
+    if strip_comments(statement).strip():
+        statements.append(statement)
+    return statements
+
+
+def _checksum(sql: str) -> str:
+    # 统一换行符，避免不同平台检出的文件校验和不一致
+    return hashlib.sha256(sql.replace('\r\n', '\n').encode('utf-8')).hexdigest()
+
+
+def _load(path: Path, baseline: bool) -> MigrationFile:
+    sql = path.read_text(encoding='utf-8')
+    code = strip_comments(sql)
+    return MigrationFile(
+        version=path.relative_to(DATABASE_DIR).as_posix(),
+        path=path,
+        sql=sql,
+        checksum=_checksum(sql),
+        tables=[name.lower() for name in _CREATE_TABLE_PATTERN.findall(code)],
+        references={name.lower() for name in _REFERENCES_PATTERN.findall(code)},
+        baseline=baseline,
+    )
+
+
+def _order_by_dependencies(files: List[MigrationFile]) -> List[MigrationFile]:
+    """
+    按外键依赖排序：被引用的表先创建，其余按路径顺序
+    """
+    creators = {}
+    for migration in files:
+        for table in migration.tables:
+            creators.setdefault(table, migration)
+
+    ordered = []
+    visited: Set[str] = set()
+
+    def visit(migration: MigrationFile, stack: Set[str]):
+        if migration.version in visited or migration.version in stack:
+            return
+        stack.add(migration.version)
+        for table in sorted(migration.references):
+            dependency = creators.get(table)
+            if dependency is not None and dependency is not migration:
+                visit(dependency, stack)
+        stack.discard(migration.version)
+        visited.add(migration.version)
+        ordered.append(migration)
+
+    for migration in files:
+        visit(migration, set())
+    return ordered
+
+
+def discover_migrations(partitioned: Optional[Iterable[str]] = None) -> List[MigrationFile]:
+    """
+    收集待执行的SQL文件：先是按外键依赖排序的基线建表脚本，再是按序号排序的增量迁移
+
+    只包含注释的占位文件会被跳过，补充内容后会在下次执行时应用。
+
+    参数:
+        partitioned: 使用按月分区版本建表的表名，如['hk_mins']，对应 <表名>_partitioned.sql
+
+    返回:
+        List[MigrationFile]: 按执行顺序排列的文件
+    """
+    partitioned = set(partitioned or [])
+    baseline_files = []
+    variants = {}
+    for path in sorted(BASELINE_DIR.rglob('*.sql')):
+        if path.stem.endswith(PARTITIONED_SUFFIX):
+            variants[path.stem[:-len(PARTITIONED_SUFFIX)]] = path
+        else:
+            baseline_files.append(path)
+
+    unknown = partitioned - set(variants)
+    if unknown:
+        raise ValueError(f"没有按月分区版本的建表脚本: {', '.join(sorted(unknown))}. 可用表包括: {', '.join(sorted(variants))}")
+
+    baseline = []
+    for path in baseline_files:
+        if path.stem in partitioned:
+            path = variants[path.stem]
+        migration = _load(path, baseline=True)
+        if strip_comments(migration.sql).strip():
+            baseline.append(migration)
+
+    migrations = []
+    if MIGRATIONS_DIR.exists():
+        for path in sorted(MIGRATIONS_DIR.glob('*.sql')):
+            if not re.match(r"\d+_", path.name):
+                continue
+            migrations.append(_load(path, baseline=False))
+
+    return _order_by_dependencies(baseline) + migrations
+
+
+async def _existing_tables(conn, tables: List[str]) -> Set[str]:
+    if not tables:
+        return set()
+    rows = await conn.fetch(
+        "SELECT name FROM unnest($1::text[]) AS name WHERE to_regclass(name) IS NOT NULL", tables
+    )
+    return {row['name'] for row in rows}
+
+
+async def _record(conn, migration: MigrationFile, execution_ms: Optional[int], status: str):
+    await conn.execute("""
+        INSERT INTO schema_migrations (version, checksum, execution_ms, status)
+        VALUES ($1, $2, $3, $4)
+    """, migration.version, migration.checksum, execution_ms, status)
+
+
+async def _apply(db, migration: MigrationFile) -> str:
+    """
+    执行一个文件并记录版本，返回状态：applied 或 existing
+    """
+    start = time.perf_counter()
+
+    if migration.transactional:
+        async with db.transaction() as conn:
+            # 基线建表脚本中的表都已存在（在引入迁移之前手工建的库），只记录版本
+            if migration.baseline and migration.tables:
+                existing = await _existing_tables(conn, migration.tables)
+                if len(existing) == len(set(migration.tables)):
+                    await _record(conn, migration, None, 'existing')
+                    return 'existing'
+            await conn.execute(migration.sql)
+            execution_ms = int((time.perf_counter() - start) * 1000)
+            await _record(conn, migration, execution_ms, 'applied')
+        return 'applied'
+
+    for statement in split_statements(migration.sql):
+        await db.execute(statement)
+    execution_ms = int((time.perf_counter() - start) * 1000)
+    async with db.transaction() as conn:
+        await _record(conn, migration, execution_ms, 'applied')
+    return 'applied'
+
+
+async def migrate(db,
+                  partitioned: Optional[Iterable[str]] = None,
+                  dry_run: bool = False) -> Dict[str, List[str]]:
+    """
+    按顺序执行尚未应用的建表脚本和迁移，版本记录在schema_migrations表中
+
+    - 每个文件在单独的事务中执行并记录版本，失败时回滚该文件并停止
+    - 已应用的文件内容发生变化时只打印警告，不会重复执行；结构变更应新增迁移文件
+    - 基线建表脚本中的表都已存在时只记录版本（status为existing），便于在已有的库上启用
+    - 通过advisory lock保证同一时间只有一个进程在执行迁移
+
+    参数:
+        db: 数据库对象
+        partitioned: 使用按月分区版本建表的表名，只影响尚未创建的表
+        dry_run: 只打印待执行的文件，不执行
+
+    返回:
+        Dict: {'applied': [...], 'existing': [...], 'changed': [...]}，值为版本列表
+    """
+    from app.db.bulk_upsert import clear_column_type_cache
+    from app.db.partitions import clear_partition_cache
+
+    migrations = discover_migrations(partitioned)
+    summary = {'applied': [], 'existing': [], 'changed': []}
+
+    async with db.pool.acquire() as lock_conn:
+        await lock_conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+        try:
+            await lock_conn.execute(VERSION_TABLE_SQL)
+            rows = await lock_conn.fetch("SELECT version, checksum FROM schema_migrations")
+            applied = {row['version']: row['checksum'] for row in rows}
+
+            for migration in migrations:
+                checksum = applied.get(migration.version)
+                if checksum is not None:
+                    if checksum != migration.checksum:
+                        summary['changed'].append(migration.version)
+                        print(f"警告: {migration.version} 在应用后被修改，不会重复执行，结构变更请新增迁移文件")
+                    continue
+
+                if dry_run:
+                    print(f"待执行: {migration.version}")
+                    summary['applied'].append(migration.version)
+                    continue
+
+                try:
+                    status = await _apply(db, migration)
+                except Exception as e:
+                    print(f"{migration.version} 执行失败: {str(e)}")
+                    raise
+                summary[status].append(migration.version)
+                print(f"{migration.version}: {'已执行' if status == 'applied' else '表已存在，记录版本'}")
+        finally:
+            await lock_conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+
+    if summary['applied'] and not dry_run:
+        # 表结构可能已变化
+        clear_column_type_cache()
+        clear_partition_cache()
+
+    print(f"迁移完成: 执行 {len(summary['applied'])} 个，记录已存在 {len(summary['existing'])} 个，"
+          f"已修改 {len(summary['changed'])} 个")
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="按顺序执行database/tushare_db建表脚本和database/migrations迁移，并记录版本")
+    parser.add_argument('--partitioned', action='append', metavar='TABLE',
+                        help="使用按月分区版本建表，如 --partitioned hk_mins，可重复指定")
+    parser.add_argument('--dry-run', action='store_true', help="只列出待执行的文件")
+    args = parser.parse_args()
+
+    from app.db.db import get_db, close_db
+
+    db = await get_db()
+    try:
+        await migrate(db, partitioned=args.partitioned, dry_run=args.dry_run)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
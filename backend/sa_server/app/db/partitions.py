@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import datetime
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.config.config import settings
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """按月范围分区的表"""
+    table_name: str
+    # 分区列（date或timestamp）
+    column: str
+
+
+# 按月分区的表，建表语句见 database/tushare_db/**/<表名>_partitioned.sql
+PARTITIONED_TABLES: Dict[str, PartitionSpec] = {
+    'hk_mins': PartitionSpec('hk_mins', 'trade_time'),
+    'stk_mins': PartitionSpec('stk_mins', 'trade_time'),
+    'realtime_tick': PartitionSpec('realtime_tick', 'trade_date'),
+}
+
+# 表名 -> 是否为分区表（未执行分区迁移的库中仍是普通表）
+_partitioned_cache: Dict[str, bool] = {}
+# 表名 -> 已确认存在的分区月份
+_known_partitions: Dict[str, Set[datetime.date]] = {}
+# 串行化分区创建，避免并发写入的批次同时创建同一个分区
+_partition_lock = asyncio.Lock()
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class PartitionInfo:
+    """分区信息，范围为[start, end)"""
+    name: str
+    start: datetime.date
+    end: datetime.date
+
+
+def month_start(value: Any) -> datetime.date:
+    """
+    取日期所在月份的第一天
+
+    参数:
+        value: date/datetime对象，或YYYY-MM、YYYYMM、YYYYMMDD、YYYY-MM-DD格式的字符串
+    """
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.replace(day=1)
+
+    text = str(value).strip().replace('-', '')
+    if len(text) < 6 or not text[:6].isdigit():
+        raise ValueError(f"无效的月份: {value}")
+    return datetime.date(int(text[:4]), int(text[4:6]), 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """月份加减，结果为月初"""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: datetime.date) -> str:
+    """分区表名，例如 hk_mins_y2024m01，与建表脚本中的命名一致"""
+    return f"{table_name}_y{month.year}m{month.month:02d}"
+
+
+def _get_spec(table_name: str) -> PartitionSpec:
+    spec = PARTITIONED_TABLES.get(table_name)
+    if spec is None:
+        raise ValueError(f"{table_name} 不是按月分区的表. 可用表包括: {', '.join(PARTITIONED_TABLES)}")
+    return spec
+
+
+async def is_partitioned(db, table_name: str) -> bool:
+    """
+    表是否已迁移为分区表，结果按表名缓存
+    """
+    partitioned = _partitioned_cache.get(table_name)
+    if partitioned is None:
+        relkind = await db.fetchval(
+            "SELECT relkind FROM pg_catalog.pg_class WHERE oid = to_regclass($1)", table_name
+        )
+        partitioned = relkind == 'p'
+        _partitioned_cache[table_name] = partitioned
+    return partitioned
+
+
+def clear_partition_cache(table_name: Optional[str] = None):
+    """
+    清除分区缓存，手工调整分区后调用
+
+    参数:
+        table_name: 表名，为None时清除全部
+    """
+    if table_name is None:
+        _partitioned_cache.clear()
+        _known_partitions.clear()
+    else:
+        _partitioned_cache.pop(table_name, None)
+        _known_partitions.pop(table_name, None)
+
+
+async def list_partitions(db, table_name: str) -> List[PartitionInfo]:
+    """
+    列出表的月度分区，按起始月份排序（不包含DEFAULT分区）
+    """
+    rows = await db.fetch("""
+        SELECT c.relname, pg_catalog.pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_catalog.pg_inherits i
+        JOIN pg_catalog.pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = $1::regclass
+    """, table_name)
+
+    partitions = []
+    for row in rows:
+        match = _BOUND_PATTERN.search(row['bound'] or '')
+        if not match:
+            continue
+        partitions.append(PartitionInfo(
+            name=row['relname'],
+            start=month_start(match.group(1)[:10]),
+            end=month_start(match.group(2)[:10]),
+        ))
+    partitions.sort(key=lambda partition: partition.start)
+    return partitions
+
+
+async def create_partition(db, table_name: str, month: datetime.date) -> bool:
+    """
+    创建指定月份的分区，已存在时跳过
+
+    返回:
+        bool: 是否新建了分区
+    """
+    _get_spec(table_name)
+    month = month_start(month)
+    known = _known_partitions.setdefault(table_name, set())
+    if month in known:
+        return False
+
+    async with _partition_lock:
+        if month in known:
+            return False
+        if not known:
+            known.update(partition.start for partition in await list_partitions(db, table_name))
+            if month in known:
+                return False
+
+        name = partition_name(table_name, month)
+        await db.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        known.add(month)
+        print(f"{table_name}: 已创建分区 {name}")
+        return True
+
+
+async def ensure_partitions(db, table_name: str,
+                            start: Optional[Any] = None,
+                            months_ahead: Optional[int] = None) -> int:
+    """
+    创建从start所在月份到当月之后months_ahead个月的全部分区
+
+    参数:
+        db: 数据库对象
+        table_name: 表名
+        start: 起始月份，默认为当月
+        months_ahead: 提前创建的月数，默认取配置项DB_PARTITION_MONTHS_AHEAD
+
+    返回:
+        int: 新建的分区数
+    """
+    if months_ahead is None:
+        months_ahead = settings.DB_PARTITION_MONTHS_AHEAD
+
+    current = month_start(datetime.date.today())
+    month = month_start(start) if start is not None else current
+    last = add_months(current, months_ahead)
+
+    created = 0
+    while month <= last:
+        if await create_partition(db, table_name, month):
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+
+async def ensure_partitions_for_values(db, table_name: str, values: Iterable[Any]) -> int:
+    """
+    写入前补建数据所在月份缺失的分区，使写入（如历史数据回补）不会因为没有对应分区而失败
+
+    非分区表（或尚未迁移为分区表的库）直接返回。
+
+    参数:
+        db: 数据库对象
+        table_name: 表名
+        values: 分区列的取值
+
+    返回:
+        int: 新建的分区数
+    """
+    if table_name not in PARTITIONED_TABLES or not await is_partitioned(db, table_name):
+        return 0
+
+    months = {month_start(value) for value in values if value is not None}
+    known = _known_partitions.get(table_name, set())
+    created = 0
+    for month in sorted(months - known):
+        if await create_partition(db, table_name, month):
+            created += 1
+    return created
+
+
+async def detach_expired_partitions(db, table_name: str,
+                                    retention_months: int,
+                                    drop: bool = False,
+                                    today: Optional[datetime.date] = None) -> List[str]:
+    """
+    分离超出保留期的分区
+
+    分区整体分离只修改元数据，不需要DELETE和VACUUM。分离后的表仍保留在库中，
+    可以归档（如pg_dump）后再删除；drop为True时直接删除。
+
+    参数:
+        db: 数据库对象
+        table_name: 表名
+        retention_months: 保留的月数（包含当月），例如24表示保留当月及之前23个月
+        drop: 分离后是否删除
+        today: 计算保留期的基准日期，默认为今天
+
+    返回:
+        List[str]: 被分离的分区名
+    """
+    _get_spec(table_name)
+    if retention_months <= 0:
+        raise ValueError(f"保留月数必须大于0: {retention_months}")
+
+    cutoff = add_months(month_start(today or datetime.date.today()), -(retention_months - 1))
+    detached = []
+    for partition in await list_partitions(db, table_name):
+        if partition.end > cutoff:
+            continue
+        async with _partition_lock:
+            await db.execute(f"ALTER TABLE {table_name} DETACH PARTITION {partition.name}")
+            if drop:
+                await db.execute(f"DROP TABLE {partition.name}")
+            _known_partitions.get(table_name, set()).discard(partition.start)
+        detached.append(partition.name)
+        print(f"{table_name}: 已{'删除' if drop else '分离'}分区 {partition.name}")
+    return detached
+
+
+async def maintain_partitions(db,
+                              tables: Optional[Iterable[str]] = None,
+                              start: Optional[Any] = None,
+                              months_ahead: Optional[int] = None,
+                              retention: Optional[Dict[str, int]] = None,
+                              drop: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    分区维护：为各分区表提前创建未来月份的分区，并分离超出保留期的分区
+
+    尚未迁移为分区表的表会被跳过，可以放在每日定时任务中执行。
+
+    参数:
+        db: 数据库对象
+        tables: 要维护的表，默认为PARTITIONED_TABLES中的全部表
+        start: 起始月份，用于迁移或回补时一次性创建历史分区，默认为当月
+        months_ahead: 提前创建的月数，默认取配置项DB_PARTITION_MONTHS_AHEAD
+        retention: 表名 -> 保留月数，默认取配置项DB_PARTITION_RETENTION_MONTHS，未配置的表不分离
+        drop: 分离后是否删除
+
+    返回:
+        Dict: 表名 -> {'created': 新建分区数, 'detached': 分离的分区名}
+    """
+    if retention is None:
+        retention = settings.DB_PARTITION_RETENTION_MONTHS
+
+    summary = {}
+    for table_name in tables or PARTITIONED_TABLES:
+        _get_spec(table_name)
+        if not await is_partitioned(db, table_name):
+            print(f"{table_name}: 不是分区表，跳过分区维护")
+            continue
+
+        created = await ensure_partitions(db, table_name, start, months_ahead)
+        detached = []
+        if retention.get(table_name):
+            detached = await detach_expired_partitions(db, table_name, retention[table_name], drop)
+        summary[table_name] = {'created': created, 'detached': detached}
+        print(f"{table_name}: 分区维护完成，新建 {created} 个，分离 {len(detached)} 个")
+    return summary
+
+
+def _parse_retention(items: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    """解析 表名=月数 形式的保留期参数"""
+    if not items:
+        return None
+    retention = {}
+    for item in items:
+        table_name, _, months = item.partition('=')
+        if not months.isdigit():
+            raise ValueError(f"无效的保留期参数: {item}，格式为 表名=月数")
+        retention[table_name] = int(months)
+    return retention
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="按月分区维护：提前创建分区、分离超出保留期的分区")
+    parser.add_argument('--table', action='append', choices=list(PARTITIONED_TABLES),
+                        help="要维护的表，可重复指定，默认全部")
+    parser.add_argument('--from', dest='start', help="起始月份（YYYY-MM），迁移或回补历史数据时使用，默认为当月")
+    parser.add_argument('--months-ahead', type=int, help="提前创建的月数，默认取配置项DB_PARTITION_MONTHS_AHEAD")
+    parser.add_argument('--retention', action='append', metavar='TABLE=MONTHS',
+                        help="保留月数，如 realtime_tick=3，可重复指定，默认取配置项DB_PARTITION_RETENTION_MONTHS")
+    parser.add_argument('--drop', action='store_true', help="分离后直接删除过期分区")
+    args = parser.parse_args()
+
+    from app.db.db import get_db, close_db
+
+    db = await get_db()
+    try:
+        await maintain_partitions(
+            db,
+            tables=args.table,
+            start=args.start,
+            months_ahead=args.months_ahead,
+            retention=_parse_retention(args.retention),
+            drop=args.drop
+        )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
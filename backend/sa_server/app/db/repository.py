@@ -0,0 +1,375 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Sequence, Tuple, Type, Union
+import pandas as pd
+from pydantic import BaseModel
+from app.config.config import settings
+from app.db.keyset_pagination import KeysetPage, KeysetPagination
+from app.utils.date_validators import DateValidators
+from app.utils.frame_validators import FrameValidators
+from app.utils.sql_query_formater import format_sql_query
+
+
+# 过滤运算符后缀 -> SQL运算符
+FILTER_OPERATORS = {
+    'eq': '=',
+    'ne': '!=',
+    'gt': '>',
+    'ge': '>=',
+    'lt': '<',
+    'le': '<=',
+    'like': 'LIKE',
+    'ilike': 'ILIKE',
+    'in': '= ANY',
+}
+
+# 对日期列取值做类型转换的运算符，LIKE类运算符按文本处理
+_DATE_COERCED_OPERATORS = {'eq', 'ne', 'gt', 'ge', 'lt', 'le', 'in'}
+
+# 查询结果格式：
+#   model   - 模型对象列表，逐行model_validate（默认）
+#   records - 字典列表，直接由asyncpg记录转换，不做校验
+#   columns - 按列组织的ColumnarPage，直接由asyncpg记录转置，不做校验
+RESULT_FORMATS = ('model', 'records', 'columns')
+
+
+@dataclass(frozen=True)
+class ModelMetadata:
+    """由Pydantic模型推导出的表元数据，每个模型只计算一次"""
+    # 可用于过滤、排序和投影的字段（包含唯一列，如id）
+    fields: Tuple[str, ...]
+    field_set: FrozenSet[str]
+    # date类型的字段
+    date_fields: FrozenSet[str]
+    # datetime类型的字段
+    datetime_fields: FrozenSet[str]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def for_model(model: Type[BaseModel], tie_breaker: Tuple[str, ...] = ('id',)) -> 'ModelMetadata':
+        kinds = FrameValidators.field_kinds(model)
+        fields = tuple(field for field in tie_breaker if field not in kinds) + tuple(kinds.keys())
+        return ModelMetadata(
+            fields=fields,
+            field_set=frozenset(fields),
+            date_fields=frozenset(name for name, kind in kinds.items() if kind == 'date'),
+            datetime_fields=frozenset(name for name, kind in kinds.items() if kind == 'datetime'),
+        )
+
+
+class ColumnarPage:
+    """
+    按列组织的查询结果，每个字段对应一个值列表
+
+    由asyncpg记录直接转置得到，不经过Pydantic模型，适合大结果集的读取和序列化。
+    len()返回行数。
+    """
+
+    def __init__(self, columns: Dict[str, List[Any]], next_cursor: Optional[str] = None):
+        self.columns = columns
+        self.next_cursor = next_cursor
+
+    @classmethod
+    def from_records(cls, rows: Sequence[Any], names: Sequence[str],
+                     next_cursor: Optional[str] = None) -> 'ColumnarPage':
+        """
+        将asyncpg记录转置为列
+
+        参数:
+            rows: asyncpg记录列表
+            names: 输出的字段，可以是查询列的子集
+            next_cursor: 下一页游标
+        """
+        if not rows:
+            return cls({name: [] for name in names}, next_cursor)
+
+        keys = list(rows[0].keys())
+        transposed = list(zip(*(row.values() for row in rows)))
+        return cls({name: list(transposed[keys.index(name)]) for name in names}, next_cursor)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def to_frame(self) -> pd.DataFrame:
+        """转换为DataFrame"""
+        return pd.DataFrame(self.columns)
+
+
+def parse_filter_key(key: str) -> Tuple[str, str]:
+    """
+    解析过滤键，例如 'trade_date__gt' -> ('trade_date', 'gt')，无后缀时为 'eq'
+    """
+    if '__' in key:
+        field, op = key.split('__', 1)
+    else:
+        field, op = key, 'eq'
+    return field, op
+
+
+@lru_cache(maxsize=1024)
+def _compile_select(table_name: str,
+                    model: Type[BaseModel],
+                    columns: Optional[Tuple[str, ...]],
+                    filter_shape: Tuple[Tuple[str, str], ...],
+                    order_spec: Tuple[str, ...],
+                    tie_breaker: Tuple[str, ...],
+                    cursor_nulls: Optional[Tuple[bool, ...]],
+                    has_limit: bool,
+                    has_offset: bool) -> str:
+    """
+    按查询形状生成SQL文本
+
+    查询形状由投影列、过滤字段及运算符、排序方式、游标中的空值位置和是否分页决定，
+    与具体参数值无关，同一形状的查询只生成一次SQL。
+    """
+    select_list = ', '.join(columns) if columns else '*'
+    query_parts = [f"SELECT {select_list} FROM {table_name}"]
+    conditions = []
+    param_idx = 1
+
+    for field, op in filter_shape:
+        if op == 'in':
+            conditions.append(f"{field} = ANY(${param_idx})")
+        else:
+            conditions.append(f"{field} {FILTER_OPERATORS[op]} ${param_idx}")
+        param_idx += 1
+
+    pagination = KeysetPagination(model, order_spec, tie_breaker=tie_breaker)
+    if cursor_nulls is not None:
+        conditions.append(pagination.condition_sql(cursor_nulls, param_idx))
+        param_idx += cursor_nulls.count(False)
+
+    if conditions:
+        query_parts.append("WHERE " + " AND ".join(conditions))
+    query_parts.append(pagination.order_clause())
+
+    if has_limit:
+        query_parts.append(f"LIMIT ${param_idx}")
+        param_idx += 1
+    if has_offset:
+        query_parts.append(f"OFFSET ${param_idx}")
+        param_idx += 1
+
+    return " ".join(query_parts)
+
+
+class ModelRepository:
+    """
+    由Pydantic模型驱动的通用查询仓库，统一实现各CRUD类中的动态过滤查询
+
+    字段白名单和日期列集合按模型只计算一次（见ModelMetadata），
+    SQL文本按查询形状缓存（见_compile_select），每次查询只需整理参数。
+
+    过滤条件支持的运算符后缀：
+        - __eq: 等于 (默认)
+        - __ne: 不等于
+        - __gt: 大于
+        - __ge: 大于等于
+        - __lt: 小于
+        - __le: 小于等于
+        - __like: LIKE模糊查询
+        - __ilike: ILIKE不区分大小写模糊查询
+        - __in: IN包含查询，值为列表或元组
+    日期列的取值可以是date对象、YYYYMMDD或YYYY-MM-DD字符串。
+    """
+
+    def __init__(self, db, table_name: str, model: Type[BaseModel],
+                 default_order_by: Optional[Sequence[str]] = None,
+                 tie_breaker: Union[str, Sequence[str]] = 'id'):
+        """
+        参数:
+            db: 数据库对象
+            table_name: 表名
+            model: 表对应的Pydantic模型
+            default_order_by: 未指定排序字段时使用的排序，例如['-trade_date']
+            tie_breaker: 追加在排序字段末尾的唯一列，没有id列的表传入唯一键的各列，例如['ts_code', 'trade_date']
+        """
+        self.db = db
+        self.table_name = table_name
+        self.model = model
+        self.tie_breaker = KeysetPagination.normalize_tie_breaker(tie_breaker)
+        self.metadata = ModelMetadata.for_model(model, self.tie_breaker)
+        self.default_order_by = list(default_order_by) if default_order_by else None
+
+    def _check_field(self, field: str):
+        if field not in self.metadata.field_set:
+            raise ValueError(f"无效的字段名: {field}. 可用字段包括: {', '.join(self.metadata.fields)}")
+
+    def _coerce_value(self, field: str, value: Any) -> Any:
+        """将日期列的过滤值转换为date/datetime对象"""
+        if value is None:
+            return value
+        if field in self.metadata.date_fields:
+            return DateValidators.to_date(value, raise_error=True)
+        if field in self.metadata.datetime_fields:
+            return DateValidators.to_datetime(value, raise_error=True)
+        return value
+
+    def _filter_params(self, filters: Dict[str, Any]) -> Tuple[Tuple[Tuple[str, str], ...], List[Any]]:
+        """
+        校验过滤条件，返回过滤形状和参数列表
+        """
+        shape = []
+        params = []
+        for key, value in filters.items():
+            field, op = parse_filter_key(key)
+            self._check_field(field)
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"不支持的操作符: {op}")
+
+            if op == 'in':
+                if not isinstance(value, (list, tuple)):
+                    raise ValueError(f"IN操作符需要列表或元组类型的值: {key}={value}")
+                if field in self.metadata.date_fields or field in self.metadata.datetime_fields:
+                    value = [self._coerce_value(field, item) for item in value]
+                value = list(value)
+            elif op in _DATE_COERCED_OPERATORS:
+                value = self._coerce_value(field, value)
+
+            shape.append((field, op))
+            params.append(value)
+        return tuple(shape), params
+
+    def _projection(self, fields: Optional[Sequence[str]], pagination: KeysetPagination) -> Optional[Tuple[str, ...]]:
+        """
+        计算投影列：请求的字段加上生成游标所需的排序字段
+        """
+        if not fields:
+            return None
+        columns = []
+        for field in fields:
+            self._check_field(field)
+            if field not in columns:
+                columns.append(field)
+        for field, _ in pagination.order_keys:
+            if field not in columns:
+                columns.append(field)
+        return tuple(columns)
+
+    def _build_query(self,
+                     filters: Optional[Dict[str, Any]],
+                     order_by: Optional[List[str]],
+                     limit: Optional[int],
+                     offset: Optional[int],
+                     cursor: Optional[str],
+                     fields: Optional[Sequence[str]],
+                     result_format: str) -> Tuple[str, List[Any], KeysetPagination]:
+        """
+        校验参数并生成SQL文本和参数列表
+
+        返回:
+            Tuple[str, List, KeysetPagination]: (SQL, 参数列表, 分页对象)
+        """
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"不支持的结果格式: {result_format}. 可用格式包括: {', '.join(RESULT_FORMATS)}")
+
+        filter_shape, params = self._filter_params(filters or {})
+
+        pagination = KeysetPagination(self.model, order_by or self.default_order_by, cursor, self.tie_breaker)
+        cursor_nulls = None
+        if cursor:
+            cursor_values = pagination.cursor_values()
+            cursor_nulls = tuple(value is None for value in cursor_values)
+            params.extend(value for value in cursor_values if value is not None)
+
+        columns = self._projection(fields, pagination)
+        has_offset = offset is not None and not cursor
+        if limit is not None:
+            params.append(limit)
+        if has_offset:
+            params.append(offset)
+
+        query = _compile_select(
+            self.table_name, self.model, columns, filter_shape,
+            tuple(pagination.order_spec), self.tie_breaker, cursor_nulls, limit is not None, has_offset
+        )
+
+        # 开发环境可以打印
+        if settings.DEBUG:
+            print(f"Generated SQL: {format_sql_query(query, params)}")
+
+        return query, params, pagination
+
+    def _convert_rows(self,
+                      rows: Sequence[Any],
+                      fields: Optional[Sequence[str]],
+                      result_format: str,
+                      pagination: KeysetPagination,
+                      limit: Optional[int]) -> Union[KeysetPage, ColumnarPage]:
+        """
+        按结果格式转换数据库返回的记录
+        """
+        if result_format == 'columns':
+            if fields:
+                names = list(dict.fromkeys(fields))
+            else:
+                names = list(rows[0].keys()) if rows else list(self.metadata.fields)
+            return ColumnarPage.from_records(rows, names, pagination.next_cursor(rows, limit))
+
+        if fields:
+            items = [{field: row[field] for field in fields} for row in rows]
+        elif result_format == 'records':
+            items = [dict(row) for row in rows]
+        else:
+            items = [self.model.model_validate(dict(row)) for row in rows]
+        return pagination.page(rows, items, limit)
+
+    async def get(self,
+                  filters: Optional[Dict[str, Any]] = None,
+                  order_by: Optional[List[str]] = None,
+                  limit: Optional[int] = None,
+                  offset: Optional[int] = None,
+                  cursor: Optional[str] = None,
+                  fields: Optional[Sequence[str]] = None,
+                  result_format: str = 'model') -> Union[KeysetPage, ColumnarPage]:
+        """
+        动态查询，支持任意字段过滤、自定义排序、keyset游标分页和列投影
+
+        参数:
+            filters: 过滤条件字典，键为 字段名[__运算符]，例如 {'ts_code__like': '600%', 'end_date__gt': '20230101'}
+            order_by: 排序字段列表，字段前加"-"表示降序，例如['-end_date', 'ts_code']
+            limit: 最大返回记录数
+            offset: 跳过前面的记录数，传入cursor时忽略
+            cursor: 上一页返回的next_cursor
+            fields: 只查询的字段列表，为空时查询全部字段
+            result_format: 结果格式，见RESULT_FORMATS；读接口应使用records或columns，跳过逐行校验
+
+        返回:
+            KeysetPage: result_format为model时，未指定fields为模型对象列表，否则为只包含所请求字段的字典列表；
+                        为records时为字典列表
+            ColumnarPage: result_format为columns时
+            结果均附带next_cursor
+        """
+        query, params, pagination = self._build_query(
+            filters, order_by, limit, offset, cursor, fields, result_format
+        )
+        rows = await self.db.fetch(query, *params)
+        return self._convert_rows(rows, fields, result_format, pagination, limit)
+
+    async def stream(self,
+                     filters: Optional[Dict[str, Any]] = None,
+                     order_by: Optional[List[str]] = None,
+                     fields: Optional[Sequence[str]] = None,
+                     chunk_size: int = 5000,
+                     result_format: str = 'records') -> AsyncIterator[Union[KeysetPage, ColumnarPage]]:
+        """
+        通过服务端游标分块读取全部匹配的数据，过滤、排序和投影规则与get相同
+
+        整个结果集只执行一次查询，不需要LIMIT/OFFSET或游标翻页，
+        内存中最多只保留一个块，适合导出和分析全量数据。
+
+        参数:
+            filters: 过滤条件字典，同get
+            order_by: 排序字段列表，同get
+            fields: 只查询的字段列表，为空时查询全部字段
+            chunk_size: 每块的记录数
+            result_format: 每块的结果格式，见RESULT_FORMATS，默认records
+
+        返回:
+            异步生成器，每次产出一块KeysetPage或ColumnarPage，块上的next_cursor为None
+        """
+        query, params, pagination = self._build_query(
+            filters, order_by, None, None, None, fields, result_format
+        )
+        async for rows in self.db.stream(query, *params, chunk_size=chunk_size):
+            yield self._convert_rows(rows, fields, result_format, pagination, None)
@@ -0,0 +1,166 @@
+import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.db.daily_aggregates import parse_trade_date
+
+
+# 增量导入函数：接收开始日期和结束日期（YYYYMMDD），开始日期为None时表示全量导入，返回导入的记录数
+Importer = Callable[[Optional[str], str], Awaitable[int]]
+
+
+async def get_watermark(db, dataset: str, ts_code: Optional[str] = None) -> Optional[datetime.date]:
+    """
+    获取数据集的同步水位
+
+    参数:
+        db: 数据库对象
+        dataset: 数据集名，通常为表名
+        ts_code: 按股票同步时的股票代码，为空时取整表水位
+
+    返回:
+        datetime.date: 已导入数据的最新日期，从未同步过时为None
+    """
+    return await db.fetchval(
+        "SELECT watermark FROM sync_state WHERE dataset = $1 AND ts_code = $2",
+        dataset, ts_code or ''
+    )
+
+
+async def get_watermarks(db, dataset: str) -> Dict[str, datetime.date]:
+    """
+    获取数据集下按股票同步的全部水位
+
+    返回:
+        Dict[str, datetime.date]: ts_code -> 水位
+    """
+    rows = await db.fetch(
+        "SELECT ts_code, watermark FROM sync_state WHERE dataset = $1 AND ts_code != ''", dataset
+    )
+    return {row['ts_code']: row['watermark'] for row in rows}
+
+
+async def save_watermark(db, dataset: str, date_field: str, watermark: Any,
+                         ts_code: Optional[str] = None,
+                         start_date: Any = None,
+                         rows: int = 0):
+    """
+    记录同步水位，水位只前进不后退（重叠窗口重新导入的旧数据不会把水位拉回）
+
+    参数:
+        db: 数据库对象
+        dataset: 数据集名
+        date_field: 水位对应的日期字段
+        watermark: 已导入数据的最新日期
+        ts_code: 按股票同步时的股票代码
+        start_date: 本次导入请求的开始日期
+        rows: 本次导入的记录数
+    """
+    await db.execute("""
+        INSERT INTO sync_state (dataset, ts_code, date_field, watermark, last_start_date, last_rows, synced_at)
+        VALUES ($1, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP)
+        ON CONFLICT (dataset, ts_code) DO UPDATE SET
+            date_field = EXCLUDED.date_field,
+            watermark = GREATEST(sync_state.watermark, EXCLUDED.watermark),
+            last_start_date = EXCLUDED.last_start_date,
+            last_rows = EXCLUDED.last_rows,
+            synced_at = EXCLUDED.synced_at
+    """, dataset, ts_code or '', date_field, parse_trade_date(watermark),
+        parse_trade_date(start_date) if start_date else None, rows)
+
+
+async def reset_watermark(db, dataset: str, ts_code: Optional[str] = None):
+    """
+    清除同步水位，下次增量导入按全量导入处理；ts_code为空时清除数据集的全部水位
+    """
+    if ts_code:
+        await db.execute("DELETE FROM sync_state WHERE dataset = $1 AND ts_code = $2", dataset, ts_code)
+    else:
+        await db.execute("DELETE FROM sync_state WHERE dataset = $1", dataset)
+
+
+async def table_watermark(db, table_name: str, date_field: str,
+                          ts_code: Optional[str] = None,
+                          since: Optional[datetime.date] = None) -> Optional[datetime.date]:
+    """
+    数据表中日期字段的最大值
+
+    参数:
+        db: 数据库对象
+        table_name: 表名
+        date_field: 日期字段
+        ts_code: 只统计该股票的数据
+        since: 只统计不早于该日期的数据
+
+    返回:
+        datetime.date: 最大日期，没有数据时为None
+    """
+    conditions = [f"{date_field} IS NOT NULL"]
+    params = []
+    if ts_code:
+        params.append(ts_code)
+        conditions.append(f"ts_code = ${len(params)}")
+    if since:
+        params.append(since)
+        conditions.append(f"{date_field} >= ${len(params)}")
+    value = await db.fetchval(
+        f"SELECT MAX({date_field}) FROM {table_name} WHERE {' AND '.join(conditions)}", *params
+    )
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value
+
+
+async def run_incremental(db, dataset: str, table_name: str, date_field: str,
+                          importer: Importer,
+                          overlap_days: int,
+                          ts_code: Optional[str] = None,
+                          end_date: Optional[str] = None) -> int:
+    """
+    增量导入：只获取同步水位之后的数据，导入成功后推进水位
+
+    - 开始日期为水位减去overlap_days，重叠窗口内的数据重新导入（upsert），覆盖数据源的补录和修订
+    - 从未同步过时以数据表中已有数据的最大日期作为水位，已有的库启用增量导入时不会重新下载全部历史；
+      数据表也为空时按全量导入处理
+    - 导入失败（抛出异常）时不更新水位，下次从原水位重新获取
+    - 新水位为本次请求区间内数据表中的最大日期，没有新数据时水位不变
+
+    参数:
+        db: 数据库对象
+        dataset: 数据集名，通常为表名
+        table_name: 数据表名
+        date_field: 水位对应的日期字段，如trade_date/ann_date/end_date/date
+        importer: 导入函数，接收开始日期和结束日期（YYYYMMDD），导入失败时必须抛出异常，
+                  导入方法需传入raise_errors=True，否则失败的区间也会推进水位
+        overlap_days: 重叠窗口天数
+        ts_code: 按股票同步时的股票代码，水位按股票分别记录
+        end_date: 结束日期（YYYYMMDD），默认为今天
+
+    返回:
+        int: 导入的记录数
+    """
+    watermark = await get_watermark(db, dataset, ts_code)
+    if watermark is None:
+        watermark = await table_watermark(db, table_name, date_field, ts_code)
+
+    if watermark is None:
+        start = None
+        start_date = None
+    else:
+        start = watermark - datetime.timedelta(days=overlap_days)
+        start_date = start.strftime('%Y%m%d')
+    end_date = end_date or datetime.date.today().strftime('%Y%m%d')
+
+    target = f"{dataset}" + (f" {ts_code}" if ts_code else "")
+    if start_date:
+        print(f"{target} 增量导入: 水位 {watermark}，获取 {start_date} 至 {end_date} 的数据")
+    else:
+        print(f"{target} 没有同步记录，按全量导入")
+
+    count = await importer(start_date, end_date)
+
+    new_watermark = await table_watermark(db, table_name, date_field, ts_code, since=start)
+    if new_watermark is not None:
+        await save_watermark(db, dataset, date_field, new_watermark, ts_code, start_date, count)
+        print(f"{target} 增量导入完成: {count} 条记录，水位 {max(new_watermark, watermark or new_watermark)}")
+    else:
+        print(f"{target} 增量导入完成: 没有新数据")
+    return count
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -37,16 +38,18 @@ def get_hk_basic(ts_code: str = None, list_status: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取港股列表信息
         hk_basic = pro.hk_basic(ts_code=ts_code, list_status=list_status)
         
         return hk_basic
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取港股列表信息数据错误: {str(e)}")
-        raise Exception(f"获取港股列表信息数据错误: {str(e)}")
+        raise TushareError(f"获取港股列表信息数据错误: {str(e)}") from e
 
 
 def get_hk_tradecal(start_date: str = None, end_date: str = None, is_open: str = None) -> pd.DataFrame:
@@ -72,16 +75,18 @@ def get_hk_tradecal(start_date: str = None, end_date: str = None, is_open: str =
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取港股交易日历数据
         hk_tradecal = pro.hk_tradecal(start_date=start_date, end_date=end_date, is_open=is_open)
         
         return hk_tradecal
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取港股交易日历数据错误: {str(e)}")
-        raise Exception(f"获取港股交易日历数据错误: {str(e)}")
+        raise TushareError(f"获取港股交易日历数据错误: {str(e)}") from e
 
 
 def get_hk_daily(ts_code: str = None, trade_date: str = None,
@@ -117,7 +122,7 @@ def get_hk_daily(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取港股日线行情数据
@@ -125,9 +130,11 @@ def get_hk_daily(ts_code: str = None, trade_date: str = None,
                                   start_date=start_date, end_date=end_date)
         
         return hk_daily
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取港股日线行情数据错误: {str(e)}")
-        raise Exception(f"获取港股日线行情数据错误: {str(e)}")
+        raise TushareError(f"获取港股日线行情数据错误: {str(e)}") from e
 
 
 def get_hk_daily_adj(ts_code: str = None, trade_date: str = None,
@@ -170,7 +177,7 @@ def get_hk_daily_adj(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取港股日线行情数据（已复权）
@@ -178,9 +185,11 @@ def get_hk_daily_adj(ts_code: str = None, trade_date: str = None,
                                          start_date=start_date, end_date=end_date)
         
         return hk_daily_adj
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取港股日线行情（已复权）数据错误: {str(e)}")
-        raise Exception(f"获取港股日线行情（已复权）数据错误: {str(e)}")
+        raise TushareError(f"获取港股日线行情（已复权）数据错误: {str(e)}") from e
 
 
 def get_hk_mins(ts_code: str = None, freq: str = None,
@@ -221,7 +230,7 @@ def get_hk_mins(ts_code: str = None, freq: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 参数检查
     if not ts_code:
@@ -235,6 +244,8 @@ def get_hk_mins(ts_code: str = None, freq: str = None,
                               start_date=start_date, end_date=end_date)
         
         return hk_mins
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取港股分钟行情数据错误: {str(e)}")
-        raise Exception(f"获取港股分钟行情数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取港股分钟行情数据错误: {str(e)}") from e
\ No newline at end of file
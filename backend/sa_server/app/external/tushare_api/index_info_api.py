@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -50,7 +51,7 @@ def get_index_basic(ts_code: str = None, name: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取指数基础信息
@@ -58,9 +59,11 @@ def get_index_basic(ts_code: str = None, name: str = None,
                                       market=market, publisher=publisher, category=category)
         
         return index_basic
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取指数基础信息数据错误: {str(e)}")
-        raise Exception(f"获取指数基础信息数据错误: {str(e)}")
+        raise TushareError(f"获取指数基础信息数据错误: {str(e)}") from e
 
 
 def get_daily(ts_code: str = None, trade_date: str = None,
@@ -96,7 +99,7 @@ def get_daily(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股日线行情
@@ -105,6 +108,8 @@ def get_daily(ts_code: str = None, trade_date: str = None,
 
         
         return daily
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股日线行情数据错误: {str(e)}")
-        raise Exception(f"获取A股日线行情数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取A股日线行情数据错误: {str(e)}") from e
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -40,16 +41,18 @@ def get_shibor(date: str = None, start_date: str = None, end_date: str = None) -
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取shibor利率
         shibor = pro.shibor(date=date, start_date=start_date, end_date=end_date)
         
         return shibor
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取shibor利率数据错误: {str(e)}")
-        raise Exception(f"获取shibor利率数据错误: {str(e)}")
+        raise TushareError(f"获取shibor利率数据错误: {str(e)}") from e
 
 
 def get_shibor_quote(date: str = None, start_date: str = None, end_date: str = None, bank: str = None) -> pd.DataFrame:
@@ -92,16 +95,18 @@ def get_shibor_quote(date: str = None, start_date: str = None, end_date: str = N
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取shibor报价数据
         shibor_quote = pro.shibor_quote(date=date, start_date=start_date, end_date=end_date, bank=bank)
 
         return shibor_quote
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取shibor报价数据错误: {str(e)}")
-        raise Exception(f"获取shibor报价数据错误: {str(e)}")
+        raise TushareError(f"获取shibor报价数据错误: {str(e)}") from e
 
 
 def get_shibor_lpr(date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -132,16 +137,18 @@ def get_shibor_lpr(date: str = None, start_date: str = None, end_date: str = Non
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取LPR报价数据
         shibor_lpr = pro.shibor_lpr(date=date, start_date=start_date, end_date=end_date)
 
         return shibor_lpr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取LPR报价数据错误: {str(e)}")
-        raise Exception(f"获取LPR报价数据错误: {str(e)}")
+        raise TushareError(f"获取LPR报价数据错误: {str(e)}") from e
 
 
 def get_libor(date: str = None, start_date: str = None, end_date: str = None, curr_type: str = None) -> pd.DataFrame:
@@ -178,16 +185,18 @@ def get_libor(date: str = None, start_date: str = None, end_date: str = None, cu
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取Libor拆借利率数据
         libor = pro.libor(date=date, start_date=start_date, end_date=end_date, curr_type=curr_type)
 
         return libor
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取Libor拆借利率数据错误: {str(e)}")
-        raise Exception(f"获取Libor拆借利率数据错误: {str(e)}")
+        raise TushareError(f"获取Libor拆借利率数据错误: {str(e)}") from e
     
 
 def get_hibor(date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -222,16 +231,18 @@ def get_hibor(date: str = None, start_date: str = None, end_date: str = None) ->
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取Hibor香港同业拆借利率数据
         hibor = pro.hibor(date=date, start_date=start_date, end_date=end_date)
 
         return hibor
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取Hibor香港同业拆借利率数据错误: {str(e)}")
-        raise Exception(f"获取Hibor香港同业拆借利率数据错误: {str(e)}")
+        raise TushareError(f"获取Hibor香港同业拆借利率数据错误: {str(e)}") from e
 
 
 def get_wz_index(date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -271,16 +282,18 @@ def get_wz_index(date: str = None, start_date: str = None, end_date: str = None)
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取温州民间借贷利率数据
         wz_index = pro.wz_index(date=date, start_date=start_date, end_date=end_date)
 
         return wz_index
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取温州民间借贷利率数据错误: {str(e)}")
-        raise Exception(f"获取温州民间借贷利率数据错误: {str(e)}")
+        raise TushareError(f"获取温州民间借贷利率数据错误: {str(e)}") from e
 
 def get_gz_index(date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
@@ -310,16 +323,18 @@ def get_gz_index(date: str = None, start_date: str = None, end_date: str = None)
         """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取广州民间借贷利率数据
         gz_index = pro.gz_index(date=date, start_date=start_date, end_date=end_date)
 
         return gz_index
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取广州民间借贷利率数据错误: {str(e)}")
-        raise Exception(f"获取广州民间借贷利率数据错误: {str(e)}")
+        raise TushareError(f"获取广州民间借贷利率数据错误: {str(e)}") from e
 
 
 def get_cn_gdp(q: str = None, start_q: str = None, end_q: str = None, fields: str = None) -> pd.DataFrame:
@@ -352,16 +367,18 @@ def get_cn_gdp(q: str = None, start_q: str = None, end_q: str = None, fields: st
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取中国GDP数据
         cn_gdp = pro.cn_gdp(q=q, start_q=start_q, end_q=end_q, fields=fields)
         
         return cn_gdp
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取中国GDP数据数据错误: {str(e)}")
-        raise Exception(f"获取中国GDP数据数据错误: {str(e)}")
+        raise TushareError(f"获取中国GDP数据数据错误: {str(e)}") from e
     
 def get_cn_cpi(m: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
@@ -396,16 +413,18 @@ def get_cn_cpi(m: str = None, start_date: str = None, end_date: str = None) -> p
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取中国CPI数据
         cn_cpi = pro.cn_cpi(m=m, start_date=start_date, end_date=end_date)
         
         return cn_cpi
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取中国CPI数据数据错误: {str(e)}")
-        raise Exception(f"获取中国CPI数据数据错误: {str(e)}")
+        raise TushareError(f"获取中国CPI数据数据错误: {str(e)}") from e
 
 
 def get_cn_ppi(m: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -459,16 +478,18 @@ def get_cn_ppi(m: str = None, start_date: str = None, end_date: str = None) -> p
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取中国PPI数据
         cn_ppi = pro.cn_ppi(m=m, start_date=start_date, end_date=end_date)
 
         return cn_ppi
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取中国PPI数据数据错误: {str(e)}")
-        raise Exception(f"获取中国PPI数据数据错误: {str(e)}")
+        raise TushareError(f"获取中国PPI数据数据错误: {str(e)}") from e
 
 
 def get_cn_m(m: str = None, start_date: str = None, end_date: str = None, fields : str = None) -> pd.DataFrame:
@@ -503,16 +524,18 @@ def get_cn_m(m: str = None, start_date: str = None, end_date: str = None, fields
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取货币供应量数据
         cn_m = pro.cn_m(m=m, start_date=start_date, end_date=end_date, fields=fields)
 
         return cn_m
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取货币供应量数据错误: {str(e)}")
-        raise Exception(f"获取货币供应量数据错误: {str(e)}")
+        raise TushareError(f"获取货币供应量数据错误: {str(e)}") from e
 
 def get_sf_month(m: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
@@ -538,16 +561,18 @@ def get_sf_month(m: str = None, start_date: str = None, end_date: str = None) ->
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取社会融资规模数据
         sf_month = pro.sf_month(m=m, start_date=start_date, end_date=end_date)
 
         return sf_month
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取社会融资规模数据错误: {str(e)}")
-        raise Exception(f"获取社会融资规模数据错误: {str(e)}")
+        raise TushareError(f"获取社会融资规模数据错误: {str(e)}") from e
     
 
 def get_cn_pmi(m: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -630,16 +655,18 @@ def get_cn_pmi(m: str = None, start_date: str = None, end_date: str = None) -> p
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取PMI数据
         cn_pmi = pro.cn_pmi(m=m, start_date=start_date, end_date=end_date)
 
         return cn_pmi
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取PMI数据错误: {str(e)}")
-        raise Exception(f"获取PMI数据错误: {str(e)}")
+        raise TushareError(f"获取PMI数据错误: {str(e)}") from e
 
 
 # 国外宏观经济数据
@@ -679,16 +706,18 @@ def get_us_tycr(date: str = None, start_date: str = None, end_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取国债收益率曲线利率（日频）数据
         us_tycr = pro.us_tycr(date=date, start_date=start_date, end_date=end_date, fields=fields)
 
         return us_tycr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取美国国债收益率曲线数据错误: {str(e)}")
-        raise Exception(f"获取美国国债收益率曲线数据错误: {str(e)}")
+        raise TushareError(f"获取美国国债收益率曲线数据错误: {str(e)}") from e
     
 def get_us_trycr(date: str = None, start_date: str = None, end_date: str = None, fields : str = None) -> pd.DataFrame:
     """
@@ -718,16 +747,18 @@ def get_us_trycr(date: str = None, start_date: str = None, end_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取国债实际收益率曲线利率数据
         us_trycr = pro.us_trycr(date=date, start_date=start_date, end_date=end_date, fields=fields)
 
         return us_trycr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取国债实际收益率曲线利率数据错误: {str(e)}")
-        raise Exception(f"获取国债实际收益率曲线利率数据错误: {str(e)}")
+        raise TushareError(f"获取国债实际收益率曲线利率数据错误: {str(e)}") from e
 
 
 def get_us_tbr(date: str = None, start_date: str = None, end_date: str = None, fields : str = None) -> pd.DataFrame:
@@ -764,16 +795,18 @@ def get_us_tbr(date: str = None, start_date: str = None, end_date: str = None, f
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取短期国债利率数据
         us_tbr = pro.us_tbr(date=date, start_date=start_date, end_date=end_date, fields=fields)
 
         return us_tbr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取短期国债利率数据错误: {str(e)}")
-        raise Exception(f"获取短期国债利率数据错误: {str(e)}")
+        raise TushareError(f"获取短期国债利率数据错误: {str(e)}") from e
 
 
 def get_us_tltr(date: str = None, start_date: str = None, end_date: str = None, fields : str = None) -> pd.DataFrame:
@@ -801,16 +834,18 @@ def get_us_tltr(date: str = None, start_date: str = None, end_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取长期国债利率数据
         us_tltr = pro.us_tltr(date=date, start_date=start_date, end_date=end_date, fields=fields)
 
         return us_tltr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取长期国债利率数据错误: {str(e)}")
-        raise Exception(f"获取长期国债利率数据错误: {str(e)}")
+        raise TushareError(f"获取长期国债利率数据错误: {str(e)}") from e
 
 
 def get_us_trltr(date: str = None, start_date: str = None, end_date: str = None, fields : str = None) -> pd.DataFrame:
@@ -836,13 +871,15 @@ def get_us_trltr(date: str = None, start_date: str = None, end_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取国债实际长期利率平均值数据
         us_trltr = pro.us_trltr(date=date, start_date=start_date, end_date=end_date, fields=fields)
 
         return us_trltr
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取国债实际长期利率平均值数据错误: {str(e)}")
-        raise Exception(f"获取国债实际长期利率平均值数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取国债实际长期利率平均值数据错误: {str(e)}") from e
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -51,7 +52,7 @@ def get_report_rc(ts_code: str = None, report_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取券商（卖方）每天研报的盈利预测数据
@@ -59,9 +60,11 @@ def get_report_rc(ts_code: str = None, report_date: str = None,
                                    start_date=start_date, end_date=end_date)
         
         return report_rc
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取券商（卖方）每天研报的盈利预测数据错误: {str(e)}")
-        raise Exception(f"获取券商（卖方）每天研报的盈利预测数据错误: {str(e)}")
+        raise TushareError(f"获取券商（卖方）每天研报的盈利预测数据错误: {str(e)}") from e
 
 
 def get_cyq_perf(ts_code: str = None, trade_date: str = None,
@@ -98,7 +101,7 @@ def get_cyq_perf(ts_code: str = None, trade_date: str = None,
    """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股每日筹码平均成本和胜率情况
@@ -106,9 +109,11 @@ def get_cyq_perf(ts_code: str = None, trade_date: str = None,
                                  start_date=start_date, end_date=end_date)
         
         return cyq_perf
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股每日筹码平均成本和胜率数据错误: {str(e)}")
-        raise Exception(f"获取A股每日筹码平均成本和胜率数据错误: {str(e)}")
+        raise TushareError(f"获取A股每日筹码平均成本和胜率数据错误: {str(e)}") from e
 
 
 def get_cyq_chips(ts_code: str = None, trade_date: str = None,
@@ -138,7 +143,7 @@ def get_cyq_chips(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股每日筹码分布数据
@@ -146,9 +151,11 @@ def get_cyq_chips(ts_code: str = None, trade_date: str = None,
                                    start_date=start_date, end_date=end_date)
         
         return cyq_chips
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股每日筹码分布数据错误: {str(e)}")
-        raise Exception(f"获取A股每日筹码分布数据错误: {str(e)}")
+        raise TushareError(f"获取A股每日筹码分布数据错误: {str(e)}") from e
 
 
 def get_stk_factor(ts_code: str = None, trade_date: str = None,
@@ -213,7 +220,7 @@ def get_stk_factor(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股每日个股技术面因子数据
@@ -221,9 +228,11 @@ def get_stk_factor(ts_code: str = None, trade_date: str = None,
                                      start_date=start_date, end_date=end_date)
         
         return stk_factor
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股每日个股技术面因子数据错误: {str(e)}")
-        raise Exception(f"获取A股每日个股技术面因子数据错误: {str(e)}")
+        raise TushareError(f"获取A股每日个股技术面因子数据错误: {str(e)}") from e
 
 def get_stk_factor_pro(ts_code: str = None, trade_date: str = None,
                     start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -508,7 +517,7 @@ def get_stk_factor_pro(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股每日个股技术面因子数据
@@ -516,9 +525,11 @@ def get_stk_factor_pro(ts_code: str = None, trade_date: str = None,
                                             start_date=start_date, end_date=end_date)
         
         return stk_factor_pro
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股每日个股技术面因子数据错误: {str(e)}")
-        raise Exception(f"获取A股每日个股技术面因子数据错误: {str(e)}")
+        raise TushareError(f"获取A股每日个股技术面因子数据错误: {str(e)}") from e
 
 
 def get_ccass_hold(ts_code: str = None, hk_code: str = None,
@@ -552,7 +563,7 @@ def get_ccass_hold(ts_code: str = None, hk_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取中央结算系统持股汇总
@@ -560,9 +571,11 @@ def get_ccass_hold(ts_code: str = None, hk_code: str = None,
                                             trade_date=trade_date, start_date=start_date, end_date=end_date)
         
         return ccass_hold
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取中央结算系统持股汇总数据错误: {str(e)}")
-        raise Exception(f"获取中央结算系统持股汇总数据错误: {str(e)}")
+        raise TushareError(f"获取中央结算系统持股汇总数据错误: {str(e)}") from e
 
 
 def get_ccass_hold_detail(ts_code: str = None, hk_code: str = None,
@@ -595,7 +608,7 @@ def get_ccass_hold_detail(ts_code: str = None, hk_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取中央结算系统机构席位持股明细
@@ -603,9 +616,11 @@ def get_ccass_hold_detail(ts_code: str = None, hk_code: str = None,
                                                     trade_date=trade_date, start_date=start_date, end_date=end_date)
         
         return ccass_hold_detail
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取中央结算系统机构席位持股明细数据错误: {str(e)}")
-        raise Exception(f"获取中央结算系统机构席位持股明细数据错误: {str(e)}")
+        raise TushareError(f"获取中央结算系统机构席位持股明细数据错误: {str(e)}") from e
 
 
 def get_hk_hold(code: str = None, ts_code: str = None, trade_date: str = None,
@@ -641,7 +656,7 @@ def get_hk_hold(code: str = None, ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取沪深港股通持股明细
@@ -649,9 +664,11 @@ def get_hk_hold(code: str = None, ts_code: str = None, trade_date: str = None,
                                 start_date=start_date, end_date=end_date, exchange=exchange)
         
         return hk_hold
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取沪深港股通持股明细数据错误: {str(e)}")
-        raise Exception(f"获取沪深港股通持股明细数据错误: {str(e)}")
+        raise TushareError(f"获取沪深港股通持股明细数据错误: {str(e)}") from e
 
 
 def get_stk_nineturn(ts_code: str = None, trade_date: str = None, freq: str = None,
@@ -690,7 +707,7 @@ def get_stk_nineturn(ts_code: str = None, trade_date: str = None, freq: str = No
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取个股九转数据
@@ -698,9 +715,11 @@ def get_stk_nineturn(ts_code: str = None, trade_date: str = None, freq: str = No
                                             start_date=start_date, end_date=end_date)
         
         return stk_nineturn
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取个股九转数据错误: {str(e)}")
-        raise Exception(f"获取个股九转数据错误: {str(e)}")
+        raise TushareError(f"获取个股九转数据错误: {str(e)}") from e
 
 def get_stk_surv(ts_code: str = None, trade_date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
@@ -733,7 +752,7 @@ def get_stk_surv(ts_code: str = None, trade_date: str = None, start_date: str =
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取上市公司机构调研记录数据
@@ -741,9 +760,11 @@ def get_stk_surv(ts_code: str = None, trade_date: str = None, start_date: str =
                                     start_date=start_date, end_date=end_date)
         
         return stk_surv
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司机构调研记录数据错误: {str(e)}")
-        raise Exception(f"获取上市公司机构调研记录数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司机构调研记录数据错误: {str(e)}") from e
 
 
 def get_broker_recommend(month: str = None) -> pd.DataFrame:
@@ -768,7 +789,7 @@ def get_broker_recommend(month: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # month参数不能为空
     if month is None:
@@ -779,7 +800,9 @@ def get_broker_recommend(month: str = None) -> pd.DataFrame:
         broker_recommend = pro.broker_recommend(month=month)
         
         return broker_recommend
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取券商月度金股数据错误: {str(e)}")
-        raise Exception(f"获取券商月度金股数据错误: {str(e)}")
+        raise TushareError(f"获取券商月度金股数据错误: {str(e)}") from e
 
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -143,7 +144,7 @@ def get_income(ts_code: str = None, ann_date: str = None, f_ann_date: str = None
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 参数检查
     if not ts_code:
@@ -157,9 +158,11 @@ def get_income(ts_code: str = None, ann_date: str = None, f_ann_date: str = None
                                 report_type=report_type, comp_type=comp_type)
         
         return income
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取利润表数据错误: {str(e)}")
-        raise Exception(f"获取利润表数据错误: {str(e)}")
+        raise TushareError(f"获取利润表数据错误: {str(e)}") from e
 
 
 def get_balancesheet(ts_code: str = None, ann_date: str = None,
@@ -347,7 +350,7 @@ def get_balancesheet(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 参数检查
     if not ts_code:
@@ -361,9 +364,11 @@ def get_balancesheet(ts_code: str = None, ann_date: str = None,
                                         report_type=report_type, comp_type=comp_type)
         
         return balancesheet
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取资产负债表数据错误: {str(e)}")
-        raise Exception(f"获取资产负债表数据错误: {str(e)}")
+        raise TushareError(f"获取资产负债表数据错误: {str(e)}") from e
 
 
 def get_cashflow(ts_code: str = None, ann_date: str = None, f_ann_date: str = None,
@@ -492,7 +497,7 @@ def get_cashflow(ts_code: str = None, ann_date: str = None, f_ann_date: str = No
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -506,9 +511,11 @@ def get_cashflow(ts_code: str = None, ann_date: str = None, f_ann_date: str = No
                                 report_type=report_type, comp_type=comp_type, is_calc=is_calc)
         
         return cashflow
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取现金流量表数据错误: {str(e)}")
-        raise Exception(f"获取现金流量表数据错误: {str(e)}")
+        raise TushareError(f"获取现金流量表数据错误: {str(e)}") from e
 
 
 def get_forecast(ts_code: str = None, ann_date: str = None,
@@ -549,7 +556,7 @@ def get_forecast(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code and not ann_date:
@@ -563,9 +570,11 @@ def get_forecast(ts_code: str = None, ann_date: str = None,
                                 type=type)
         
         return forecast
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取业绩预告数据错误: {str(e)}")
-        raise Exception(f"获取业绩预告数据错误: {str(e)}")
+        raise TushareError(f"获取业绩预告数据错误: {str(e)}") from e
 
 
 def get_express(ts_code: str = None, ann_date: str = None,
@@ -625,7 +634,7 @@ def get_express(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -638,9 +647,11 @@ def get_express(ts_code: str = None, ann_date: str = None,
                               start_date=start_date, end_date=end_date, period=period)
         
         return express
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取业绩快报数据错误: {str(e)}")
-        raise Exception(f"获取业绩快报数据错误: {str(e)}")
+        raise TushareError(f"获取业绩快报数据错误: {str(e)}") from e
 
 
 def get_dividend(ts_code: str = None, ann_date: str = None,
@@ -684,7 +695,7 @@ def get_dividend(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code and not ann_date and not record_date and not ex_date and not imp_ann_date:
@@ -698,9 +709,11 @@ def get_dividend(ts_code: str = None, ann_date: str = None,
                                 imp_ann_date=imp_ann_date)
         
         return dividend
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取分红送股数据错误: {str(e)}")
-        raise Exception(f"获取分红送股数据错误: {str(e)}")
+        raise TushareError(f"获取分红送股数据错误: {str(e)}") from e
 
 
 def get_fina_indicator(ts_code: str = None, ann_date: str = None,
@@ -895,7 +908,7 @@ def get_fina_indicator(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -908,9 +921,11 @@ def get_fina_indicator(ts_code: str = None, ann_date: str = None,
                                             start_date=start_date, end_date=end_date, period=period)
         
         return fina_indicator
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取财务指标数据错误: {str(e)}")
-        raise Exception(f"获取财务指标数据错误: {str(e)}")
+        raise TushareError(f"获取财务指标数据错误: {str(e)}") from e
 
 
 def get_fina_audit(ts_code: str = None, ann_date: str = None,
@@ -943,7 +958,7 @@ def get_fina_audit(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -956,9 +971,11 @@ def get_fina_audit(ts_code: str = None, ann_date: str = None,
                                     start_date=start_date, end_date=end_date, period=period)
         
         return fina_audit
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取定期财务审计意见数据错误: {str(e)}")
-        raise Exception(f"获取定期财务审计意见数据错误: {str(e)}")
+        raise TushareError(f"获取定期财务审计意见数据错误: {str(e)}") from e
 
 
 def get_fina_mainbz(ts_code: str = None,
@@ -994,7 +1011,7 @@ def get_fina_mainbz(ts_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -1007,9 +1024,11 @@ def get_fina_mainbz(ts_code: str = None,
                                      type=type, start_date=start_date, end_date=end_date)
         
         return fina_mainbz
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司主营业务构成数据错误: {str(e)}")
-        raise Exception(f"获取上市公司主营业务构成数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司主营业务构成数据错误: {str(e)}") from e
 
 
 def get_disclosure_date(ts_code: str = None, end_date: str = None,
@@ -1040,7 +1059,7 @@ def get_disclosure_date(ts_code: str = None, end_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     try:
         # 获取财报披露计划日期
@@ -1049,6 +1068,8 @@ def get_disclosure_date(ts_code: str = None, end_date: str = None,
                                                 actual_date=actual_adte)
         
         return disclosure_date
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取财报披露计划日期数据错误: {str(e)}")
-        raise Exception(f"获取财报披露计划日期数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取财报披露计划日期数据错误: {str(e)}") from e
\ No newline at end of file
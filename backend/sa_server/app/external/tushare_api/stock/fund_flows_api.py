@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -51,7 +52,7 @@ def get_moneyflow(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取沪深A股票资金流向
@@ -59,9 +60,11 @@ def get_moneyflow(ts_code: str = None, trade_date: str = None,
                                     start_date=start_date, end_date=end_date)
 
         return moneyflow
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取沪深A股票资金流向数据错误: {str(e)}")
-        raise Exception(f"获取沪深A股票资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取沪深A股票资金流向数据错误: {str(e)}") from e
 
 
 def get_moneyflow_ths(ts_code: str = None, trade_date: str = None,
@@ -99,7 +102,7 @@ def get_moneyflow_ths(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺个股资金流向
@@ -107,9 +110,11 @@ def get_moneyflow_ths(ts_code: str = None, trade_date: str = None,
                                             start_date=start_date, end_date=end_date)
 
         return moneyflow_ths
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺个股资金流向数据错误: {str(e)}")
-        raise Exception(f"获取同花顺个股资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺个股资金流向数据错误: {str(e)}") from e
     
 
 def get_moneyflow_dc(ts_code: str = None, trade_date: str = None,
@@ -149,7 +154,7 @@ def get_moneyflow_dc(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富个股资金流向
@@ -157,9 +162,11 @@ def get_moneyflow_dc(ts_code: str = None, trade_date: str = None,
                                             start_date=start_date, end_date=end_date)
 
         return moneyflow_dc
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取东方财富个股资金流向数据错误: {str(e)}")
-        raise Exception(f"获取东方财富个股资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取东方财富个股资金流向数据错误: {str(e)}") from e
 
 
 def get_moneyflow_cnt_ths(ts_code: str = None, trade_date: str = None,
@@ -196,7 +203,7 @@ def get_moneyflow_cnt_ths(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺概念板块每日资金流向
@@ -204,9 +211,11 @@ def get_moneyflow_cnt_ths(ts_code: str = None, trade_date: str = None,
                                                     start_date=start_date, end_date=end_date)
 
         return moneyflow_cnt_ths
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺概念板块每日资金流向数据错误: {str(e)}")
-        raise Exception(f"获取同花顺概念板块每日资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺概念板块每日资金流向数据错误: {str(e)}") from e
     
 
 def get_moneyflow_ind_ths(ts_code: str = None, trade_date: str = None,
@@ -243,7 +252,7 @@ def get_moneyflow_ind_ths(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺行业资金流向
@@ -251,9 +260,11 @@ def get_moneyflow_ind_ths(ts_code: str = None, trade_date: str = None,
                                                     start_date=start_date, end_date=end_date)
 
         return moneyflow_ind_ths
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺行业资金流向数据错误: {str(e)}")
-        raise Exception(f"获取同花顺行业资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺行业资金流向数据错误: {str(e)}") from e
 
 
 def get_moneyflow_ind_dc(ts_code: str = None, trade_date: str = None,
@@ -297,7 +308,7 @@ def get_moneyflow_ind_dc(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富板块资金流向
@@ -305,9 +316,11 @@ def get_moneyflow_ind_dc(ts_code: str = None, trade_date: str = None,
                                                     start_date=start_date, end_date=end_date, content_type=content_type)
 
         return moneyflow_ind_dc
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取东方财富板块资金流向数据错误: {str(e)}")
-        raise Exception(f"获取东方财富板块资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取东方财富板块资金流向数据错误: {str(e)}") from e
 
 
 def get_moneyflow_mkt_dc(trade_date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -345,16 +358,18 @@ def get_moneyflow_mkt_dc(trade_date: str = None, start_date: str = None, end_dat
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富大盘资金流向
         moneyflow_mkt_dc = pro.moneyflow_mkt_dc(trade_date=trade_date, start_date=start_date, end_date=end_date)
         
         return moneyflow_mkt_dc
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取东方财富大盘资金流向数据错误: {str(e)}")
-        raise Exception(f"获取东方财富大盘资金流向数据错误: {str(e)}")
+        raise TushareError(f"获取东方财富大盘资金流向数据错误: {str(e)}") from e
 
 
 def get_moneyflow_hsgt(trade_date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -383,13 +398,15 @@ def get_moneyflow_hsgt(trade_date: str = None, start_date: str = None, end_date:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取获取沪股通、深股通、港股通每日资金流向
         moneyflow_hsgt = pro.moneyflow_hsgt(trade_date=trade_date, start_date=start_date, end_date=end_date)
 
         return moneyflow_hsgt
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取获取沪股通、深股通、港股通每日资金流向数据错误: {str(e)}")
-        raise Exception(f"获取获取沪股通、深股通、港股通每日资金流向数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取获取沪股通、深股通、港股通每日资金流向数据错误: {str(e)}") from e
\ No newline at end of file
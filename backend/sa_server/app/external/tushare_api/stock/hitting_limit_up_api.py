@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -31,16 +32,18 @@ def get_kpl_concept(trade_date: str = None, ts_code: str = None, name: str = Non
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取开盘啦概念题材列表
         kpl_concept = pro.kpl_concept(trade_date=trade_date, ts_code=ts_code, name=name)
         
         return kpl_concept
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取开盘啦概念题材列表数据错误: {str(e)}")
-        raise Exception(f"获取开盘啦概念题材列表数据错误: {str(e)}")
+        raise TushareError(f"获取开盘啦概念题材列表数据错误: {str(e)}") from e
 
 
 def get_kpl_concept_cons(trade_date: str = None, ts_code: str = None, con_code: str = None) -> pd.DataFrame:
@@ -70,7 +73,7 @@ def get_kpl_concept_cons(trade_date: str = None, ts_code: str = None, con_code:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取开盘啦概念题材成分股列表
@@ -81,9 +84,11 @@ def get_kpl_concept_cons(trade_date: str = None, ts_code: str = None, con_code:
         )
         
         return kpl_concept_cons
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取开盘啦概念题材成分股列表数据错误: {str(e)}")
-        raise Exception(f"获取开盘啦概念题材成分股列表数据错误: {str(e)}")
+        raise TushareError(f"获取开盘啦概念题材成分股列表数据错误: {str(e)}") from e
 
 
 def get_kpl_list(ts_code: str = None, trade_date: str = None, tag: str = None,
@@ -133,7 +138,7 @@ def get_kpl_list(ts_code: str = None, trade_date: str = None, tag: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取开盘啦涨停、跌停、炸板等榜单数据
@@ -141,9 +146,11 @@ def get_kpl_list(ts_code: str = None, trade_date: str = None, tag: str = None,
                                 tag=tag, start_date=start_date, end_date=end_date)
         
         return kpl_list
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取开盘啦涨停、跌停、炸板等榜单数据错误: {str(e)}")
-        raise Exception(f"获取开盘啦涨停、跌停、炸板等榜单数据错误: {str(e)}")
+        raise TushareError(f"获取开盘啦涨停、跌停、炸板等榜单数据错误: {str(e)}") from e
 
 
 def get_top_list(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
@@ -181,16 +188,18 @@ def get_top_list(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取龙虎榜每日交易明细
         top_list = pro.top_list(trade_date=trade_date, ts_code=ts_code)
         
         return top_list
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取龙虎榜每日交易明细数据错误: {str(e)}")
-        raise Exception(f"获取龙虎榜每日交易明细数据错误: {str(e)}")
+        raise TushareError(f"获取龙虎榜每日交易明细数据错误: {str(e)}") from e
 
 
 def get_top_inst(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
@@ -222,7 +231,7 @@ def get_top_inst(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 股票代码不能为空
     if ts_code is None:
@@ -233,9 +242,11 @@ def get_top_inst(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
         top_inst = pro.top_inst(trade_date=trade_date, ts_code=ts_code)
         
         return top_inst
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取龙虎榜机构成交明细数据错误: {str(e)}")
-        raise Exception(f"获取龙虎榜机构成交明细数据错误: {str(e)}")
+        raise TushareError(f"获取龙虎榜机构成交明细数据错误: {str(e)}") from e
 
 
 def get_limit_list_ths(trade_date: str = None, ts_code: str = None, limit_type: str = None,
@@ -286,7 +297,7 @@ def get_limit_list_ths(trade_date: str = None, ts_code: str = None, limit_type:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺涨停榜单数据
@@ -300,9 +311,11 @@ def get_limit_list_ths(trade_date: str = None, ts_code: str = None, limit_type:
         )
         
         return limit_list_ths
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺涨停榜单数据错误: {str(e)}")
-        raise Exception(f"获取同花顺涨停榜单数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺涨停榜单数据错误: {str(e)}") from e
 
 
 def get_limit_list_d(trade_date: str = None, ts_code: str = None, limit_type: str = None,
@@ -347,7 +360,7 @@ def get_limit_list_d(trade_date: str = None, ts_code: str = None, limit_type: st
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取A股每日涨跌停、炸板数据
@@ -361,9 +374,11 @@ def get_limit_list_d(trade_date: str = None, ts_code: str = None, limit_type: st
         )
         
         return limit_list_ths
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取A股每日涨跌停、炸板数据错误: {str(e)}")
-        raise Exception(f"获取A股每日涨跌停、炸板数据错误: {str(e)}")
+        raise TushareError(f"获取A股每日涨跌停、炸板数据错误: {str(e)}") from e
 
 
 def get_limit_step(trade_date: str = None, ts_code: str = None,
@@ -393,7 +408,7 @@ def get_limit_step(trade_date: str = None, ts_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取每天连板个数晋级的股票
@@ -406,9 +421,11 @@ def get_limit_step(trade_date: str = None, ts_code: str = None,
         )
         
         return limit_step
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取每天连板个数晋级的股票数据错误: {str(e)}")
-        raise Exception(f"获取每天连板个数晋级的股票数据错误: {str(e)}")
+        raise TushareError(f"获取每天连板个数晋级的股票数据错误: {str(e)}") from e
 
 
 def get_limit_cpt_list(trade_date: str = None, ts_code: str = None,
@@ -442,7 +459,7 @@ def get_limit_cpt_list(trade_date: str = None, ts_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取每天涨停股票最多最强的概念板块
@@ -454,9 +471,11 @@ def get_limit_cpt_list(trade_date: str = None, ts_code: str = None,
         )
         
         return limit_cpt_list
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取每天涨停股票最多最强的概念板块数据错误: {str(e)}")
-        raise Exception(f"获取每天涨停股票最多最强的概念板块数据错误: {str(e)}")
+        raise TushareError(f"获取每天涨停股票最多最强的概念板块数据错误: {str(e)}") from e
 
 
 def get_ths_index(trade_date: str = None, exchange: str = None, type: str = None) -> pd.DataFrame:
@@ -484,7 +503,7 @@ def get_ths_index(trade_date: str = None, exchange: str = None, type: str = None
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺板块指数
@@ -495,9 +514,11 @@ def get_ths_index(trade_date: str = None, exchange: str = None, type: str = None
         )
         
         return ths_index
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺概念股指数列表数据错误: {str(e)}")
-        raise Exception(f"获取同花顺概念股指数列表数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺概念股指数列表数据错误: {str(e)}") from e
 
 
 def get_ths_daily(ts_code: str = None, trade_date: str = None,
@@ -535,7 +556,7 @@ def get_ths_daily(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺板块指数行情
@@ -547,9 +568,11 @@ def get_ths_daily(ts_code: str = None, trade_date: str = None,
         )
         
         return ths_daily
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺板块指数行情数据错误: {str(e)}")
-        raise Exception(f"获取同花顺板块指数行情数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺板块指数行情数据错误: {str(e)}") from e
 
 
 def get_ths_member(ts_code: str = None, con_code: str = None) -> pd.DataFrame:
@@ -577,7 +600,7 @@ def get_ths_member(ts_code: str = None, con_code: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺概念板块成分列表
@@ -587,9 +610,11 @@ def get_ths_member(ts_code: str = None, con_code: str = None) -> pd.DataFrame:
         )
         
         return ths_member
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺概念板块成分列表数据错误: {str(e)}")
-        raise Exception(f"获取同花顺概念板块成分列表数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺概念板块成分列表数据错误: {str(e)}") from e
 
 
 def get_dc_index(ts_code: str = None, name: str = None, trade_date: str = None,
@@ -627,7 +652,7 @@ def get_dc_index(ts_code: str = None, name: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富每个交易日的概念板块
@@ -640,9 +665,11 @@ def get_dc_index(ts_code: str = None, name: str = None, trade_date: str = None,
         )
         
         return dc_index
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取东方财富每个交易日的概念板块数据错误: {str(e)}")
-        raise Exception(f"获取东方财富每个交易日的概念板块数据错误: {str(e)}")
+        raise TushareError(f"获取东方财富每个交易日的概念板块数据错误: {str(e)}") from e
 
 
 def get_dc_member(ts_code: str = None, con_code: str = None, trade_date: str = None) -> pd.DataFrame:
@@ -669,7 +696,7 @@ def get_dc_member(ts_code: str = None, con_code: str = None, trade_date: str = N
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富板块每日成分数据
@@ -680,9 +707,11 @@ def get_dc_member(ts_code: str = None, con_code: str = None, trade_date: str = N
         )
         
         return dc_member
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取东方财富概念板块成分列表数据错误: {str(e)}")
-        raise Exception(f"获取东方财富概念板块成分列表数据错误: {str(e)}")
+        raise TushareError(f"获取东方财富概念板块成分列表数据错误: {str(e)}") from e
 
 
 def get_stk_auction(ts_code: str = None, trade_date: str = None,
@@ -716,7 +745,7 @@ def get_stk_auction(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取集合竞价成交数据
@@ -728,9 +757,11 @@ def get_stk_auction(ts_code: str = None, trade_date: str = None,
         )
         
         return stk_auction
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取当日个股和ETF的集合竞价成交数据错误: {str(e)}")
-        raise Exception(f"获取当日个股和ETF的集合竞价成交数据错误: {str(e)}")
+        raise TushareError(f"获取当日个股和ETF的集合竞价成交数据错误: {str(e)}") from e
 
 
 def get_hm_list(name: str = None) -> pd.DataFrame:
@@ -754,16 +785,18 @@ def get_hm_list(name: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取游资分类名录信息
         hm_list = pro.hm_list(name=name)
         
         return hm_list
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取游资分类名录信息数据错误: {str(e)}")
-        raise Exception(f"获取游资分类名录信息数据错误: {str(e)}")
+        raise TushareError(f"获取游资分类名录信息数据错误: {str(e)}") from e
 
 
 def get_hm_detail(trade_date: str = None, ts_code: str = None, hm_name: str = None,
@@ -798,7 +831,7 @@ def get_hm_detail(trade_date: str = None, ts_code: str = None, hm_name: str = No
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取每日游资交易明细
@@ -811,9 +844,11 @@ def get_hm_detail(trade_date: str = None, ts_code: str = None, hm_name: str = No
         )
         
         return hm_detail
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取每日游资交易明细数据错误: {str(e)}")
-        raise Exception(f"获取每日游资交易明细数据错误: {str(e)}")
+        raise TushareError(f"获取每日游资交易明细数据错误: {str(e)}") from e
 
 
 def get_ths_hot(trade_date: str = None, ts_code: str = None,
@@ -849,7 +884,7 @@ def get_ths_hot(trade_date: str = None, ts_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取同花顺App热榜数据
@@ -861,9 +896,11 @@ def get_ths_hot(trade_date: str = None, ts_code: str = None,
         )
         
         return ths_hot
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取同花顺App热榜数据数据错误: {str(e)}")
-        raise Exception(f"获取同花顺App热榜数据数据错误: {str(e)}")
+        raise TushareError(f"获取同花顺App热榜数据数据错误: {str(e)}") from e
 
 
 def get_dc_hot(trade_date: str = None, ts_code: str = None,
@@ -897,7 +934,7 @@ def get_dc_hot(trade_date: str = None, ts_code: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取东方财富App热榜数据
@@ -910,8 +947,10 @@ def get_dc_hot(trade_date: str = None, ts_code: str = None,
         )
         
         return dc_hot
+    except TushareError:
+        raise
     except Exception as e:
         print(f"东方财富App热榜数据数据错误: {str(e)}")
-        raise Exception(f"东方财富App热榜数据数据错误: {str(e)}")
+        raise TushareError(f"东方财富App热榜数据数据错误: {str(e)}") from e
 
 
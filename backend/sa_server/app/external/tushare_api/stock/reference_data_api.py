@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -37,7 +38,7 @@ def get_top10_holders(ts_code: str = None, period: str = None, ann_date: str = N
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 参数检查
     if not ts_code:
@@ -50,9 +51,11 @@ def get_top10_holders(ts_code: str = None, period: str = None, ann_date: str = N
                                             start_date=start_date, end_date=end_date)
         
         return top10_holders
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司前十大股东数据错误: {str(e)}")
-        raise Exception(f"获取上市公司前十大股东数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司前十大股东数据错误: {str(e)}") from e
 
 
 def get_top10_floatholders(ts_code: str = None, period: str = None, ann_date: str = None,
@@ -86,7 +89,7 @@ def get_top10_floatholders(ts_code: str = None, period: str = None, ann_date: st
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     # 参数检查
     if not ts_code:
@@ -99,9 +102,11 @@ def get_top10_floatholders(ts_code: str = None, period: str = None, ann_date: st
                                                     start_date=start_date, end_date=end_date)
         
         return top10_floatholders
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司前十大流通股东数据错误: {str(e)}")
-        raise Exception(f"获取上市公司前十大流通股东数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司前十大流通股东数据错误: {str(e)}") from e
 
 
 def get_pledge_stat(ts_code: str = None, end_date: str = None) -> pd.DataFrame:
@@ -130,16 +135,18 @@ def get_pledge_stat(ts_code: str = None, end_date: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取上市公司股东质押数据
         pledge_stat = pro.pledge_stat(ts_code=ts_code, end_date=end_date)
         
         return pledge_stat
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司股东质押数据错误: {str(e)}")
-        raise Exception(f"获取上市公司股东质押数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司股东质押数据错误: {str(e)}") from e
 
 
 def get_pledge_detail(ts_code: str = None) -> pd.DataFrame:
@@ -174,7 +181,7 @@ def get_pledge_detail(ts_code: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
 
     # 参数检查
     if not ts_code:
@@ -186,9 +193,11 @@ def get_pledge_detail(ts_code: str = None) -> pd.DataFrame:
         pledge_detail = pro.pledge_detail(ts_code=ts_code)
         
         return pledge_detail
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取股权质押明细数据错误: {str(e)}")
-        raise Exception(f"获取股权质押明细数据错误: {str(e)}")
+        raise TushareError(f"获取股权质押明细数据错误: {str(e)}") from e
 
 
 def get_repurchase(ann_date: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -219,16 +228,18 @@ def get_repurchase(ann_date: str = None, start_date: str = None, end_date: str =
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取股票回购数据
         repurchase = pro.repurchase(ann_date=ann_date, start_date=start_date, end_date=end_date)
         
         return repurchase
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取股票回购数据错误: {str(e)}")
-        raise Exception(f"获取股票回购数据错误: {str(e)}")
+        raise TushareError(f"获取股票回购数据错误: {str(e)}") from e
 
 
 def get_share_float(ts_code: str = None, ann_date: str = None, float_date: str = None,
@@ -261,7 +272,7 @@ def get_share_float(ts_code: str = None, ann_date: str = None, float_date: str =
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取限售股解禁
@@ -270,9 +281,11 @@ def get_share_float(ts_code: str = None, ann_date: str = None, float_date: str =
                                       end_date=end_date)
         
         return share_float
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取限售股解禁数据错误: {str(e)}")
-        raise Exception(f"获取限售股解禁数据错误: {str(e)}")
+        raise TushareError(f"获取限售股解禁数据错误: {str(e)}") from e
 
 
 def get_block_trade(ts_code: str = None, trade_date: str = None,
@@ -304,7 +317,7 @@ def get_block_trade(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取大宗交易数据
@@ -312,9 +325,11 @@ def get_block_trade(ts_code: str = None, trade_date: str = None,
                                       start_date=start_date, end_date=end_date)
         
         return block_trade
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取大宗交易数据错误: {str(e)}")
-        raise Exception(f"获取大宗交易数据错误: {str(e)}")
+        raise TushareError(f"获取大宗交易数据错误: {str(e)}") from e
 
 
 def get_stk_holdernumber(ts_code: str = None, ann_date: str = None, enddate: str = None,
@@ -344,7 +359,7 @@ def get_stk_holdernumber(ts_code: str = None, ann_date: str = None, enddate: str
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取股东户数数据
@@ -353,9 +368,11 @@ def get_stk_holdernumber(ts_code: str = None, ann_date: str = None, enddate: str
                                                 end_date=end_date)
         
         return stk_holdernumber
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取股东户数数据错误: {str(e)}")
-        raise Exception(f"获取股东户数数据错误: {str(e)}")
+        raise TushareError(f"获取股东户数数据错误: {str(e)}") from e
 
 
 def get_stk_holdertrade(ts_code: str = None, ann_date: str = None, start_date: str = None,
@@ -395,7 +412,7 @@ def get_stk_holdertrade(ts_code: str = None, ann_date: str = None, start_date: s
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取股东增减持数据
@@ -404,6 +421,8 @@ def get_stk_holdertrade(ts_code: str = None, ann_date: str = None, start_date: s
                                                 trade_type=trade_type, holder_type=holder_type)
         
         return stk_holdertrade
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取股东增减持数据错误: {str(e)}")
-        raise Exception(f"获取股东增减持数据错误: {str(e)}")
\ No newline at end of file
+        raise TushareError(f"获取股东增减持数据错误: {str(e)}") from e
\ No newline at end of file
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.external.tushare_client import get_tushare_client
+from app.external.tushare_rate_limiter import TushareError
 
 
 # 获取Tushare API实例
@@ -46,7 +47,7 @@ def get_stock_basic(ts_code: str = None, name: str = None, market: str = None, l
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取指数基本信息
@@ -55,9 +56,11 @@ def get_stock_basic(ts_code: str = None, name: str = None, market: str = None, l
 
         
         return stock_basic
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取基础信息数据错误: {str(e)}")
-        raise Exception(f"获取基础信息数据错误: {str(e)}")
+        raise TushareError(f"获取基础信息数据错误: {str(e)}") from e
 
 
 def get_stk_premarket(ts_code: str = None, trade_date: str = None,
@@ -89,7 +92,7 @@ def get_stk_premarket(ts_code: str = None, trade_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取股本情况（盘前）
@@ -98,9 +101,11 @@ def get_stk_premarket(ts_code: str = None, trade_date: str = None,
 
         
         return stk_premarket
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取当日股票的股本数据错误: {str(e)}")
-        raise Exception(f"获取当日股票的股本数据错误: {str(e)}")
+        raise TushareError(f"获取当日股票的股本数据错误: {str(e)}") from e
 
 
 def get_trade_cal(exchange: str = None, start_date: str = None,
@@ -128,7 +133,7 @@ def get_trade_cal(exchange: str = None, start_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取各大交易所交易日历数据,默认提取的是上交所
@@ -137,9 +142,11 @@ def get_trade_cal(exchange: str = None, start_date: str = None,
 
         
         return trade_cal
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取交易日历数据错误: {str(e)}")
-        raise Exception(f"获取交易日历数据错误: {str(e)}")
+        raise TushareError(f"获取交易日历数据错误: {str(e)}") from e
 
 
 def get_namechange(ts_code: str = None, start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -166,7 +173,7 @@ def get_namechange(ts_code: str = None, start_date: str = None, end_date: str =
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取历史名称变更记录
@@ -174,9 +181,11 @@ def get_namechange(ts_code: str = None, start_date: str = None, end_date: str =
 
         
         return namechange
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取历史名称变更记录数据错误: {str(e)}")
-        raise Exception(f"获取历史名称变更记录数据错误: {str(e)}")
+        raise TushareError(f"获取历史名称变更记录数据错误: {str(e)}") from e
 
 
 def get_hs_const(hs_type: str = None, is_new: str = None) -> pd.DataFrame:
@@ -201,7 +210,7 @@ def get_hs_const(hs_type: str = None, is_new: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取沪股通、深股通成分数据
@@ -209,9 +218,11 @@ def get_hs_const(hs_type: str = None, is_new: str = None) -> pd.DataFrame:
 
         
         return hs_const
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取沪股通、深股通成分数据错误: {str(e)}")
-        raise Exception(f"获取沪股通、深股通成分数据错误: {str(e)}")
+        raise TushareError(f"获取沪股通、深股通成分数据错误: {str(e)}") from e
 
 
 def get_stock_company(ts_code: str = None, exchange: str = None) -> pd.DataFrame:
@@ -250,7 +261,7 @@ def get_stock_company(ts_code: str = None, exchange: str = None) -> pd.DataFrame
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取上市公司基础信息
@@ -258,9 +269,11 @@ def get_stock_company(ts_code: str = None, exchange: str = None) -> pd.DataFrame
 
         
         return stock_company
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司基础信息数据错误: {str(e)}")
-        raise Exception(f"获取上市公司基础信息数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司基础信息数据错误: {str(e)}") from e
 
 
 def get_stk_managers(ts_code: str = None, ann_date: str = None,
@@ -296,7 +309,7 @@ def get_stk_managers(ts_code: str = None, ann_date: str = None,
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取上市公司管理层
@@ -305,9 +318,11 @@ def get_stk_managers(ts_code: str = None, ann_date: str = None,
 
         
         return stk_managers
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司管理层数据错误: {str(e)}")
-        raise Exception(f"获取上市公司管理层数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司管理层数据错误: {str(e)}") from e
 
 
 def get_stk_rewards(ts_code: str, end_date: str = None) -> pd.DataFrame:
@@ -335,16 +350,18 @@ def get_stk_rewards(ts_code: str, end_date: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取上市公司管理层薪酬和持股
         stk_rewards = pro.stk_rewards(ts_code=ts_code, end_date=end_date)
 
         return stk_rewards
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取上市公司管理层薪酬和持股数据错误: {str(e)}")
-        raise Exception(f"获取上市公司管理层薪酬和持股数据错误: {str(e)}")
+        raise TushareError(f"获取上市公司管理层薪酬和持股数据错误: {str(e)}") from e
 
 
 def get_new_share(start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -378,16 +395,18 @@ def get_new_share(start_date: str = None, end_date: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取新股上市列表
         new_share = pro.new_share(start_date=start_date, end_date=end_date)
 
         return new_share
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取新股上市列表数据错误: {str(e)}")
-        raise Exception(f"获取新股上市列表数据错误: {str(e)}")
+        raise TushareError(f"获取新股上市列表数据错误: {str(e)}") from e
 
 
 def get_bak_basic(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
@@ -432,16 +451,18 @@ def get_bak_basic(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
     """
     if not pro:
         # API未初始化
-        raise Exception("初始化TushareAPI失败")
+        raise TushareError("初始化TushareAPI失败")
     
     try:
         # 获取备用基础列表
         bak_basic = pro.bak_basic(trade_date=trade_date, ts_code=ts_code)
 
         return bak_basic
+    except TushareError:
+        raise
     except Exception as e:
         print(f"获取备用基础列表数据错误: {str(e)}")
-        raise Exception(f"获取备用基础列表数据错误: {str(e)}")
+        raise TushareError(f"获取备用基础列表数据错误: {str(e)}") from e
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+# app/external/tushare_async.py
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.config.config import settings
+from app.external.tushare_rate_limiter import TushareDeferred, TushareError, backoff_delay, deferred_waits
+
+
+T = TypeVar('T')
+
+# Tushare SDK基于requests同步请求，在专用线程池中执行，避免阻塞事件循环
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# 每个事件循环一个信号量，限制同时在途的调用数（包括已超时但线程仍在执行的调用）
+_semaphores = {}
+
+
+class TushareTimeoutError(TushareError):
+    """Tushare调用超时"""
+    pass
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    获取Tushare调用专用的线程池，大小取配置项TUSHARE_MAX_WORKERS
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.TUSHARE_MAX_WORKERS,
+                    thread_name_prefix='tushare'
+                )
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.TUSHARE_MAX_WORKERS)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def shutdown_executor(wait: bool = False):
+    """
+    关闭线程池，应用退出时调用；之后的调用会重新创建线程池
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+    _semaphores.clear()
+
+
+def _call_deferred(func: Callable[..., T], prepaid: Dict[str, int], args, kwargs) -> T:
+    # 工作线程中不等待令牌或退避，需要等待时抛出TushareDeferred
+    with deferred_waits(prepaid):
+        return func(*args, **kwargs)
+
+
+async def _submit(func: Callable[..., T], prepaid: Dict[str, int], args, kwargs, timeout: Optional[float]) -> T:
+    semaphore = _get_semaphore()
+    await semaphore.acquire()
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(get_executor(), _call_deferred, func, prepaid, args, kwargs)
+    except BaseException:
+        semaphore.release()
+        raise
+    # 线程执行结束（包括超时之后）才释放名额
+    future.add_done_callback(lambda _: semaphore.release())
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout or None)
+    except asyncio.TimeoutError:
+        name = getattr(func, '__name__', repr(func))
+        print(f"Tushare调用超时: {name}, 超过 {timeout} 秒")
+        raise TushareTimeoutError(f"Tushare调用超时: {name}, 超过 {timeout} 秒")
+
+
+async def run_tushare(func: Callable[..., T], *args, timeout: Optional[float] = None, **kwargs) -> T:
+    """
+    在专用线程池中执行同步的Tushare接口函数（app.external.tushare_api中的get_*函数）
+
+    - 同时执行的调用数不超过TUSHARE_MAX_WORKERS，其余调用在事件循环中等待，不占用线程
+    - 接口限频的令牌等待和失败后的退避重试在事件循环中进行（await asyncio.sleep），
+      只有实际的HTTP请求占用线程，慢接口的等待不会阻塞其他接口
+    - 超时只计算实际执行的时间；超时后线程中的请求无法中断，会继续占用名额直到返回，
+      避免超时的请求不断累积压垮线程池
+
+    参数:
+        func: 同步函数，如get_hk_daily
+        *args: 位置参数
+        timeout: 超时秒数，默认取配置项TUSHARE_TIMEOUT，为None或0时不限
+        **kwargs: 关键字参数
+
+    返回:
+        func的返回值（通常为DataFrame）
+    """
+    if timeout is None:
+        timeout = settings.TUSHARE_TIMEOUT
+
+    # 按接口名记录已预订、等待结束的令牌，重新提交时直接使用
+    prepaid: Dict[str, int] = {}
+    max_retries = settings.TUSHARE_MAX_RETRIES
+    attempt = 0
+    while True:
+        try:
+            return await _submit(func, prepaid, args, kwargs, timeout)
+        except TushareDeferred as e:
+            if e.error is None:
+                prepaid[e.api_name] = prepaid.get(e.api_name, 0) + 1
+                await asyncio.sleep(e.wait)
+                continue
+            if attempt >= max_retries:
+                raise e.error_type(f"{e.api_name} 重试 {max_retries} 次后仍然失败: {str(e.error)}") from e.error
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"Tushare接口 {e.api_name} 调用失败，{delay:.1f} 秒后第 {attempt} 次重试: {str(e.error)}")
+            await asyncio.sleep(delay)
+
+
+def async_tushare(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """
+    将同步的Tushare接口函数包装为协程函数，参数与原函数一致，另可传入timeout
+
+    示例:
+        get_hk_daily_async = async_tushare(get_hk_daily)
+        df = await get_hk_daily_async(ts_code='00700.HK', timeout=30)
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, timeout: Optional[float] = None, **kwargs):
+        return await run_tushare(func, *args, timeout=timeout, **kwargs)
+    return wrapper
@@ -0,0 +1,165 @@
+# app/external/tushare_chunking.py
+import asyncio
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from app.external.tushare_async import run_tushare
+
+
+@dataclass(frozen=True)
+class ChunkSpec:
+    """有单次行数上限的Tushare接口"""
+    api_name: str
+    # 单次调用最多返回的行数（见各接口文档的"限量"）
+    row_limit: int
+    # 不指定代码（全市场）时每个交易日的大致行数，用于估算初始窗口大小
+    market_rows_per_day: float
+    # 指定代码时每个交易日的大致行数
+    code_rows_per_day: float = 1.0
+    # start_date/end_date参数的格式
+    date_format: str = '%Y%m%d'
+    # 只支持按单个交易日查询的接口，区间拆分为逐日请求，值为日期参数名
+    single_date_param: Optional[str] = None
+
+
+# 港股约2600只、A股约5300只；窗口按自然日拆分，连续交易日超过上限时由对半拆分兜底
+CHUNK_SPECS: Dict[str, ChunkSpec] = {spec.api_name: spec for spec in [
+    ChunkSpec('hk_tradecal', row_limit=2000, market_rows_per_day=1),
+    ChunkSpec('hk_daily', row_limit=5000, market_rows_per_day=2600),
+    ChunkSpec('hk_daily_adj', row_limit=6000, market_rows_per_day=2600),
+    ChunkSpec('hk_mins', row_limit=5000, market_rows_per_day=331, code_rows_per_day=331,
+              date_format='%Y-%m-%d %H:%M:%S'),
+    ChunkSpec('moneyflow', row_limit=6000, market_rows_per_day=5300),
+    ChunkSpec('moneyflow_ths', row_limit=6000, market_rows_per_day=5300),
+    ChunkSpec('moneyflow_dc', row_limit=6000, market_rows_per_day=5300),
+    ChunkSpec('moneyflow_cnt_ths', row_limit=5000, market_rows_per_day=400),
+    ChunkSpec('moneyflow_ind_ths', row_limit=5000, market_rows_per_day=100),
+    ChunkSpec('moneyflow_mkt_dc', row_limit=3000, market_rows_per_day=1),
+    ChunkSpec('kpl_list', row_limit=8000, market_rows_per_day=200),
+    ChunkSpec('top_list', row_limit=10000, market_rows_per_day=60, single_date_param='trade_date'),
+]}
+
+# 分钟线每个交易日的bar数相对1分钟线的比例
+_FREQ_SCALE = {'1min': 1, '5min': 1 / 5, '15min': 1 / 15, '30min': 1 / 30, '60min': 1 / 60}
+# 初始窗口按上限的八成估算，给数据量波动留出余量
+_FILL_RATIO = 0.8
+
+
+def _has_time(spec: ChunkSpec) -> bool:
+    return '%H' in spec.date_format
+
+
+def _window_days(spec: ChunkSpec, kwargs: Dict[str, Any]) -> int:
+    """估算不超过行数上限的窗口天数"""
+    rows_per_day = spec.code_rows_per_day if kwargs.get('ts_code') else spec.market_rows_per_day
+    freq = kwargs.get('freq')
+    if freq in _FREQ_SCALE:
+        rows_per_day *= _FREQ_SCALE[freq]
+    return max(1, int(spec.row_limit * _FILL_RATIO / max(rows_per_day, 1e-6)))
+
+
+def split_windows(spec: ChunkSpec, start: pd.Timestamp, end: pd.Timestamp,
+                  days: int) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    将[start, end]按自然日拆分为不超过days天的窗口，窗口首尾相接且不重叠
+    """
+    windows = []
+    step = pd.Timedelta(days=days)
+    # 日期格式的窗口结束于前一天，带时间格式的结束于前一秒
+    gap = pd.Timedelta(seconds=1) if _has_time(spec) else pd.Timedelta(days=1)
+    window_start = start
+    while window_start <= end:
+        next_start = window_start.normalize() + step
+        windows.append((window_start, min(end, next_start - gap)))
+        window_start = next_start
+    return windows
+
+
+def _parse(value: Any, spec: ChunkSpec, is_end: bool) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value) if value else pd.Timestamp(datetime.date.today())
+    if is_end and _has_time(spec) and timestamp == timestamp.normalize():
+        # 只给了日期的结束时间包含当天全部数据
+        timestamp = timestamp + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return timestamp
+
+
+async def _fetch_window(func: Callable[..., pd.DataFrame], spec: ChunkSpec, kwargs: Dict[str, Any],
+                        start: pd.Timestamp, end: pd.Timestamp) -> List[pd.DataFrame]:
+    """
+    获取一个窗口的数据，返回行数达到上限（可能被截断）时对半拆分后重新获取
+    """
+    params = dict(kwargs, start_date=start.strftime(spec.date_format), end_date=end.strftime(spec.date_format))
+    df = await run_tushare(func, **params)
+    if df is None or df.empty:
+        return []
+    if len(df) < spec.row_limit:
+        return [df]
+
+    days = (end.normalize() - start.normalize()).days + 1
+    if days <= 1:
+        print(f"{spec.api_name} {params['start_date']} ~ {params['end_date']} 单日数据达到单次上限 {spec.row_limit} 行，可能不完整")
+        return [df]
+
+    halves = split_windows(spec, start, end, days // 2)
+    results = await asyncio.gather(*(_fetch_window(func, spec, kwargs, s, e) for s, e in halves))
+    return [frame for frames in results for frame in frames]
+
+
+async def _fetch_single_date(func: Callable[..., pd.DataFrame], spec: ChunkSpec, kwargs: Dict[str, Any],
+                             day: pd.Timestamp) -> List[pd.DataFrame]:
+    params = {key: value for key, value in kwargs.items() if key not in ('start_date', 'end_date')}
+    params[spec.single_date_param] = day.strftime(spec.date_format)
+    df = await run_tushare(func, **params)
+    if df is None or df.empty:
+        return []
+    return [df]
+
+
+async def fetch_chunked(func: Callable[..., pd.DataFrame], api_name: Optional[str] = None, **kwargs) -> Optional[pd.DataFrame]:
+    """
+    按接口的单次行数上限将日期区间拆分为多个窗口并发获取，合并后返回
+
+    - 初始窗口按接口的行数上限和每日行数估算；某个窗口返回的行数达到上限时对半拆分重新获取，
+      直到窗口只剩一天，保证区间内的数据完整
+    - 只支持按单日查询的接口（如top_list）拆分为逐日请求
+    - 各窗口通过run_tushare并发执行，受线程池大小和接口限频约束
+    - 任一窗口失败时抛出异常，不会返回部分数据
+    - 未登记的接口、未指定start_date或指定了trade_date时直接调用一次
+    - 值为None的参数不传给接口函数，只有指定了区间时才传入start_date/end_date
+
+    参数:
+        func: tushare_api中的接口函数，如get_hk_daily
+        api_name: 接口名，默认由函数名去掉get_前缀得到
+        **kwargs: 接口参数，start_date/end_date为区间，end_date默认为今天
+
+    返回:
+        pd.DataFrame: 合并后的数据，没有数据时为None
+    """
+    if api_name is None:
+        api_name = func.__name__[4:] if func.__name__.startswith('get_') else func.__name__
+    spec = CHUNK_SPECS.get(api_name)
+    # 未指定的参数不传给接口函数，部分接口函数（如get_top_list）没有start_date/end_date参数
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+
+    if spec is None or kwargs.get('trade_date') or not kwargs.get('start_date'):
+        return await run_tushare(func, **kwargs)
+
+    start = _parse(kwargs.get('start_date'), spec, is_end=False)
+    end = _parse(kwargs.get('end_date'), spec, is_end=True)
+    if start > end:
+        return None
+
+    if spec.single_date_param:
+        days = pd.date_range(start.normalize(), end.normalize(), freq='D')
+        tasks = [_fetch_single_date(func, spec, kwargs, day) for day in days]
+    else:
+        windows = split_windows(spec, start, end, _window_days(spec, kwargs))
+        tasks = [_fetch_window(func, spec, kwargs, s, e) for s, e in windows]
+
+    results = await asyncio.gather(*tasks)
+    frames = [frame for window_frames in results for frame in window_frames]
+    print(f"{api_name} 分 {len(tasks)} 个窗口获取，共 {sum(len(frame) for frame in frames)} 行")
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
@@ -2,6 +2,10 @@
 import os
 import tushare as ts
 from dotenv import load_dotenv
+from app.config.config import settings
+from app.external.tushare_fake import FakeProApi, RecordingClient
+from app.external.tushare_rate_limiter import RateLimitedClient
+from app.storage.cache_client import CachedClient
 
 
 # 加载环境变量
@@ -10,11 +14,24 @@ load_dotenv()
 def get_tushare_client():
     """
     获取Tushare API实例
+    
+    返回的实例按接口名限频，频次超限和网络错误时自动退避重试（见tushare_rate_limiter），
+    并按配置项RESPONSE_CACHE_MODE缓存响应（见app.storage.cache_client）
+    
+    配置了TUSHARE_FAKE_DIR时返回读取录制数据的本地替身（见tushare_fake），同样经过限频和缓存，不访问网络；
+    配置了TUSHARE_RECORD_DIR时真实响应同时保存为录制数据
     """
+    if settings.TUSHARE_FAKE_DIR:
+        print(f"使用本地Tushare替身: {settings.TUSHARE_FAKE_DIR}")
+        return CachedClient(RateLimitedClient(FakeProApi.from_settings()))
+    
     # 初始化Tushare
     try:
         ts.set_token(os.getenv("TUSHARE_TOKEN", ""))
-        pro = ts.pro_api()
+        pro = RateLimitedClient(ts.pro_api())
+        if settings.TUSHARE_RECORD_DIR:
+            pro = RecordingClient(pro, settings.TUSHARE_RECORD_DIR)
+        pro = CachedClient(pro)
     except Exception as e:
         print(f"Tushare初始化错误: {str(e)}")
         # 使用空的API实例，后续会进行错误处理
@@ -0,0 +1,272 @@
+# app/external/tushare_fake.py
+import collections
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from app.config.config import settings
+from app.external.tushare_chunking import CHUNK_SPECS
+from app.storage.cache_client import cache_key
+
+
+# 默认的录制目录
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parents[1] / 'tests' / 'fixtures' / 'tushare'
+
+# 按日期区间过滤时依次尝试的日期列
+DATE_COLUMNS = ('trade_date', 'cal_date', 'trade_time', 'ann_date', 'end_date', 'date', 'month', 'quarter')
+
+# start_date/end_date不按DATE_COLUMNS中第一个存在的列过滤的接口，如按报告期而非公告日期过滤的财务接口
+DATE_FILTER_COLUMNS: Dict[str, str] = {
+    'fina_indicator': 'end_date',
+    'fina_mainbz': 'end_date',
+}
+
+INDEX_FILE = 'index.jsonl'
+
+
+def write_fixture(root: Path, api_name: str, df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    保存一次接口响应：<目录>/<接口名>/<键>.parquet，参数记录在同目录的index.jsonl中
+
+    参数:
+        root: 录制目录
+        api_name: 接口名
+        df: 接口返回的数据
+        params: 调用参数
+
+    返回:
+        Path: 数据文件路径
+    """
+    params = {name: value for name, value in (params or {}).items() if value is not None}
+    key = cache_key(api_name, params)
+    directory = Path(root) / api_name
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{key}.parquet"
+    df.to_parquet(path)
+    with open(directory / INDEX_FILE, 'a', encoding='utf-8') as index:
+        index.write(json.dumps({'key': key, 'params': params, 'rows': len(df)}, ensure_ascii=False, default=str) + '\n')
+    return path
+
+
+def synthesize_daily(root: Path, api_name: str, ts_codes: List[str], start_date: str, end_date: str,
+                     seed: int = 0) -> int:
+    """
+    生成日线结构的模拟数据（ts_code, trade_date, open, high, low, close, pre_close, vol, amount）并保存为录制数据，
+    没有真实录制数据时用于压测导入和分块逻辑
+
+    返回:
+        int: 生成的行数
+    """
+    rng = random.Random(seed)
+    dates = pd.bdate_range(start_date, end_date).strftime('%Y%m%d')
+    rows = []
+    for ts_code in ts_codes:
+        close = rng.uniform(5, 100)
+        for trade_date in dates:
+            pre_close = close
+            close = max(0.01, pre_close * (1 + rng.gauss(0, 0.02)))
+            high = max(pre_close, close) * (1 + abs(rng.gauss(0, 0.005)))
+            low = min(pre_close, close) * (1 - abs(rng.gauss(0, 0.005)))
+            vol = rng.uniform(1e5, 1e7)
+            rows.append((ts_code, trade_date, round(pre_close, 3), round(high, 3), round(low, 3), round(close, 3),
+                         round(pre_close, 3), round(close - pre_close, 3), round((close / pre_close - 1) * 100, 4),
+                         round(vol, 0), round(vol * close / 1000, 3)))
+    df = pd.DataFrame(rows, columns=['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'pre_close',
+                                     'change', 'pct_chg', 'vol', 'amount'])
+    # Tushare按日期倒序返回
+    df = df.sort_values(['trade_date', 'ts_code'], ascending=[False, True], ignore_index=True)
+    write_fixture(root, api_name, df, {'synthetic': True})
+    return len(df)
+
+
+class RecordingClient:
+    """
+    Tushare pro_api的录制代理：原样返回真实响应，同时保存为FakeProApi可读取的录制数据
+    """
+
+    def __init__(self, pro, root: Path):
+        self._pro = pro
+        self._root = Path(root)
+        self._lock = threading.Lock()
+
+    def _record(self, api_name: str, df: Any, params: Dict[str, Any]):
+        if not isinstance(df, pd.DataFrame):
+            return
+        try:
+            with self._lock:
+                write_fixture(self._root, api_name, df, params)
+        except Exception as e:
+            print(f"录制 {api_name} 失败: {str(e)}")
+
+    def query(self, api_name: str, fields: str = '', **kwargs):
+        df = self._pro.query(api_name, fields=fields, **kwargs)
+        self._record(api_name, df, dict(kwargs, fields=fields or None))
+        return df
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        target = getattr(self._pro, name)
+        if not callable(target):
+            return target
+
+        def method(**kwargs):
+            df = target(**kwargs)
+            self._record(name, df, kwargs)
+            return df
+        method.__name__ = name
+        return method
+
+
+class FakeProApi:
+    """
+    读取录制数据的本地pro_api替身，不访问网络
+
+    - 参数与录制时完全一致时返回录制的响应，否则在该接口的全部录制数据中按参数过滤
+      （ts_code等列按值匹配，start_date/end_date按日期列过滤），分块后的窗口也能得到正确的结果
+    - 单次返回的行数按接口限量截断，与真实接口一致
+    - 可模拟延迟、频次超限错误和网络错误，用于复现限频、重试和分块逻辑
+    """
+
+    def __init__(self, root: Optional[Path] = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 quota_per_minute: int = 0,
+                 error_rate: float = 0.0,
+                 row_limits: Optional[Dict[str, int]] = None,
+                 seed: Optional[int] = None):
+        """
+        参数:
+            root: 录制目录
+            latency: 每次调用的模拟延迟（秒）
+            jitter: 延迟的随机抖动（秒）
+            quota_per_minute: 每个接口每分钟允许的调用次数，超过时抛出频次超限错误，0表示不限
+            error_rate: 模拟网络错误的概率
+            row_limits: 各接口单次返回的行数上限，默认取tushare_chunking中登记的限量
+            seed: 随机数种子
+        """
+        self.root = Path(root) if root else DEFAULT_FIXTURE_DIR
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.row_limits = {name: spec.row_limit for name, spec in CHUNK_SPECS.items()}
+        self.row_limits.update(row_limits or {})
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures: Dict[str, tuple] = {}
+        self._calls: Dict[str, collections.deque] = collections.defaultdict(collections.deque)
+        self.stats: Dict[str, Dict[str, int]] = collections.defaultdict(
+            lambda: {'calls': 0, 'rows': 0, 'quota_errors': 0, 'network_errors': 0, 'truncated': 0}
+        )
+
+    @classmethod
+    def from_settings(cls) -> 'FakeProApi':
+        return cls(
+            root=Path(settings.TUSHARE_FAKE_DIR),
+            latency=settings.TUSHARE_FAKE_LATENCY,
+            jitter=settings.TUSHARE_FAKE_JITTER,
+            quota_per_minute=settings.TUSHARE_FAKE_QUOTA_PER_MINUTE,
+            error_rate=settings.TUSHARE_FAKE_ERROR_RATE,
+            row_limits=settings.TUSHARE_FAKE_ROW_LIMITS,
+        )
+
+    def _load(self, api_name: str) -> tuple:
+        """读取接口的全部录制数据：(参数键 -> 响应, 合并去重后的数据)"""
+        with self._lock:
+            cached = self._fixtures.get(api_name)
+            if cached is not None:
+                return cached
+            directory = self.root / api_name
+            exact = {}
+            if directory.exists():
+                for path in sorted(directory.glob('*.parquet')):
+                    exact[path.stem] = pd.read_parquet(path)
+            frames = [df for df in exact.values() if not df.empty]
+            combined = pd.concat(frames, ignore_index=True).drop_duplicates(ignore_index=True) if frames else pd.DataFrame()
+            self._fixtures[api_name] = (exact, combined)
+            return exact, combined
+
+    def _check_quota(self, api_name: str):
+        if not self.quota_per_minute:
+            return
+        now = time.monotonic()
+        with self._lock:
+            calls = self._calls[api_name]
+            while calls and now - calls[0] >= 60:
+                calls.popleft()
+            calls.append(now)
+            exceeded = len(calls) > self.quota_per_minute
+        if exceeded:
+            self.stats[api_name]['quota_errors'] += 1
+            raise Exception(f"抱歉，您每分钟最多访问该接口{self.quota_per_minute}次，"
+                            f"权限的具体详情访问：https://tushare.pro/document/1?doc_id=108。")
+
+    @staticmethod
+    def _filter(df: pd.DataFrame, params: Dict[str, Any], date_column: Optional[str] = None) -> pd.DataFrame:
+        if df.empty:
+            return df
+        mask = pd.Series(True, index=df.index)
+        for name, value in params.items():
+            if name in ('start_date', 'end_date') or name not in df.columns:
+                continue
+            values = str(value).split(',') if name == 'ts_code' else [str(value)]
+            mask &= df[name].astype(str).isin(values)
+
+        start, end = params.get('start_date'), params.get('end_date')
+        if date_column not in df.columns:
+            date_column = next((column for column in DATE_COLUMNS if column in df.columns), None)
+        if date_column and (start or end):
+            dates = pd.to_datetime(df[date_column].astype(str), errors='coerce')
+            if start:
+                mask &= dates >= pd.Timestamp(str(start))
+            if end:
+                end_value = pd.Timestamp(str(end))
+                # 只有日期的结束参数包含当天全部数据
+                if len(str(end)) <= 10:
+                    mask &= dates < end_value + pd.Timedelta(days=1)
+                else:
+                    mask &= dates <= end_value
+        return df[mask]
+
+    def call(self, api_name: str, fields: Optional[str] = None, **kwargs) -> pd.DataFrame:
+        params = {name: value for name, value in kwargs.items() if value is not None}
+        stats = self.stats[api_name]
+        stats['calls'] += 1
+
+        delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        self._check_quota(api_name)
+        if self.error_rate and self._random.random() < self.error_rate:
+            stats['network_errors'] += 1
+            raise ConnectionError(f"Connection aborted: 模拟的网络错误 ({api_name})")
+
+        exact, combined = self._load(api_name)
+        df = exact.get(cache_key(api_name, dict(params, fields=fields)))
+        if df is None:
+            df = self._filter(combined, params, DATE_FILTER_COLUMNS.get(api_name))
+        if fields:
+            df = df[[column for column in fields.split(',') if column in df.columns]]
+
+        limit = self.row_limits.get(api_name)
+        if limit and len(df) > limit:
+            stats['truncated'] += 1
+            df = df.head(limit)
+        stats['rows'] += len(df)
+        return df.reset_index(drop=True)
+
+    def query(self, api_name: str, fields: str = '', **kwargs) -> pd.DataFrame:
+        return self.call(api_name, fields=fields or None, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def method(fields: Optional[str] = None, **kwargs):
+            return self.call(name, fields=fields, **kwargs)
+        method.__name__ = name
+        return method
@@ -0,0 +1,274 @@
+# app/external/tushare_rate_limiter.py
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from app.config.config import settings
+
+
+# 文档中单独限频的接口（每分钟调用次数），可通过配置项TUSHARE_RATE_LIMITS覆盖
+ENDPOINT_CALLS_PER_MINUTE: Dict[str, int] = {
+    'stk_auction': 10,
+}
+
+# 超出频次限制的错误信息，如"抱歉，您每分钟最多访问该接口200次"
+_QUOTA_MARKERS = ('每分钟最多访问', '每小时最多访问', '访问频率', '最多访问该接口', 'too many requests')
+# 网络错误，重试通常可以恢复
+_NETWORK_MARKERS = ('timed out', 'timeout', 'connection', 'remote end closed', 'max retries exceeded',
+                    'temporarily unavailable', 'bad gateway', 'service unavailable', 'gateway timeout')
+
+
+class TushareError(Exception):
+    """Tushare接口调用失败"""
+    pass
+
+
+class TushareQuotaError(TushareError):
+    """超出Tushare接口频次限制，重试后仍然失败"""
+    pass
+
+
+class TushareNetworkError(TushareError):
+    """Tushare接口网络错误，重试后仍然失败"""
+    pass
+
+
+class TushareDeferred(TushareError):
+    """
+    在run_tushare的线程池中调用时需要等待：没有令牌（已预订令牌，wait秒后可用），
+    或出现可重试的错误（error），由run_tushare在事件循环中等待后重新提交，不占用工作线程
+    """
+
+    def __init__(self, api_name: str, wait: float = 0.0,
+                 error: Optional[Exception] = None, error_type: Optional[type] = None):
+        super().__init__(f"{api_name} 需要等待 {wait:.1f} 秒" if error is None else f"{api_name} 调用失败: {str(error)}")
+        self.api_name = api_name
+        self.wait = wait
+        self.error = error
+        self.error_type = error_type
+
+
+# 当前线程是否由run_tushare提交：是时等待交给事件循环，值为本次调用已预订的令牌数（按接口名）
+_local = threading.local()
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶，按每分钟调用次数匀速补充令牌
+
+    通过run_tushare提交的调用先预订令牌，在事件循环中等待到令牌可用（见app.external.tushare_async），
+    直接同步调用时在当前线程中等待。
+    """
+
+    def __init__(self, calls_per_minute: int, capacity: Optional[int] = None):
+        self.rate = calls_per_minute / 60.0
+        # 默认容量为1，严格匀速；容量越大允许的突发调用越多
+        self.capacity = max(1, capacity or 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """
+        预订一个令牌，令牌不足时记为欠账，后续调用按顺序排在后面
+
+        返回:
+            float: 预订的令牌还需等待的秒数，0表示立即可用
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        取一个令牌，没有令牌时在当前线程中等待
+
+        返回:
+            float: 等待的秒数
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def drain(self):
+        """
+        清空令牌，服务端返回超出频次限制时调用，使其他线程一起放慢
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+
+class TushareRateLimiter:
+    """按接口名限频的令牌桶集合，所有Tushare调用共享"""
+
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def calls_per_minute(api_name: str) -> int:
+        """
+        接口每分钟允许的调用次数：配置项TUSHARE_RATE_LIMITS > 内置的单独限频 > TUSHARE_CALLS_PER_MINUTE
+        """
+        limits = settings.TUSHARE_RATE_LIMITS
+        if api_name in limits:
+            return limits[api_name]
+        return ENDPOINT_CALLS_PER_MINUTE.get(api_name, settings.TUSHARE_CALLS_PER_MINUTE)
+
+    def bucket(self, api_name: str) -> TokenBucket:
+        bucket = self._buckets.get(api_name)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(api_name)
+                if bucket is None:
+                    bucket = TokenBucket(self.calls_per_minute(api_name), settings.TUSHARE_BURST)
+                    self._buckets[api_name] = bucket
+        return bucket
+
+    def reset(self):
+        """清除全部令牌桶，修改限频配置后调用"""
+        with self._lock:
+            self._buckets.clear()
+
+
+rate_limiter = TushareRateLimiter()
+
+
+def classify_error(error: Exception) -> Optional[type]:
+    """
+    判断错误是否可以重试
+
+    返回:
+        TushareQuotaError或TushareNetworkError；其他错误（参数错误、积分不足等）返回None，不重试
+    """
+    message = str(error).lower()
+    if any(marker in message for marker in _QUOTA_MARKERS):
+        return TushareQuotaError
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return TushareNetworkError
+    # requests的异常类型不在内置异常体系中，按类名和错误信息判断
+    if type(error).__module__.startswith(('requests', 'urllib3')) or any(marker in message for marker in _NETWORK_MARKERS):
+        return TushareNetworkError
+    return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    第attempt次重试前的等待秒数：指数退避，在上限的一半到上限之间随机取值，避免多个线程同时重试
+    """
+    ceiling = min(settings.TUSHARE_BACKOFF_MAX, settings.TUSHARE_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+@contextmanager
+def deferred_waits(prepaid: Dict[str, int]):
+    """
+    在此范围内的调用不在当前线程中等待令牌或退避，而是抛出TushareDeferred，run_tushare在工作线程中使用
+
+    参数:
+        prepaid: 按接口名记录已预订、等待结束的令牌数，调用时优先使用
+    """
+    _local.prepaid = prepaid
+    try:
+        yield
+    finally:
+        _local.prepaid = None
+
+
+def _call_deferred(api_name: str, bucket: TokenBucket, prepaid: Dict[str, int],
+                   func: Callable[..., Any], *args, **kwargs) -> Any:
+    if prepaid.get(api_name):
+        prepaid[api_name] -= 1
+    else:
+        wait = bucket.reserve()
+        if wait > 0:
+            raise TushareDeferred(api_name, wait=wait)
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        error_type = classify_error(e)
+        if error_type is None:
+            raise
+        if error_type is TushareQuotaError:
+            bucket.drain()
+        raise TushareDeferred(api_name, error=e, error_type=error_type) from e
+
+
+def call_with_limits(api_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    按接口限频调用，频次超限和网络错误时退避重试
+
+    通过run_tushare提交时（见deferred_waits），等待令牌和退避由run_tushare在事件循环中完成，
+    这里只抛出TushareDeferred；直接同步调用时在当前线程中等待和重试。
+
+    参数:
+        api_name: 接口名，如daily、hk_mins，用于选择令牌桶
+        func: 实际调用的函数
+        *args, **kwargs: 调用参数
+
+    返回:
+        func的返回值
+    """
+    bucket = rate_limiter.bucket(api_name)
+    prepaid = getattr(_local, 'prepaid', None)
+    if prepaid is not None:
+        return _call_deferred(api_name, bucket, prepaid, func, *args, **kwargs)
+
+    max_retries = settings.TUSHARE_MAX_RETRIES
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            error_type = classify_error(e)
+            if error_type is None:
+                raise
+            if error_type is TushareQuotaError:
+                bucket.drain()
+            if attempt >= max_retries:
+                raise error_type(f"{api_name} 重试 {max_retries} 次后仍然失败: {str(e)}") from e
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"Tushare接口 {api_name} 调用失败，{delay:.1f} 秒后第 {attempt} 次重试: {str(e)}")
+            time.sleep(delay)
+
+
+class RateLimitedClient:
+    """
+    Tushare pro_api的代理，pro.<接口名>(...)和pro.query(接口名, ...)都经过限频和重试
+
+    tushare_api中的各接口函数通过get_tushare_client获取此代理，调用方式不变。
+    """
+
+    def __init__(self, pro):
+        self._pro = pro
+        self._methods: Dict[str, Callable[..., Any]] = {}
+
+    def query(self, api_name: str, fields: str = '', **kwargs):
+        return call_with_limits(api_name, self._pro.query, api_name, fields=fields, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = self._methods.get(name)
+        if method is None:
+            target = getattr(self._pro, name)
+            if not callable(target):
+                return target
+
+            def method(*args, **kwargs):
+                return call_with_limits(name, target, *args, **kwargs)
+            method.__name__ = name
+            self._methods[name] = method
+        return method
@@ -1,7 +1,9 @@
 import pandas as pd
 import yfinance as yf
+from app.storage.cache_client import cached_response
 
 
+@cached_response('yfinance.recommendations')
 def get_recommendations(ts_code: str, as_dict: bool = False) -> pd.DataFrame:
     """
     yfinance.Ticker.get_recommendations
@@ -1,7 +1,9 @@
 import pandas as pd
 import yfinance as yf
+from app.storage.cache_client import cached_response
 
 
+@cached_response('yfinance.income_stmt')
 def get_income_stmt(ts_code: str, as_dict: bool = False, pretty: bool = False, freq: str = 'yearly'):
     """
     yfinance.Ticker.get_income_stmt
@@ -42,6 +44,7 @@ def get_income_stmt(ts_code: str, as_dict: bool = False, pretty: bool = False, f
         print(f"获取公司收入报表（损益表）数据错误: {str(e)}")
         return None
 
+@cached_response('yfinance.income_stmt')
 def income_stmt(ts_code: str) -> pd.DataFrame:
     """
     yfinance.Ticker.income_stmt
@@ -2,6 +2,7 @@ import pandas as pd
 import yfinance as yf
 from typing import List
 from pandas import Series
+from app.storage.cache_client import cached_response
 
 
 def get_isin(ts_code: str) -> str | None:
@@ -19,6 +20,7 @@ def get_isin(ts_code: str) -> str | None:
         return None
 
 
+@cached_response('yfinance.history')
 def get_history(ts_code: str, period: str = "1mo", interval: str = "1d",
                 start: str = None, end: str = None, prepost: bool = False, actions: bool = True,
                 auto_adjust: bool = True, back_adjust: bool = False, repair: bool = False, keepna: bool = False,
@@ -89,6 +91,7 @@ def get_history(ts_code: str, period: str = "1mo", interval: str = "1d",
         raise Exception(f"获取历史数据错误: {str(e)}")
 
 
+@cached_response('yfinance.histories')
 def get_histories(ts_code_list: List, period: str = "1mo", interval: str = "1d",
                 start: str = None, end: str = None, prepost: bool = False, actions: bool = True,
                 auto_adjust: bool = True, repair: bool = False, proxy: str = None,
@@ -130,6 +133,7 @@ def get_history_metadata(ts_code: str) -> dict:
         return {}
 
 
+@cached_response('yfinance.dividends')
 def get_dividends(ts_code: str, period: str = 'max') -> pd.DataFrame:
     """
     yfinance.Ticker.dividends
@@ -145,6 +149,7 @@ def get_dividends(ts_code: str, period: str = 'max') -> pd.DataFrame:
         return pd.DataFrame()
 
 
+@cached_response('yfinance.dividends')
 def dividends(ts_code: str) -> Series:
     """
     yfinance.Ticker.dividends
@@ -160,6 +165,7 @@ def dividends(ts_code: str) -> Series:
         return Series()
 
 
+@cached_response('yfinance.splits')
 def get_splits(ts_code: str, period: str = 'max') -> Series:
     """
     yfinance.Ticker.get_splits
@@ -174,6 +180,7 @@ def get_splits(ts_code: str, period: str = 'max') -> Series:
         print(f"获取拆分数据错误: {str(e)}")
         return Series()
 
+@cached_response('yfinance.splits')
 def splits(ts_code: str) -> Series:
     """
     yfinance.Ticker.splits
@@ -188,6 +195,7 @@ def splits(ts_code: str) -> Series:
         print(f"获取拆分数据错误: {str(e)}")
         return Series()
 
+@cached_response('yfinance.actions')
 def get_actions(ts_code: str, period: str = 'max') -> Series:
     """
     yfinance.Ticker.get_actions
@@ -203,6 +211,7 @@ def get_actions(ts_code: str, period: str = 'max') -> Series:
         print(f"获取股息和拆分数据错误: {str(e)}")
         return Series()
 
+@cached_response('yfinance.actions')
 def actions(ts_code: str) -> pd.DataFrame:
     """
     yfinance.Ticker.actions
@@ -218,6 +227,7 @@ def actions(ts_code: str) -> pd.DataFrame:
         print(f"获取股息和拆分数据错误: {str(e)}")
         return pd.DataFrame()
 
+@cached_response('yfinance.capital_gains')
 def get_capital_gains(ts_code: str, peroid: str = 'max') -> Series:
     """
     yfinance.Ticker.capital_gains
@@ -233,6 +243,7 @@ def get_capital_gains(ts_code: str, peroid: str = 'max') -> Series:
         print(f"获取资本收益数据错误: {str(e)}")
         return Series()
 
+@cached_response('yfinance.capital_gains')
 def capital_gains(ts_code: str) -> Series:
     """
     yfinance.Ticker.capital_gains
@@ -248,6 +259,7 @@ def capital_gains(ts_code: str) -> Series:
         print(f"获取资本收益数据错误: {str(e)}")
         return Series()
 
+@cached_response('yfinance.shares_full')
 def get_shares_full(ts_code: str, start: str = None, end: str = None) -> Series:
     """
     yfinance.Ticker.get_shares_full
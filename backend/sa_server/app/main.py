@@ -1,12 +1,28 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import api_router
+from app.db.db import init_db, close_db
+from app.external.tushare_async import shutdown_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时创建共享连接池，关闭时释放连接池和Tushare调用线程池
+    await init_db()
+    try:
+        yield
+    finally:
+        await close_db()
+        shutdown_executor()
+
 
 app = FastAPI(
     title="股票分析系统API",
     description="提供股票数据和市场分析的API服务",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # 配置CORS
@@ -11,11 +11,12 @@ class ResponseModel(BaseModel):
     success: bool = Field(True, description="是否成功")
     message: str = Field("操作成功", description="响应消息")
     data: Optional[Any] = Field(None, description="响应数据")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多数据")
 
     @classmethod
-    def success(cls, data: Optional[Any] = None, message: str = "操作成功"):
+    def success(cls, data: Optional[Any] = None, message: str = "操作成功", next_cursor: Optional[str] = None):
         """成功响应"""
-        return cls(code=ErrorCode.SUCCESS.code, success=True, message=message, data=data)
+        return cls(code=ErrorCode.SUCCESS.code, success=True, message=message, data=data, next_cursor=next_cursor)
     
     @classmethod
     def error(cls, error_code: Union[ErrorCode, int], message: Optional[str] = None, data: Optional[Any] = None):
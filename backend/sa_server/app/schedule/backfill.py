@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import datetime
+import importlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from app.config.config import settings
+
+
+@dataclass(frozen=True)
+class BackfillDataset:
+    """只能按股票逐只导入的数据集"""
+    name: str
+    # 股票列表来源：hk -> hk_basic，stock -> stock_basic
+    universe: str
+    module: str
+    service_class: str
+    method: str
+    # 导入方法获取或写入数据失败时默认只打印错误，需要传入raise_errors=True才能区分失败和无数据，
+    # 否则失败的股票会被记为完成
+    raise_errors: bool = False
+    # 除ts_code和日期区间外必须指定的参数，如hk_mins的freq
+    required_params: tuple = ()
+
+
+_SERVICES = 'app.services.db_services'
+
+BACKFILL_DATASETS: Dict[str, BackfillDataset] = {dataset.name: dataset for dataset in [
+    BackfillDataset('hk_daily', 'hk', f'{_SERVICES}.hk_stock_service.hk_daily_service',
+                    'HkDailyService', 'import_hk_daily_data', raise_errors=True),
+    BackfillDataset('hk_daily_adj', 'hk', f'{_SERVICES}.hk_stock_service.hk_daily_adj_service',
+                    'HkDailyAdjService', 'import_hk_daily_adj_data', raise_errors=True),
+    BackfillDataset('hk_mins', 'hk', f'{_SERVICES}.hk_stock_service.hk_mins_service',
+                    'HkMinsService', 'import_hk_mins_data', raise_errors=True, required_params=('freq',)),
+    BackfillDataset('top10_holders', 'stock', f'{_SERVICES}.stock_service.reference_data.top10_holders_service',
+                    'Top10HoldersService', 'import_top10_holders_data', raise_errors=True),
+    BackfillDataset('top10_floatholders', 'stock', f'{_SERVICES}.stock_service.reference_data.top10_floatholders_service',
+                    'Top10FloatholdersService', 'import_top10_floatholders_data', raise_errors=True),
+    BackfillDataset('stk_holdernumber', 'stock', f'{_SERVICES}.stock_service.reference_data.stk_holdernumber_service',
+                    'StkHoldernumberService', 'import_stk_holdernumber_data', raise_errors=True),
+    BackfillDataset('fina_indicator', 'stock', f'{_SERVICES}.stock_service.stock_financial.fina_indicator_service',
+                    'FinaIndicatorService', 'import_fina_indicator_data', raise_errors=True),
+]}
+
+UNIVERSE_TABLES = {'hk': 'hk_basic', 'stock': 'stock_basic'}
+
+
+async def load_universe(db, universe: str, list_status: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    从hk_basic/stock_basic获取股票列表
+
+    参数:
+        db: 数据库对象
+        universe: hk 或 stock
+        list_status: 上市状态（L上市 D退市 P暂停上市），默认全部，回补历史时包含已退市的股票
+
+    返回:
+        List[str]: 按代码排序的ts_code列表
+    """
+    table_name = UNIVERSE_TABLES.get(universe)
+    if table_name is None:
+        raise ValueError(f"未知的股票列表: {universe}. 可用列表包括: {', '.join(UNIVERSE_TABLES)}")
+    statuses = list(list_status) if list_status else None
+    rows = await db.fetch(f"""
+        SELECT DISTINCT ts_code FROM {table_name}
+        WHERE ts_code IS NOT NULL AND ($1::text[] IS NULL OR list_status = ANY($1::text[]))
+        ORDER BY ts_code
+    """, statuses)
+    return [row['ts_code'] for row in rows]
+
+
+def job_name(dataset: str, start_date: Optional[str] = None, end_date: Optional[str] = None, **params) -> str:
+    """
+    默认任务名：数据集、其他参数和日期区间，如 hk_mins:1min:20200101-20241231；
+    参数相同的回补共用检查点，中断后重新执行即可续传
+    """
+    parts = [dataset] + [str(value) for _, value in sorted(params.items()) if value]
+    if start_date or end_date:
+        parts.append(f"{start_date or ''}-{end_date or ''}")
+    return ':'.join(parts)
+
+
+@dataclass
+class BackfillProgress:
+    """回补进度，用于计算吞吐量和预计剩余时间"""
+    job: str
+    total: int
+    skipped: int = 0
+    done: int = 0
+    failed: int = 0
+    rows: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        per_minute = self.finished / elapsed * 60
+        remaining = self.total - self.finished
+        eta = datetime.timedelta(seconds=int(remaining / (self.finished / elapsed))) if self.finished else '未知'
+        return (f"{self.job}: {self.finished}/{self.total} 只 (失败 {self.failed}，此前已完成 {self.skipped})，"
+                f"{self.rows} 条记录，{per_minute:.1f} 只/分钟，{self.rows / elapsed:.0f} 条/秒，预计剩余 {eta}")
+
+
+async def _completed_codes(db, job: str, skip_failed: bool) -> set:
+    statuses = ['done', 'failed'] if skip_failed else ['done']
+    rows = await db.fetch(
+        "SELECT ts_code FROM backfill_progress WHERE job = $1 AND status = ANY($2::text[])", job, statuses
+    )
+    return {row['ts_code'] for row in rows}
+
+
+async def _checkpoint(db, job: str, ts_code: str, status: str, rows: int,
+                      error: Optional[str], elapsed_ms: int):
+    await db.execute("""
+        INSERT INTO backfill_progress (job, ts_code, status, rows, attempts, error, elapsed_ms, updated_at)
+        VALUES ($1, $2, $3, $4, 1, $5, $6, CURRENT_TIMESTAMP)
+        ON CONFLICT (job, ts_code) DO UPDATE SET
+            status = EXCLUDED.status,
+            rows = EXCLUDED.rows,
+            attempts = backfill_progress.attempts + 1,
+            error = EXCLUDED.error,
+            elapsed_ms = EXCLUDED.elapsed_ms,
+            updated_at = EXCLUDED.updated_at
+    """, job, ts_code, status, rows, error, elapsed_ms)
+
+
+async def reset_backfill(db, job: str):
+    """清除任务的检查点，下次执行从头开始"""
+    await db.execute("DELETE FROM backfill_progress WHERE job = $1", job)
+
+
+async def run_backfill(db, dataset: str,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None,
+                       workers: Optional[int] = None,
+                       job: Optional[str] = None,
+                       ts_codes: Optional[List[str]] = None,
+                       list_status: Optional[Iterable[str]] = None,
+                       skip_failed: bool = False,
+                       batch_size: int = 1000,
+                       report_interval: float = 30.0,
+                       **params) -> Dict[str, Any]:
+    """
+    按股票回补数据集：从hk_basic/stock_basic获取股票列表，由多个worker并发逐只导入，每只完成后记录检查点
+
+    - 中断（崩溃、Ctrl+C）后以相同参数重新执行，跳过已完成的股票，失败的股票重新导入
+    - Tushare调用经过run_tushare，并发数受线程池大小限制，调用频率受接口限频约束，
+      worker数超过TUSHARE_MAX_WORKERS只会排队等待
+    - 定期打印进度、吞吐量和预计剩余时间
+
+    参数:
+        db: 数据库对象
+        dataset: 数据集名，见BACKFILL_DATASETS
+        start_date: 开始日期，格式与对应导入方法一致
+        end_date: 结束日期
+        workers: 并发导入的股票数，默认取配置项TUSHARE_MAX_WORKERS
+        job: 任务名，默认由数据集和参数生成
+        ts_codes: 指定股票列表，默认取全部股票
+        list_status: 上市状态过滤，默认全部
+        skip_failed: 是否跳过之前失败的股票
+        batch_size: 批量写入的记录数
+        report_interval: 打印进度的间隔秒数
+        **params: 导入方法的其他参数，如hk_mins的freq
+
+    返回:
+        Dict: 任务名、股票数、完成数、失败数、记录数和耗时，failed_codes为本次失败的股票
+    """
+    spec = BACKFILL_DATASETS.get(dataset)
+    if spec is None:
+        raise ValueError(f"不支持按股票回补的数据集: {dataset}. 可用数据集包括: {', '.join(BACKFILL_DATASETS)}")
+    missing = [name for name in spec.required_params if not params.get(name)]
+    if missing:
+        raise ValueError(f"{dataset} 回补需要指定参数: {', '.join(missing)}")
+
+    job = job or job_name(dataset, start_date, end_date, **params)
+    workers = workers or settings.TUSHARE_MAX_WORKERS
+    universe = ts_codes or await load_universe(db, spec.universe, list_status)
+    completed = await _completed_codes(db, job, skip_failed)
+    pending = [ts_code for ts_code in universe if ts_code not in completed]
+
+    progress = BackfillProgress(job=job, total=len(pending), skipped=len(universe) - len(pending))
+    print(f"{job}: 共 {len(universe)} 只股票，待导入 {len(pending)} 只，{workers} 个worker")
+    if not pending:
+        return {'job': job, 'total': 0, 'skipped': progress.skipped, 'done': 0, 'failed': 0,
+                'rows': 0, 'elapsed': 0.0, 'failed_codes': []}
+
+    service = getattr(importlib.import_module(spec.module), spec.service_class)(db)
+    import_method = getattr(service, spec.method)
+    kwargs = dict(params, start_date=start_date, end_date=end_date, batch_size=batch_size)
+    if spec.raise_errors:
+        kwargs['raise_errors'] = True
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for ts_code in pending:
+        queue.put_nowait(ts_code)
+    failed_codes = []
+
+    async def worker():
+        while True:
+            try:
+                ts_code = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                rows = await import_method(ts_code=ts_code, **kwargs)
+            except Exception as e:
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
+                progress.failed += 1
+                failed_codes.append(ts_code)
+                print(f"{job}: {ts_code} 导入失败: {str(e)}")
+                await _checkpoint(db, job, ts_code, 'failed', 0, str(e), elapsed_ms)
+                continue
+            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            progress.done += 1
+            progress.rows += rows or 0
+            await _checkpoint(db, job, ts_code, 'done', rows or 0, None, elapsed_ms)
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_interval)
+            print(progress.report())
+
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(workers, len(pending)))))
+    finally:
+        reporter_task.cancel()
+        print(progress.report())
+
+    return {
+        'job': job,
+        'total': progress.total,
+        'skipped': progress.skipped,
+        'done': progress.done,
+        'failed': progress.failed,
+        'rows': progress.rows,
+        'elapsed': time.monotonic() - progress.started_at,
+        'failed_codes': failed_codes,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="按股票回补数据集，支持断点续传")
+    parser.add_argument('dataset', choices=list(BACKFILL_DATASETS))
+    parser.add_argument('--start', help="开始日期，格式与对应导入方法一致")
+    parser.add_argument('--end', help="结束日期")
+    parser.add_argument('--freq', help="分钟频度（hk_mins）")
+    parser.add_argument('--workers', type=int, help="并发导入的股票数，默认取TUSHARE_MAX_WORKERS")
+    parser.add_argument('--job', help="任务名，默认由数据集和参数生成")
+    parser.add_argument('--ts-code', action='append', dest='ts_codes', help="指定股票，可重复指定")
+    parser.add_argument('--list-status', action='append', help="上市状态（L/D/P），可重复指定，默认全部")
+    parser.add_argument('--skip-failed', action='store_true', help="跳过之前失败的股票")
+    parser.add_argument('--reset', action='store_true', help="清除检查点后从头开始")
+    args = parser.parse_args()
+
+    from app.db.db import get_db, close_db
+
+    params = {'freq': args.freq} if args.freq else {}
+    db = await get_db()
+    try:
+        if args.reset:
+            await reset_backfill(db, args.job or job_name(args.dataset, args.start, args.end, **params))
+        await run_backfill(db, args.dataset, start_date=args.start, end_date=args.end,
+                           workers=args.workers, job=args.job, ts_codes=args.ts_codes,
+                           list_status=args.list_status, skip_failed=args.skip_failed, **params)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
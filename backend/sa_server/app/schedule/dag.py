@@ -0,0 +1,325 @@
+import asyncio
+import datetime
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from app.config.config import settings
+
+
+# 节点状态
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCESS = 'success'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+# 重新执行时沿用上次运行的成功结果，不再执行
+REUSED = 'reused'
+
+# 下游可以继续执行的上游状态
+_DONE_STATUSES = (SUCCESS, REUSED)
+
+
+class DagSkip(Exception):
+    """节点主动跳过（如非交易日），节点及其下游记为skipped，不算失败，不重试"""
+    pass
+
+
+@dataclass
+class DagContext:
+    """传给节点函数的运行上下文"""
+    db: Any
+    run_date: datetime.date
+    # 已完成节点的返回值
+    results: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def trade_date(self) -> str:
+        """YYYYMMDD格式的数据日期，Tushare接口参数使用"""
+        return self.run_date.strftime('%Y%m%d')
+
+
+@dataclass(frozen=True)
+class DagNode:
+    """流水线中的一个节点"""
+    name: str
+    # 节点函数，参数为DagContext，返回导入的记录数或其他结果
+    func: Callable[[DagContext], Awaitable[Any]]
+    depends_on: tuple = ()
+    # 失败后的重试次数，None时取运行参数
+    retries: Optional[int] = None
+    # 单次执行的超时秒数，None表示不限
+    timeout: Optional[float] = None
+
+
+@dataclass
+class NodeRun:
+    """节点的一次运行记录"""
+    name: str
+    status: str = PENDING
+    attempts: int = 0
+    rows: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    elapsed_ms: Optional[int] = None
+
+
+@dataclass
+class DagRun:
+    """流水线的一次运行结果"""
+    pipeline: str
+    run_date: datetime.date
+    run_id: Optional[int] = None
+    status: str = RUNNING
+    nodes: Dict[str, NodeRun] = field(default_factory=dict)
+    elapsed_ms: Optional[int] = None
+
+    @property
+    def failed_nodes(self) -> List[str]:
+        return [name for name, node in self.nodes.items() if node.status == FAILED]
+
+    def summary(self) -> str:
+        counts: Dict[str, int] = {}
+        for node in self.nodes.values():
+            counts[node.status] = counts.get(node.status, 0) + 1
+        parts = ', '.join(f"{status} {count}" for status, count in sorted(counts.items()))
+        return f"{self.pipeline} {self.run_date} {self.status}: {parts}，耗时 {(self.elapsed_ms or 0) / 1000:.1f} 秒"
+
+
+class Dag:
+    """
+    有向无环的任务依赖图，构造时检查依赖是否存在以及是否有环
+    """
+
+    def __init__(self, name: str, nodes: Iterable[DagNode]):
+        self.name = name
+        self.nodes: Dict[str, DagNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"{name}: 节点重复: {node.name}")
+            self.nodes[node.name] = node
+
+        for node in self.nodes.values():
+            missing = [dep for dep in node.depends_on if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"{name}: 节点 {node.name} 依赖的节点不存在: {', '.join(missing)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """按依赖排序的节点名（Kahn算法），同一层按定义顺序"""
+        remaining = {name: len(node.depends_on) for name, node in self.nodes.items()}
+        order = []
+        ready = [name for name, count in remaining.items() if count == 0]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for child in self.downstream(name):
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.nodes):
+            cycle = [name for name in self.nodes if name not in order]
+            raise ValueError(f"{self.name}: 依赖存在环: {', '.join(cycle)}")
+        return order
+
+    def downstream(self, name: str) -> List[str]:
+        """直接依赖name的节点"""
+        return [child for child, node in self.nodes.items() if name in node.depends_on]
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now()
+
+
+async def _record_run(db, run: DagRun, retry_of: Optional[int]) -> Optional[int]:
+    try:
+        return await db.fetchval("""
+            INSERT INTO pipeline_runs (pipeline, run_date, status, retry_of)
+            VALUES ($1, $2, $3, $4)
+            RETURNING run_id
+        """, run.pipeline, run.run_date, run.status, retry_of)
+    except Exception as e:
+        print(f"{run.pipeline}: 记录运行历史失败: {str(e)}")
+        return None
+
+
+async def _finish_run(db, run: DagRun):
+    if run.run_id is None:
+        return
+    try:
+        await db.execute("""
+            UPDATE pipeline_runs SET status = $2, finished_at = CURRENT_TIMESTAMP, elapsed_ms = $3
+            WHERE run_id = $1
+        """, run.run_id, run.status, run.elapsed_ms)
+    except Exception as e:
+        print(f"{run.pipeline}: 记录运行历史失败: {str(e)}")
+
+
+async def _record_node(db, run: DagRun, node: NodeRun):
+    """写入节点状态，运行历史表不可用时只打印错误，不影响流水线执行"""
+    if run.run_id is None:
+        return
+    try:
+        await db.execute("""
+            INSERT INTO pipeline_node_runs (run_id, node, status, attempts, rows, error,
+                                            started_at, finished_at, elapsed_ms)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT (run_id, node) DO UPDATE SET
+                status = EXCLUDED.status,
+                attempts = EXCLUDED.attempts,
+                rows = EXCLUDED.rows,
+                error = EXCLUDED.error,
+                started_at = EXCLUDED.started_at,
+                finished_at = EXCLUDED.finished_at,
+                elapsed_ms = EXCLUDED.elapsed_ms
+        """, run.run_id, node.name, node.status, node.attempts, node.rows, node.error,
+            node.started_at, node.finished_at, node.elapsed_ms)
+    except Exception as e:
+        print(f"{run.pipeline}: 记录节点 {node.name} 状态失败: {str(e)}")
+
+
+async def run_dag(db, dag: Dag,
+                  run_date: Optional[datetime.date] = None,
+                  concurrency: Optional[int] = None,
+                  max_retries: Optional[int] = None,
+                  retry_delay: Optional[float] = None,
+                  reuse: Optional[Set[str]] = None,
+                  retry_of: Optional[int] = None) -> DagRun:
+    """
+    按依赖关系执行流水线：上游全部成功后节点才开始执行，互不依赖的分支并发执行
+
+    - 同时执行的节点数不超过concurrency（全局并发预算），重试等待期间不占用预算
+    - 节点失败时只重试该节点，重试次数用尽后记为failed，其全部下游记为skipped
+    - 节点抛出DagSkip时该节点及其下游记为skipped，不算失败
+    - 运行和每个节点的状态、尝试次数、耗时写入pipeline_runs/pipeline_node_runs
+
+    参数:
+        db: 数据库对象
+        dag: 流水线
+        run_date: 数据日期，默认今天；每日流水线由DailyTask传入最近一个已收盘的交易日
+        concurrency: 同时执行的节点数，默认取配置项PIPELINE_CONCURRENCY
+        max_retries: 节点未单独设置时的重试次数，默认取配置项PIPELINE_MAX_RETRIES
+        retry_delay: 首次重试前的等待秒数，之后每次翻倍，默认取配置项PIPELINE_RETRY_DELAY
+        reuse: 沿用上次成功结果、不再执行的节点（见retry_failed）
+        retry_of: 重新执行时原运行的run_id
+
+    返回:
+        DagRun: 运行结果，有节点失败时status为failed
+    """
+    concurrency = max(1, concurrency or settings.PIPELINE_CONCURRENCY)
+    max_retries = settings.PIPELINE_MAX_RETRIES if max_retries is None else max_retries
+    retry_delay = settings.PIPELINE_RETRY_DELAY if retry_delay is None else retry_delay
+    reuse = reuse or set()
+
+    context = DagContext(db=db, run_date=run_date or datetime.date.today())
+    run = DagRun(pipeline=dag.name, run_date=context.run_date,
+                 nodes={name: NodeRun(name) for name in dag.order})
+    run.run_id = await _record_run(db, run, retry_of)
+    print(f"{dag.name}: 开始运行 {context.run_date}，共 {len(dag.order)} 个节点，并发 {concurrency}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: Dict[str, asyncio.Task] = {}
+    started = time.monotonic()
+
+    async def execute(node: DagNode) -> str:
+        node_run = run.nodes[node.name]
+        upstream = await asyncio.gather(*(tasks[dep] for dep in node.depends_on))
+        if any(status not in _DONE_STATUSES for status in upstream):
+            node_run.status = SKIPPED
+            blocked = [dep for dep, status in zip(node.depends_on, upstream) if status not in _DONE_STATUSES]
+            node_run.error = f"上游节点未完成: {', '.join(blocked)}"
+            await _record_node(db, run, node_run)
+            return node_run.status
+
+        if node.name in reuse:
+            node_run.status = REUSED
+            await _record_node(db, run, node_run)
+            return node_run.status
+
+        retries = max_retries if node.retries is None else node.retries
+        node_run.started_at = _now()
+        node_start = time.monotonic()
+        while True:
+            node_run.attempts += 1
+            node_run.status = RUNNING
+            await _record_node(db, run, node_run)
+            try:
+                async with semaphore:
+                    if node.timeout:
+                        result = await asyncio.wait_for(node.func(context), node.timeout)
+                    else:
+                        result = await node.func(context)
+                context.results[node.name] = result
+                node_run.status = SUCCESS
+                node_run.rows = result if isinstance(result, int) and not isinstance(result, bool) else None
+                node_run.error = None
+                break
+            except DagSkip as e:
+                node_run.status = SKIPPED
+                node_run.error = str(e)
+                print(f"{dag.name}: 跳过 {node.name}: {str(e)}")
+                break
+            except Exception as e:
+                node_run.error = f"{type(e).__name__}: {str(e)}"
+                if node_run.attempts > retries:
+                    node_run.status = FAILED
+                    print(f"{dag.name}: {node.name} 第 {node_run.attempts} 次执行失败，不再重试: {node_run.error}")
+                    break
+                delay = retry_delay * (2 ** (node_run.attempts - 1))
+                print(f"{dag.name}: {node.name} 第 {node_run.attempts} 次执行失败，{delay:.0f} 秒后重试: {node_run.error}")
+                await asyncio.sleep(delay)
+
+        node_run.finished_at = _now()
+        node_run.elapsed_ms = int((time.monotonic() - node_start) * 1000)
+        await _record_node(db, run, node_run)
+        if node_run.status == SUCCESS:
+            rows = f"，{node_run.rows} 条记录" if node_run.rows is not None else ''
+            print(f"{dag.name}: {node.name} 完成，耗时 {node_run.elapsed_ms / 1000:.1f} 秒{rows}")
+        return node_run.status
+
+    # 按依赖顺序创建任务，保证上游任务先于下游存在
+    for name in dag.order:
+        tasks[name] = asyncio.create_task(execute(dag.nodes[name]))
+    await asyncio.gather(*tasks.values())
+
+    run.elapsed_ms = int((time.monotonic() - started) * 1000)
+    run.status = FAILED if run.failed_nodes else SUCCESS
+    await _finish_run(db, run)
+    print(run.summary())
+    return run
+
+
+async def retry_failed(db, dag: Dag, run_id: int, **kwargs) -> DagRun:
+    """
+    重新执行一次运行：上次成功（或沿用）的节点不再执行，只执行失败和被跳过的节点
+
+    参数:
+        db: 数据库对象
+        dag: 流水线，须与原运行一致
+        run_id: 原运行的run_id
+        **kwargs: run_dag的其他参数
+
+    返回:
+        DagRun: 新的运行结果
+    """
+    row = await db.fetchrow("SELECT pipeline, run_date FROM pipeline_runs WHERE run_id = $1", run_id)
+    if row is None:
+        raise ValueError(f"运行记录不存在: {run_id}")
+    if row['pipeline'] != dag.name:
+        raise ValueError(f"运行 {run_id} 属于流水线 {row['pipeline']}，不是 {dag.name}")
+    rows = await db.fetch("""
+        SELECT node FROM pipeline_node_runs
+        WHERE run_id = $1 AND status = ANY($2::text[])
+    """, run_id, list(_DONE_STATUSES))
+    done = {r['node'] for r in rows if r['node'] in dag.nodes}
+    return await run_dag(db, dag, run_date=row['run_date'], reuse=done, retry_of=run_id, **kwargs)
+
+
+async def last_run_id(db, pipeline: str, run_date: Optional[datetime.date] = None) -> Optional[int]:
+    """流水线最近一次运行的run_id，可按数据日期过滤"""
+    return await db.fetchval("""
+        SELECT run_id FROM pipeline_runs
+        WHERE pipeline = $1 AND ($2::date IS NULL OR run_date = $2)
+        ORDER BY run_id DESC
+        LIMIT 1
+    """, pipeline, run_date)
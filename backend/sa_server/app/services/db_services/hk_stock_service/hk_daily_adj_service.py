@@ -1,7 +1,10 @@
 import pandas as pd
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from app.external.tushare_api.hk_stock_api import get_hk_daily_adj
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.hk_stock_modules.hk_daily_adj import HkDailyAdjData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
+from app.utils.frame_validators import FrameValidators
 
 class HkDailyAdjService:
     """香港股票复权日线行情数据导入服务，实现高效批量导入和数据管理"""
@@ -20,7 +23,8 @@ class HkDailyAdjService:
                                       trade_date: Optional[str] = None,
                                       start_date: Optional[str] = None,
                                       end_date: Optional[str] = None,
-                                      batch_size: int = 1000) -> int:
+                                      batch_size: int = 1000,
+                                      raise_errors: bool = False) -> int:
         """
         从Tushare获取香港股票复权日线数据并高效导入数据库
         
@@ -30,6 +34,7 @@ class HkDailyAdjService:
             start_date: 开始日期 (YYYYMMDD格式)
             end_date: 结束日期 (YYYYMMDD格式)
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -50,7 +55,7 @@ class HkDailyAdjService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_hk_daily_adj(
+            df_result = await fetch_chunked(get_hk_daily_adj,
                 ts_code=ts_code, 
                 trade_date=trade_date, 
                 start_date=start_date,
@@ -64,118 +69,24 @@ class HkDailyAdjService:
             print(f"获取到 {len(df_result)} 条香港股票复权日线数据")
         except Exception as e:
             print(f"获取香港股票复权日线数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的香港股票复权日线数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为HkDailyAdjData对象
-                daily_adj_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        float_fields = ['open', 'high', 'low', 'close', 'pre_close', 'change', 
-                                      'pct_change', 'amount', 'vwap', 'adj_factor', 
-                                      'turnover_ratio', 'free_mv', 'total_mv']
-                        
-                        for field in float_fields:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = float(record[field])
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        int_fields = ['vol', 'free_share', 'total_share']
-                        for field in int_fields:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = int(float(record[field]))
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        daily_adj_data = HkDailyAdjData(**record)
-                        daily_adj_data_list.append(daily_adj_data)
-                    except Exception as e:
-                        print(f"创建HkDailyAdjData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if daily_adj_data_list:
-                    inserted = await self.batch_upsert_hk_daily_adj(daily_adj_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条香港股票复权日线数据")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造HkDailyAdjData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'hk_daily_adj', df_result, HkDailyAdjData,
+            conflict_keys=['ts_code', 'trade_date'],
+            required_fields=['ts_code', 'trade_date'],
+            batch_size=batch_size,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条香港股票复权日线数据")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'trade_date': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_hk_daily_adj(self, daily_adj_list: List[HkDailyAdjData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -189,119 +100,13 @@ class HkDailyAdjService:
         if not daily_adj_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = daily_adj_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for daily_adj in daily_adj_list:
-            # 创建唯一键 (ts_code, trade_date)
-            key = (daily_adj.ts_code, str(daily_adj.trade_date))
-            unique_records[key] = daily_adj
-        
-        # 提取最终的唯一记录列表
-        unique_daily_adj_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for daily_adj in unique_daily_adj_list:
-            daily_adj_dict = daily_adj.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = daily_adj_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'hk_daily_adj', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_hk_daily_adj (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_hk_daily_adj', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO hk_daily_adj ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_hk_daily_adj
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'hk_daily_adj', daily_adj_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"hk_daily_adj 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定股票代码的复权日线数据
@@ -390,7 +195,10 @@ async def query_hk_daily_adj_data(db,
                                 filters: Optional[Dict[str, Any]] = None, 
                                 order_by: Optional[List[str]] = None,
                                 limit: Optional[int] = None,
-                                offset: Optional[int] = None) -> List[HkDailyAdjData]:
+                                offset: Optional[int] = None,
+                                cursor: Optional[str] = None,
+                                fields: Optional[List[str]] = None,
+                                result_format: str = 'model') -> List[HkDailyAdjData]:
     """
     动态查询香港股票复权日线数据，支持任意字段过滤和自定义排序
     
@@ -408,6 +216,9 @@ async def query_hk_daily_adj_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-trade_date', 'ts_code']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[HkDailyAdjData]: 符合条件的香港股票复权日线数据列表
@@ -436,78 +247,146 @@ async def query_hk_daily_adj_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
 
 
-# 计算前复权数据
-async def calculate_qfq_prices(db, ts_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+# 参与复权计算的价格字段
+ADJUST_PRICE_FIELDS = ['open', 'high', 'low', 'close', 'pre_close']
+
+
+async def _get_base_adj_factor(crud, filters: Dict[str, Any], latest: bool) -> Optional[float]:
     """
-    计算指定股票的前复权价格
-    
+    获取区间内最新（前复权）或最早（后复权）的有效复权因子
+
+    参数:
+        crud: HkDailyAdjCRUD对象
+        filters: 股票代码和日期区间过滤条件
+        latest: True取最新的复权因子，False取最早的复权因子
+    """
+    rows = await crud.get_hk_daily_adj(
+        filters={**filters, 'adj_factor__gt': 0},
+        order_by=['-trade_date' if latest else 'trade_date'],
+        limit=1,
+        fields=['adj_factor'],
+        result_format='records'
+    )
+    return float(rows[0]['adj_factor']) if rows else None
+
+
+async def _stream_adjusted_prices(db, ts_code: str, start_date: Optional[str], end_date: Optional[str],
+                                  prefix: str, chunk_size: int) -> AsyncIterator[pd.DataFrame]:
+    """
+    分块计算复权价格，每块为一个DataFrame
+
+    基准复权因子先通过一次LIMIT 1查询得到，之后每块数据独立计算，
+    内存中只保留一块数据，适合长区间的分钟级或日线级全量计算。
+
     参数:
         db: 数据库连接对象
         ts_code: 股票代码
         start_date: 开始日期 (YYYYMMDD格式，可选)
         end_date: 结束日期 (YYYYMMDD格式，可选)
-        
-    返回:
-        List[Dict]: 包含前复权价格的数据列表
+        prefix: 'qfq'为前复权（以最新复权因子为基准），'hfq'为后复权（以最早复权因子为基准）
+        chunk_size: 每块的记录数
     """
-    # 获取原始数据
     from app.db.crud.hk_stock_crud.hk_daily_adj_crud import HkDailyAdjCRUD
-    
+
     crud = HkDailyAdjCRUD(db)
     filters = {'ts_code': ts_code}
-    
+
     if start_date:
         filters['trade_date__ge'] = start_date
     if end_date:
         filters['trade_date__le'] = end_date
-        
-    daily_adj_data = await crud.get_hk_daily_adj(
-        filters=filters,
-        order_by=['trade_date']  # 按时间正序排列，便于计算复权
-    )
-    
-    if not daily_adj_data:
+
+    base_factor = await _get_base_adj_factor(crud, filters, latest=(prefix == 'qfq'))
+    if base_factor is None:
+        print(f"警告: 股票 {ts_code} 缺少复权因子数据，无法计算{'前' if prefix == 'qfq' else '后'}复权价格")
+
+    # 按时间正序读取，便于计算复权
+    async for chunk in crud.stream_hk_daily_adj(
+        filters=filters, order_by=['trade_date'], chunk_size=chunk_size, result_format='columns'
+    ):
+        df = chunk.to_frame()
+        for col in ADJUST_PRICE_FIELDS + ['adj_factor']:
+            df[col] = FrameValidators.to_numeric_series(df[col])
+
+        if base_factor is not None:
+            ratio = df['adj_factor'] / base_factor
+            for col in ADJUST_PRICE_FIELDS:
+                # 保留两位小数
+                df[f'{prefix}_{col}'] = (df[col] * ratio).round(2)
+        yield df
+
+
+async def stream_qfq_prices(db, ts_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            chunk_size: int = 5000) -> AsyncIterator[pd.DataFrame]:
+    """
+    分块计算指定股票的前复权价格，每块产出一个包含qfq_*列的DataFrame
+
+    参数:
+        db: 数据库连接对象
+        ts_code: 股票代码
+        start_date: 开始日期 (YYYYMMDD格式，可选)
+        end_date: 结束日期 (YYYYMMDD格式，可选)
+        chunk_size: 每块的记录数
+    """
+    async for df in _stream_adjusted_prices(db, ts_code, start_date, end_date, 'qfq', chunk_size):
+        yield df
+
+
+async def stream_hfq_prices(db, ts_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            chunk_size: int = 5000) -> AsyncIterator[pd.DataFrame]:
+    """
+    分块计算指定股票的后复权价格，每块产出一个包含hfq_*列的DataFrame
+
+    参数:
+        db: 数据库连接对象
+        ts_code: 股票代码
+        start_date: 开始日期 (YYYYMMDD格式，可选)
+        end_date: 结束日期 (YYYYMMDD格式，可选)
+        chunk_size: 每块的记录数
+    """
+    async for df in _stream_adjusted_prices(db, ts_code, start_date, end_date, 'hfq', chunk_size):
+        yield df
+
+
+async def _collect_adjusted_prices(chunks: AsyncIterator[pd.DataFrame]) -> List[Dict[str, Any]]:
+    """将分块计算结果合并为字典列表"""
+    frames = [df async for df in chunks]
+    if not frames:
         return []
+    df = pd.concat(frames, ignore_index=True)
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+# 计算前复权数据
+async def calculate_qfq_prices(db, ts_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    计算指定股票的前复权价格，大区间请使用stream_qfq_prices分块处理
     
-    # 将数据转换为pandas DataFrame便于计算
-    import pandas as pd
-    df = pd.DataFrame([d.model_dump() for d in daily_adj_data])
-    
-    # 确保有复权因子列
-    if 'adj_factor' not in df.columns or df['adj_factor'].isna().all():
-        print(f"警告: 股票 {ts_code} 缺少复权因子数据，无法计算前复权价格")
-        return df.to_dict('records')
-    
-    # 获取最新的复权因子作为基准
-    latest_factor = df['adj_factor'].iloc[-1]
-    
-    # 计算前复权价格
-    df['qfq_open'] = df['open'] * df['adj_factor'] / latest_factor
-    df['qfq_high'] = df['high'] * df['adj_factor'] / latest_factor
-    df['qfq_low'] = df['low'] * df['adj_factor'] / latest_factor
-    df['qfq_close'] = df['close'] * df['adj_factor'] / latest_factor
-    df['qfq_pre_close'] = df['pre_close'] * df['adj_factor'] / latest_factor
-    
-    # 保留两位小数
-    for col in ['qfq_open', 'qfq_high', 'qfq_low', 'qfq_close', 'qfq_pre_close']:
-        df[col] = df[col].round(2)
-    
-    # 转换回字典列表
-    result = df.to_dict('records')
-    
-    return result
+    参数:
+        db: 数据库连接对象
+        ts_code: 股票代码
+        start_date: 开始日期 (YYYYMMDD格式，可选)
+        end_date: 结束日期 (YYYYMMDD格式，可选)
+        
+    返回:
+        List[Dict]: 包含前复权价格的数据列表
+    """
+    return await _collect_adjusted_prices(stream_qfq_prices(db, ts_code, start_date, end_date))
 
 
 # 计算后复权数据
 async def calculate_hfq_prices(db, ts_code: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    计算指定股票的后复权价格
+    计算指定股票的后复权价格，大区间请使用stream_hfq_prices分块处理
     
     参数:
         db: 数据库连接对象
@@ -518,52 +397,7 @@ async def calculate_hfq_prices(db, ts_code: str, start_date: Optional[str] = Non
     返回:
         List[Dict]: 包含后复权价格的数据列表
     """
-    # 获取原始数据
-    from app.db.crud.hk_stock_crud.hk_daily_adj_crud import HkDailyAdjCRUD
-    
-    crud = HkDailyAdjCRUD(db)
-    filters = {'ts_code': ts_code}
-    
-    if start_date:
-        filters['trade_date__ge'] = start_date
-    if end_date:
-        filters['trade_date__le'] = end_date
-        
-    daily_adj_data = await crud.get_hk_daily_adj(
-        filters=filters,
-        order_by=['trade_date']  # 按时间正序排列，便于计算复权
-    )
-    
-    if not daily_adj_data:
-        return []
-    
-    # 将数据转换为pandas DataFrame便于计算
-    import pandas as pd
-    df = pd.DataFrame([d.model_dump() for d in daily_adj_data])
-    
-    # 确保有复权因子列
-    if 'adj_factor' not in df.columns or df['adj_factor'].isna().all():
-        print(f"警告: 股票 {ts_code} 缺少复权因子数据，无法计算后复权价格")
-        return df.to_dict('records')
-    
-    # 获取第一个有效的复权因子作为基准
-    first_valid_factor = df.loc[df['adj_factor'].notna(), 'adj_factor'].iloc[0]
-    
-    # 计算后复权价格
-    df['hfq_open'] = df['open'] * df['adj_factor'] / first_valid_factor
-    df['hfq_high'] = df['high'] * df['adj_factor'] / first_valid_factor
-    df['hfq_low'] = df['low'] * df['adj_factor'] / first_valid_factor
-    df['hfq_close'] = df['close'] * df['adj_factor'] / first_valid_factor
-    df['hfq_pre_close'] = df['pre_close'] * df['adj_factor'] / first_valid_factor
-    
-    # 保留两位小数
-    for col in ['hfq_open', 'hfq_high', 'hfq_low', 'hfq_close', 'hfq_pre_close']:
-        df[col] = df[col].round(2)
-    
-    # 转换回字典列表
-    result = df.to_dict('records')
-    
-    return result
+    return await _collect_adjusted_prices(stream_hfq_prices(db, ts_code, start_date, end_date))
 
 
 # 获取最大市值股票排行
@@ -1,7 +1,8 @@
-import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.hk_stock_api import get_hk_daily
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.hk_stock_modules.hk_daily import HkDailyData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
 
 class HkDailyService:
     """香港股票日线行情数据导入服务，实现高效批量导入和数据管理"""
@@ -20,7 +21,9 @@ class HkDailyService:
                                   trade_date: Optional[str] = None,
                                   start_date: Optional[str] = None,
                                   end_date: Optional[str] = None,
-                                  batch_size: int = 1000) -> int:
+                                  batch_size: int = 1000,
+                                  concurrency: Optional[int] = None,
+                                  raise_errors: bool = False) -> int:
         """
         从Tushare获取香港股票日线数据并高效导入数据库
         
@@ -30,6 +33,8 @@ class HkDailyService:
             start_date: 开始日期 (YYYYMMDD格式)
             end_date: 结束日期 (YYYYMMDD格式)
             batch_size: 批量处理的记录数，默认1000条
+            concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -50,7 +55,7 @@ class HkDailyService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_hk_daily(
+            df_result = await fetch_chunked(get_hk_daily,
                 ts_code=ts_code, 
                 trade_date=trade_date, 
                 start_date=start_date,
@@ -64,103 +69,24 @@ class HkDailyService:
             print(f"获取到 {len(df_result)} 条香港股票日线数据")
         except Exception as e:
             print(f"获取香港股票日线数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的香港股票日线数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为HkDailyData对象
-                daily_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        for field in ['open', 'high', 'low', 'close', 'pre_close', 'change', 'pct_chg', 'vol', 'amount']:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = float(record[field])
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        daily_data = HkDailyData(**record)
-                        daily_data_list.append(daily_data)
-                    except Exception as e:
-                        print(f"创建HkDailyData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if daily_data_list:
-                    inserted = await self.batch_upsert_hk_daily(daily_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条香港股票日线数据")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换后直接由列数组生成COPY记录，不再逐行构造HkDailyData
+        # 批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'hk_daily', df_result, HkDailyData,
+            conflict_keys=['ts_code', 'trade_date'],
+            batch_size=batch_size,
+            concurrency=concurrency,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条香港股票日线数据")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'trade_date': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_hk_daily(self, daily_list: List[HkDailyData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -174,119 +100,13 @@ class HkDailyService:
         if not daily_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = daily_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for daily in daily_list:
-            # 创建唯一键 (ts_code, trade_date)
-            key = (daily.ts_code, str(daily.trade_date))
-            unique_records[key] = daily
-        
-        # 提取最终的唯一记录列表
-        unique_daily_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for daily in unique_daily_list:
-            daily_dict = daily.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = daily_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'hk_daily', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_hk_daily (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_hk_daily', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO hk_daily ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_hk_daily
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'hk_daily', daily_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"hk_daily 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定股票代码的日线数据
@@ -375,7 +195,10 @@ async def query_hk_daily_data(db,
                             filters: Optional[Dict[str, Any]] = None, 
                             order_by: Optional[List[str]] = None,
                             limit: Optional[int] = None,
-                            offset: Optional[int] = None) -> List[HkDailyData]:
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model') -> List[HkDailyData]:
     """
     动态查询香港股票日线数据，支持任意字段过滤和自定义排序
     
@@ -393,6 +216,9 @@ async def query_hk_daily_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-trade_date', 'ts_code']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[HkDailyData]: 符合条件的香港股票日线数据列表
@@ -421,7 +247,10 @@ async def query_hk_daily_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
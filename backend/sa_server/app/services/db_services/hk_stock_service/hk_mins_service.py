@@ -1,7 +1,8 @@
-import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.hk_stock_api import get_hk_mins
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.hk_stock_modules.hk_mins import HkMinsData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
 
 class HkMinsService:
     """香港股票分钟行情数据导入服务，实现高效批量导入和数据管理"""
@@ -20,7 +21,9 @@ class HkMinsService:
                                 freq: str,
                                 start_date: Optional[str] = None,
                                 end_date: Optional[str] = None,
-                                batch_size: int = 1000) -> int:
+                                batch_size: int = 1000,
+                                concurrency: Optional[int] = None,
+                                raise_errors: bool = False) -> int:
         """
         从Tushare获取香港股票分钟行情数据并高效导入数据库
         
@@ -30,6 +33,8 @@ class HkMinsService:
             start_date: 开始日期时间 格式：2023-03-13 09:00:00
             end_date: 结束日期时间 格式：2023-03-13 19:00:00
             batch_size: 批量处理的记录数，默认1000条
+            concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
+            raise_errors: 获取数据失败时是否抛出异常，默认打印错误并返回0
             
         返回:
             导入的记录数量
@@ -46,7 +51,7 @@ class HkMinsService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_hk_mins(
+            df_result = await fetch_chunked(get_hk_mins,
                 ts_code=ts_code, 
                 freq=freq, 
                 start_date=start_date,
@@ -60,112 +65,25 @@ class HkMinsService:
             print(f"获取到 {len(df_result)} 条香港股票分钟行情数据")
         except Exception as e:
             print(f"获取香港股票分钟行情数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records, freq)
-        
-        if not valid_records:
-            print("没有有效的香港股票分钟行情数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
+        # 分钟频度由请求参数决定，统一写入freq列
+        df_result = df_result.assign(freq=freq)
         
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为HkMinsData对象
-                mins_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        # 处理浮点数字段
-                        float_fields = ['open', 'high', 'low', 'close', 'amount']
-                        for field in float_fields:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = float(record[field])
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        # 处理整数字段
-                        if 'vol' in record and record['vol'] is not None:
-                            if isinstance(record['vol'], str) and record['vol'].strip() == '':
-                                record['vol'] = None
-                            elif record['vol'] is not None:
-                                try:
-                                    record['vol'] = int(float(record['vol']))
-                                except (ValueError, TypeError):
-                                    record['vol'] = None
-                        
-                        # 确保包含频率字段
-                        if 'freq' not in record:
-                            record['freq'] = freq
-                        
-                        mins_data = HkMinsData(**record)
-                        mins_data_list.append(mins_data)
-                    except Exception as e:
-                        print(f"创建HkMinsData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_time', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if mins_data_list:
-                    inserted = await self.batch_upsert_hk_mins(mins_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条香港股票分钟行情数据")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换后以流水线方式在多个连接上并发写入，不再逐行构造HkMinsData
+        result = await pipelined_upsert_frame(
+            self.db, 'hk_mins', df_result, HkMinsData,
+            conflict_keys=['ts_code', 'trade_time', 'freq'],
+            batch_size=batch_size,
+            concurrency=concurrency
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条香港股票分钟行情数据")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]], freq: str) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            freq: 分钟频度
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'trade_time': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['trade_time'] is None:
-                invalid_count += 1
-                continue
-            
-            # 添加频率字段
-            record['freq'] = freq
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_hk_mins(self, mins_list: List[HkMinsData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -179,123 +97,17 @@ class HkMinsService:
         if not mins_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = mins_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for mins in mins_list:
-            # 创建唯一键 (ts_code, trade_time, freq)
-            key = (mins.ts_code, str(mins.trade_time), mins.freq)
-            unique_records[key] = mins
-        
-        # 提取最终的唯一记录列表
-        unique_mins_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for mins in unique_mins_list:
-            mins_dict = mins.model_dump(exclude={'id'})
-            # 正确处理日期时间类型和None值
-            record = []
-            for col in columns:
-                val = mins_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'hk_mins', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_hk_mins (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_hk_mins', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_time', 'freq']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO hk_mins ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_hk_mins
-                        ON CONFLICT (ts_code, trade_time, freq) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'hk_mins', mins_list,
+            conflict_keys=['ts_code', 'trade_time', 'freq']
+        )
+        print(f"hk_mins 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定股票代码和频率的分钟行情数据
-async def import_hk_mins_by_ts_code_and_freq(db, ts_code: str, freq: str, start_date: Optional[str] = None, end_date: Optional[str] = None, batch_size: int = 1000) -> int:
+async def import_hk_mins_by_ts_code_and_freq(db, ts_code: str, freq: str, start_date: Optional[str] = None, end_date: Optional[str] = None, batch_size: int = 1000, concurrency: Optional[int] = None) -> int:
     """
     导入特定股票代码和频率的香港股票分钟行情数据
     
@@ -306,6 +118,7 @@ async def import_hk_mins_by_ts_code_and_freq(db, ts_code: str, freq: str, start_
         start_date: 开始日期时间 格式：2023-03-13 09:00:00
         end_date: 结束日期时间 格式：2023-03-13 19:00:00
         batch_size: 批量处理大小
+        concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
         
     返回:
         导入的记录数
@@ -316,7 +129,8 @@ async def import_hk_mins_by_ts_code_and_freq(db, ts_code: str, freq: str, start_
         freq=freq,
         start_date=start_date,
         end_date=end_date,
-        batch_size=batch_size
+        batch_size=batch_size,
+        concurrency=concurrency
     )
     
     date_range = ""
@@ -364,7 +178,7 @@ async def import_hk_mins_by_date(db, ts_code: str, freq: str, date: str, batch_s
 
 
 # 快捷函数，用于导入多个股票代码的分钟行情数据
-async def import_hk_mins_for_multiple_stocks(db, ts_codes: List[str], freq: str, start_date: Optional[str] = None, end_date: Optional[str] = None, batch_size: int = 1000) -> Dict[str, int]:
+async def import_hk_mins_for_multiple_stocks(db, ts_codes: List[str], freq: str, start_date: Optional[str] = None, end_date: Optional[str] = None, batch_size: int = 1000, concurrency: Optional[int] = None) -> Dict[str, int]:
     """
     导入多个股票代码的香港股票分钟行情数据
     
@@ -375,6 +189,7 @@ async def import_hk_mins_for_multiple_stocks(db, ts_codes: List[str], freq: str,
         start_date: 开始日期时间 格式：2023-03-13 09:00:00
         end_date: 结束日期时间 格式：2023-03-13 19:00:00
         batch_size: 批量处理大小
+        concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
         
     返回:
         Dict[str, int]: 字典，键为股票代码，值为导入的记录数
@@ -389,7 +204,8 @@ async def import_hk_mins_for_multiple_stocks(db, ts_codes: List[str], freq: str,
                 freq=freq, 
                 start_date=start_date, 
                 end_date=end_date, 
-                batch_size=batch_size
+                batch_size=batch_size,
+                concurrency=concurrency
             )
             result[ts_code] = count
         except Exception as e:
@@ -408,7 +224,10 @@ async def query_hk_mins_data(db,
                           filters: Optional[Dict[str, Any]] = None, 
                           order_by: Optional[List[str]] = None,
                           limit: Optional[int] = None,
-                          offset: Optional[int] = None) -> List[HkMinsData]:
+                          offset: Optional[int] = None,
+                          cursor: Optional[str] = None,
+                          fields: Optional[List[str]] = None,
+                          result_format: str = 'model') -> List[HkMinsData]:
     """
     动态查询香港股票分钟行情数据，支持任意字段过滤和自定义排序
     
@@ -426,6 +245,9 @@ async def query_hk_mins_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-trade_time', 'ts_code']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[HkMinsData]: 符合条件的香港股票分钟行情数据列表
@@ -451,7 +273,10 @@ async def query_hk_mins_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
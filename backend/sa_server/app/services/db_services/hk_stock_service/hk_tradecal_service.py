@@ -1,7 +1,8 @@
-import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.hk_stock_api import get_hk_tradecal
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.hk_stock_modules.hk_tradecal import HkTradecalData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
 
 class HkTradecalService:
     """香港交易日历数据导入服务，实现高效批量导入和数据管理"""
@@ -19,7 +20,8 @@ class HkTradecalService:
                                     start_date: Optional[str] = None, 
                                     end_date: Optional[str] = None,
                                     is_open: Optional[str] = None,
-                                    batch_size: int = 1000) -> int:
+                                    batch_size: int = 1000,
+                                    raise_errors: bool = False) -> int:
         """
         从Tushare获取香港交易日历并高效导入数据库
         
@@ -28,6 +30,7 @@ class HkTradecalService:
             end_date: 结束日期 (YYYYMMDD格式)
             is_open: 是否交易 '0'休市 '1'交易
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -46,7 +49,7 @@ class HkTradecalService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_hk_tradecal(start_date=start_date, end_date=end_date, is_open=is_open)
+            df_result = await fetch_chunked(get_hk_tradecal, start_date=start_date, end_date=end_date, is_open=is_open)
             
             if df_result is None or df_result.empty:
                 print(f"未找到香港交易日历: {param_desc}")
@@ -55,103 +58,24 @@ class HkTradecalService:
             print(f"获取到 {len(df_result)} 条香港交易日历")
         except Exception as e:
             print(f"获取香港交易日历失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的香港交易日历记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为HkTradecalData对象
-                tradecal_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        if 'is_open' in record and record['is_open'] is not None:
-                            if isinstance(record['is_open'], str) and record['is_open'].strip() == '':
-                                record['is_open'] = None
-                            elif record['is_open'] is not None:
-                                try:
-                                    record['is_open'] = int(record['is_open'])
-                                except (ValueError, TypeError):
-                                    record['is_open'] = None
-                        
-                        tradecal_data = HkTradecalData(**record)
-                        tradecal_data_list.append(tradecal_data)
-                    except Exception as e:
-                        print(f"创建HkTradecalData对象失败 {record.get('cal_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if tradecal_data_list:
-                    inserted = await self.batch_upsert_hk_tradecal(tradecal_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条香港交易日历")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造HkTradecalData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'hk_tradecal', df_result, HkTradecalData,
+            conflict_keys=['cal_date'],
+            required_fields=['cal_date', 'is_open'],
+            batch_size=batch_size,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条香港交易日历")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'cal_date': None,
-            'is_open': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['cal_date'] is None or record['is_open'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            for date_field in ['cal_date', 'pretrade_date']:
-                if date_field in record and record[date_field] is not None:
-                    # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                    if hasattr(record[date_field], 'strftime'):
-                        record[date_field] = record[date_field].strftime('%Y%m%d')
-                    # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                    elif isinstance(record[date_field], str) and '-' in record[date_field]:
-                        date_parts = record[date_field].split('-')
-                        if len(date_parts) == 3:
-                            record[date_field] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_hk_tradecal(self, tradecal_list: List[HkTradecalData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -165,119 +89,13 @@ class HkTradecalService:
         if not tradecal_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = tradecal_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for tradecal in tradecal_list:
-            # 创建唯一键 (cal_date)
-            key = str(tradecal.cal_date)
-            unique_records[key] = tradecal
-        
-        # 提取最终的唯一记录列表
-        unique_tradecal_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for tradecal in unique_tradecal_list:
-            tradecal_dict = tradecal.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = tradecal_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'hk_tradecal', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_hk_tradecal (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_hk_tradecal', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'cal_date']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO hk_tradecal ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_hk_tradecal
-                        ON CONFLICT (cal_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'hk_tradecal', tradecal_list,
+            conflict_keys=['cal_date']
+        )
+        print(f"hk_tradecal 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入指定日期范围的香港交易日历
@@ -372,7 +190,10 @@ async def query_hk_tradecal_data(db,
                                filters: Optional[Dict[str, Any]] = None, 
                                order_by: Optional[List[str]] = None,
                                limit: Optional[int] = None,
-                               offset: Optional[int] = None) -> List[HkTradecalData]:
+                               offset: Optional[int] = None,
+                               cursor: Optional[str] = None,
+                               fields: Optional[List[str]] = None,
+                               result_format: str = 'model') -> List[HkTradecalData]:
     """
     动态查询香港交易日历，支持任意字段过滤和自定义排序
     
@@ -382,6 +203,9 @@ async def query_hk_tradecal_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[HkTradecalData]: 符合条件的香港交易日历列表
@@ -401,7 +225,10 @@ async def query_hk_tradecal_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.macroeconomics_api import get_cn_pmi
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.macroeconomics_modules.cn.cn_pmi import CnPmiData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class CnPmiService:
@@ -31,7 +33,7 @@ class CnPmiService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_cn_pmi(m=month, start_m=start_month, end_m=end_month)
+        df_result = await run_tushare(get_cn_pmi, m=month, start_m=start_month, end_m=end_month)
         
         if df_result is None or df_result.empty:
             print(f"未找到PMI数据: month={month}, start_month={start_month}, end_month={end_month}")
@@ -84,58 +86,13 @@ class CnPmiService:
         if not pmi_list:
             return 0
         
-        # 获取字段列表
-        columns = list(pmi_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for pmi in pmi_list:
-            pmi_dict = pmi.model_dump()
-            # 正确处理None值
-            record = []
-            for col in columns:
-                val = pmi_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_cn_pmi (LIKE cn_pmi) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_cn_pmi', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'month']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO cn_pmi 
-                        SELECT * FROM temp_cn_pmi
-                        ON CONFLICT (month) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"PMI数据批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'cn_pmi', pmi_list,
+            conflict_keys=['month']
+        )
+        print(f"cn_pmi 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
     
     async def get_pmi_dataframe(self, 
                                 start_month: Optional[str] = None,
@@ -152,38 +109,37 @@ class CnPmiService:
         返回:
             包含PMI数据的pandas DataFrame
         """
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 构建字段部分
-                fields_str = '*'
-                if fields:
-                    fields_str = ', '.join(['month'] + fields)
-                
-                # 构建条件部分
-                conditions = []
-                params = []
-                if start_month:
-                    conditions.append(f"month >= ${len(params) + 1}")
-                    params.append(start_month)
-                if end_month:
-                    conditions.append(f"month <= ${len(params) + 1}")
-                    params.append(end_month)
-                
-                where_clause = ""
-                if conditions:
-                    where_clause = f"WHERE {' AND '.join(conditions)}"
-                
-                # 执行查询
-                query = f"SELECT {fields_str} FROM cn_pmi {where_clause} ORDER BY month"
-                rows = await conn.fetch(query, *params)
-                
-                # 转换为DataFrame
-                records = [dict(row) for row in rows]
-                return pd.DataFrame(records)
-                
-            except Exception as e:
-                print(f"获取PMI数据发生错误: {str(e)}")
-                return pd.DataFrame()
+        try:
+            # 构建字段部分
+            fields_str = '*'
+            if fields:
+                fields_str = ', '.join(['month'] + fields)
+            
+            # 构建条件部分
+            conditions = []
+            params = []
+            if start_month:
+                conditions.append(f"month >= ${len(params) + 1}")
+                params.append(start_month)
+            if end_month:
+                conditions.append(f"month <= ${len(params) + 1}")
+                params.append(end_month)
+            
+            where_clause = ""
+            if conditions:
+                where_clause = f"WHERE {' AND '.join(conditions)}"
+            
+            # 执行查询
+            query = f"SELECT {fields_str} FROM cn_pmi {where_clause} ORDER BY month"
+            rows = await self.db.fetch(query, *params)
+            
+            # 转换为DataFrame
+            records = [dict(row) for row in rows]
+            return pd.DataFrame(records)
+            
+        except Exception as e:
+            print(f"获取PMI数据发生错误: {str(e)}")
+            return pd.DataFrame()
     
     async def analyze_pmi_trend(self, 
                                start_month: Optional[str] = None,
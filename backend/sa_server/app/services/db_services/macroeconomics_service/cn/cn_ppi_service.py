@@ -3,6 +3,8 @@ import re
 from typing import List, Optional, Dict, Any
 from app.data.db_modules.macroeconomics_modules.cn.cn_ppi import CnPpiData
 from app.external.tushare_api.macroeconomics_api import get_cn_ppi
+from app.external.tushare_async import run_tushare
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class CnPpiService:
@@ -34,7 +36,7 @@ class CnPpiService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_cn_ppi(m=m, start_date=start_date, end_date=end_date)
+        df_result = await run_tushare(get_cn_ppi, m=m, start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
             if m:
@@ -99,51 +101,13 @@ class CnPpiService:
         if not ppi_list:
             return 0
         
-        # 获取字段列表
-        columns = list(ppi_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for ppi in ppi_list:
-            ppi_dict = ppi.model_dump()
-            # 正确处理None值
-            record = [ppi_dict[col] for col in columns]
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_cn_ppi (LIKE cn_ppi) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_cn_ppi', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'month']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO cn_ppi 
-                        SELECT * FROM temp_cn_ppi
-                        ON CONFLICT (month) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'cn_ppi', ppi_list,
+            conflict_keys=['month']
+        )
+        print(f"cn_ppi 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
     
     async def analyze_ppi_trend(self, months: int = 12) -> Dict[str, Any]:
         """
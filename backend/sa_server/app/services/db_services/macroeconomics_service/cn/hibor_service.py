@@ -2,7 +2,10 @@ import datetime
 import pandas as pd
 from typing import List, Optional, Union
 from app.external.tushare_api.macroeconomics_api import get_hibor
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.macroeconomics_modules.cn.hibor import HiborData
+from app.db.bulk_upsert import bulk_upsert_models
+from app.db.sync_state import run_incremental
 
 
 class HiborService:
@@ -20,7 +23,8 @@ class HiborService:
     async def import_hibor_data(self, date: Optional[str] = None, 
                               start_date: Optional[str] = None, 
                               end_date: Optional[str] = None,
-                              batch_size: int = 1000) -> int:
+                              batch_size: int = 1000,
+                              raise_errors: bool = False) -> int:
         """
         从Tushare获取HIBOR数据并高效导入数据库
         
@@ -29,12 +33,13 @@ class HiborService:
             start_date: 可选，开始日期，格式为YYYYMMDD
             end_date: 可选，结束日期，格式为YYYYMMDD
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_hibor(date=date, start_date=start_date, end_date=end_date)
+        df_result = await run_tushare(get_hibor, date=date, start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
             print(f"未找到HIBOR数据: date={date}, start_date={start_date}, end_date={end_date}")
@@ -82,9 +87,30 @@ class HiborService:
                     print(f"批次导入成功: {inserted} 条记录")
             except Exception as e:
                 print(f"批次导入失败: {str(e)}")
+                if raise_errors:
+                    raise
         
         return total_count
     
+    async def import_incremental(self, overlap_days: int = 7, batch_size: int = 1000) -> int:
+        """
+        增量导入HIBOR数据：只获取同步水位之后的数据，没有同步记录且表为空时全量导入
+        
+        参数:
+            overlap_days: 重叠窗口天数，水位之前这些天的数据重新导入，覆盖数据源的补录和修订
+            batch_size: 批量处理的记录数，默认1000条
+            
+        返回:
+            导入的记录数量
+        """
+        async def importer(start_date: Optional[str], end_date: str) -> int:
+            if start_date is None:
+                # 不指定日期参数，获取所有历史数据
+                return await self.import_hibor_data(batch_size=batch_size, raise_errors=True)
+            return await self.import_hibor_data(start_date=start_date, end_date=end_date, batch_size=batch_size, raise_errors=True)
+        
+        return await run_incremental(self.db, 'hibor', 'hibor', 'date', importer, overlap_days)
+    
     async def batch_upsert_hibor(self, hibor_list: List[HiborData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -98,59 +124,13 @@ class HiborService:
         if not hibor_list:
             return 0
         
-        # 获取字段列表
-        columns = list(hibor_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for hibor in hibor_list:
-            hibor_dict = hibor.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = hibor_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_hibor (LIKE hibor) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_hibor', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'date']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO hibor 
-                        SELECT * FROM temp_hibor
-                        ON CONFLICT (date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'hibor', hibor_list,
+            conflict_keys=['date']
+        )
+        print(f"hibor 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定日期的HIBOR数据
@@ -283,6 +263,25 @@ async def import_all_historical_hibor(db, batch_size: int = 1000) -> int:
     return count
 
 
+# 快捷函数，增量导入HIBOR数据
+async def import_incremental_hibor(db, overlap_days: int = 7, batch_size: int = 1000) -> int:
+    """
+    增量导入HIBOR数据，只获取上次同步之后的数据，用于每日定时任务代替全量导入
+    
+    参数:
+        db: 数据库连接对象
+        overlap_days: 重叠窗口天数
+        batch_size: 批量处理大小
+        
+    返回:
+        导入的记录数
+    """
+    service = HiborService(db)
+    count = await service.import_incremental(overlap_days=overlap_days, batch_size=batch_size)
+    print(f"成功增量导入 {count} 条HIBOR记录")
+    return count
+
+
 # 快捷函数，导入指定年份的HIBOR数据
 async def import_hibor_by_year(db, year: int) -> int:
     """
@@ -3,6 +3,9 @@ from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
 from app.data.db_modules.macroeconomics_modules.cn.shibor import ShiborData
 from app.external.tushare_api.macroeconomics_api import get_shibor
+from app.external.tushare_async import run_tushare
+from app.db.bulk_upsert import bulk_upsert_models
+from app.db.sync_state import run_incremental
 
 class ShiborService:
     """上海银行间同业拆放利率数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -19,7 +22,8 @@ class ShiborService:
     async def import_shibor_data(self, date: Optional[str] = None,
                                 start_date: Optional[str] = None, 
                                 end_date: Optional[str] = None,
-                                batch_size: int = 1000) -> int:
+                                batch_size: int = 1000,
+                                raise_errors: bool = False) -> int:
         """
         从Tushare获取Shibor数据并高效导入数据库
         
@@ -28,6 +32,7 @@ class ShiborService:
             start_date: 可选，开始日期，格式：YYYYMMDD
             end_date: 可选，结束日期，格式：YYYYMMDD，默认为当前日期
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
@@ -35,7 +40,7 @@ class ShiborService:
         # 处理日期参数
         if date:
             # 如果提供了具体日期，则只获取该日的数据
-            df_result = get_shibor(date=date)
+            df_result = await run_tushare(get_shibor, date=date)
             print(f"获取单一日期 {date} 的Shibor数据")
         else:
             # 处理日期范围参数
@@ -47,7 +52,7 @@ class ShiborService:
                 start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
             
             # 从Tushare获取数据
-            df_result = get_shibor(start_date=start_date, end_date=end_date)
+            df_result = await run_tushare(get_shibor, start_date=start_date, end_date=end_date)
             print(f"获取从 {start_date} 到 {end_date} 的Shibor数据")
         
         if df_result is None or df_result.empty:
@@ -98,9 +103,30 @@ class ShiborService:
                     print(f"批次导入成功: {inserted} 条记录")
             except Exception as e:
                 print(f"批次导入失败: {str(e)}")
+                if raise_errors:
+                    raise
         
         return total_count
     
+    async def import_incremental(self, overlap_days: int = 7, batch_size: int = 1000) -> int:
+        """
+        增量导入Shibor数据：只获取同步水位之后的数据，没有同步记录且表为空时全量导入
+        
+        参数:
+            overlap_days: 重叠窗口天数，水位之前这些天的数据重新导入，覆盖数据源的补录和修订
+            batch_size: 批量处理的记录数，默认1000条
+            
+        返回:
+            导入的记录数量
+        """
+        async def importer(start_date: Optional[str], end_date: str) -> int:
+            if start_date is None:
+                # 与import_all_shibor一致，全量导入最近一年
+                start_date = (datetime.now() - timedelta(days=365)).strftime('%Y%m%d')
+            return await self.import_shibor_data(start_date=start_date, end_date=end_date, batch_size=batch_size, raise_errors=True)
+        
+        return await run_incremental(self.db, 'shibor', 'shibor', 'date', importer, overlap_days)
+    
     async def batch_upsert_shibor(self, shibor_list: List[ShiborData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -114,56 +140,13 @@ class ShiborService:
         if not shibor_list:
             return 0
         
-        # 获取字段列表
-        columns = list(shibor_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for shibor in shibor_list:
-            shibor_dict = shibor.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = shibor_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_shibor (LIKE shibor) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_shibor', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'date']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO shibor 
-                        SELECT * FROM temp_shibor
-                        ON CONFLICT (date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'shibor', shibor_list,
+            conflict_keys=['date']
+        )
+        print(f"shibor 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
     
     async def analyze_shibor_trend(self, rate_type: str = 'on_rate', days: int = 30) -> Dict[str, Any]:
         """
@@ -347,6 +330,25 @@ async def import_all_shibor(db, batch_size: int = 1000):
     return count
 
 
+# 快捷函数，增量导入Shibor数据
+async def import_incremental_shibor(db, overlap_days: int = 7, batch_size: int = 1000) -> int:
+    """
+    增量导入Shibor数据，只获取上次同步之后的数据，用于每日定时任务代替全量导入
+    
+    参数:
+        db: 数据库连接对象
+        overlap_days: 重叠窗口天数
+        batch_size: 批量处理大小
+        
+    返回:
+        导入的记录数
+    """
+    service = ShiborService(db)
+    count = await service.import_incremental(overlap_days=overlap_days, batch_size=batch_size)
+    print(f"成功增量导入 {count} 条Shibor记录")
+    return count
+
+
 # 导入特定期限的Shibor数据并分析
 async def import_and_analyze_shibor(db, rate_type: str = 'on_rate', days: int = 90):
     """
@@ -1,8 +1,10 @@
 import datetime
-import pandas as pd
 from typing import List, Optional, Dict, Any
-from app.external.tushare_api.fund_flows_api import get_moneyflow
+from app.external.tushare_api.stock.fund_flows_api import get_moneyflow
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.stock_modules.fund_flows.moneyflow import MoneyflowData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
+from app.db.daily_aggregates import parse_trade_date, refresh_missing_aggregates, refresh_safely
 
 
 class MoneyflowService:
@@ -21,7 +23,9 @@ class MoneyflowService:
                                    trade_date: Optional[str] = None,
                                    start_date: Optional[str] = None, 
                                    end_date: Optional[str] = None,
-                                   batch_size: int = 1000) -> int:
+                                   batch_size: int = 1000,
+                                   concurrency: Optional[int] = None,
+                                   raise_errors: bool = False) -> int:
         """
         从Tushare获取股票资金流向数据并高效导入数据库
         
@@ -31,62 +35,34 @@ class MoneyflowService:
             start_date: 可选，开始日期，格式YYYYMMDD
             end_date: 可选，结束日期，格式YYYYMMDD
             batch_size: 批量处理的记录数，默认1000条
+            concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_moneyflow(ts_code=ts_code, trade_date=trade_date, 
+        df_result = await fetch_chunked(get_moneyflow, ts_code=ts_code, trade_date=trade_date, 
                                  start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
             print(f"未找到资金流向数据: ts_code={ts_code}, trade_date={trade_date}, start_date={start_date}, end_date={end_date}")
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
+        # 列式校验和类型转换后直接由列数组生成COPY记录，不再逐行构造MoneyflowData
+        # 批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'moneyflow', df_result, MoneyflowData,
+            conflict_keys=['ts_code', 'trade_date'],
+            batch_size=batch_size,
+            concurrency=concurrency,
+            raise_errors=raise_errors
+        )
         
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'trade_date': None  # 日期字段为None时会引发错误
-        }
-        
-        # 处理数据并确保所有必填字段都有值
-        valid_records = []
-        for record in records:
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field] == ''):
-                    if field == 'trade_date':  # 日期不能为空
-                        print(f"跳过无效记录，缺少交易日期: {record.get('ts_code', '未知')}")
-                        continue
-                    record[field] = default_value
-            valid_records.append(record)
-        
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch in batches:
-            try:
-                # 将批次数据转换为MoneyflowData对象
-                moneyflow_data_list = []
-                for record in batch:
-                    try:
-                        moneyflow_data = MoneyflowData(**record)
-                        moneyflow_data_list.append(moneyflow_data)
-                    except Exception as e:
-                        print(f"创建MoneyflowData对象失败 {record.get('ts_code', '未知')} - {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if moneyflow_data_list:
-                    inserted = await self.batch_upsert_moneyflow(moneyflow_data_list)
-                    total_count += inserted
-                    print(f"批次导入成功: {inserted} 条记录")
-            except Exception as e:
-                print(f"批次导入失败: {str(e)}")
-        
-        return total_count
+        # 按写入的交易日刷新资金流向统计表
+        if result.total > 0:
+            await refresh_safely(self.db, 'moneyflow', df_result['trade_date'])
+        return result.total
     
     async def batch_upsert_moneyflow(self, moneyflow_list: List[MoneyflowData]) -> int:
         """
@@ -101,60 +77,31 @@ class MoneyflowService:
         if not moneyflow_list:
             return 0
         
-        # 获取字段列表
-        columns = list(moneyflow_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for moneyflow in moneyflow_list:
-            moneyflow_dict = moneyflow.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = moneyflow_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'moneyflow', moneyflow_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"moneyflow 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
+    
+    async def _get_daily_aggregate(self, parsed_date: datetime.date):
+        """
+        读取交易日的市场资金流向汇总，尚未聚合（统计表引入之前导入的数据）时按需补算，
+        原始表没有该交易日的数据时不刷新
         
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_moneyflow (LIKE moneyflow) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_moneyflow', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    non_pk_columns = [col for col in columns if col not in ('ts_code', 'trade_date')]
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in non_pk_columns]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO moneyflow 
-                        SELECT * FROM temp_moneyflow
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        参数:
+            parsed_date: 交易日期
+            
+        返回:
+            agg_moneyflow_daily中的一行，原始表没有该交易日的数据时为None
+        """
+        query = "SELECT * FROM agg_moneyflow_daily WHERE trade_date = $1"
+        row = await self.db.fetchrow(query, parsed_date)
+        if row is None:
+            if await refresh_missing_aggregates(self.db, 'moneyflow', [parsed_date]):
+                row = await self.db.fetchrow(query, parsed_date)
+        return row
     
     async def get_daily_moneyflow_summary(self, trade_date: str) -> Dict[str, Any]:
         """
@@ -166,46 +113,42 @@ class MoneyflowService:
         返回:
             市场资金流向汇总数据
         """
-        async with self.db.pool.acquire() as conn:
-            # 计算市场整体净流入
-            total_net = await conn.fetchrow("""
-                SELECT 
-                    SUM(net_mf_amount) as total_net_amount,
-                    COUNT(*) as total_stocks,
-                    SUM(CASE WHEN net_mf_amount > 0 THEN 1 ELSE 0 END) as inflow_stocks,
-                    SUM(CASE WHEN net_mf_amount < 0 THEN 1 ELSE 0 END) as outflow_stocks
-                FROM moneyflow
-                WHERE trade_date = $1
-            """, trade_date)
-            
-            # 计算不同规模订单的净流入
-            scale_net = await conn.fetchrow("""
-                SELECT 
-                    SUM(buy_sm_amount - sell_sm_amount) as small_net,
-                    SUM(buy_md_amount - sell_md_amount) as medium_net,
-                    SUM(buy_lg_amount - sell_lg_amount) as large_net,
-                    SUM(buy_elg_amount - sell_elg_amount) as extra_large_net
-                FROM moneyflow
-                WHERE trade_date = $1
-            """, trade_date)
-            
+        # 读取导入时按交易日预聚合的汇总，不再对当日全部个股做SUM
+        summary = await self._get_daily_aggregate(parse_trade_date(trade_date))
+        
+        if summary is None:
             return {
                 "trade_date": trade_date,
-                "total_net_amount": total_net["total_net_amount"],
-                "total_stocks": total_net["total_stocks"],
-                "inflow_stocks": total_net["inflow_stocks"],
-                "outflow_stocks": total_net["outflow_stocks"],
-                "inflow_ratio": total_net["inflow_stocks"] / total_net["total_stocks"] if total_net["total_stocks"] > 0 else 0,
-                "small_net": scale_net["small_net"],
-                "medium_net": scale_net["medium_net"],
-                "large_net": scale_net["large_net"],
-                "extra_large_net": scale_net["extra_large_net"]
+                "total_net_amount": None,
+                "total_stocks": 0,
+                "inflow_stocks": 0,
+                "outflow_stocks": 0,
+                "inflow_ratio": 0,
+                "small_net": None,
+                "medium_net": None,
+                "large_net": None,
+                "extra_large_net": None
             }
+        
+        return {
+            "trade_date": trade_date,
+            "total_net_amount": summary["total_net_amount"],
+            "total_stocks": summary["total_stocks"],
+            "inflow_stocks": summary["inflow_stocks"],
+            "outflow_stocks": summary["outflow_stocks"],
+            "inflow_ratio": summary["inflow_stocks"] / summary["total_stocks"] if summary["total_stocks"] > 0 else 0,
+            "small_net": summary["small_net"],
+            "medium_net": summary["medium_net"],
+            "large_net": summary["large_net"],
+            "extra_large_net": summary["extra_large_net"]
+        }
     
     async def analyze_sector_moneyflow(self, trade_date: str, industry_field: str = 'industry') -> List[Dict[str, Any]]:
         """
         分析指定交易日各行业板块的资金流向情况
         
+        默认的industry分类读取导入时预聚合的行业汇总，其他分类字段实时聚合。
+        
         参数:
             trade_date: 交易日期，格式YYYYMMDD
             industry_field: 行业分类字段，默认使用industry
@@ -214,17 +157,20 @@ class MoneyflowService:
             各行业资金流向数据列表，按净流入金额排序
         """
         # 解析日期字符串为日期对象
-        if isinstance(trade_date, str) and len(trade_date) == 8:
-            parsed_date = datetime.date(
-                int(trade_date[:4]), 
-                int(trade_date[4:6]), 
-                int(trade_date[6:8])
-            )
+        parsed_date = parse_trade_date(trade_date)
+        
+        if industry_field == 'industry':
+            if await self._get_daily_aggregate(parsed_date) is None:
+                return []
+            rows = await self.db.fetch("""
+                SELECT industry, stock_count, total_net_amount, avg_net_amount,
+                       inflow_stocks, outflow_stocks, large_buy_amount, large_sell_amount
+                FROM agg_moneyflow_industry_daily
+                WHERE trade_date = $1
+                ORDER BY total_net_amount DESC
+            """, parsed_date)
         else:
-            parsed_date = trade_date
-            
-        async with self.db.pool.acquire() as conn:
-            query = f"""
+            rows = await self.db.fetch(f"""
                 SELECT sb.{industry_field} as industry,
                        COUNT(*) as stock_count,
                        SUM(mf.net_mf_amount) as total_net_amount,
@@ -238,21 +184,19 @@ class MoneyflowService:
                 WHERE mf.trade_date = $1
                 GROUP BY sb.{industry_field}
                 ORDER BY total_net_amount DESC
-            """
-            
-            rows = await conn.fetch(query, parsed_date)
+            """, parsed_date)
+        
+        result = []
+        for row in rows:
+            industry_data = dict(row)
+            # 计算大单资金净流入
+            industry_data["large_net_amount"] = industry_data["large_buy_amount"] - industry_data["large_sell_amount"]
+            # 计算行业内个股净流入比例
+            total_stocks = industry_data["stock_count"]
+            industry_data["inflow_ratio"] = industry_data["inflow_stocks"] / total_stocks if total_stocks > 0 else 0
+            result.append(industry_data)
             
-            result = []
-            for row in rows:
-                industry_data = dict(row)
-                # 计算大单资金净流入
-                industry_data["large_net_amount"] = industry_data["large_buy_amount"] - industry_data["large_sell_amount"]
-                # 计算行业内个股净流入比例
-                total_stocks = industry_data["stock_count"]
-                industry_data["inflow_ratio"] = industry_data["inflow_stocks"] / total_stocks if total_stocks > 0 else 0
-                result.append(industry_data)
-                
-            return result
+        return result
     
     async def get_stock_moneyflow_trend(self, ts_code: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """
@@ -285,38 +229,37 @@ class MoneyflowService:
         else:
             parsed_end_date = end_date
             
-        async with self.db.pool.acquire() as conn:
-            query = """
-                SELECT mf.*, p.close, p.change, p.pct_chg
-                FROM moneyflow mf
-                LEFT JOIN daily p ON mf.ts_code = p.ts_code AND mf.trade_date = p.trade_date
-                WHERE mf.ts_code = $1 
-                  AND mf.trade_date BETWEEN $2 AND $3
-                ORDER BY mf.trade_date
-            """
+        query = """
+            SELECT mf.*, p.close, p.change, p.pct_chg
+            FROM moneyflow mf
+            LEFT JOIN daily p ON mf.ts_code = p.ts_code AND mf.trade_date = p.trade_date
+            WHERE mf.ts_code = $1 
+              AND mf.trade_date BETWEEN $2 AND $3
+            ORDER BY mf.trade_date
+        """
+        
+        rows = await self.db.fetch(query, ts_code, parsed_start_date, parsed_end_date)
+        
+        result = []
+        for row in rows:
+            # 将行转换为字典
+            data = dict(row)
             
-            rows = await conn.fetch(query, ts_code, parsed_start_date, parsed_end_date)
+            # 计算大单净流入和小单净流入
+            data["large_net"] = (data["buy_lg_amount"] + data["buy_elg_amount"]) - (data["sell_lg_amount"] + data["sell_elg_amount"])
+            data["small_net"] = (data["buy_sm_amount"] + data["buy_md_amount"]) - (data["sell_sm_amount"] + data["sell_md_amount"])
             
-            result = []
-            for row in rows:
-                # 将行转换为字典
-                data = dict(row)
-                
-                # 计算大单净流入和小单净流入
-                data["large_net"] = (data["buy_lg_amount"] + data["buy_elg_amount"]) - (data["sell_lg_amount"] + data["sell_elg_amount"])
-                data["small_net"] = (data["buy_sm_amount"] + data["buy_md_amount"]) - (data["sell_sm_amount"] + data["sell_md_amount"])
+            # 根据价格变动和资金流向计算一致性指标
+            # 正值表示资金流向与价格变动一致
+            if data["pct_chg"] is not None and data["net_mf_amount"] is not None:
+                data["consistency"] = 1 if (data["pct_chg"] > 0 and data["net_mf_amount"] > 0) or \
+                                         (data["pct_chg"] < 0 and data["net_mf_amount"] < 0) else 0
+            else:
+                data["consistency"] = None
                 
-                # 根据价格变动和资金流向计算一致性指标
-                # 正值表示资金流向与价格变动一致
-                if data["pct_chg"] is not None and data["net_mf_amount"] is not None:
-                    data["consistency"] = 1 if (data["pct_chg"] > 0 and data["net_mf_amount"] > 0) or \
-                                             (data["pct_chg"] < 0 and data["net_mf_amount"] < 0) else 0
-                else:
-                    data["consistency"] = None
-                    
-                result.append(data)
-                
-            return result
+            result.append(data)
+            
+        return result
 
 
 # 快捷函数，用于导入特定日期的资金流向数据
@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List, Optional
-from app.external.tushare_api.fund_flows_api import get_moneyflow_ths
+from app.external.tushare_api.stock.fund_flows_api import get_moneyflow_ths
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.fund_flows.moneyflow_ths import MoneyflowThsData
+from app.db.bulk_upsert import bulk_upsert_models
 
 class MoneyflowThsService:
     """同花顺股票资金流向数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -19,7 +21,8 @@ class MoneyflowThsService:
                                       trade_date: Optional[str] = None,
                                       start_date: Optional[str] = None, 
                                       end_date: Optional[str] = None,
-                                      batch_size: int = 1000) -> int:
+                                      batch_size: int = 1000,
+                                      raise_errors: bool = False) -> int:
         """
         从Tushare获取同花顺股票资金流向数据并高效导入数据库
         
@@ -29,12 +32,13 @@ class MoneyflowThsService:
             start_date: 可选，开始日期 YYYYMMDD格式
             end_date: 可选，结束日期 YYYYMMDD格式
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_moneyflow_ths(ts_code=ts_code, trade_date=trade_date, 
+        df_result = await run_tushare(get_moneyflow_ths, ts_code=ts_code, trade_date=trade_date, 
                                         start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
@@ -66,6 +70,8 @@ class MoneyflowThsService:
                     print(f"批次导入成功: {inserted} 条记录")
             except Exception as e:
                 print(f"批次导入失败: {str(e)}")
+                if raise_errors:
+                    raise
         
         return total_count
     
@@ -82,59 +88,13 @@ class MoneyflowThsService:
         if not moneyflow_list:
             return 0
         
-        # 获取字段列表
-        columns = list(moneyflow_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for moneyflow in moneyflow_list:
-            moneyflow_dict = moneyflow.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = moneyflow_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_moneyflow_ths (LIKE moneyflow_ths) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_moneyflow_ths', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了复合主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ('ts_code', 'trade_date')]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO moneyflow_ths 
-                        SELECT * FROM temp_moneyflow_ths
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'moneyflow_ths', moneyflow_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"moneyflow_ths 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入单日所有股票的资金流向数据
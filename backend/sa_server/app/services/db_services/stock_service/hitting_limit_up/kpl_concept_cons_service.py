@@ -1,7 +1,8 @@
-import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.stock.hitting_limit_up_api import get_kpl_concept_cons
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.hitting_limit_up.kpl_concept_cons import KplConceptConsData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
 
 class KplConceptConsService:
     """题材概念成分数据导入服务，实现高效批量导入和数据管理"""
@@ -46,7 +47,7 @@ class KplConceptConsService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_kpl_concept_cons(trade_date=trade_date, ts_code=ts_code, con_code=con_code)
+            df_result = await run_tushare(get_kpl_concept_cons, trade_date=trade_date, ts_code=ts_code, con_code=con_code)
             
             if df_result is None or df_result.empty:
                 print(f"未找到题材概念成分数据: {param_desc}")
@@ -57,103 +58,19 @@ class KplConceptConsService:
             print(f"获取题材概念成分数据失败: {str(e)}")
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的题材概念成分数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为KplConceptConsData对象
-                concept_cons_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        if 'hot_num' in record and record['hot_num'] is not None:
-                            if isinstance(record['hot_num'], str) and record['hot_num'].strip() == '':
-                                record['hot_num'] = None
-                            elif record['hot_num'] is not None:
-                                try:
-                                    record['hot_num'] = int(float(record['hot_num']))
-                                except (ValueError, TypeError):
-                                    record['hot_num'] = None
-                        
-                        concept_cons_data = KplConceptConsData(**record)
-                        concept_cons_data_list.append(concept_cons_data)
-                    except Exception as e:
-                        print(f"创建KplConceptConsData对象失败 {record.get('ts_code', '未知')}, {record.get('con_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if concept_cons_data_list:
-                    inserted = await self.batch_upsert_kpl_concept_cons(concept_cons_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条题材概念成分记录")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造KplConceptConsData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'kpl_concept_cons', df_result, KplConceptConsData,
+            conflict_keys=['ts_code', 'con_code', 'trade_date'],
+            required_fields=['ts_code', 'name', 'con_code', 'con_name', 'trade_date'],
+            batch_size=batch_size
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条题材概念成分记录")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'name': '',
-            'con_code': '',
-            'con_name': '',
-            'trade_date': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['name'] == '' or record['con_code'] == '' or record['con_name'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_kpl_concept_cons(self, concept_cons_list: List[KplConceptConsData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -167,119 +84,13 @@ class KplConceptConsService:
         if not concept_cons_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = concept_cons_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for concept_cons in concept_cons_list:
-            # 创建唯一键 (ts_code, con_code, trade_date)
-            key = (concept_cons.ts_code, concept_cons.con_code, str(concept_cons.trade_date))
-            unique_records[key] = concept_cons
-        
-        # 提取最终的唯一记录列表
-        unique_concept_cons_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for concept_cons in unique_concept_cons_list:
-            concept_cons_dict = concept_cons.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = concept_cons_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'kpl_concept_cons', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_kpl_concept_cons (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_kpl_concept_cons', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'con_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO kpl_concept_cons ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_kpl_concept_cons
-                        ON CONFLICT (ts_code, con_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'kpl_concept_cons', concept_cons_list,
+            conflict_keys=['ts_code', 'con_code', 'trade_date']
+        )
+        print(f"kpl_concept_cons 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定交易日期的题材概念成分数据
@@ -397,7 +208,10 @@ async def query_kpl_concept_cons_data(db,
                                  filters: Optional[Dict[str, Any]] = None, 
                                  order_by: Optional[List[str]] = None,
                                  limit: Optional[int] = None,
-                                 offset: Optional[int] = None) -> List[KplConceptConsData]:
+                                 offset: Optional[int] = None,
+                                 cursor: Optional[str] = None,
+                                 fields: Optional[List[str]] = None,
+                                 result_format: str = 'model') -> List[KplConceptConsData]:
     """
     动态查询题材概念成分数据，支持任意字段过滤和自定义排序
     
@@ -417,6 +231,9 @@ async def query_kpl_concept_cons_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-hot_num', 'name']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[KplConceptConsData]: 符合条件的题材概念成分数据列表
@@ -446,7 +263,10 @@ async def query_kpl_concept_cons_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
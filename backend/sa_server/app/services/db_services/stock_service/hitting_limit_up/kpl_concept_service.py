@@ -1,7 +1,10 @@
-import pandas as pd
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.stock.hitting_limit_up_api import get_kpl_concept
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.hitting_limit_up.kpl_concept import KplConceptData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
+from app.db.daily_aggregates import refresh_daily_aggregates, refresh_safely
+from app.db.sync_state import run_incremental
 
 class KplConceptService:
     """题材概念数据导入服务，实现高效批量导入和数据管理"""
@@ -21,7 +24,8 @@ class KplConceptService:
                                     name: Optional[str] = None,
                                     start_date: Optional[str] = None,
                                     end_date: Optional[str] = None,
-                                    batch_size: int = 1000) -> int:
+                                    batch_size: int = 1000,
+                                    raise_errors: bool = False) -> int:
         """
         从Tushare获取题材概念数据并高效导入数据库
         
@@ -32,6 +36,7 @@ class KplConceptService:
             start_date: 开始日期（用于查询日期范围，YYYYMMDD格式）
             end_date: 结束日期（用于查询日期范围，YYYYMMDD格式）
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -54,7 +59,7 @@ class KplConceptService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_kpl_concept(trade_date=trade_date, ts_code=ts_code, name=name)
+            df_result = await run_tushare(get_kpl_concept, trade_date=trade_date, ts_code=ts_code, name=name)
             
             if df_result is None or df_result.empty:
                 print(f"未找到题材概念数据: {param_desc}")
@@ -63,103 +68,46 @@ class KplConceptService:
             print(f"获取到 {len(df_result)} 条题材概念数据")
         except Exception as e:
             print(f"获取题材概念数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的题材概念数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为KplConceptData对象
-                concept_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        for field in ['z_t_num', 'up_num']:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = int(float(record[field]))
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        concept_data = KplConceptData(**record)
-                        concept_data_list.append(concept_data)
-                    except Exception as e:
-                        print(f"创建KplConceptData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if concept_data_list:
-                    inserted = await self.batch_upsert_kpl_concepts(concept_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条题材概念记录")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造KplConceptData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'kpl_concept', df_result, KplConceptData,
+            conflict_keys=['ts_code', 'trade_date'],
+            required_fields=['ts_code', 'name', 'trade_date'],
+            batch_size=batch_size,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条题材概念记录")
+        
+        # 按写入的交易日刷新题材概念统计表
+        if total_count > 0:
+            await refresh_safely(self.db, 'kpl_concept', df_result['trade_date'])
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def import_incremental(self, overlap_days: int = 3, batch_size: int = 1000) -> int:
         """
-        预处理和验证数据记录
+        增量导入题材概念数据：只获取同步水位之后的交易日，没有同步记录且表为空时全量导入
         
         参数:
-            records: 原始数据记录列表
+            overlap_days: 重叠窗口天数，水位之前这些天的数据重新导入，覆盖数据源的补录和修订
+            batch_size: 批量处理的记录数，默认1000条
             
         返回:
-            处理后的有效记录列表
+            导入的记录数量
         """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'name': '',
-            'trade_date': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
+        async def importer(start_date: Optional[str], end_date: str) -> int:
+            if start_date is None:
+                return await self.import_kpl_concept_data(batch_size=batch_size, raise_errors=True)
+            return await self.import_kpl_concept_data(start_date=start_date, end_date=end_date,
+                                                      batch_size=batch_size, raise_errors=True)
         
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['name'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
+        return await run_incremental(self.db, 'kpl_concept', 'kpl_concept', 'trade_date', importer, overlap_days)
     
     async def batch_upsert_kpl_concepts(self, concepts_list: List[KplConceptData]) -> int:
         """
@@ -174,119 +122,13 @@ class KplConceptService:
         if not concepts_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = concepts_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for concept in concepts_list:
-            # 创建唯一键 (ts_code, trade_date)
-            key = (concept.ts_code, str(concept.trade_date))
-            unique_records[key] = concept
-        
-        # 提取最终的唯一记录列表
-        unique_concepts_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for concept in unique_concepts_list:
-            concept_dict = concept.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = concept_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'kpl_concept', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_kpl_concept (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_kpl_concept', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO kpl_concept ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_kpl_concept
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'kpl_concept', concepts_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"kpl_concept 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定交易日期的题材概念数据
@@ -423,12 +265,34 @@ async def import_all_kpl_concepts(db, batch_size: int = 1000) -> int:
     return count
 
 
+# 增量导入题材概念数据
+async def import_incremental_kpl_concepts(db, overlap_days: int = 3, batch_size: int = 1000) -> int:
+    """
+    增量导入题材概念数据，只获取上次同步之后的交易日，用于每日定时任务代替全量导入
+    
+    参数:
+        db: 数据库连接对象
+        overlap_days: 重叠窗口天数
+        batch_size: 批量处理大小，默认1000条
+        
+    返回:
+        导入的记录数
+    """
+    service = KplConceptService(db)
+    count = await service.import_incremental(overlap_days=overlap_days, batch_size=batch_size)
+    print(f"成功增量导入题材概念数据，共 {count} 条记录")
+    return count
+
+
 # 从数据库中查询题材概念数据
 async def query_kpl_concept_data(db, 
                             filters: Optional[Dict[str, Any]] = None, 
                             order_by: Optional[List[str]] = None,
                             limit: Optional[int] = None,
-                            offset: Optional[int] = None) -> List[KplConceptData]:
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model') -> List[KplConceptData]:
     """
     动态查询题材概念数据，支持任意字段过滤和自定义排序
     
@@ -448,6 +312,9 @@ async def query_kpl_concept_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-z_t_num', 'name']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[KplConceptData]: 符合条件的题材概念数据列表
@@ -477,7 +344,10 @@ async def query_kpl_concept_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
@@ -737,26 +607,51 @@ async def analyze_kpl_concept_trends(db, days: int = 7, min_z_t_num: int = 3) ->
     返回:
         Dict: 包含题材概念趋势分析的结果
     """
-    # 首先获取最近几天的交易日期
+    # 首先获取最近几天的交易日期，同时找出尚未聚合的交易日
     query = """
-        SELECT DISTINCT trade_date
-        FROM kpl_concept
-        ORDER BY trade_date DESC
-        LIMIT $1
+        SELECT
+            d.trade_date,
+            a.trade_date IS NULL as missing
+        FROM (
+            SELECT DISTINCT trade_date
+            FROM kpl_concept
+            ORDER BY trade_date DESC
+            LIMIT $1
+        ) d
+        LEFT JOIN agg_kpl_concept_daily a ON a.trade_date = d.trade_date
+        ORDER BY d.trade_date DESC
     """
     recent_dates = await db.fetch(query, days)
     
+    missing_dates = [row['trade_date'] for row in recent_dates if row['missing']]
+    if missing_dates:
+        # 统计表引入之前导入的交易日，或导入后刷新失败的交易日，一次性补算
+        await refresh_daily_aggregates(db, 'kpl_concept', missing_dates)
+    
     if not recent_dates or len(recent_dates) < 2:
         return {"error": "数据不足，无法进行趋势分析"}
     
-    # 获取这些日期的所有题材概念数据
     date_list = [row['trade_date'] for row in recent_dates]
     
+    # 每日的题材数量和涨停总数来自统计表，不再对原始行做GROUP BY
+    daily_rows = await db.fetch("""
+        SELECT trade_date, concept_count, z_t_total, max_z_t_num
+        FROM agg_kpl_concept_daily
+        WHERE trade_date = ANY($1::date[])
+        ORDER BY trade_date DESC
+    """, date_list)
+    
+    # 当日最大涨停数量低于阈值的交易日没有符合条件的题材，不再查询明细
+    active_dates = [row['trade_date'] for row in daily_rows if (row['max_z_t_num'] or 0) >= min_z_t_num]
+    if not active_dates:
+        return {"error": f"未找到涨停数量≥{min_z_t_num}的题材概念数据"}
+    
+    # 获取这些日期的题材概念数据
     from app.db.crud.stock_crud.hitting_limit_up.kpl_concept_crud import KplConceptCRUD
     crud = KplConceptCRUD(db)
     
     all_concepts = await crud.get_kpl_concepts(
-        filters={'trade_date__in': date_list, 'z_t_num__ge': min_z_t_num},
+        filters={'trade_date__in': active_dates, 'z_t_num__ge': min_z_t_num},
         order_by=['ts_code', '-trade_date']
     )
     
@@ -812,6 +707,15 @@ async def analyze_kpl_concept_trends(db, days: int = 7, min_z_t_num: int = 3) ->
         else:
             steady.append(trend_data)
     
+    # 整体涨停总数的变化（最新在前）
+    z_t_totals = [row['z_t_total'] or 0 for row in daily_rows]
+    if all(curr > prev for curr, prev in zip(z_t_totals, z_t_totals[1:])):
+        market_trend = "up"
+    elif all(curr < prev for curr, prev in zip(z_t_totals, z_t_totals[1:])):
+        market_trend = "down"
+    else:
+        market_trend = "steady"
+    
     # 按最新涨停数量排序
     trending_up.sort(key=lambda x: x["latest_z_t_num"] or 0, reverse=True)
     steady.sort(key=lambda x: x["latest_z_t_num"] or 0, reverse=True)
@@ -825,6 +729,19 @@ async def analyze_kpl_concept_trends(db, days: int = 7, min_z_t_num: int = 3) ->
             "end_date": date_list[0].strftime('%Y%m%d') if date_list else None
         },
         "min_z_t_num": min_z_t_num,
+        "market": {
+            "trend": market_trend,
+            "z_t_total_change": z_t_totals[0] - z_t_totals[-1] if len(z_t_totals) >= 2 else 0,
+            "history": [
+                {
+                    "trade_date": row['trade_date'].strftime('%Y%m%d'),
+                    "concept_count": row['concept_count'],
+                    "z_t_total": row['z_t_total'],
+                    "max_z_t_num": row['max_z_t_num']
+                }
+                for row in daily_rows
+            ]
+        },
         "trends": {
             "up": trending_up,
             "steady": steady,
@@ -1,8 +1,11 @@
-import pandas as pd
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.stock.hitting_limit_up_api import get_kpl_list
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.stock_modules.hitting_limit_up.kpl_list import KplListData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
+from app.db.daily_aggregates import parse_trade_date, refresh_daily_aggregates, refresh_missing_aggregates, refresh_safely
+from app.db.sync_state import run_incremental
 
 class KplListService:
     """涨停板列表数据导入服务，实现高效批量导入和数据管理"""
@@ -22,7 +25,8 @@ class KplListService:
                                  tag: Optional[str] = None,
                                  start_date: Optional[str] = None,
                                  end_date: Optional[str] = None,
-                                 batch_size: int = 1000) -> int:
+                                 batch_size: int = 1000,
+                                 raise_errors: bool = False) -> int:
         """
         从Tushare获取涨停板列表数据并高效导入数据库
         
@@ -33,6 +37,7 @@ class KplListService:
             start_date: 开始日期（用于查询日期范围，YYYYMMDD格式）
             end_date: 结束日期（用于查询日期范围，YYYYMMDD格式）
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -55,7 +60,7 @@ class KplListService:
         
         # 从Tushare获取数据
         try:
-            df_result = get_kpl_list(
+            df_result = await fetch_chunked(get_kpl_list,
                 ts_code=ts_code, 
                 trade_date=trade_date, 
                 tag=tag,
@@ -70,110 +75,51 @@ class KplListService:
             print(f"获取到 {len(df_result)} 条涨停板列表数据")
         except Exception as e:
             print(f"获取涨停板列表数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的涨停板列表数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为KplListData对象
-                kpl_list_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        numeric_fields = [
-                            'net_change', 'bid_amount', 'bid_change', 'bid_turnover', 
-                            'lu_bid_vol', 'pct_chg', 'bid_pct_chg', 'rt_pct_chg', 
-                            'limit_order', 'amount', 'turnover_rate', 'free_float', 
-                            'lu_limit_order'
-                        ]
-                        
-                        for field in numeric_fields:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = float(record[field])
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        kpl_list_data = KplListData(**record)
-                        kpl_list_data_list.append(kpl_list_data)
-                    except Exception as e:
-                        print(f"创建KplListData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if kpl_list_data_list:
-                    inserted = await self.batch_upsert_kpl_list(kpl_list_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条涨停板列表记录")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造KplListData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'kpl_list', df_result, KplListData,
+            conflict_keys=['ts_code', 'trade_date'],
+            required_fields=['ts_code', 'name', 'trade_date'],
+            batch_size=batch_size,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条涨停板列表记录")
+        
+        # 按写入的交易日刷新涨停板统计表
+        if total_count > 0:
+            await refresh_safely(self.db, 'kpl_list', df_result['trade_date'])
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def import_incremental(self,
+                                 ts_code: Optional[str] = None,
+                                 overlap_days: int = 3,
+                                 batch_size: int = 1000) -> int:
         """
-        预处理和验证数据记录
+        增量导入涨停板列表数据：只获取同步水位之后的交易日，没有同步记录且表为空时全量导入
         
         参数:
-            records: 原始数据记录列表
+            ts_code: 股票代码，指定时按股票分别记录水位
+            overlap_days: 重叠窗口天数，水位之前这些天的数据重新导入，覆盖数据源的补录和修订
+            batch_size: 批量处理的记录数，默认1000条
             
         返回:
-            处理后的有效记录列表
+            导入的记录数量
         """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'name': '',
-            'trade_date': None,
-        }
+        async def importer(start_date: Optional[str], end_date: str) -> int:
+            if start_date is None:
+                return await self.import_kpl_list_data(ts_code=ts_code, batch_size=batch_size, raise_errors=True)
+            return await self.import_kpl_list_data(ts_code=ts_code, start_date=start_date,
+                                                   end_date=end_date, batch_size=batch_size, raise_errors=True)
         
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['name'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
+        return await run_incremental(self.db, 'kpl_list', 'kpl_list', 'trade_date', importer,
+                                     overlap_days, ts_code=ts_code)
     
     async def batch_upsert_kpl_list(self, kpl_list_data_list: List[KplListData]) -> int:
         """
@@ -188,119 +134,13 @@ class KplListService:
         if not kpl_list_data_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = kpl_list_data_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for kpl_list_data in kpl_list_data_list:
-            # 创建唯一键 (ts_code, trade_date)
-            key = (kpl_list_data.ts_code, str(kpl_list_data.trade_date))
-            unique_records[key] = kpl_list_data
-        
-        # 提取最终的唯一记录列表
-        unique_kpl_list_data_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for kpl_list_data in unique_kpl_list_data_list:
-            kpl_list_dict = kpl_list_data.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = kpl_list_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'kpl_list', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_kpl_list (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_kpl_list', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO kpl_list ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_kpl_list
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'kpl_list', kpl_list_data_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"kpl_list 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定交易日期的涨停板列表数据
@@ -448,12 +288,36 @@ async def import_all_kpl_list(db, batch_size: int = 1000) -> int:
     return count
 
 
+# 增量导入涨停板列表数据
+async def import_incremental_kpl_list(db, ts_code: Optional[str] = None,
+                                      overlap_days: int = 3, batch_size: int = 1000) -> int:
+    """
+    增量导入涨停板列表数据，只获取上次同步之后的交易日，用于每日定时任务代替全量导入
+    
+    参数:
+        db: 数据库连接对象
+        ts_code: 股票代码（可选）
+        overlap_days: 重叠窗口天数
+        batch_size: 批量处理大小，默认1000条
+        
+    返回:
+        导入的记录数
+    """
+    service = KplListService(db)
+    count = await service.import_incremental(ts_code=ts_code, overlap_days=overlap_days, batch_size=batch_size)
+    print(f"成功增量导入涨停板列表数据，共 {count} 条记录")
+    return count
+
+
 # 从数据库中查询涨停板列表数据
 async def query_kpl_list_data(db, 
                          filters: Optional[Dict[str, Any]] = None, 
                          order_by: Optional[List[str]] = None,
                          limit: Optional[int] = None,
-                         offset: Optional[int] = None) -> List[KplListData]:
+                         offset: Optional[int] = None,
+                         cursor: Optional[str] = None,
+                         fields: Optional[List[str]] = None,
+                         result_format: str = 'model') -> List[KplListData]:
     """
     动态查询涨停板列表数据，支持任意字段过滤和自定义排序
     
@@ -473,6 +337,9 @@ async def query_kpl_list_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-pct_chg', 'name']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[KplListData]: 符合条件的涨停板列表数据
@@ -502,10 +369,13 @@ async def query_kpl_list_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
-    return result
+    return results
 
 
 # 分析主力资金流入最多的涨停股
@@ -655,12 +525,19 @@ async def analyze_limit_up_trends(db, days: int = 10) -> Dict[str, Any]:
     返回:
         Dict: 涨停趋势分析结果
     """
-    # 获取最近N天的交易日期
+    # 获取最近N天的交易日期，同时找出尚未聚合的交易日
     date_query = """
-    SELECT DISTINCT trade_date
-    FROM kpl_list
-    ORDER BY trade_date DESC
-    LIMIT $1
+    SELECT 
+        d.trade_date,
+        a.trade_date IS NULL as missing
+    FROM (
+        SELECT DISTINCT trade_date
+        FROM kpl_list
+        ORDER BY trade_date DESC
+        LIMIT $1
+    ) d
+    LEFT JOIN agg_kpl_list_daily a ON a.trade_date = d.trade_date
+    ORDER BY d.trade_date DESC
     """
     
     date_rows = await db.fetch(date_query, days)
@@ -668,71 +545,95 @@ async def analyze_limit_up_trends(db, days: int = 10) -> Dict[str, Any]:
     if not date_rows or len(date_rows) == 0:
         return {"error": "未找到足够的数据进行趋势分析"}
     
-    dates = [row["trade_date"].strftime("%Y%m%d") for row in date_rows]
+    trade_dates = [row["trade_date"] for row in date_rows]
+    missing_dates = [row["trade_date"] for row in date_rows if row["missing"]]
+    if missing_dates:
+        # 统计表引入之前导入的交易日，一次性补算
+        await refresh_daily_aggregates(db, 'kpl_list', missing_dates)
     
-    # 查询每天的涨停数据
-    daily_data = []
-    for date in dates:
-        daily_stats = await analyze_limit_up_by_date(db, date)
-        if "error" not in daily_stats:
-            daily_data.append(daily_stats)
+    # 所有交易日的汇总和日环比变化在一个查询中完成，查询次数与天数无关
+    summary_query = """
+    SELECT 
+        trade_date,
+        limit_up_count,
+        first_limit_up_count,
+        continuous_limit_up_count,
+        blown_board_count,
+        LAG(limit_up_count) OVER (ORDER BY trade_date) as prev_limit_up_count
+    FROM 
+        agg_kpl_list_daily
+    WHERE 
+        trade_date = ANY($1::date[])
+    ORDER BY 
+        trade_date DESC
+    """
+    
+    # 主题频率：每日涨停数前10的主题在整个区间内的累计涨停数
+    theme_query = """
+    SELECT 
+        bucket as theme,
+        SUM(count) as count
+    FROM (
+        SELECT 
+            bucket,
+            count,
+            ROW_NUMBER() OVER (PARTITION BY trade_date ORDER BY count DESC, bucket) as rank
+        FROM 
+            agg_kpl_list_dist_daily
+        WHERE 
+            trade_date = ANY($1::date[])
+            AND dimension = 'theme'
+    ) ranked
+    WHERE 
+        rank <= 10
+    GROUP BY 
+        bucket
+    ORDER BY 
+        count DESC, bucket
+    LIMIT 15
+    """
+    
+    summary_rows = await db.fetch(summary_query, trade_dates)
+    theme_rows = await db.fetch(theme_query, trade_dates)
+    
+    dates = [row["trade_date"].strftime("%Y%m%d") for row in summary_rows]
     
     # 计算趋势
     trend_data = {
         "period": {
-            "days": len(daily_data),
-            "start_date": dates[-1] if daily_data else None,
-            "end_date": dates[0] if daily_data else None
+            "days": len(summary_rows),
+            "start_date": dates[-1] if summary_rows else None,
+            "end_date": dates[0] if summary_rows else None
         },
         "daily_summary": [],
         "trend_analysis": {
             "limit_up_trend": [],
-            "theme_frequency": {},
+            "theme_frequency": {row["theme"]: row["count"] for row in theme_rows},
             "consecutive_days": {}
         }
     }
     
     # 统计每日数据
-    for day_data in daily_data:
-        summary = {
-            "trade_date": day_data["trade_date"],
-            "limit_up_count": day_data["summary"]["limit_up_count"],
-            "first_limit_up_count": day_data["summary"]["first_limit_up_count"],
-            "continuous_limit_up_count": day_data["summary"]["continuous_limit_up_count"],
-            "blown_board_count": day_data["summary"]["blown_board_count"]
-        }
-        trend_data["daily_summary"].append(summary)
-        
-        # 统计主题频率
-        for theme in day_data["theme_distribution"]:
-            theme_name = theme["theme"]
-            if theme_name not in trend_data["trend_analysis"]["theme_frequency"]:
-                trend_data["trend_analysis"]["theme_frequency"][theme_name] = 0
-            trend_data["trend_analysis"]["theme_frequency"][theme_name] += theme["count"]
-    
-    # 排序主题频率
-    sorted_themes = sorted(
-        trend_data["trend_analysis"]["theme_frequency"].items(),
-        key=lambda x: x[1],
-        reverse=True
-    )
-    trend_data["trend_analysis"]["theme_frequency"] = {k: v for k, v in sorted_themes[:15]}
+    for date, row in zip(dates, summary_rows):
+        trend_data["daily_summary"].append({
+            "trade_date": date,
+            "limit_up_count": row["limit_up_count"],
+            "first_limit_up_count": row["first_limit_up_count"],
+            "continuous_limit_up_count": row["continuous_limit_up_count"],
+            "blown_board_count": row["blown_board_count"]
+        })
     
-    # 计算涨停数据趋势
-    if len(trend_data["daily_summary"]) >= 2:
-        # 按日期排序（最早的在前）
-        sorted_summary = sorted(trend_data["daily_summary"], key=lambda x: x["trade_date"])
-        
-        for i in range(1, len(sorted_summary)):
-            prev = sorted_summary[i-1]
-            curr = sorted_summary[i]
-            
-            trend_data["trend_analysis"]["limit_up_trend"].append({
-                "date": curr["trade_date"],
-                "limit_up_count": curr["limit_up_count"],
-                "change": curr["limit_up_count"] - prev["limit_up_count"],
-                "change_percent": round((curr["limit_up_count"] - prev["limit_up_count"]) / max(prev["limit_up_count"], 1) * 100, 2)
-            })
+    # 计算涨停数据趋势（最早的在前，第一天没有前一日数据）
+    for date, row in reversed(list(zip(dates, summary_rows))):
+        prev_count = row["prev_limit_up_count"]
+        if prev_count is None:
+            continue
+        trend_data["trend_analysis"]["limit_up_trend"].append({
+            "date": date,
+            "limit_up_count": row["limit_up_count"],
+            "change": row["limit_up_count"] - prev_count,
+            "change_percent": round((row["limit_up_count"] - prev_count) / max(prev_count, 1) * 100, 2)
+        })
     
     return trend_data
 
@@ -839,7 +740,7 @@ async def get_hot_themes_by_date(db, trade_date: str, limit: int = 10) -> Dict[s
         }
         result["hot_themes"].append(theme_data)
     
-    return results
+    return result
 
 
 # 获取连板数据分析
@@ -929,107 +830,39 @@ async def analyze_limit_up_by_date(db, trade_date: str) -> Dict[str, Any]:
     返回:
         Dict: 涨停板数据分析结果
     """
-    # 处理trade_date格式
-    formatted_trade_date = trade_date
-    if trade_date and isinstance(trade_date, str) and trade_date.isdigit() and len(trade_date) == 8:
-        formatted_trade_date = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:8]}"
-    
-    # 查询基本统计数据
-    stats_query = """
-    SELECT 
-        COUNT(*) FILTER (WHERE tag = '涨停') as limit_up_count,
-        COUNT(*) FILTER (WHERE tag = '涨停' AND status = '1') as first_limit_up_count,
-        COUNT(*) FILTER (WHERE tag = '涨停' AND status != '1' AND status ~ E'^\\\\d+$') as continuous_limit_up_count,
-        COUNT(*) FILTER (WHERE tag = '炸板') as blown_board_count,
-        AVG(pct_chg) FILTER (WHERE tag = '涨停') as avg_limit_up_pct,
-        AVG(turnover_rate) FILTER (WHERE tag = '涨停') as avg_turnover_rate,
-        AVG(amount) FILTER (WHERE tag = '涨停') as avg_amount
-    FROM 
-        kpl_list
-    WHERE 
-        trade_date = $1::date
-    """
-    
-    # 查询主题分布
-    theme_query = """
-    SELECT 
-        theme,
-        COUNT(*) as count
-    FROM 
-        kpl_list
-    WHERE 
-        trade_date = $1::date
-        AND tag = '涨停'
-        AND theme IS NOT NULL
-        AND theme != ''
-    GROUP BY 
-        theme
-    ORDER BY 
-        count DESC
-    LIMIT 10
-    """
-    
-    # 查询连板分布
-    status_query = """
-    SELECT 
-        status,
-        COUNT(*) as count
-    FROM 
-        kpl_list
-    WHERE 
-        trade_date = $1::date
-        AND tag = '涨停'
-        AND status IS NOT NULL
-        AND status != ''
-    GROUP BY 
-        status
-    ORDER BY 
-        CASE 
-            WHEN status ~ E'^\\\\d+$' THEN CAST(status AS INTEGER)
-            ELSE 0
-        END DESC
-    """
-    
-    # 查询涨停时间分布
-    time_query = """
-    SELECT 
-        CASE
-            WHEN lu_time <= '10:00:00' THEN '10点前'
-            WHEN lu_time <= '11:30:00' THEN '上午'
-            WHEN lu_time <= '14:00:00' THEN '14点前'
-            WHEN lu_time <= '15:00:00' THEN '收盘前'
-            ELSE '其他'
-        END as time_period,
-        COUNT(*) as count
-    FROM 
-        kpl_list
-    WHERE 
-        trade_date = $1::date
-        AND tag = '涨停'
-        AND lu_time IS NOT NULL
-    GROUP BY 
-        time_period
-    ORDER BY 
-        CASE
-            WHEN time_period = '10点前' THEN 1
-            WHEN time_period = '上午' THEN 2
-            WHEN time_period = '14点前' THEN 3
-            WHEN time_period = '收盘前' THEN 4
-            ELSE 5
-        END
-    """
+    parsed_date = parse_trade_date(trade_date)
+    if parsed_date is None:
+        return {
+            "error": f"无效的交易日期: {trade_date}"
+        }
     
-    # 执行查询
-    stats_row = await db.fetchrow(stats_query, formatted_trade_date)
-    theme_rows = await db.fetch(theme_query, formatted_trade_date)
-    status_rows = await db.fetch(status_query, formatted_trade_date)
-    time_rows = await db.fetch(time_query, formatted_trade_date)
+    # 读取按交易日预聚合的统计数据（导入时刷新），不再对当日原始行做GROUP BY
+    stats_query = "SELECT * FROM agg_kpl_list_daily WHERE trade_date = $1"
+    stats_row = await db.fetchrow(stats_query, parsed_date)
+    if not stats_row:
+        # 统计表引入之前导入的数据尚未聚合，按需补算一次；原始表没有该交易日的数据时不刷新
+        if await refresh_missing_aggregates(db, 'kpl_list', [parsed_date]):
+            stats_row = await db.fetchrow(stats_query, parsed_date)
     
     if not stats_row:
         return {
             "error": f"未找到交易日期 {trade_date} 的涨停板数据"
         }
     
+    dist_rows = await db.fetch("""
+    SELECT dimension, bucket, count, sort_key
+    FROM agg_kpl_list_dist_daily
+    WHERE trade_date = $1
+    """, parsed_date)
+    
+    # 主题分布取前10，连板分布按连板数从高到低，时间分布按时段先后
+    theme_rows = sorted((row for row in dist_rows if row["dimension"] == "theme"),
+                        key=lambda row: row["count"], reverse=True)[:10]
+    status_rows = sorted((row for row in dist_rows if row["dimension"] == "status"),
+                         key=lambda row: row["sort_key"], reverse=True)
+    time_rows = sorted((row for row in dist_rows if row["dimension"] == "time_period"),
+                       key=lambda row: row["sort_key"])
+    
     # 构建结果
     result = {
         "trade_date": trade_date,
@@ -1050,21 +883,21 @@ async def analyze_limit_up_by_date(db, trade_date: str) -> Dict[str, Any]:
     # 填充主题分布数据
     for row in theme_rows:
         result["theme_distribution"].append({
-            "theme": row["theme"],
+            "theme": row["bucket"],
             "count": row["count"]
         })
     
     # 填充连板分布数据
     for row in status_rows:
         result["status_distribution"].append({
-            "status": row["status"],
+            "status": row["bucket"],
             "count": row["count"]
         })
     
     # 填充时间分布数据
     for row in time_rows:
         result["time_distribution"].append({
-            "time_period": row["time_period"],
+            "time_period": row["bucket"],
             "count": row["count"]
         })
     
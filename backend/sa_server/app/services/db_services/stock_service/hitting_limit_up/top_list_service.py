@@ -1,9 +1,10 @@
-import pandas as pd
 import datetime
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.stock.hitting_limit_up_api import get_top_list
+from app.external.tushare_chunking import fetch_chunked
 from app.data.db_modules.stock_modules.hitting_limit_up.top_list import TopListData
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
 
 class TopListService:
     """龙虎榜数据导入服务，实现高效批量导入和数据管理"""
@@ -18,16 +19,22 @@ class TopListService:
         self.db = db
     
     async def import_top_list_data(self, 
-                                 trade_date: str,
+                                 trade_date: Optional[str] = None,
                                  ts_code: Optional[str] = None,
-                                 batch_size: int = 1000) -> int:
+                                 start_date: Optional[str] = None,
+                                 end_date: Optional[str] = None,
+                                 batch_size: int = 1000,
+                                 raise_errors: bool = False) -> int:
         """
         从Tushare获取龙虎榜数据并高效导入数据库
         
         参数:
             trade_date: 交易日期(YYYYMMDD格式)
             ts_code: 股票代码（可选）
+            start_date: 开始日期(YYYYMMDD格式)，与end_date一起指定时按日期区间逐日获取
+            end_date: 结束日期(YYYYMMDD格式)
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 获取或写入数据失败时是否抛出异常，默认打印错误，获取失败时返回0
             
         返回:
             导入的记录数量
@@ -38,13 +45,18 @@ class TopListService:
             params.append(f"trade_date={trade_date}")
         if ts_code:
             params.append(f"ts_code={ts_code}")
+        if start_date:
+            params.append(f"start_date={start_date}")
+        if end_date:
+            params.append(f"end_date={end_date}")
         
         param_desc = ", ".join(params) if params else "所有"
         print(f"正在获取龙虎榜数据: {param_desc}")
         
         # 从Tushare获取数据
         try:
-            df_result = get_top_list(trade_date=trade_date, ts_code=ts_code)
+            df_result = await fetch_chunked(get_top_list, trade_date=trade_date, ts_code=ts_code,
+                                            start_date=start_date, end_date=end_date)
             
             if df_result is None or df_result.empty:
                 print(f"未找到龙虎榜数据: {param_desc}")
@@ -53,110 +65,24 @@ class TopListService:
             print(f"获取到 {len(df_result)} 条龙虎榜数据")
         except Exception as e:
             print(f"获取龙虎榜数据失败: {str(e)}")
+            if raise_errors:
+                raise
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
-        
-        # 数据预处理和验证
-        valid_records = await self._preprocess_records(records)
-        
-        if not valid_records:
-            print("没有有效的龙虎榜数据记录可导入")
-            return 0
-            
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch_idx, batch in enumerate(batches):
-            try:
-                # 将批次数据转换为TopListData对象
-                top_list_data_list = []
-                for record in batch:
-                    try:
-                        # 为了确保数据类型正确，显式处理数值字段
-                        numeric_fields = [
-                            'close', 'pct_change', 'turnover_rate', 'amount', 
-                            'l_sell', 'l_buy', 'l_amount', 'net_amount', 
-                            'net_rate', 'amount_rate', 'float_values'
-                        ]
-                        
-                        for field in numeric_fields:
-                            if field in record and record[field] is not None:
-                                if isinstance(record[field], str) and record[field].strip() == '':
-                                    record[field] = None
-                                elif record[field] is not None:
-                                    try:
-                                        record[field] = float(record[field])
-                                    except (ValueError, TypeError):
-                                        record[field] = None
-                        
-                        top_list_data = TopListData(**record)
-                        top_list_data_list.append(top_list_data)
-                    except Exception as e:
-                        print(f"创建TopListData对象失败 {record.get('ts_code', '未知')}, {record.get('trade_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if top_list_data_list:
-                    inserted = await self.batch_upsert_top_list(top_list_data_list)
-                    total_count += inserted
-                    print(f"批次 {batch_idx + 1}/{len(batches)} 导入成功: {inserted} 条龙虎榜记录")
-            except Exception as e:
-                print(f"批次 {batch_idx + 1}/{len(batches)} 导入失败: {str(e)}")
+        # 列式校验和类型转换（必填字段过滤、日期解析、数值转换）后直接由列数组生成COPY记录，
+        # 不再逐行预处理和构造TopListData，批次以流水线方式在多个连接上并发写入
+        result = await pipelined_upsert_frame(
+            self.db, 'top_list', df_result, TopListData,
+            conflict_keys=['ts_code', 'trade_date'],
+            required_fields=['ts_code', 'name', 'trade_date'],
+            batch_size=batch_size,
+            raise_errors=raise_errors
+        )
+        total_count = result.total
         
         print(f"总共成功导入 {total_count} 条龙虎榜记录")
         return total_count
     
-    async def _preprocess_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        预处理和验证数据记录
-        
-        参数:
-            records: 原始数据记录列表
-            
-        返回:
-            处理后的有效记录列表
-        """
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'name': '',
-            'trade_date': None,
-        }
-        
-        valid_records = []
-        invalid_count = 0
-        
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field].strip() == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['name'] == '' or record['trade_date'] is None:
-                invalid_count += 1
-                continue
-            
-            # 处理日期格式，确保是YYYYMMDD格式
-            if 'trade_date' in record and record['trade_date'] is not None:
-                # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                if hasattr(record['trade_date'], 'strftime'):
-                    record['trade_date'] = record['trade_date'].strftime('%Y%m%d')
-                # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                elif isinstance(record['trade_date'], str) and '-' in record['trade_date']:
-                    date_parts = record['trade_date'].split('-')
-                    if len(date_parts) == 3:
-                        record['trade_date'] = ''.join(date_parts)
-            
-            valid_records.append(record)
-        
-        if invalid_count > 0:
-            print(f"警告: 跳过了 {invalid_count} 条无效记录")
-            
-        return valid_records
-    
     async def batch_upsert_top_list(self, top_list_data_list: List[TopListData]) -> int:
         """
         使用PostgreSQL的COPY命令进行高效批量插入或更新
@@ -170,119 +96,14 @@ class TopListService:
         if not top_list_data_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = top_list_data_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for top_list_data in top_list_data_list:
-            # 创建唯一键 (ts_code, trade_date)
-            key = (top_list_data.ts_code, str(top_list_data.trade_date))
-            unique_records[key] = top_list_data
-        
-        # 提取最终的唯一记录列表
-        unique_top_list_data_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for top_list_data in unique_top_list_data_list:
-            top_list_dict = top_list_data.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = top_list_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'top_list', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_top_list (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_top_list', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'trade_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO top_list ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_top_list
-                        ON CONFLICT (ts_code, trade_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'top_list', top_list_data_list,
+            conflict_keys=['ts_code', 'trade_date']
+        )
+        print(f"top_list 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
 
 # 快捷函数，用于导入特定交易日期的龙虎榜数据
 async def import_date_top_list(db, trade_date: str, batch_size: int = 1000) -> int:
@@ -327,12 +148,39 @@ async def import_stock_top_list(db, ts_code: str, trade_date: str, batch_size: i
     return count
 
 
+# 快捷函数，用于导入日期区间内的龙虎榜数据
+async def import_date_range_top_list(db, start_date: str, end_date: str, batch_size: int = 1000) -> int:
+    """
+    导入日期区间内的龙虎榜数据，接口只支持按单个交易日查询，区间内逐日并发获取
+    
+    参数:
+        db: 数据库连接对象
+        start_date: 开始日期（YYYYMMDD格式）
+        end_date: 结束日期（YYYYMMDD格式）
+        batch_size: 批量处理大小
+        
+    返回:
+        导入的记录数
+    """
+    service = TopListService(db)
+    count = await service.import_top_list_data(
+        start_date=start_date,
+        end_date=end_date,
+        batch_size=batch_size
+    )
+    print(f"成功导入 {count} 条 {start_date} 至 {end_date} 的龙虎榜记录")
+    return count
+
+
 # 从数据库中查询龙虎榜数据
 async def query_top_list_data(db, 
                          filters: Optional[Dict[str, Any]] = None, 
                          order_by: Optional[List[str]] = None,
                          limit: Optional[int] = None,
-                         offset: Optional[int] = None) -> List[TopListData]:
+                         offset: Optional[int] = None,
+                         cursor: Optional[str] = None,
+                         fields: Optional[List[str]] = None,
+                         result_format: str = 'model') -> List[TopListData]:
     """
     动态查询龙虎榜数据，支持任意字段过滤和自定义排序
     
@@ -352,6 +200,9 @@ async def query_top_list_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-net_amount', 'trade_date']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[TopListData]: 符合条件的龙虎榜数据列表
@@ -363,7 +214,10 @@ async def query_top_list_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
@@ -2,7 +2,9 @@ import pandas as pd
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from app.external.tushare_api.stock.reference_data_api import get_repurchase
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.reference_data.repurchase import RepurchaseData
+from app.db.bulk_upsert import bulk_upsert_models
 
 class RepurchaseService:
     """股票回购数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -33,7 +35,7 @@ class RepurchaseService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_repurchase(ann_date=ann_date, start_date=start_date, end_date=end_date)
+        df_result = await run_tushare(get_repurchase, ann_date=ann_date, start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
             print(f"未找到股票回购数据: ann_date={ann_date}, start_date={start_date}, end_date={end_date}")
@@ -119,120 +121,13 @@ class RepurchaseService:
         if not repurchase_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = repurchase_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 使用字典来存储记录，如果有重复键，保留最新记录
-        unique_records = {}
-        
-        for repurchase in repurchase_list:
-            # 创建唯一键
-            end_date_str = str(repurchase.end_date or '')
-            key = (repurchase.ts_code, str(repurchase.ann_date), end_date_str)
-            unique_records[key] = repurchase
-        
-        # 提取最终的唯一记录列表
-        unique_repurchase_list = list(unique_records.values())
-        
-        # 准备数据
-        records = []
-        for repurchase in unique_repurchase_list:
-            repurchase_dict = repurchase.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = repurchase_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'repurchase', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_repurchase (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_repurchase', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'ann_date', 'end_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO repurchase ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_repurchase
-                        ON CONFLICT (ts_code, ann_date, end_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'repurchase', repurchase_list,
+            conflict_keys=['ts_code', 'ann_date', 'end_date']
+        )
+        print(f"repurchase 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定公告日期的回购数据
@@ -303,7 +198,10 @@ async def query_repurchase_data(db,
                             filters: Optional[Dict[str, Any]] = None, 
                             order_by: Optional[List[str]] = None,
                             limit: Optional[int] = None,
-                            offset: Optional[int] = None):
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model'):
     """
     动态查询股票回购数据，支持任意字段过滤和自定义排序
     
@@ -323,6 +221,9 @@ async def query_repurchase_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-ann_date', 'amount']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[RepurchaseData]: 符合条件的股票回购数据列表
@@ -352,7 +253,10 @@ async def query_repurchase_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
@@ -2,8 +2,10 @@ import pandas as pd
 from typing import List, Dict, Any, Optional
 from app.utils.date_validators import DateValidators
 from app.utils.numeric_validators import NumericValidators
-from app.external.tushare_api.stock_info_api import get_bak_basic
+from app.external.tushare_api.stock.stock_info_api import get_bak_basic
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.bak_basic import StockBakBasicData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class StockBakBasicService:
@@ -38,7 +40,7 @@ class StockBakBasicService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_bak_basic(trade_date=trade_date, ts_code=ts_code)
+        df_result = await run_tushare(get_bak_basic, trade_date=trade_date, ts_code=ts_code)
         
         if df_result is None or df_result.empty:
             query_params = []
@@ -134,60 +136,14 @@ class StockBakBasicService:
         if not bak_basic_list:
             return 0
         
-        # 获取字段列表
-        columns = list(bak_basic_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for bak_basic in bak_basic_list:
-            bak_basic_dict = bak_basic.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = bak_basic_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_bak_basic (LIKE bak_basic) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_bak_basic', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_fields = [col for col in columns if col not in ['trade_date', 'ts_code']]
-                    update_sets = [f"{field} = EXCLUDED.{field}" for field in update_fields]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO bak_basic
-                        SELECT * FROM temp_bak_basic
-                        ON CONFLICT (trade_date, ts_code) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-                
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'bak_basic', bak_basic_list,
+            conflict_keys=['trade_date', 'ts_code']
+        )
+        print(f"bak_basic 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
+    
     async def get_market_overview(self, trade_date: str) -> Dict[str, Any]:
         """
         获取指定交易日的市场概览数据
@@ -211,31 +167,30 @@ class StockBakBasicService:
             WHERE trade_date = $1
         """
         
-        async with self.db.pool.acquire() as conn:
-            row = await conn.fetchrow(query,  DateValidators.to_date(trade_date))
-            if row:
-                # 将数值结果转换为字典并格式化
-                result = dict(row)
-                # 确保小数位数合理
-                for key in ['avg_pe', 'avg_pb']:
-                    if result[key] is not None:
-                        result[key] = round(result[key], 2)
-                
-                # 添加日期
-                result['trade_date'] = trade_date
-                
-                return result
+        row = await self.db.fetchrow(query,  DateValidators.to_date(trade_date))
+        if row:
+            # 将数值结果转换为字典并格式化
+            result = dict(row)
+            # 确保小数位数合理
+            for key in ['avg_pe', 'avg_pb']:
+                if result[key] is not None:
+                    result[key] = round(result[key], 2)
+            
+            # 添加日期
+            result['trade_date'] = trade_date
             
-            return {
-                'trade_date': trade_date,
-                'total_stocks': 0,
-                'avg_pe': None,
-                'avg_pb': None,
-                'total_market_share': None,
-                'total_float_share': None,
-                'industry_count': 0,
-                'area_count': 0
-            }
+            return result
+        
+        return {
+            'trade_date': trade_date,
+            'total_stocks': 0,
+            'avg_pe': None,
+            'avg_pb': None,
+            'total_market_share': None,
+            'total_float_share': None,
+            'industry_count': 0,
+            'area_count': 0
+        }
     
     async def get_industry_statistics(self, trade_date: str) -> List[Dict[str, Any]]:
         """
@@ -264,22 +219,21 @@ class StockBakBasicService:
             ORDER BY stock_count DESC
         """
         
-        async with self.db.pool.acquire() as conn:
-            rows = await conn.fetch(query, trade_date)
-            results = []
-            
-            for row in rows:
-                industry_data = dict(row)
-                # 格式化数值
-                for key in ['avg_pe', 'avg_pb', 'avg_eps', 'avg_gpr', 'avg_npr']:
-                    if industry_data[key] is not None:
-                        industry_data[key] = round(industry_data[key], 2)
-                
-                # 添加日期
-                industry_data['trade_date'] = trade_date
-                results.append(industry_data)
+        rows = await self.db.fetch(query, trade_date)
+        results = []
+        
+        for row in rows:
+            industry_data = dict(row)
+            # 格式化数值
+            for key in ['avg_pe', 'avg_pb', 'avg_eps', 'avg_gpr', 'avg_npr']:
+                if industry_data[key] is not None:
+                    industry_data[key] = round(industry_data[key], 2)
             
-            return results
+            # 添加日期
+            industry_data['trade_date'] = trade_date
+            results.append(industry_data)
+        
+        return results
 
 
 # 快捷函数，用于导入指定交易日的股票历史列表数据
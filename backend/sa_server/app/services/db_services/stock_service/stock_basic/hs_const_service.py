@@ -1,8 +1,10 @@
 import datetime
 import pandas as pd
 from typing import List, Optional, Dict, Set, Tuple
-from app.external.tushare_api.stock_info_api import get_hs_const
+from app.external.tushare_api.stock.stock_info_api import get_hs_const
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.hs_const import HsConstData
+from app.db.bulk_upsert import merge_temp_table
 
 
 class HsConstService:
@@ -42,7 +44,7 @@ class HsConstService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_hs_const(hs_type=hs_type, is_new=is_new)
+        df_result = await run_tushare(get_hs_const, hs_type=hs_type, is_new=is_new)
         
         if df_result is None or df_result.empty:
             query_params = []
@@ -127,71 +129,49 @@ class HsConstService:
             records.append(record)
         
         # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同但不包括id字段
-                    column_defs = ', '.join([
-                        f"{col} {self._get_column_type(col)}" 
-                        for col in columns
-                    ])
-                    
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_hs_const (
-                            {column_defs},
-                            UNIQUE (ts_code, hs_type, in_date)
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    try:
-                        await conn.copy_records_to_table('temp_hs_const', records=records, columns=columns)
-                    except Exception as e:
-                        print(f"复制数据到临时表失败，可能存在重复记录: {str(e)}")
-                        # 如果批量复制失败，尝试逐条插入
-                        await conn.execute("TRUNCATE TABLE temp_hs_const")
-                        for record in records:
-                            try:
-                                insert_values = ", ".join([f"${i+1}" for i in range(len(record))])
-                                await conn.execute(
-                                    f"INSERT INTO temp_hs_const ({', '.join(columns)}) VALUES ({insert_values})",
-                                    *record
-                                )
-                            except Exception as insert_error:
-                                print(f"插入记录失败: {str(insert_error)}")
-                    
-                    # 构建更新语句中的SET部分（除了唯一键外的所有字段）
-                    update_fields = [col for col in columns if col not in ('ts_code', 'hs_type', 'in_date')]
-                    if not update_fields:  # 如果没有可更新的字段，则简单跳过冲突
-                        result = await conn.execute(f'''
-                            INSERT INTO hs_const ({', '.join(columns)})
-                            SELECT {', '.join(columns)} FROM temp_hs_const
-                            ON CONFLICT (ts_code, hs_type, in_date) DO NOTHING
-                        ''')
-                    else:
-                        update_sets = [f"{col} = EXCLUDED.{col}" for col in update_fields]
-                        update_clause = ', '.join(update_sets)
-                        
-                        # 从临时表插入到目标表，有冲突则更新
-                        result = await conn.execute(f'''
-                            INSERT INTO hs_const ({', '.join(columns)})
-                            SELECT {', '.join(columns)} FROM temp_hs_const
-                            ON CONFLICT (ts_code, hs_type, in_date) DO UPDATE SET {update_clause}
-                        ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        try:
+            async with self.db.transaction() as conn:
+                # 创建临时表，结构与目标表相同但不包括id字段
+                column_defs = ', '.join([
+                    f"{col} {self._get_column_type(col)}" 
+                    for col in columns
+                ])
+                
+                await conn.execute(f'''
+                    CREATE TEMP TABLE temp_hs_const (
+                        {column_defs},
+                        UNIQUE (ts_code, hs_type, in_date)
+                    ) ON COMMIT DROP
+                ''')
+                
+                # 使用COPY命令将数据复制到临时表
+                try:
+                    await conn.copy_records_to_table('temp_hs_const', records=records, columns=columns)
+                except Exception as e:
+                    print(f"复制数据到临时表失败，可能存在重复记录: {str(e)}")
+                    # 如果批量复制失败，尝试逐条插入
+                    await conn.execute("TRUNCATE TABLE temp_hs_const")
+                    for record in records:
+                        try:
+                            insert_values = ", ".join([f"${i+1}" for i in range(len(record))])
+                            await conn.execute(
+                                f"INSERT INTO temp_hs_const ({', '.join(columns)}) VALUES ({insert_values})",
+                                *record
+                            )
+                        except Exception as insert_error:
+                            print(f"插入记录失败: {str(insert_error)}")
+                
+                # 从临时表合并到目标表，有冲突则更新，内容未变化的记录不重写
+                result = await merge_temp_table(
+                    conn, 'hs_const', 'temp_hs_const', columns,
+                    conflict_keys=['ts_code', 'hs_type', 'in_date']
+                )
+                print(f"hs_const 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+                return result.total
+                
+        except Exception as e:
+            print(f"批量导入过程中发生错误: {str(e)}")
+            raise
     
     def _get_column_type(self, column_name: str) -> str:
         """
@@ -214,36 +194,35 @@ class HsConstService:
         返回:
             更新的记录数
         """
-        async with self.db.pool.acquire() as conn:
-            try:
-                async with conn.transaction():
-                    # 首先将所有记录设置为非最新
-                    await conn.execute("UPDATE hs_const SET is_new = '0'")
-                    
-                    # 然后将每个股票每种类型的最新in_date的记录设置为最新
-                    result = await conn.execute("""
-                        UPDATE hs_const AS hc
-                        SET is_new = '1'
-                        FROM (
-                            SELECT ts_code, hs_type, MAX(in_date) as max_in_date
-                            FROM hs_const
-                            WHERE out_date IS NULL OR out_date >= CURRENT_DATE
-                            GROUP BY ts_code, hs_type
-                        ) AS latest
-                        WHERE hc.ts_code = latest.ts_code
-                        AND hc.hs_type = latest.hs_type
-                        AND hc.in_date = latest.max_in_date
-                    """)
-                    
-                    # 解析结果获取更新的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                        return count
-                    return 0
-            except Exception as e:
-                print(f"更新is_new状态时发生错误: {str(e)}")
-                raise
+        try:
+            async with self.db.transaction() as conn:
+                # 首先将所有记录设置为非最新
+                await conn.execute("UPDATE hs_const SET is_new = '0'")
+                
+                # 然后将每个股票每种类型的最新in_date的记录设置为最新
+                result = await conn.execute("""
+                    UPDATE hs_const AS hc
+                    SET is_new = '1'
+                    FROM (
+                        SELECT ts_code, hs_type, MAX(in_date) as max_in_date
+                        FROM hs_const
+                        WHERE out_date IS NULL OR out_date >= CURRENT_DATE
+                        GROUP BY ts_code, hs_type
+                    ) AS latest
+                    WHERE hc.ts_code = latest.ts_code
+                    AND hc.hs_type = latest.hs_type
+                    AND hc.in_date = latest.max_in_date
+                """)
+                
+                # 解析结果获取更新的记录数
+                parts = result.split()
+                if len(parts) >= 3:
+                    count = int(parts[2])
+                    return count
+                return 0
+        except Exception as e:
+            print(f"更新is_new状态时发生错误: {str(e)}")
+            raise
 
 
 # 快捷函数，用于导入沪港通成份股数据
@@ -1,8 +1,10 @@
 import datetime
 import pandas as pd
 from typing import List, Optional, Union
-from app.external.tushare_api.stock_info_api import get_namechange
+from app.external.tushare_api.stock.stock_info_api import get_namechange
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.namechange import NameChangeData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class NameChangeService:
@@ -39,7 +41,7 @@ class NameChangeService:
         end_date_str = self._format_date(end_date) if end_date else None
         
         # 从Tushare获取数据
-        df_result = get_namechange(ts_code=ts_code, start_date=start_date_str, end_date=end_date_str)
+        df_result = await run_tushare(get_namechange, ts_code=ts_code, start_date=start_date_str, end_date=end_date_str)
         
         if df_result is None or df_result.empty:
             print(f"未找到股票曾用名数据: ts_code={ts_code}")
@@ -86,80 +88,13 @@ class NameChangeService:
         if not namechange_list:
             return 0
         
-        # 获取字段列表 (不包括id字段，因为它是自增的)
-        columns = [col for col in list(namechange_list[0].model_dump().keys()) if col != 'id']
-
-        # 对输入数据进行去重，确保唯一键(ts_code, start_date)不重复
-        seen_keys = set()
-        unique_namechange_list = []
-        
-        for namechange in namechange_list:
-            key = (namechange.ts_code, str(namechange.start_date))
-            if key not in seen_keys:
-                seen_keys.add(key)
-                unique_namechange_list.append(namechange)
-            else:
-                print(f"检测到重复记录: {namechange.ts_code}, {namechange.start_date}，已跳过")
-        
-        # 准备数据
-        records = []
-        for namechange in unique_namechange_list:
-            namechange_dict = namechange.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = namechange_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同但不包括id字段
-                    column_defs = ', '.join([
-                        f"{col} {self._get_column_type(col)}" 
-                        for col in columns
-                    ])
-                    
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_namechange (
-                            {column_defs}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_namechange', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了ts_code和start_date外的所有字段）
-                    update_fields = [col for col in columns if col not in ('ts_code', 'start_date')]
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in update_fields]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO namechange ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_namechange
-                        ON CONFLICT (ts_code, start_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'namechange', namechange_list,
+            conflict_keys=['ts_code', 'start_date']
+        )
+        print(f"namechange 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
     
     def _format_date(self, date_input: Union[str, datetime.date]) -> str:
         """将日期转换为YYYYMMDD格式字符串"""
@@ -175,21 +110,6 @@ class NameChangeService:
             return date_input.strftime('%Y%m%d')
         else:
             raise TypeError(f"不支持的日期类型: {type(date_input)}")
-    
-    def _get_column_type(self, column_name: str) -> str:
-        """
-        根据字段名称获取PostgreSQL数据类型
-        这个方法帮助创建临时表时确定正确的列类型
-        """
-        type_mapping = {
-            'ts_code': 'VARCHAR(20)',
-            'name': 'VARCHAR(50)',
-            'start_date': 'DATE',
-            'end_date': 'DATE',
-            'ann_date': 'DATE',
-            'change_reason': 'VARCHAR(200)'
-        }
-        return type_mapping.get(column_name, 'TEXT')
 
 
 # 快捷函数，用于导入指定股票的曾用名数据
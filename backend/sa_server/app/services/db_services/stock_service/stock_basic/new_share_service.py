@@ -2,8 +2,10 @@ import pandas as pd
 from typing import List, Dict, Any
 from app.utils.date_validators import DateValidators
 from app.utils.numeric_validators import NumericValidators
-from app.external.tushare_api.stock_info_api import get_new_share
+from app.external.tushare_api.stock.stock_info_api import get_new_share
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.new_share import NewShareData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class NewShareService:
@@ -31,7 +33,7 @@ class NewShareService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_new_share(start_date=start_date, end_date=end_date)
+        df_result = await run_tushare(get_new_share, start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
             print(f"未找到IPO新股数据: {start_date} 至 {end_date}")
@@ -98,61 +100,14 @@ class NewShareService:
         if not new_share_list:
             return 0
         
-        # 获取字段列表
-        columns = list(new_share_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for new_share in new_share_list:
-            new_share_dict = new_share.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = new_share_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_new_share (LIKE new_share) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_new_share', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_fields = [col for col in columns if col != 'ts_code']
-                    update_sets = [f"{field} = EXCLUDED.{field}" for field in update_fields]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO new_share
-                        SELECT * FROM temp_new_share
-                        ON CONFLICT (ts_code) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-                
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'new_share', new_share_list,
+            conflict_keys=['ts_code']
+        )
+        print(f"new_share 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
+    
     async def get_ipo_statistics(self, year: int = None) -> Dict[str, Any]:
         """
         获取IPO统计数据
@@ -183,33 +138,32 @@ class NewShareService:
             {year_condition}
         """
         
-        async with self.db.pool.acquire() as conn:
-            row = await conn.fetchrow(query, *params)
-            if row:
-                # 将数值结果转换为字典并格式化
-                result = dict(row)
-                # 确保小数位数合理
-                for key in ['avg_price', 'max_price', 'min_price', 'avg_pe']:
-                    if result[key] is not None:
-                        result[key] = round(result[key], 2)
-                
-                if result['avg_ballot'] is not None:
-                    result['avg_ballot'] = round(result['avg_ballot'] * 100, 4)  # 转换为百分比
-                
-                if result['total_funds'] is not None:
-                    result['total_funds'] = round(result['total_funds'], 2)  # 亿元
-                
-                return result
+        row = await self.db.fetchrow(query, *params)
+        if row:
+            # 将数值结果转换为字典并格式化
+            result = dict(row)
+            # 确保小数位数合理
+            for key in ['avg_price', 'max_price', 'min_price', 'avg_pe']:
+                if result[key] is not None:
+                    result[key] = round(result[key], 2)
+            
+            if result['avg_ballot'] is not None:
+                result['avg_ballot'] = round(result['avg_ballot'] * 100, 4)  # 转换为百分比
+            
+            if result['total_funds'] is not None:
+                result['total_funds'] = round(result['total_funds'], 2)  # 亿元
             
-            return {
-                'total_ipos': 0,
-                'avg_price': None,
-                'max_price': None,
-                'min_price': None,
-                'avg_pe': None,
-                'total_funds': None,
-                'avg_ballot': None
-            }
+            return result
+        
+        return {
+            'total_ipos': 0,
+            'avg_price': None,
+            'max_price': None,
+            'min_price': None,
+            'avg_pe': None,
+            'total_funds': None,
+            'avg_ballot': None
+        }
 
 
 # 快捷函数，用于导入指定时间段的IPO新股数据
@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List, Optional
-from app.external.tushare_api.stock_info_api import get_stk_managers
+from app.external.tushare_api.stock.stock_info_api import get_stk_managers
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.stk_managers import StockManagerData
+from app.db.bulk_upsert import bulk_upsert_models
 
 class StockManagerService:
     """股票管理层数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -39,7 +41,7 @@ class StockManagerService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_stk_managers(ts_code=ts_code, ann_date=ann_date,
+        df_result = await run_tushare(get_stk_managers, ts_code=ts_code, ann_date=ann_date,
                                     start_date=start_date, end_date=end_date)
         
         if df_result is None or df_result.empty:
@@ -116,70 +118,13 @@ class StockManagerService:
         if not manager_list:
             return 0
         
-        # 获取字段列表（排除id字段，因为它是自动生成的）
-        columns = [col for col in list(manager_list[0].model_dump().keys()) if col != 'id']
-        
-        # 准备数据
-        records = []
-        for manager in manager_list:
-            manager_dict = manager.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = manager_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同（排除id字段）
-                    await conn.execute('CREATE TEMP TABLE temp_stk_managers (LIKE stk_managers) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_stk_managers', records=records, columns=columns)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    # 注意: stk_managers表使用ts_code, name, begin_date作为唯一约束
-                    result = await conn.execute('''
-                        INSERT INTO stk_managers (
-                            ts_code, ann_date, name, gender, lev, title, edu,
-                            national, birthday, begin_date, end_date, resume
-                        )
-                        SELECT 
-                            ts_code, ann_date, name, gender, lev, title, edu,
-                            national, birthday, begin_date, end_date, resume
-                        FROM temp_stk_managers
-                        ON CONFLICT (ts_code, name, begin_date) DO UPDATE SET
-                            ann_date = EXCLUDED.ann_date,
-                            gender = EXCLUDED.gender,
-                            lev = EXCLUDED.lev,
-                            title = EXCLUDED.title,
-                            edu = EXCLUDED.edu,
-                            national = EXCLUDED.national,
-                            birthday = EXCLUDED.birthday,
-                            end_date = EXCLUDED.end_date,
-                            resume = EXCLUDED.resume
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'stk_managers', manager_list,
+            conflict_keys=['ts_code', 'name', 'begin_date']
+        )
+        print(f"stk_managers 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入指定股票的管理层数据
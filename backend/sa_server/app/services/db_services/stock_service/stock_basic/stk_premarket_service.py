@@ -1,8 +1,10 @@
 import datetime
 import pandas as pd
 from typing import List, Optional, Union
-from app.external.tushare_api.stock_info_api import get_stk_premarket
+from app.external.tushare_api.stock.stock_info_api import get_stk_premarket
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.stk_premarket import StkPremarketData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class StkPremarketService:
@@ -72,7 +74,7 @@ class StkPremarketService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_stk_premarket(
+        df_result = await run_tushare(get_stk_premarket,
             ts_code=ts_code,
             trade_date=trade_date_str,
             start_date=start_date,
@@ -135,59 +137,13 @@ class StkPremarketService:
         if not premarket_list:
             return 0
         
-        # 获取字段列表
-        columns = list(premarket_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for premarket in premarket_list:
-            premarket_dict = premarket.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = premarket_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_stk_premarket (LIKE stk_premarket) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_stk_premarket', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ('trade_date', 'ts_code')]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO stk_premarket 
-                        SELECT * FROM temp_stk_premarket
-                        ON CONFLICT (trade_date, ts_code) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'stk_premarket', premarket_list,
+            conflict_keys=['trade_date', 'ts_code']
+        )
+        print(f"stk_premarket 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入指定日期的所有股票盘前数据
@@ -2,8 +2,10 @@ import math
 import pandas as pd
 from typing import List, Optional
 from decimal import Decimal, DecimalException
-from app.external.tushare_api.stock_info_api import get_stk_rewards
+from app.external.tushare_api.stock.stock_info_api import get_stk_rewards
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.stk_rewards import StockRewardData
+from app.db.bulk_upsert import bulk_upsert_models
 
 class StockRewardService:
     """股票管理层薪酬和持股数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -35,7 +37,7 @@ class StockRewardService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_stk_rewards(ts_code=ts_code, end_date=end_date)
+        df_result = await run_tushare(get_stk_rewards, ts_code=ts_code, end_date=end_date)
         
         if df_result is None or df_result.empty:
             query_params = [f"ts_code={ts_code}"]
@@ -124,64 +126,14 @@ class StockRewardService:
         if not reward_list:
             return 0
         
-        # 获取字段列表（排除id字段，因为它是自动生成的）
-        columns = [col for col in list(reward_list[0].model_dump().keys()) if col != 'id']
-        
-        # 准备数据
-        records = []
-        for reward in reward_list:
-            reward_dict = reward.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = reward_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同（排除id字段）
-                    await conn.execute('CREATE TEMP TABLE temp_stk_rewards (LIKE stk_rewards) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_stk_rewards', records=records, columns=columns)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    # 注意: stk_rewards表使用ts_code, name, end_date作为唯一约束
-                    result = await conn.execute('''
-                        INSERT INTO stk_rewards (
-                            ts_code, ann_date, end_date, name, title, reward, hold_vol
-                        )
-                        SELECT 
-                            ts_code, ann_date, end_date, name, title, reward, hold_vol
-                        FROM temp_stk_rewards
-                        ON CONFLICT (ts_code, name, end_date) DO UPDATE SET
-                            ann_date = EXCLUDED.ann_date,
-                            title = EXCLUDED.title,
-                            reward = EXCLUDED.reward,
-                            hold_vol = EXCLUDED.hold_vol
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-                
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'stk_rewards', reward_list,
+            conflict_keys=['ts_code', 'name', 'end_date']
+        )
+        print(f"stk_rewards 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
+    
     async def get_annual_reward_summary(self, ts_code: str, year: int) -> dict:
         """
         获取指定股票在特定年份的薪酬统计摘要
@@ -204,17 +156,16 @@ class StockRewardService:
             WHERE ts_code = $1 AND EXTRACT(YEAR FROM end_date) = $2
         """
         
-        async with self.db.pool.acquire() as conn:
-            row = await conn.fetchrow(query, ts_code, year)
-            if row:
-                return dict(row)
-            return {
-                'total_managers': 0,
-                'total_reward': Decimal('0'),
-                'avg_reward': Decimal('0'),
-                'max_reward': Decimal('0'),
-                'min_reward': Decimal('0')
-            }
+        row = await self.db.fetchrow(query, ts_code, year)
+        if row:
+            return dict(row)
+        return {
+            'total_managers': 0,
+            'total_reward': Decimal('0'),
+            'avg_reward': Decimal('0'),
+            'max_reward': Decimal('0'),
+            'min_reward': Decimal('0')
+        }
 
 
 # 快捷函数，用于导入指定股票的薪酬和持股数据
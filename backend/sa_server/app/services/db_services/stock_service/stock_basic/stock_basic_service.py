@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List, Optional
-from app.external.tushare_api.stock_info_api import get_stock_basic
+from app.external.tushare_api.stock.stock_info_api import get_stock_basic
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.stock_basic import StockBasicData
+from app.db.bulk_upsert import bulk_upsert_models
 
 class StockBasicService:
     """股票数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -19,7 +21,8 @@ class StockBasicService:
     async def import_stock_data(self, ts_code: Optional[str] = None, name: Optional[str] = None, 
                                market: Optional[str] = None, list_status: str = 'L', 
                                exchange: str = '', is_hs: Optional[str] = None, 
-                               batch_size: int = 1000) -> int:
+                               batch_size: int = 1000,
+                               raise_errors: bool = False) -> int:
         """
         从Tushare获取股票数据并高效导入数据库
         
@@ -31,12 +34,13 @@ class StockBasicService:
             exchange: 可选，交易所 SSE上交所 SZSE深交所 BSE北交所
             is_hs: 可选，是否沪深港通标的，N否 H沪股通 S深股通
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_stock_basic(ts_code=ts_code, name=name, market=market, 
+        df_result = await run_tushare(get_stock_basic, ts_code=ts_code, name=name, market=market, 
                                    list_status=list_status, exchange=exchange, is_hs=is_hs)
         
         if df_result is None or df_result.empty:
@@ -90,6 +94,8 @@ class StockBasicService:
                     print(f"批次导入成功: {inserted} 条记录")
             except Exception as e:
                 print(f"批次导入失败: {str(e)}")
+                if raise_errors:
+                    raise
         
         return total_count
     
@@ -106,59 +112,13 @@ class StockBasicService:
         if not stock_list:
             return 0
         
-        # 获取字段列表
-        columns = list(stock_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for stock in stock_list:
-            stock_dict = stock.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = stock_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_stock_basic (LIKE stock_basic) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_stock_basic', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col != 'ts_code']
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO stock_basic 
-                        SELECT * FROM temp_stock_basic
-                        ON CONFLICT (ts_code) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'stock_basic', stock_list,
+            conflict_keys=['ts_code']
+        )
+        print(f"stock_basic 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入所有股票数据
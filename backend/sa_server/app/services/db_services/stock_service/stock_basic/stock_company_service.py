@@ -1,7 +1,9 @@
 import pandas as pd
 from typing import List, Optional, Dict, Set
-from app.external.tushare_api.stock_info_api import get_stock_company
+from app.external.tushare_api.stock.stock_info_api import get_stock_company
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.stock_company import StockCompanyData
+from app.db.bulk_upsert import merge_temp_table
 
 
 class StockCompanyService:
@@ -32,7 +34,7 @@ class StockCompanyService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_stock_company(ts_code=ts_code, exchange=exchange)
+        df_result = await run_tushare(get_stock_company, ts_code=ts_code, exchange=exchange)
         
         if df_result is None or df_result.empty:
             print(f"未找到上市公司基本信息: ts_code={ts_code}, exchange={exchange}")
@@ -109,71 +111,49 @@ class StockCompanyService:
             records.append(record)
         
         # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    column_defs = ', '.join([
-                        f"{col} {self._get_column_type(col)}" 
-                        for col in columns
-                    ])
-                    
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_stock_company (
-                            {column_defs},
-                            PRIMARY KEY (ts_code)
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    try:
-                        await conn.copy_records_to_table('temp_stock_company', records=records, columns=columns)
-                    except Exception as e:
-                        print(f"复制数据到临时表失败，可能存在重复记录: {str(e)}")
-                        # 如果批量复制失败，尝试逐条插入
-                        await conn.execute("TRUNCATE TABLE temp_stock_company")
-                        for record in records:
-                            try:
-                                insert_values = ", ".join([f"${i+1}" for i in range(len(record))])
-                                await conn.execute(
-                                    f"INSERT INTO temp_stock_company ({', '.join(columns)}) VALUES ({insert_values})",
-                                    *record
-                                )
-                            except Exception as insert_error:
-                                print(f"插入记录失败: {str(insert_error)}")
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_fields = [col for col in columns if col != 'ts_code']
-                    if not update_fields:  # 如果没有可更新的字段，则简单跳过冲突
-                        result = await conn.execute(f'''
-                            INSERT INTO stock_company
-                            SELECT * FROM temp_stock_company
-                            ON CONFLICT (ts_code) DO NOTHING
-                        ''')
-                    else:
-                        update_sets = [f"{col} = EXCLUDED.{col}" for col in update_fields]
-                        update_clause = ', '.join(update_sets)
-                        
-                        # 从临时表插入到目标表，有冲突则更新
-                        result = await conn.execute(f'''
-                            INSERT INTO stock_company
-                            SELECT * FROM temp_stock_company
-                            ON CONFLICT (ts_code) DO UPDATE SET {update_clause}
-                        ''')
-                    
-                    # 解析结果获取处理的记录数
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        try:
+            async with self.db.transaction() as conn:
+                # 创建临时表，结构与目标表相同
+                column_defs = ', '.join([
+                    f"{col} {self._get_column_type(col)}" 
+                    for col in columns
+                ])
+                
+                await conn.execute(f'''
+                    CREATE TEMP TABLE temp_stock_company (
+                        {column_defs},
+                        PRIMARY KEY (ts_code)
+                    ) ON COMMIT DROP
+                ''')
+                
+                # 使用COPY命令将数据复制到临时表
+                try:
+                    await conn.copy_records_to_table('temp_stock_company', records=records, columns=columns)
+                except Exception as e:
+                    print(f"复制数据到临时表失败，可能存在重复记录: {str(e)}")
+                    # 如果批量复制失败，尝试逐条插入
+                    await conn.execute("TRUNCATE TABLE temp_stock_company")
+                    for record in records:
+                        try:
+                            insert_values = ", ".join([f"${i+1}" for i in range(len(record))])
+                            await conn.execute(
+                                f"INSERT INTO temp_stock_company ({', '.join(columns)}) VALUES ({insert_values})",
+                                *record
+                            )
+                        except Exception as insert_error:
+                            print(f"插入记录失败: {str(insert_error)}")
+                
+                # 从临时表合并到目标表，有冲突则更新，内容未变化的记录不重写
+                result = await merge_temp_table(
+                    conn, 'stock_company', 'temp_stock_company', columns,
+                    conflict_keys=['ts_code']
+                )
+                print(f"stock_company 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+                return result.total
+                
+        except Exception as e:
+            print(f"批量导入过程中发生错误: {str(e)}")
+            raise
     
     def _get_column_type(self, column_name: str) -> str:
         """
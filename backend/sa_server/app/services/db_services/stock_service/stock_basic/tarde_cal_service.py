@@ -1,8 +1,10 @@
 import datetime
 import pandas as pd
 from typing import List, Optional, Union
-from app.external.tushare_api.stock_info_api import get_trade_cal
+from app.external.tushare_api.stock.stock_info_api import get_trade_cal
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_basic.tarde_cal import TradeCalData
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class TradeCalService:
@@ -22,7 +24,8 @@ class TradeCalService:
                               start_date: Optional[Union[str, datetime.date]] = None,
                               end_date: Optional[Union[str, datetime.date]] = None,
                               is_open: Optional[str] = None,
-                              batch_size: int = 1000) -> int:
+                              batch_size: int = 1000,
+                              raise_errors: bool = False) -> int:
         """
         从Tushare获取交易日历数据并高效导入数据库
         
@@ -32,6 +35,7 @@ class TradeCalService:
             end_date: 可选，结束日期
             is_open: 可选，是否交易 0休市 1交易
             batch_size: 批量处理的记录数，默认1000条
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
@@ -46,7 +50,7 @@ class TradeCalService:
             return 0
             
         # 从Tushare获取数据
-        df_result = get_trade_cal(
+        df_result = await run_tushare(get_trade_cal,
             exchange=exchange, 
             start_date=start_date_str, 
             end_date=end_date_str,
@@ -93,6 +97,8 @@ class TradeCalService:
                     print(f"批次导入成功: {inserted} 条记录")
             except Exception as e:
                 print(f"批次导入失败: {str(e)}")
+                if raise_errors:
+                    raise
         
         return total_count
     
@@ -109,59 +115,13 @@ class TradeCalService:
         if not trade_cal_list:
             return 0
         
-        # 获取字段列表
-        columns = list(trade_cal_list[0].model_dump().keys())
-        
-        # 准备数据
-        records = []
-        for trade_cal in trade_cal_list:
-            trade_cal_dict = trade_cal.model_dump()
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = trade_cal_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 创建临时表，结构与目标表相同
-                    await conn.execute('CREATE TEMP TABLE temp_tarde_cal (LIKE tarde_cal) ON COMMIT DROP')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_tarde_cal', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（除了主键外的所有字段）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ('exchange', 'cal_date')]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO tarde_cal 
-                        SELECT * FROM temp_tarde_cal
-                        ON CONFLICT (exchange, cal_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'tarde_cal', trade_cal_list,
+            conflict_keys=['exchange', 'cal_date']
+        )
+        print(f"tarde_cal 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
     
     def _format_date(self, date_input: Union[str, datetime.date]) -> str:
         """将日期转换为YYYYMMDD格式字符串"""
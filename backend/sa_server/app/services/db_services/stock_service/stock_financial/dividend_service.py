@@ -1,9 +1,11 @@
 import pandas as pd
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
-from app.external.tushare_api.financial_info_api import get_dividend
+from app.external.tushare_api.stock.financial_info_api import get_dividend
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_financial.dividend import DividendData
 from app.db.crud.stock_crud.stock_financial.dividend_crud import DividendCRUD
+from app.db.bulk_upsert import bulk_upsert_models
 
 
 class DividendService:
@@ -39,7 +41,7 @@ class DividendService:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_dividend(ts_code=ts_code, ann_date=ann_date, ex_date=ex_date,
+        df_result = await run_tushare(get_dividend, ts_code=ts_code, ann_date=ann_date, ex_date=ex_date,
                               record_date=record_date, imp_ann_date=imp_ann_date)
         
         if df_result is None or df_result.empty:
@@ -125,126 +127,13 @@ class DividendService:
         if not dividend_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = dividend_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 优先选择更新的记录
-        # 使用字典来存储记录，如果有重复键，根据日期更新
-        unique_records = {}
-        
-        for dividend in dividend_list:
-            # 创建唯一键
-            key = (dividend.ts_code, str(dividend.end_date), str(dividend.ann_date))
-            
-            # 如果键不存在，或者当前记录比已存在的记录更新，则更新
-            if key not in unique_records or (dividend.imp_ann_date and (not unique_records[key][0].imp_ann_date or dividend.imp_ann_date > unique_records[key][0].imp_ann_date)):
-                unique_records[key] = (dividend, True)
-                print(f"保留记录: {dividend.ts_code}, {dividend.end_date}, {dividend.ann_date}")
-            else:
-                print(f"跳过记录: {dividend.ts_code}, {dividend.end_date}, {dividend.ann_date}, 已存在更新的记录")
-        
-        # 提取最终的唯一记录列表
-        unique_dividend_list = [record[0] for record in unique_records.values()]
-        
-        # 准备数据
-        records = []
-        for dividend in unique_dividend_list:
-            dividend_dict = dividend.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = dividend_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'dividend', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_dividend (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_dividend', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'end_date', 'ann_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO dividend ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_dividend
-                        ON CONFLICT (ts_code, end_date, ann_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'dividend', dividend_list,
+            conflict_keys=['ts_code', 'end_date', 'ann_date']
+        )
+        print(f"dividend 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定股票的分红数据
@@ -371,7 +260,10 @@ async def query_dividend_data(db,
                             filters: Optional[Dict[str, Any]] = None, 
                             order_by: Optional[List[str]] = None,
                             limit: Optional[int] = None,
-                            offset: Optional[int] = None):
+                            offset: Optional[int] = None,
+                            cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None,
+                            result_format: str = 'model'):
     """
     动态查询分红数据，支持任意字段过滤和自定义排序
     
@@ -391,6 +283,9 @@ async def query_dividend_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-ex_date', 'ts_code']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[DividendData]: 符合条件的分红数据列表
@@ -420,7 +315,10 @@ async def query_dividend_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
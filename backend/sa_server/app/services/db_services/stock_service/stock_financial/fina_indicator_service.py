@@ -1,9 +1,10 @@
-import pandas as pd
-from decimal import Decimal
 from typing import List, Optional, Dict, Any
-from app.external.tushare_api.financial_info_api import get_fina_indicator
+from app.external.tushare_api.stock.financial_info_api import get_fina_indicator
+from app.external.tushare_async import run_tushare
 from app.data.db_modules.stock_modules.stock_financial.fina_indicator import FinaIndicatorData
 from app.db.crud.stock_crud.stock_financial.fina_indicator_crud import FinaIndicatorCRUD
+from app.db.bulk_upsert import bulk_upsert_models, pipelined_upsert_frame
+from app.db.sync_state import run_incremental
 
 class FinaIndicatorService:
     """财务指标数据导入服务，使用PostgreSQL COPY命令高效导入数据"""
@@ -22,7 +23,9 @@ class FinaIndicatorService:
                                       start_date: Optional[str] = None, 
                                       end_date: Optional[str] = None,
                                       period: Optional[str] = None,
-                                      batch_size: int = 1000) -> int:
+                                      batch_size: int = 1000,
+                                      concurrency: Optional[int] = None,
+                                      raise_errors: bool = False) -> int:
         """
         从Tushare获取财务指标数据并高效导入数据库
         
@@ -33,12 +36,14 @@ class FinaIndicatorService:
             end_date: 报告期结束日期（YYYYMMDD格式）
             period: 报告期(YYYYMMDD格式，每个季度最后一天的日期，比如20171231表示年报)
             batch_size: 批量处理的记录数，默认1000条
+            concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
+            raise_errors: 有批次写入失败时是否抛出异常，默认打印错误并返回已写入的记录数
             
         返回:
             导入的记录数量
         """
         # 从Tushare获取数据
-        df_result = get_fina_indicator(ts_code=ts_code, ann_date=ann_date,
+        df_result = await run_tushare(get_fina_indicator, ts_code=ts_code, ann_date=ann_date,
                                     start_date=start_date, end_date=end_date,
                                     period=period)
         
@@ -46,71 +51,45 @@ class FinaIndicatorService:
             print(f"未找到财务指标数据: ts_code={ts_code}, period={period}")
             return 0
         
-        # 转换为列表并处理可能的NaN值
-        records = df_result.replace({pd.NA: None}).to_dict('records')
+        # 列式校验和类型转换后以流水线方式在多个连接上并发写入，不再逐行构造FinaIndicatorData
+        # ts_code和end_date为空的记录会被拒绝
+        result = await pipelined_upsert_frame(
+            self.db, 'fina_indicator', df_result, FinaIndicatorData,
+            conflict_keys=['ts_code', 'end_date'],
+            batch_size=batch_size,
+            concurrency=concurrency,
+            required_fields=['ts_code', 'end_date'],
+            raise_errors=raise_errors
+        )
+        return result.total
+    
+    async def import_incremental(self, ts_code: Optional[str] = None,
+                                 overlap_days: int = 366,
+                                 batch_size: int = 1000,
+                                 concurrency: Optional[int] = None) -> int:
+        """
+        增量导入财务指标数据：只获取同步水位（报告期end_date）之后的报告期，没有同步记录且表为空时全量导入
         
-        # 定义必填字段及默认值
-        required_fields = {
-            'ts_code': '',
-            'end_date': None,
-        }
+        年报在次年4月前披露，已披露的报告期也可能被更正，默认重叠一年的报告期。
         
-        # 处理数据并确保所有必填字段都有值
-        valid_records = []
-        for record in records:
-            # 确保必填字段存在且有值
-            for field, default_value in required_fields.items():
-                if field not in record or record[field] is None or (isinstance(record[field], str) and record[field] == ''):
-                    record[field] = default_value
-            
-            # 如果缺少关键字段，跳过该记录
-            if record['ts_code'] == '' or record['end_date'] is None:
-                continue
+        参数:
+            ts_code: 股票代码，指定时按股票分别记录水位
+            overlap_days: 重叠窗口天数，水位之前这些天的报告期重新导入
+            batch_size: 批量处理的记录数，默认1000条
+            concurrency: 同时写入的批次数，默认取配置项DB_IMPORT_CONCURRENCY
             
-            # 处理日期格式，确保是YYYYMMDD格式
-            date_fields = ['ann_date', 'end_date']
-            for date_field in date_fields:
-                if date_field in record and record[date_field] is not None:
-                    # 如果是pandas Timestamp对象，转换为YYYYMMDD格式字符串
-                    if hasattr(record[date_field], 'strftime'):
-                        record[date_field] = record[date_field].strftime('%Y%m%d')
-                    # 如果已经是字符串但带有连字符（如"2023-12-31"），转换为YYYYMMDD
-                    elif isinstance(record[date_field], str) and '-' in record[date_field]:
-                        date_parts = record[date_field].split('-')
-                        if len(date_parts) == 3:
-                            record[date_field] = ''.join(date_parts)
-                
-            valid_records.append(record)
-        
-        # 分批处理
-        batches = [valid_records[i:i + batch_size] for i in range(0, len(valid_records), batch_size)]
-        total_count = 0
-        
-        for batch in batches:
-            try:
-                # 将批次数据转换为FinaIndicatorData对象
-                fina_indicator_data_list = []
-                for record in batch:
-                    try:
-                        # 处理数字字段，确保它们是Decimal类型
-                        for key, value in record.items():
-                            if isinstance(value, (float, int)) and key not in ['id']:
-                                record[key] = Decimal(str(value))
-                        
-                        fina_indicator_data = FinaIndicatorData(**record)
-                        fina_indicator_data_list.append(fina_indicator_data)
-                    except Exception as e:
-                        print(f"创建FinaIndicatorData对象失败 {record.get('ts_code', '未知')}, {record.get('end_date', '未知')}: {str(e)}")
-                
-                # 使用COPY命令批量导入
-                if fina_indicator_data_list:
-                    inserted = await self.batch_upsert_fina_indicator(fina_indicator_data_list)
-                    total_count += inserted
-                    print(f"批次导入成功: {inserted} 条财务指标记录")
-            except Exception as e:
-                print(f"批次导入失败: {str(e)}")
+        返回:
+            导入的记录数量
+        """
+        async def importer(start_date: Optional[str], end_date: str) -> int:
+            if start_date is None:
+                return await self.import_fina_indicator_data(ts_code=ts_code, batch_size=batch_size,
+                                                             concurrency=concurrency, raise_errors=True)
+            return await self.import_fina_indicator_data(ts_code=ts_code, start_date=start_date, end_date=end_date,
+                                                         batch_size=batch_size, concurrency=concurrency, raise_errors=True)
         
-        return total_count
+        return await run_incremental(self.db, 'fina_indicator', 'fina_indicator', 'end_date', importer,
+                                     overlap_days, ts_code=ts_code)
     
     async def batch_upsert_fina_indicator(self, fina_indicator_list: List[FinaIndicatorData]) -> int:
         """
@@ -125,131 +104,13 @@ class FinaIndicatorService:
         if not fina_indicator_list:
             return 0
         
-        # 获取字段列表，排除id字段
-        sample_dict = fina_indicator_list[0].model_dump(exclude={'id'})
-        columns = list(sample_dict.keys())
-        
-        # 优先选择update_flag为1的记录
-        # 使用字典来存储记录，如果有重复键，根据update_flag决定是否替换
-        unique_records = {}
-        
-        for fina_indicator in fina_indicator_list:
-            # 创建唯一键
-            key = (fina_indicator.ts_code, str(fina_indicator.end_date))
-            
-            # 获取update_flag，如果不存在则默认为0
-            update_flag = getattr(fina_indicator, 'update_flag', '0')
-            
-            # 如果键不存在，或者当前记录的update_flag为1且已存记录的update_flag不为1，则更新
-            if key not in unique_records or (update_flag == '1' and unique_records[key][1] != '1'):
-                unique_records[key] = (fina_indicator, update_flag)
-                print(f"保留记录: {fina_indicator.ts_code}, {fina_indicator.end_date}, update_flag={update_flag}")
-            else:
-                existing_flag = unique_records[key][1]
-                print(f"跳过记录: {fina_indicator.ts_code}, {fina_indicator.end_date}, "
-                    f"update_flag={update_flag}，已存在update_flag={existing_flag}的记录")
-        
-        # 提取最终的唯一记录列表
-        unique_fina_indicator_list = [record[0] for record in unique_records.values()]
-        
-        # 准备数据
-        records = []
-        for fina_indicator in unique_fina_indicator_list:
-            fina_indicator_dict = fina_indicator.model_dump(exclude={'id'})
-            # 正确处理日期类型和None值
-            record = []
-            for col in columns:
-                val = fina_indicator_dict[col]
-                # 对于None值，使用PostgreSQL的NULL而不是空字符串
-                if val is None:
-                    record.append(None)
-                else:
-                    record.append(val)
-            records.append(record)
-        
-        # 使用COPY命令批量导入数据
-        async with self.db.pool.acquire() as conn:
-            try:
-                # 开始事务
-                async with conn.transaction():
-                    # 手动创建临时表，明确指定列类型，不包含id列
-                    # 首先获取原表的列信息
-                    column_types = await self._get_column_type(conn, 'fina_indicator', columns)
-                    
-                    # 构建临时表的列定义
-                    column_defs = []
-                    for col in columns:
-                        col_type = column_types.get(col, 'TEXT')
-                        column_defs.append(f"{col} {col_type}")
-                    
-                    # 创建临时表，显式指定列定义，不包含id列和任何约束
-                    await conn.execute(f'''
-                        CREATE TEMP TABLE temp_fina_indicator (
-                            {', '.join(column_defs)}
-                        ) ON COMMIT DROP
-                    ''')
-                    
-                    # 使用COPY命令将数据复制到临时表
-                    await conn.copy_records_to_table('temp_fina_indicator', records=records, columns=columns)
-                    
-                    # 构建更新语句中的SET部分（排除主键）
-                    update_sets = [f"{col} = EXCLUDED.{col}" for col in columns if col not in ['ts_code', 'end_date']]
-                    update_clause = ', '.join(update_sets)
-                    
-                    # 从临时表插入到目标表，有冲突则更新
-                    result = await conn.execute(f'''
-                        INSERT INTO fina_indicator ({', '.join(columns)})
-                        SELECT {', '.join(columns)} FROM temp_fina_indicator
-                        ON CONFLICT (ts_code, end_date) DO UPDATE SET {update_clause}
-                    ''')
-                    
-                    # 解析结果获取处理的记录数
-                    # 结果格式类似于 "INSERT 0 50"
-                    parts = result.split()
-                    if len(parts) >= 3:
-                        count = int(parts[2])
-                    else:
-                        count = len(records)  # 如果无法解析，假定全部成功
-                    
-                    return count
-                    
-            except Exception as e:
-                print(f"批量导入过程中发生错误: {str(e)}")
-                raise
-
-    async def _get_column_type(self, conn, table_name, columns):
-        """
-        获取表中指定列的数据类型
-        
-        参数:
-            conn: 数据库连接
-            table_name: 表名
-            columns: 列名列表
-            
-        返回:
-            字典，键为列名，值为数据类型
-        """
-        column_types = {}
-        for column in columns:
-            # 查询PostgreSQL系统表获取列的数据类型
-            data_type = await conn.fetchval("""
-                SELECT pg_catalog.format_type(a.atttypid, a.atttypmod)
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON c.relnamespace = n.oid
-                WHERE c.relname = $1
-                AND a.attname = $2
-                AND a.attnum > 0
-                AND NOT a.attisdropped
-            """, table_name, column)
-            
-            if data_type:
-                column_types[column] = data_type
-            else:
-                # 如果找不到类型，使用通用类型
-                column_types[column] = 'TEXT'
-        
-        return column_types
+        # 通过通用批量upsert引擎写入：临时表 + COPY + ON CONFLICT，重复键保留最后一条
+        result = await bulk_upsert_models(
+            self.db, 'fina_indicator', fina_indicator_list,
+            conflict_keys=['ts_code', 'end_date']
+        )
+        print(f"fina_indicator 写入完成: 新增 {result.inserted} 条, 更新 {result.updated} 条, 未变化 {result.unchanged} 条")
+        return result.total
 
 
 # 快捷函数，用于导入特定股票的财务指标数据
@@ -397,12 +258,36 @@ async def import_all_fina_indicator(db, batch_size: int = 1000):
     return count
 
 
+# 增量导入财务指标数据
+async def import_incremental_fina_indicator(db, ts_code: Optional[str] = None,
+                                            overlap_days: int = 366, batch_size: int = 1000):
+    """
+    增量导入财务指标数据，只获取上次同步之后的报告期，用于每日定时任务代替全量导入
+    
+    参数:
+        db: 数据库连接对象
+        ts_code: 股票代码（可选），指定时按股票分别记录水位
+        overlap_days: 重叠窗口天数，默认一年
+        batch_size: 批量处理大小，默认1000条
+        
+    返回:
+        导入的记录数
+    """
+    service = FinaIndicatorService(db)
+    count = await service.import_incremental(ts_code=ts_code, overlap_days=overlap_days, batch_size=batch_size)
+    print(f"成功增量导入财务指标数据，共 {count} 条记录")
+    return count
+
+
 # 动态查询财务指标数据
 async def query_fina_indicator_data(db, 
                                  filters: Optional[Dict[str, Any]] = None, 
                                  order_by: Optional[List[str]] = None,
                                  limit: Optional[int] = None,
-                                 offset: Optional[int] = None):
+                                 offset: Optional[int] = None,
+                                 cursor: Optional[str] = None,
+                                 fields: Optional[List[str]] = None,
+                                 result_format: str = 'model'):
     """
     动态查询财务指标数据，支持任意字段过滤和自定义排序
     
@@ -422,6 +307,9 @@ async def query_fina_indicator_data(db,
         order_by: 排序字段列表，字段前加"-"表示降序，例如['-end_date', 'ts_code']
         limit: 最大返回记录数
         offset: 跳过前面的记录数（用于分页）
+        cursor: 上一页返回的next_cursor，传入时按排序字段做keyset分页并忽略offset
+        fields: 只查询并返回的字段列表，为空时返回全部字段；指定时结果为字典列表
+        result_format: 结果格式，'model'返回模型对象（默认），'records'返回字典列表，'columns'返回按列组织的ColumnarPage；后两者不做逐行校验
         
     返回:
         List[FinaIndicatorData]: 符合条件的财务指标数据列表
@@ -451,7 +339,10 @@ async def query_fina_indicator_data(db,
         filters=filters,
         order_by=order_by,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        result_format=result_format
     )
     
     return results
@@ -0,0 +1,290 @@
+# app/storage/cache_client.py
+import datetime
+import functools
+import hashlib
+import inspect
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import pandas as pd
+from app.config.config import settings
+
+
+# 缓存模式
+CACHE_OFF = 'off'            # 不缓存
+CACHE_ON = 'on'              # 有效期内读缓存，未命中或过期时请求并写入
+CACHE_REPLAY = 'replay'      # 只读缓存（忽略有效期），未命中时抛出ResponseCacheMiss，不访问网络
+CACHE_REFRESH = 'refresh'    # 总是请求并更新缓存
+CACHE_MODES = (CACHE_OFF, CACHE_ON, CACHE_REPLAY, CACHE_REFRESH)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / 'response_cache'
+
+# 各类接口的缓存有效期（秒），可通过配置项RESPONSE_CACHE_TTLS覆盖
+DEFAULT_TTLS: Dict[str, int] = {
+    # 交易日历：除新增年份外基本不变
+    'calendar': 7 * 24 * 3600,
+    # 财务报表等历史数据：披露后很少修订
+    'financial': 7 * 24 * 3600,
+    # 基础信息、宏观数据、分红拆股等：每日更新
+    'reference': 24 * 3600,
+    # 行情、资金流向、榜单等：盘中和收盘后持续更新
+    'quote': 15 * 60,
+}
+
+# 接口名 -> 类别，未列出的接口按quote处理
+ENDPOINT_CLASSES: Dict[str, str] = {
+    **{name: 'calendar' for name in ('trade_cal', 'hk_tradecal')},
+    **{name: 'financial' for name in (
+        'income', 'balancesheet', 'cashflow', 'forecast', 'express', 'dividend', 'fina_indicator',
+        'fina_audit', 'fina_mainbz', 'disclosure_date', 'top10_holders', 'top10_floatholders',
+        'stk_holdernumber', 'pledge_stat', 'repurchase',
+        'yfinance.income_stmt', 'yfinance.recommendations',
+    )},
+    **{name: 'reference' for name in (
+        'stock_basic', 'stock_company', 'hs_const', 'hk_basic', 'index_basic', 'index_weight',
+        'cn_gdp', 'cn_cpi', 'cn_ppi', 'cn_m', 'cn_pmi', 'shibor', 'shibor_quote', 'shibor_lpr', 'libor',
+        'hibor', 'gz_index', 'wz_index', 'us_tycr', 'us_trycr', 'us_tbr', 'us_tltr', 'us_trltr',
+        'kpl_concept', 'kpl_concept_cons',
+        'yfinance.dividends', 'yfinance.splits', 'yfinance.actions', 'yfinance.capital_gains',
+        'yfinance.shares_full',
+    )},
+}
+
+# 不影响返回内容的参数，不参与缓存键
+_IGNORED_PARAMS = {'timeout', 'proxy', 'raise_errors'}
+
+
+class ResponseCacheMiss(Exception):
+    """回放模式下缓存未命中"""
+    pass
+
+
+def cache_mode() -> str:
+    mode = (settings.RESPONSE_CACHE_MODE or CACHE_OFF).lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"未知的缓存模式: {mode}. 可用模式包括: {', '.join(CACHE_MODES)}")
+    return mode
+
+
+def cache_dir() -> Path:
+    return Path(settings.RESPONSE_CACHE_DIR) if settings.RESPONSE_CACHE_DIR else DEFAULT_CACHE_DIR
+
+
+def endpoint_ttl(endpoint: str) -> int:
+    """接口缓存有效期（秒）"""
+    endpoint_class = ENDPOINT_CLASSES.get(endpoint, 'quote')
+    return settings.RESPONSE_CACHE_TTLS.get(endpoint_class, DEFAULT_TTLS[endpoint_class])
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        values = [_normalize(item) for item in value]
+        return sorted(values, key=str) if isinstance(value, set) else values
+    return value
+
+
+def cache_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """
+    缓存键：接口名和参数（去掉None值，按参数名排序）的sha256
+    """
+    normalized = {
+        name: _normalize(value) for name, value in sorted(params.items())
+        if value is not None and name not in _IGNORED_PARAMS
+    }
+    payload = json.dumps({'endpoint': endpoint, 'params': normalized}, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    接口原始响应的本地缓存，每个响应一个Parquet文件：<目录>/<接口名>/<键前2位>/<键>.parquet
+
+    Series以单列DataFrame保存，文件名后缀为.series.parquet。
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else cache_dir()
+
+    def _path(self, endpoint: str, key: str, series: bool = False) -> Path:
+        suffix = '.series.parquet' if series else '.parquet'
+        return self.root / endpoint / key[:2] / f"{key}{suffix}"
+
+    def get(self, endpoint: str, key: str, ttl: Optional[int]) -> Optional[Any]:
+        """
+        读取缓存，不存在或超过有效期时返回None；ttl为None时忽略有效期
+        """
+        for series in (False, True):
+            path = self._path(endpoint, key, series)
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if ttl is not None and time.time() - modified > ttl:
+                return None
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                print(f"读取缓存失败 {path}: {str(e)}")
+                return None
+            return df.iloc[:, 0] if series else df
+        return None
+
+    def put(self, endpoint: str, key: str, value: Any) -> bool:
+        """
+        写入缓存，先写临时文件再替换，并发写入同一键时不会读到半个文件
+
+        返回:
+            bool: 是否写入（不是DataFrame/Series或缺少Parquet引擎时不写入）
+        """
+        series = isinstance(value, pd.Series)
+        if series:
+            frame = value.to_frame(name=str(value.name) if value.name is not None else 'value')
+        elif isinstance(value, pd.DataFrame):
+            frame = value
+        else:
+            return False
+
+        path = self._path(endpoint, key, series)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            # Parquet要求列名为字符串（多级列名由pyarrow按层级保存）
+            if not isinstance(frame.columns, pd.MultiIndex) and not all(isinstance(column, str) for column in frame.columns):
+                frame = frame.copy()
+                frame.columns = [str(column) for column in frame.columns]
+            frame.to_parquet(temp_path)
+            os.replace(temp_path, path)
+            return True
+        except Exception as e:
+            print(f"写入缓存失败 {path}: {str(e)}")
+            temp_path.unlink(missing_ok=True)
+            return False
+
+    def clear(self, endpoint: Optional[str] = None) -> int:
+        """
+        删除缓存文件，endpoint为空时删除全部
+
+        返回:
+            int: 删除的文件数
+        """
+        base = self.root / endpoint if endpoint else self.root
+        if not base.exists():
+            return 0
+        count = 0
+        for path in base.rglob('*.parquet'):
+            path.unlink(missing_ok=True)
+            count += 1
+        return count
+
+
+def cached_call(endpoint: str, params: Dict[str, Any], func: Callable[[], Any],
+                cache_empty: bool = True) -> Any:
+    """
+    按缓存模式调用接口
+
+    参数:
+        endpoint: 接口名，如 hk_daily、yfinance.history，决定缓存目录和有效期
+        params: 接口参数，用于生成缓存键
+        func: 实际请求的无参函数
+        cache_empty: 是否缓存空结果；出错时返回空结果的接口应为False
+
+    返回:
+        func的返回值或缓存的结果
+    """
+    mode = cache_mode()
+    if mode == CACHE_OFF:
+        return func()
+
+    cache = ResponseCache()
+    key = cache_key(endpoint, params)
+    if mode in (CACHE_ON, CACHE_REPLAY):
+        cached = cache.get(endpoint, key, None if mode == CACHE_REPLAY else endpoint_ttl(endpoint))
+        if cached is not None:
+            return cached
+        if mode == CACHE_REPLAY:
+            raise ResponseCacheMiss(f"回放模式下没有 {endpoint} 的缓存: {params}")
+
+    result = func()
+    if isinstance(result, (pd.DataFrame, pd.Series)) and (cache_empty or not result.empty):
+        cache.put(endpoint, key, result)
+    return result
+
+
+def cached_response(endpoint: str, cache_empty: bool = False):
+    """
+    为返回DataFrame/Series的接口函数增加缓存，缓存键由全部参数（包括默认值）生成，
+    其他类型的返回值不缓存
+
+    示例:
+        @cached_response('yfinance.history')
+        def get_history(ts_code: str, period: str = "1mo", ...) -> pd.DataFrame:
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            return cached_call(endpoint, params, lambda: func(*args, **kwargs), cache_empty=cache_empty)
+        return wrapper
+    return decorator
+
+
+class CachedClient:
+    """
+    Tushare pro_api的缓存代理，pro.<接口名>(...)和pro.query(接口名, ...)的结果按接口名和参数缓存
+
+    放在限频代理外层，命中缓存时不占用调用频次。
+    """
+
+    def __init__(self, pro):
+        self._pro = pro
+
+    def query(self, api_name: str, fields: str = '', **kwargs):
+        return cached_call(api_name, dict(kwargs, fields=fields or None),
+                           lambda: self._pro.query(api_name, fields=fields, **kwargs))
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        target = getattr(self._pro, name)
+        if not callable(target):
+            return target
+
+        def method(*args, **kwargs):
+            if args:
+                # 位置参数无法可靠地生成缓存键
+                return target(*args, **kwargs)
+            return cached_call(name, kwargs, lambda: target(**kwargs))
+        method.__name__ = name
+        return method
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="管理Tushare/yfinance响应缓存")
+    parser.add_argument('command', choices=['clear', 'stats'])
+    parser.add_argument('--endpoint', help="接口名，如 hk_daily、yfinance.history，默认全部")
+    args = parser.parse_args()
+
+    cache = ResponseCache()
+    if args.command == 'clear':
+        print(f"已删除 {cache.clear(args.endpoint)} 个缓存文件")
+        return
+
+    base = cache.root / args.endpoint if args.endpoint else cache.root
+    files = list(base.rglob('*.parquet')) if base.exists() else []
+    size = sum(path.stat().st_size for path in files)
+    print(f"{base}: {len(files)} 个缓存文件，{size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
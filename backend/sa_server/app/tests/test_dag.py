@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+from app.schedule.dag import (
+    FAILED, REUSED, SKIPPED, SUCCESS, Dag, DagNode, DagSkip, retry_failed, run_dag
+)
+
+RUN_DATE = datetime.date(2024, 1, 5)
+
+
+class _RunDb:
+    """内存中的运行历史：pipeline_runs和pipeline_node_runs只保留最终状态"""
+
+    def __init__(self):
+        self.runs = {}
+        self.nodes = {}
+
+    async def fetchval(self, query, pipeline, run_date, status, retry_of):
+        run_id = len(self.runs) + 1
+        self.runs[run_id] = {'pipeline': pipeline, 'run_date': run_date, 'status': status}
+        return run_id
+
+    async def execute(self, query, *args):
+        if query.lstrip().startswith('UPDATE pipeline_runs'):
+            self.runs[args[0]]['status'] = args[1]
+        else:
+            run_id, node, status = args[:3]
+            self.nodes[(run_id, node)] = status
+        return 'OK'
+
+    async def fetchrow(self, query, run_id):
+        return self.runs.get(run_id)
+
+    async def fetch(self, query, run_id, statuses):
+        return [{'node': node} for (rid, node), status in self.nodes.items()
+                if rid == run_id and status in statuses]
+
+
+def _counting(calls, name, failures=0, exc=RuntimeError):
+    """前failures次调用抛出exc，之后返回1"""
+
+    async def func(context):
+        calls[name] = calls.get(name, 0) + 1
+        if calls[name] <= failures:
+            raise exc(f"{name} 第 {calls[name]} 次失败")
+        return 1
+
+    return func
+
+
+def test_failed_node_is_retried_until_success():
+    calls = {}
+    dag = Dag('test', [
+        DagNode('a', _counting(calls, 'a', failures=1)),
+        DagNode('b', _counting(calls, 'b'), depends_on=('a',)),
+    ])
+    db = _RunDb()
+
+    run = asyncio.run(run_dag(db, dag, run_date=RUN_DATE, max_retries=2, retry_delay=0))
+
+    assert run.status == SUCCESS
+    assert run.nodes['a'].attempts == 2 and run.nodes['a'].rows == 1
+    assert calls == {'a': 2, 'b': 1}
+    assert db.runs[run.run_id]['status'] == SUCCESS
+
+
+def test_exhausted_retries_fail_node_and_skip_downstream():
+    calls = {}
+    dag = Dag('test', [
+        DagNode('a', _counting(calls, 'a', failures=10), retries=1),
+        DagNode('b', _counting(calls, 'b'), depends_on=('a',)),
+        DagNode('c', _counting(calls, 'c')),
+    ])
+    db = _RunDb()
+
+    run = asyncio.run(run_dag(db, dag, run_date=RUN_DATE, max_retries=5, retry_delay=0))
+
+    # 节点单独设置的重试次数优先于运行参数
+    assert run.nodes['a'].status == FAILED and run.nodes['a'].attempts == 2
+    assert run.nodes['b'].status == SKIPPED and 'a' in run.nodes['b'].error
+    assert run.nodes['c'].status == SUCCESS
+    assert run.status == FAILED and run.failed_nodes == ['a']
+    assert 'b' not in calls
+    assert db.nodes[(run.run_id, 'b')] == SKIPPED
+
+
+def test_dag_skip_skips_downstream_without_failing_run():
+    calls = {}
+    dag = Dag('test', [
+        DagNode('a', _counting(calls, 'a', failures=10, exc=DagSkip)),
+        DagNode('b', _counting(calls, 'b'), depends_on=('a',)),
+    ])
+
+    run = asyncio.run(run_dag(_RunDb(), dag, run_date=RUN_DATE, max_retries=3, retry_delay=0))
+
+    # DagSkip不重试
+    assert run.nodes['a'].status == SKIPPED and run.nodes['a'].attempts == 1
+    assert run.nodes['b'].status == SKIPPED
+    assert run.status == SUCCESS
+
+
+def test_retry_failed_reuses_successful_nodes():
+    calls = {}
+    dag = Dag('test', [
+        DagNode('a', _counting(calls, 'a')),
+        DagNode('b', _counting(calls, 'b', failures=1), depends_on=('a',)),
+        DagNode('c', _counting(calls, 'c'), depends_on=('b',)),
+    ])
+    db = _RunDb()
+
+    first = asyncio.run(run_dag(db, dag, run_date=RUN_DATE, max_retries=0, retry_delay=0))
+    assert first.status == FAILED and first.nodes['c'].status == SKIPPED
+
+    second = asyncio.run(retry_failed(db, dag, first.run_id, max_retries=0, retry_delay=0))
+
+    assert second.status == SUCCESS and second.run_date == RUN_DATE
+    assert second.nodes['a'].status == REUSED
+    assert second.nodes['b'].status == SUCCESS and second.nodes['c'].status == SUCCESS
+    assert calls == {'a': 1, 'b': 2, 'c': 1}
@@ -0,0 +1,46 @@
+import asyncio
+import datetime
+from contextlib import asynccontextmanager
+from app.db.daily_aggregates import refresh_missing_aggregates
+
+
+class _Conn:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def execute(self, query, *args):
+        self.statements.append(query)
+        return 'INSERT 0 1'
+
+
+class _Db:
+    """只记录执行的语句，fetch返回原始表中有数据的交易日"""
+
+    def __init__(self, present_dates):
+        self.present_dates = present_dates
+        self.statements = []
+
+    async def fetch(self, query, dates):
+        return [{'trade_date': date} for date in dates if date in self.present_dates]
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield _Conn(self.statements)
+
+
+def test_refresh_missing_skips_dates_without_source_rows():
+    db = _Db(present_dates=set())
+
+    summary = asyncio.run(refresh_missing_aggregates(db, 'moneyflow', ['20240106']))
+
+    assert summary == {}
+    assert db.statements == []
+
+
+def test_refresh_missing_refreshes_only_dates_with_source_rows():
+    db = _Db(present_dates={datetime.date(2024, 1, 5)})
+
+    summary = asyncio.run(refresh_missing_aggregates(db, 'moneyflow', ['20240105', '20240106']))
+
+    assert set(summary) == {'agg_moneyflow_daily', 'agg_moneyflow_industry_daily'}
+    assert any(statement.startswith('DELETE FROM agg_moneyflow_daily') for statement in db.statements)
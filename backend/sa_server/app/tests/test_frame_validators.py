@@ -0,0 +1,42 @@
+import datetime
+from typing import Optional
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from app.utils.frame_validators import FrameValidators
+
+
+class _DailyData(BaseModel):
+    ts_code: str
+    trade_date: datetime.date
+    close: Optional[float] = None
+    vol: Optional[int] = None
+
+
+def test_optional_unparseable_and_infinite_values_become_null():
+    df = pd.DataFrame({
+        'ts_code': ['00001.HK', '00002.HK', '00003.HK'],
+        'trade_date': ['20240102', '20240102', '20240102'],
+        'close': ['abc', np.inf, 1.5],
+        'vol': [-np.inf, '12.7', None],
+    })
+
+    valid, rejects = FrameValidators.validate(df, _DailyData)
+
+    assert rejects.empty
+    columns = FrameValidators.to_columns(valid, _DailyData)
+    assert columns['close'] == [None, None, 1.5]
+    assert columns['vol'] == [None, 12, None]
+
+
+def test_required_blank_or_unparseable_values_reject_row():
+    df = pd.DataFrame({
+        'ts_code': ['00001.HK', '', '00003.HK'],
+        'trade_date': ['20240102', '20240102', 'not a date'],
+        'close': [1.0, 2.0, 3.0],
+    })
+
+    valid, rejects = FrameValidators.validate(df, _DailyData)
+
+    assert valid['ts_code'].tolist() == ['00001.HK']
+    assert rejects.index.tolist() == [1, 2]
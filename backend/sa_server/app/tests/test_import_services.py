@@ -0,0 +1,103 @@
+import asyncio
+import datetime
+from contextlib import asynccontextmanager
+import pytest
+from app.external import tushare_chunking
+from app.external.tushare_api import hk_stock_api
+from app.external.tushare_chunking import ChunkSpec
+from app.external.tushare_fake import DEFAULT_FIXTURE_DIR, FakeProApi
+from app.services.db_services.hk_stock_service.hk_daily_service import HkDailyService
+
+# 录制数据：app/tests/fixtures/tushare/hk_daily，3只股票2024年1月的22个交易日，由synthesize_daily生成
+FIXTURE_CODES = ['00001.HK', '00700.HK', '09988.HK']
+FIXTURE_ROWS = 66
+
+
+class _Conn:
+    def __init__(self, db):
+        self.db = db
+        self.staged = []
+
+    async def fetch(self, query, *args):
+        # 列类型查询，临时表的列按TEXT创建即可
+        return []
+
+    async def execute(self, query, *args):
+        return 'CREATE TABLE'
+
+    async def copy_records_to_table(self, table_name, *, records, columns=None, schema_name=None):
+        self.staged = [dict(zip(columns, record)) for record in records]
+
+    async def fetchrow(self, query, *args):
+        # 合并语句：按冲突键写入内存中的目标表，内容相同的记录不计数
+        inserted = updated = 0
+        for row in self.staged:
+            key = tuple(row[name] for name in self.db.conflict_keys)
+            existing = self.db.rows.get(key)
+            if existing == row:
+                continue
+            if existing is None:
+                inserted += 1
+            else:
+                updated += 1
+            self.db.rows[key] = row
+        return {'inserted': inserted, 'updated': updated}
+
+
+class _UpsertDb:
+    """内存中的目标表，每个事务使用独立的临时表"""
+
+    def __init__(self, conflict_keys):
+        self.conflict_keys = conflict_keys
+        self.rows = {}
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield _Conn(self)
+
+
+@pytest.fixture
+def fake_pro(monkeypatch):
+    fake = FakeProApi(root=DEFAULT_FIXTURE_DIR)
+    monkeypatch.setattr(hk_stock_api, 'pro', fake)
+    return fake
+
+
+def test_hk_daily_import_from_recorded_fixture(fake_pro):
+    db = _UpsertDb(['ts_code', 'trade_date'])
+    service = HkDailyService(db)
+
+    count = asyncio.run(service.import_hk_daily_data(start_date='20240101', end_date='20240131', raise_errors=True))
+
+    assert count == FIXTURE_ROWS
+    assert sorted({ts_code for ts_code, _ in db.rows}) == FIXTURE_CODES
+    row = db.rows[('00700.HK', datetime.date(2024, 1, 2))]
+    assert isinstance(row['close'], float) and 'id' not in row
+
+    # 重复导入时内容相同的记录不再写入
+    count = asyncio.run(service.import_hk_daily_data(start_date='20240101', end_date='20240131', raise_errors=True))
+    assert count == 0
+
+
+def test_hk_daily_import_single_trade_date(fake_pro):
+    db = _UpsertDb(['ts_code', 'trade_date'])
+
+    count = asyncio.run(HkDailyService(db).import_hk_daily_data(trade_date='20240105', raise_errors=True))
+
+    assert count == len(FIXTURE_CODES)
+    assert {trade_date for _, trade_date in db.rows} == {datetime.date(2024, 1, 5)}
+
+
+def test_hk_daily_import_bisects_truncated_responses(monkeypatch):
+    # 接口限量改为20行，且低估每天的行数（实际每天3行）：初始窗口会被截断，需要拆分后重新获取
+    monkeypatch.setitem(tushare_chunking.CHUNK_SPECS, 'hk_daily',
+                        ChunkSpec('hk_daily', row_limit=20, market_rows_per_day=1))
+    fake = FakeProApi(root=DEFAULT_FIXTURE_DIR, row_limits={'hk_daily': 20})
+    monkeypatch.setattr(hk_stock_api, 'pro', fake)
+    db = _UpsertDb(['ts_code', 'trade_date'])
+
+    count = asyncio.run(HkDailyService(db).import_hk_daily_data(start_date='20240101', end_date='20240131',
+                                                                raise_errors=True))
+
+    assert count == FIXTURE_ROWS
+    assert fake.stats['hk_daily']['truncated'] > 0
@@ -0,0 +1,57 @@
+import pytest
+from app.db.migrations import discover_migrations, split_statements
+
+
+def test_split_statements_skips_semicolons_in_strings_blocks_and_comments():
+    sql = """
+        -- 注释中的分号; 不拆分
+        CREATE INDEX IF NOT EXISTS idx_a ON a (id);
+        COMMENT ON TABLE a IS 'x; y ''z;''';
+        /* 块注释; */
+        DO $$
+        BEGIN
+            PERFORM 1;
+            PERFORM 2;
+        END $$;
+        DO $body$ BEGIN PERFORM 'a;b'; END $body$
+        -- 末尾只有注释
+    """
+
+    statements = split_statements(sql)
+
+    assert len(statements) == 4
+    assert statements[0].endswith('CREATE INDEX IF NOT EXISTS idx_a ON a (id)')
+    assert statements[1] == "COMMENT ON TABLE a IS 'x; y ''z;'''"
+    assert 'PERFORM 1;' in statements[2] and statements[2].endswith('END $$')
+    # 末尾的注释归入最后一条语句
+    assert statements[3].startswith("DO $body$ BEGIN PERFORM 'a;b'; END $body$")
+
+
+def test_split_statements_ignores_comment_only_input():
+    assert split_statements("-- 占位\n/* 待补充 */\n") == []
+
+
+def test_discover_migrations_orders_baseline_before_numbered_migrations():
+    migrations = discover_migrations()
+    versions = [migration.version for migration in migrations]
+
+    numbered = [migration.version for migration in migrations if not migration.baseline]
+    assert numbered == sorted(numbered) and numbered[0].startswith('migrations/0001_')
+    # 基线脚本全部在增量迁移之前
+    assert all(migration.baseline for migration in migrations[:len(migrations) - len(numbered)])
+    # 被外键引用的表先创建
+    creator = {table: migration.version for migration in migrations for table in migration.tables}
+    assert versions.index(creator['stock_basic']) < versions.index(creator['stk_mins'])
+    assert not any(version.endswith('_partitioned.sql') for version in versions)
+
+
+def test_discover_migrations_uses_partitioned_variant():
+    versions = [migration.version for migration in discover_migrations(['hk_mins'])]
+
+    assert 'tushare_db/hk_stock/hk_mins_partitioned.sql' in versions
+    assert 'tushare_db/hk_stock/hk_mins.sql' not in versions
+
+
+def test_discover_migrations_rejects_unknown_partitioned_table():
+    with pytest.raises(ValueError):
+        discover_migrations(['hk_daily'])
@@ -0,0 +1,71 @@
+import asyncio
+import pandas as pd
+from app.external import tushare_chunking
+from app.external.tushare_chunking import ChunkSpec, fetch_chunked, split_windows
+
+
+def _daily_rows(start_date: str, end_date: str, rows_per_day: int) -> pd.DataFrame:
+    days = pd.date_range(start_date, end_date, freq='D')
+    return pd.DataFrame([
+        {'ts_code': f"{i:05d}.HK", 'trade_date': day.strftime('%Y%m%d')}
+        for day in days for i in range(rows_per_day)
+    ])
+
+
+def test_passthrough_drops_none_kwargs():
+    calls = []
+
+    # 与tushare_api.get_top_list签名一致，没有start_date/end_date参数
+    def get_top_list(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
+        calls.append({'trade_date': trade_date, 'ts_code': ts_code})
+        return pd.DataFrame([{'ts_code': '000001.SZ', 'trade_date': trade_date}])
+
+    df = asyncio.run(fetch_chunked(get_top_list, trade_date='20240102', ts_code=None,
+                                   start_date=None, end_date=None))
+
+    assert len(df) == 1
+    assert calls == [{'trade_date': '20240102', 'ts_code': None}]
+
+
+def test_single_date_endpoint_splits_range_into_days():
+    calls = []
+
+    def get_top_list(trade_date: str = None, ts_code: str = None) -> pd.DataFrame:
+        calls.append(trade_date)
+        return pd.DataFrame([{'ts_code': '000001.SZ', 'trade_date': trade_date}])
+
+    df = asyncio.run(fetch_chunked(get_top_list, start_date='20240101', end_date='20240103'))
+
+    assert sorted(calls) == ['20240101', '20240102', '20240103']
+    assert len(df) == 3
+
+
+def test_truncated_window_is_bisected(monkeypatch):
+    spec = ChunkSpec('fake_daily', row_limit=10, market_rows_per_day=1)
+    monkeypatch.setitem(tushare_chunking.CHUNK_SPECS, 'fake_daily', spec)
+    windows = []
+
+    def get_fake_daily(start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        windows.append((start_date, end_date))
+        # 每天3行，超过上限时和真实接口一样截断
+        return _daily_rows(start_date, end_date, 3).head(spec.row_limit)
+
+    df = asyncio.run(fetch_chunked(get_fake_daily, start_date='20240101', end_date='20240116'))
+
+    assert len(df) == 16 * 3
+    assert not df.duplicated().any()
+    assert sorted(df['trade_date'].unique()) == [d.strftime('%Y%m%d') for d in pd.date_range('20240101', '20240116')]
+    # 初始窗口为8天，截断后拆分到2天的窗口
+    assert ('20240101', '20240108') in windows
+    assert ('20240101', '20240102') in windows
+
+
+def test_split_windows_are_contiguous():
+    spec = ChunkSpec('fake_daily', row_limit=10, market_rows_per_day=1)
+    windows = split_windows(spec, pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-10'), 4)
+
+    assert windows == [
+        (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-04')),
+        (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-08')),
+        (pd.Timestamp('2024-01-09'), pd.Timestamp('2024-01-10')),
+    ]
@@ -0,0 +1,204 @@
+import datetime
+import typing
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+
+class FrameValidators:
+    """
+    DataFrame列式校验工具类，按Pydantic模型的字段类型整列完成类型转换和必填校验。
+
+    与逐行构造Pydantic模型相比，所有转换都是pandas/NumPy的列操作，
+    适用于Tushare等接口返回的整表数据的批量导入。
+    """
+
+    # 模型 -> {字段名: 字段类别}
+    _field_kinds_cache: Dict[Type[BaseModel], Dict[str, str]] = {}
+
+    @staticmethod
+    def _annotation_kind(annotation: Any) -> str:
+        """
+        将字段类型注解归类为 date / datetime / decimal / float / int / str / object
+        """
+        # 解开Optional[X]
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+            annotation = args[0]
+
+        # datetime是date的子类，需先判断
+        if annotation is datetime.datetime:
+            return 'datetime'
+        if annotation is datetime.date:
+            return 'date'
+        if annotation is Decimal:
+            return 'decimal'
+        if annotation is float:
+            return 'float'
+        if annotation is int:
+            return 'int'
+        if annotation is str:
+            return 'str'
+        return 'object'
+
+    @classmethod
+    def field_kinds(cls, model: Type[BaseModel]) -> Dict[str, str]:
+        """
+        获取模型各字段的类别，结果按模型缓存
+
+        参数:
+            model: Pydantic模型类
+
+        返回:
+            Dict[str, str]: 键为字段名，值为字段类别
+        """
+        kinds = cls._field_kinds_cache.get(model)
+        if kinds is None:
+            kinds = {
+                name: cls._annotation_kind(field.annotation)
+                for name, field in model.model_fields.items()
+            }
+            cls._field_kinds_cache[model] = kinds
+        return kinds
+
+    @staticmethod
+    def _blank_mask(series: pd.Series) -> pd.Series:
+        """
+        空值掩码：None、NaN、NaT以及空白字符串都视为空
+        """
+        mask = series.isna()
+        if not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_datetime64_any_dtype(series):
+            mask |= series.astype(str).str.strip().eq('')
+        return mask
+
+    @staticmethod
+    def to_datetime_series(series: pd.Series) -> pd.Series:
+        """
+        将一列日期值转换为datetime64
+
+        支持YYYYMMDD字符串、ISO格式字符串、date/datetime/Timestamp对象，无法解析的值为NaT
+        """
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+
+        parsed = pd.to_datetime(series, format='%Y%m%d', errors='coerce')
+        pending = parsed.isna() & series.notna()
+        if pending.any():
+            parsed[pending] = pd.to_datetime(series[pending], format='mixed', errors='coerce')
+        return parsed
+
+    @staticmethod
+    def to_numeric_series(series: pd.Series) -> pd.Series:
+        """
+        将一列数值转换为float64，NaN/Infinity及无法解析的值为NaN
+        """
+        numeric = pd.to_numeric(series, errors='coerce').astype('float64')
+        return numeric.replace([np.inf, -np.inf], np.nan)
+
+    @classmethod
+    def validate(cls,
+                 df: pd.DataFrame,
+                 model: Type[BaseModel],
+                 required_fields: Optional[Sequence[str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        按模型字段类型整列转换数据，并拆分为有效数据和被拒绝的数据
+
+        规则:
+            - 只保留模型中存在的列
+            - 必填字段（默认取模型中的必填字段）为空或无法解析的行被拒绝
+            - 日期列转换为date/datetime，数值列的NaN转换为NULL
+            - 可选字段中无法解析的日期或数值（包括±Infinity）转换为NULL，不拒绝整行
+            - 整数列的小数部分被截断（如成交量1234.0、1234.5均为1234）
+
+        参数:
+            df: 原始数据
+            model: Pydantic模型类
+            required_fields: 必填字段列表，为None时使用模型的必填字段
+
+        返回:
+            Tuple[pd.DataFrame, pd.DataFrame]: (有效数据, 被拒绝的原始数据)
+        """
+        kinds = cls.field_kinds(model)
+        if required_fields is None:
+            required_fields = [name for name, field in model.model_fields.items() if field.is_required()]
+
+        columns = [col for col in df.columns if col in kinds]
+        reject_mask = pd.Series(False, index=df.index)
+
+        # 缺少必填列时整批拒绝
+        for field in required_fields:
+            if field not in df.columns:
+                return df.iloc[0:0][columns], df
+
+        converted = {}
+        for col in columns:
+            series = df[col]
+            kind = kinds[col]
+            blank = cls._blank_mask(series)
+
+            if kind in ('date', 'datetime'):
+                values = cls.to_datetime_series(series.mask(blank))
+                invalid = values.isna() & ~blank
+            elif kind in ('float', 'decimal', 'int'):
+                values = cls.to_numeric_series(series.mask(blank))
+                invalid = values.isna() & ~blank
+                if kind == 'int':
+                    # 与NumericValidators.to_int一致，截断小数部分
+                    values = np.trunc(values)
+            else:
+                values = series
+                invalid = pd.Series(False, index=df.index)
+
+            # 可选字段无法解析的值已转换为NaN/NaT，写入NULL
+            if col in required_fields:
+                reject_mask |= invalid | blank
+            converted[col] = values
+
+        valid = pd.DataFrame(converted, index=df.index)[~reject_mask]
+        rejects = df[reject_mask]
+        return valid, rejects
+
+    @classmethod
+    def to_columns(cls, df: pd.DataFrame, model: Type[BaseModel]) -> Dict[str, List[Any]]:
+        """
+        将validate处理后的数据转换为按列组织的Python对象列表，空值为None
+
+        Decimal字段保持float，写入时由numeric列的精度完成舍入
+        """
+        kinds = cls.field_kinds(model)
+        columns = {}
+        for col in df.columns:
+            series = df[col]
+            kind = kinds.get(col, 'object')
+            notna = series.notna()
+
+            if kind == 'date':
+                values = series.dt.date
+            elif kind == 'datetime':
+                # 新版pandas的to_pydatetime返回Series，先转为列表避免按索引重新对齐
+                values = pd.Series(list(series.dt.to_pydatetime()), index=series.index, dtype=object)
+            elif kind == 'int':
+                values = series.astype('Int64').astype(object)
+            else:
+                values = series.astype(object)
+
+            columns[col] = values.astype(object).where(notna, None).tolist()
+        return columns
+
+    @classmethod
+    def to_records(cls, df: pd.DataFrame, model: Type[BaseModel], columns: Iterable[str]) -> List[Tuple[Any, ...]]:
+        """
+        将validate处理后的数据转换为COPY所需的记录元组列表
+
+        参数:
+            df: validate返回的有效数据
+            model: Pydantic模型类
+            columns: 记录中的列顺序
+
+        返回:
+            List[Tuple]: 记录列表
+        """
+        column_values = cls.to_columns(df[list(columns)], model)
+        return list(zip(*column_values.values()))
@@ -0,0 +1,187 @@
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Type
+from pydantic import BaseModel
+from app.utils.frame_validators import FrameValidators
+
+
+# 导出格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+}
+
+
+class StreamEncoders:
+    """
+    将按列组织的数据块（{字段: 值列表}）逐块编码为NDJSON、CSV或Arrow IPC流
+
+    每个数据块独立编码后立即产出字节，内存中只保留当前块，
+    配合服务端游标读取（见Database.stream）即可实现任意大小结果集的分块传输。
+    """
+
+    @staticmethod
+    def _json_default(value: Any) -> Any:
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return float(value)
+        raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        if value is None:
+            return ''
+        if isinstance(value, float) and value != value:
+            return ''
+        return value
+
+    @classmethod
+    async def encode_ndjson(cls, chunks: AsyncIterator[Dict[str, List[Any]]]) -> AsyncIterator[bytes]:
+        """
+        每行一个JSON对象，NaN输出为null
+        """
+        async for columns in chunks:
+            names = list(columns.keys())
+            lines = []
+            for values in zip(*columns.values()):
+                # NaN不是合法的JSON值，输出为null
+                row = {name: None if isinstance(value, float) and value != value else value
+                       for name, value in zip(names, values)}
+                lines.append(json.dumps(row, ensure_ascii=False, default=cls._json_default))
+            if lines:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    @classmethod
+    async def encode_csv(cls, chunks: AsyncIterator[Dict[str, List[Any]]],
+                  header: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+        """
+        CSV格式，首块前输出表头，空值输出为空字符串
+
+        参数:
+            chunks: 数据块
+            header: 结果为空时输出的表头，有数据时以第一块的字段为准
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header_written = False
+
+        async for columns in chunks:
+            if not header_written:
+                writer.writerow(columns.keys())
+                header_written = True
+            writer.writerows(
+                [cls._csv_value(value) for value in values] for values in zip(*columns.values())
+            )
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        if not header_written and header:
+            writer.writerow(header)
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def arrow_schema(model: Type[BaseModel], names: Sequence[str]):
+        """
+        按模型字段类型生成Arrow schema，保证各数据块的列类型一致
+
+        numeric列（Decimal）输出为float64，模型中不存在的列（如id）按int64处理
+        """
+        import pyarrow as pa
+
+        kind_types = {
+            'date': pa.date32(),
+            'datetime': pa.timestamp('us'),
+            'decimal': pa.float64(),
+            'float': pa.float64(),
+            'int': pa.int64(),
+            'str': pa.string(),
+        }
+        kinds = FrameValidators.field_kinds(model)
+        return pa.schema([
+            (name, kind_types.get(kinds.get(name, 'int'), pa.string())) for name in names
+        ])
+
+    @staticmethod
+    def _arrow_array(values: List[Any], arrow_type):
+        import pyarrow as pa
+
+        if pa.types.is_floating(arrow_type):
+            # asyncpg将numeric列返回为Decimal，先转换为float
+            values = [float(value) if isinstance(value, Decimal) else value for value in values]
+        elif pa.types.is_string(arrow_type):
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        return pa.array(values, type=arrow_type, from_pandas=True)
+
+    @classmethod
+    async def encode_arrow(cls, chunks: AsyncIterator[Dict[str, List[Any]]],
+                    model: Type[BaseModel],
+                    header: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+        """
+        Arrow IPC流格式，每个数据块对应一个RecordBatch
+
+        参数:
+            chunks: 数据块
+            model: 表对应的Pydantic模型，用于确定列类型
+            header: 结果为空时使用的字段，有数据时以第一块的字段为准
+        """
+        import pyarrow as pa
+
+        sink = io.BytesIO()
+        writer = None
+        schema = None
+
+        def flush() -> bytes:
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate(0)
+            return data
+
+        async for columns in chunks:
+            if writer is None:
+                schema = cls.arrow_schema(model, list(columns.keys()))
+                writer = pa.ipc.new_stream(sink, schema)
+            arrays = [cls._arrow_array(columns[field.name], field.type) for field in schema]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield flush()
+
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, cls.arrow_schema(model, header or []))
+        writer.close()
+        yield flush()
+
+    @classmethod
+    def encode(cls, chunks: AsyncIterator[Dict[str, List[Any]]],
+               export_format: str,
+               model: Type[BaseModel],
+               header: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+        """
+        按导出格式编码数据块
+
+        参数:
+            chunks: 数据块
+            export_format: 导出格式，见EXPORT_FORMATS
+            model: 表对应的Pydantic模型
+            header: 结果为空时输出的字段
+        """
+        if export_format == 'ndjson':
+            return cls.encode_ndjson(chunks)
+        if export_format == 'csv':
+            return cls.encode_csv(chunks, header)
+        if export_format == 'arrow':
+            return cls.encode_arrow(chunks, model, header)
+        raise ValueError(f"不支持的导出格式: {export_format}. 可用格式包括: {', '.join(EXPORT_FORMATS)}")
+
+    @staticmethod
+    def arrow_available() -> bool:
+        """是否安装了pyarrow"""
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
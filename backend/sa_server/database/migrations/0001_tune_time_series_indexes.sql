@@ -0,0 +1,111 @@
+-- 时间序列表索引调整
+--
+-- 行情类表的查询基本都是 WHERE ts_code = $1 AND trade_date BETWEEN $2 AND $3（按代码取区间）
+-- 或 WHERE trade_date = $1（取某日全市场），写入都是按(ts_code, trade_date)做ON CONFLICT：
+--   1. ts_code单列索引、(ts_code, trade_date)普通索引都是唯一键的前缀或重复，只增加写入开销，删除
+--   2. 日线类表的唯一键改为包含常用价格列的覆盖索引（INCLUDE），按代码取区间时可以走Index Only Scan；
+--      ON CONFLICT (ts_code, trade_date)按列推断唯一索引，不依赖约束名，写入语句不需要修改
+--   3. 大表trade_date/trade_time上的B-tree索引改为BRIN，体积只有B-tree的千分之一左右，
+--      适合按日期顺序追加写入的表；唯一键以trade_date开头的表，trade_date索引是唯一键的前缀，直接删除
+--
+-- 注意:
+--   - BRIN依赖数据物理顺序与日期相关，按股票逐只回补历史数据后相关性会变差，
+--     可以执行 CLUSTER <表名> USING <唯一索引> 或按日期重新导入后再 ANALYZE
+--   - Index Only Scan依赖可见性映射，批量写入后需要VACUUM（autovacuum通常足够），
+--     可以通过EXPLAIN (ANALYZE, BUFFERS)中的Heap Fetches确认
+--   - 表不存在时跳过（只建了部分表的库），未分区的hk_mins/stk_mins才调整，分区版本建表时已是调整后的索引
+
+-- 日线类表：唯一键改为覆盖索引
+DO $$
+BEGIN
+    IF to_regclass('hk_daily') IS NOT NULL THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS uk_hk_daily_ts_code_trade_date_cover
+            ON hk_daily (ts_code, trade_date) INCLUDE (open, high, low, close, pre_close, vol, amount);
+        ALTER TABLE hk_daily DROP CONSTRAINT IF EXISTS hk_daily_unique_key;
+        DROP INDEX IF EXISTS idx_hk_daily_ts_code;
+        DROP INDEX IF EXISTS idx_hk_daily_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_hk_daily_trade_date;
+        CREATE INDEX IF NOT EXISTS idx_hk_daily_trade_date_brin ON hk_daily USING BRIN (trade_date);
+    END IF;
+
+    IF to_regclass('hk_daily_adj') IS NOT NULL THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS uk_hk_daily_adj_ts_code_trade_date_cover
+            ON hk_daily_adj (ts_code, trade_date) INCLUDE (open, high, low, close, pre_close, adj_factor);
+        ALTER TABLE hk_daily_adj DROP CONSTRAINT IF EXISTS hk_daily_adj_unique_key;
+        DROP INDEX IF EXISTS idx_hk_daily_adj_ts_code;
+        DROP INDEX IF EXISTS idx_hk_daily_adj_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_hk_daily_adj_trade_date;
+        CREATE INDEX IF NOT EXISTS idx_hk_daily_adj_trade_date_brin ON hk_daily_adj USING BRIN (trade_date);
+    END IF;
+
+    IF to_regclass('daily') IS NOT NULL THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS uk_daily_ts_code_trade_date_cover
+            ON daily (ts_code, trade_date) INCLUDE (open, high, low, close, pre_close, vol, amount);
+        ALTER TABLE daily DROP CONSTRAINT IF EXISTS uk_daily_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_daily_ts_code;
+        DROP INDEX IF EXISTS idx_daily_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_daily_trade_date;
+        CREATE INDEX IF NOT EXISTS idx_daily_trade_date_brin ON daily USING BRIN (trade_date);
+    END IF;
+
+    IF to_regclass('index_daily') IS NOT NULL THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS uk_index_daily_ts_code_trade_date_cover
+            ON index_daily (ts_code, trade_date) INCLUDE (open, high, low, close, pre_close, vol, amount);
+        ALTER TABLE index_daily DROP CONSTRAINT IF EXISTS uk_index_daily_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_index_daily_ts_code;
+        DROP INDEX IF EXISTS idx_index_daily_ts_code_trade_date;
+        DROP INDEX IF EXISTS idx_index_daily_trade_date;
+        CREATE INDEX IF NOT EXISTS idx_index_daily_trade_date_brin ON index_daily USING BRIN (trade_date);
+    END IF;
+END $$;
+
+-- 其他按(ts_code, trade_date)唯一的大表：删除重复索引，trade_date改为BRIN
+DO $$
+DECLARE
+    table_name TEXT;
+BEGIN
+    FOREACH table_name IN ARRAY ARRAY['daily_basic', 'adj_factor', 'weekly', 'monthly', 'stk_limit', 'bak_daily', 'moneyflow']
+    LOOP
+        IF to_regclass(table_name) IS NOT NULL THEN
+            EXECUTE format('DROP INDEX IF EXISTS %I', 'idx_' || table_name || '_ts_code');
+            EXECUTE format('DROP INDEX IF EXISTS %I', 'idx_' || table_name || '_ts_code_trade_date');
+            EXECUTE format('DROP INDEX IF EXISTS %I', 'idx_' || table_name || '_trade_date');
+            EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I USING BRIN (trade_date)',
+                           'idx_' || table_name || '_trade_date_brin', table_name);
+        END IF;
+    END LOOP;
+END $$;
+
+-- 分钟线（未分区）：唯一键已覆盖按代码取区间，删除重复索引，trade_time改为BRIN
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = to_regclass('hk_mins')) = 'r' THEN
+        -- 唯一键列顺序改为(ts_code, freq, trade_time)，与按代码和频度取区间的查询一致
+        CREATE UNIQUE INDEX IF NOT EXISTS uk_hk_mins_ts_code_freq_trade_time
+            ON hk_mins (ts_code, freq, trade_time);
+        ALTER TABLE hk_mins DROP CONSTRAINT IF EXISTS hk_mins_unique_key;
+        DROP INDEX IF EXISTS idx_hk_mins_ts_code;
+        DROP INDEX IF EXISTS idx_hk_mins_freq;
+        DROP INDEX IF EXISTS idx_hk_mins_ts_code_freq;
+        DROP INDEX IF EXISTS idx_hk_mins_ts_code_trade_time_freq;
+        DROP INDEX IF EXISTS idx_hk_mins_trade_time;
+        CREATE INDEX IF NOT EXISTS idx_hk_mins_trade_time_brin ON hk_mins USING BRIN (trade_time);
+    END IF;
+
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = to_regclass('stk_mins')) = 'r' THEN
+        DROP INDEX IF EXISTS idx_stk_mins_ts_code;
+        DROP INDEX IF EXISTS idx_stk_mins_ts_code_trade_time;
+        DROP INDEX IF EXISTS idx_stk_mins_trade_time;
+        CREATE INDEX IF NOT EXISTS idx_stk_mins_trade_time_brin ON stk_mins USING BRIN (trade_time);
+    END IF;
+END $$;
+
+-- 唯一键以trade_date开头的表：trade_date索引是唯一键的前缀
+DROP INDEX IF EXISTS idx_kpl_concept_trade_date;
+DROP INDEX IF EXISTS idx_kpl_concept_cons_trade_date;
+DROP INDEX IF EXISTS idx_top_list_trade_date;
+
+-- 唯一键以ts_code开头的表：ts_code索引是唯一键的前缀
+DROP INDEX IF EXISTS idx_kpl_list_ts_code;
+DROP INDEX IF EXISTS idx_moneyflow_dc_ts_code;
+DROP INDEX IF EXISTS idx_moneyflow_cnt_ths_ts_code;
@@ -0,0 +1,80 @@
+-- 按交易日预聚合的统计表
+--
+-- 涨停板、资金流向和题材概念的分析接口原先每次调用都对原始行做GROUP BY，
+-- 这些统计只依赖当日数据，导入时按写入的交易日刷新一次（app.db.daily_aggregates），
+-- 查询只读取对应交易日的聚合行，代价与天数相关而与原始行数无关。
+--
+-- 刷新方式为按交易日删除后重新聚合，新建表后回补历史数据：
+--   python -m app.db.daily_aggregates --table kpl_list --start 20200101 --end 20241231
+
+-- 涨停板每日汇总（kpl_list）
+CREATE TABLE IF NOT EXISTS agg_kpl_list_daily (
+    trade_date DATE PRIMARY KEY,
+    limit_up_count INT NOT NULL,                  -- 涨停数
+    first_limit_up_count INT NOT NULL,            -- 首板数
+    continuous_limit_up_count INT NOT NULL,       -- 连板数
+    blown_board_count INT NOT NULL,               -- 炸板数
+    avg_limit_up_pct NUMERIC(10, 4),              -- 涨停股平均涨幅
+    avg_turnover_rate NUMERIC(10, 4),             -- 涨停股平均换手率
+    avg_amount NUMERIC(20, 2),                    -- 涨停股平均成交额
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE agg_kpl_list_daily IS '涨停板每日汇总（由kpl_list聚合）';
+
+-- 涨停板每日分布（kpl_list）：按板块、连板状态、涨停时段统计涨停数
+CREATE TABLE IF NOT EXISTS agg_kpl_list_dist_daily (
+    trade_date DATE NOT NULL,
+    dimension VARCHAR(20) NOT NULL,               -- theme/status/time_period
+    bucket VARCHAR(100) NOT NULL,                 -- 板块名、连板状态或时段
+    count INT NOT NULL,
+    sort_key INT NOT NULL DEFAULT 0,              -- status为连板数，time_period为时段顺序
+    PRIMARY KEY (trade_date, dimension, bucket)
+);
+
+COMMENT ON TABLE agg_kpl_list_dist_daily IS '涨停板每日分布（由kpl_list聚合）';
+
+-- 市场资金流向每日汇总（moneyflow）
+CREATE TABLE IF NOT EXISTS agg_moneyflow_daily (
+    trade_date DATE PRIMARY KEY,
+    total_net_amount FLOAT,                       -- 净流入额合计（万元）
+    total_stocks INT NOT NULL,                    -- 股票数
+    inflow_stocks INT NOT NULL,                   -- 净流入股票数
+    outflow_stocks INT NOT NULL,                  -- 净流出股票数
+    small_net FLOAT,                              -- 小单净流入（万元）
+    medium_net FLOAT,                             -- 中单净流入（万元）
+    large_net FLOAT,                              -- 大单净流入（万元）
+    extra_large_net FLOAT,                        -- 特大单净流入（万元）
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE agg_moneyflow_daily IS '市场资金流向每日汇总（由moneyflow聚合）';
+
+-- 行业资金流向每日汇总（moneyflow + stock_basic.industry）
+-- 行业取刷新时stock_basic中的值，行业调整后需要重新刷新历史交易日
+CREATE TABLE IF NOT EXISTS agg_moneyflow_industry_daily (
+    trade_date DATE NOT NULL,
+    industry VARCHAR(50),                         -- 行业，未分类为NULL
+    stock_count INT NOT NULL,
+    total_net_amount FLOAT,
+    avg_net_amount FLOAT,
+    inflow_stocks INT NOT NULL,
+    outflow_stocks INT NOT NULL,
+    large_buy_amount FLOAT,                       -- 大单和特大单买入金额
+    large_sell_amount FLOAT                       -- 大单和特大单卖出金额
+);
+
+CREATE INDEX IF NOT EXISTS idx_agg_moneyflow_industry_daily_trade_date ON agg_moneyflow_industry_daily(trade_date);
+
+COMMENT ON TABLE agg_moneyflow_industry_daily IS '行业资金流向每日汇总（由moneyflow和stock_basic聚合）';
+
+-- 题材概念每日汇总（kpl_concept）
+CREATE TABLE IF NOT EXISTS agg_kpl_concept_daily (
+    trade_date DATE PRIMARY KEY,
+    concept_count INT NOT NULL,                   -- 题材数
+    z_t_total INT,                                -- 各题材涨停数合计
+    max_z_t_num INT,                              -- 单个题材最大涨停数
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE agg_kpl_concept_daily IS '题材概念每日汇总（由kpl_concept聚合）';
@@ -0,0 +1,18 @@
+-- 增量同步水位表
+--
+-- 记录每个数据集（以及按股票同步时的每个ts_code）最后一次成功导入的日期，
+-- 增量导入（app.db.sync_state.run_incremental）只获取水位之后的数据，
+-- 并向前多取一段重叠窗口，覆盖数据源对近期数据的补录和修订。
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    dataset VARCHAR(64) NOT NULL,                 -- 数据集，通常为表名
+    ts_code VARCHAR(20) NOT NULL DEFAULT '',      -- 按股票同步时的股票代码，整表同步为空字符串
+    date_field VARCHAR(32) NOT NULL,              -- 水位对应的日期字段，如trade_date/ann_date/end_date/date
+    watermark DATE NOT NULL,                      -- 已导入数据的最新日期
+    last_start_date DATE,                         -- 最近一次增量导入请求的开始日期
+    last_rows INT NOT NULL DEFAULT 0,             -- 最近一次增量导入的记录数
+    synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dataset, ts_code)
+);
+
+COMMENT ON TABLE sync_state IS '增量同步水位：每个数据集/股票最后一次成功导入的日期';
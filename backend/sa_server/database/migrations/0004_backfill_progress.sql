@@ -0,0 +1,20 @@
+-- 按股票回补的进度检查点
+--
+-- 全市场回补（app.schedule.backfill）每完成一只股票记录一行，
+-- 中断后以相同的任务名重新执行时跳过已完成的股票，失败的股票重新导入。
+
+CREATE TABLE IF NOT EXISTS backfill_progress (
+    job VARCHAR(128) NOT NULL,                    -- 任务名，默认由数据集和参数组成，如 hk_mins:1min:20200101-20241231
+    ts_code VARCHAR(20) NOT NULL,
+    status VARCHAR(10) NOT NULL,                  -- done: 已完成; failed: 失败
+    rows INT NOT NULL DEFAULT 0,                  -- 导入的记录数
+    attempts INT NOT NULL DEFAULT 1,              -- 尝试次数
+    error TEXT,                                   -- 最近一次失败的错误信息
+    elapsed_ms INT,                               -- 最近一次导入耗时
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (job, ts_code)
+);
+
+CREATE INDEX IF NOT EXISTS idx_backfill_progress_job_status ON backfill_progress (job, status);
+
+COMMENT ON TABLE backfill_progress IS '按股票回补的进度检查点';
@@ -0,0 +1,34 @@
+-- 数据导入流水线的运行记录
+--
+-- 每次运行（app.schedule.dag.run_dag）记录一行pipeline_runs，
+-- 每个节点记录一行pipeline_node_runs，包括状态、尝试次数、耗时和导入的记录数。
+-- 重新执行失败的运行时只执行上次未成功的节点，成功的节点记为reused。
+
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id BIGSERIAL PRIMARY KEY,
+    pipeline VARCHAR(64) NOT NULL,               -- 流水线名，如 nightly
+    run_date DATE NOT NULL,                      -- 数据日期（交易日）
+    status VARCHAR(10) NOT NULL,                 -- running / success / failed
+    retry_of BIGINT,                             -- 重新执行时为原运行的run_id
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    elapsed_ms INT
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_pipeline_date ON pipeline_runs (pipeline, run_date DESC);
+
+CREATE TABLE IF NOT EXISTS pipeline_node_runs (
+    run_id BIGINT NOT NULL REFERENCES pipeline_runs (run_id) ON DELETE CASCADE,
+    node VARCHAR(64) NOT NULL,
+    status VARCHAR(10) NOT NULL,                 -- running / success / failed / skipped / reused
+    attempts INT NOT NULL DEFAULT 0,             -- 尝试次数
+    rows INT,                                    -- 节点返回的导入记录数
+    error TEXT,                                  -- 失败或跳过的原因
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    elapsed_ms INT,                              -- 包括重试等待在内的耗时
+    PRIMARY KEY (run_id, node)
+);
+
+COMMENT ON TABLE pipeline_runs IS '数据导入流水线的运行记录';
+COMMENT ON TABLE pipeline_node_runs IS '数据导入流水线各节点的运行记录';
@@ -0,0 +1,12 @@
+-- 按月分区的hk_mins补建id索引
+--
+-- 分区版本的hk_mins没有主键，id只由序列生成；HkMinsCRUD按id查询、更新和删除时会扫描全部分区。
+-- 在分区表上创建索引会自动创建到每个已有分区和之后创建的分区。
+-- 未分区的hk_mins以id为主键，不需要调整；表不存在时跳过。
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = to_regclass('hk_mins')) = 'p' THEN
+        CREATE INDEX IF NOT EXISTS idx_hk_mins_id ON hk_mins (id);
+    END IF;
+END $$;
@@ -0,0 +1,11 @@
+-- 按月分区的stk_mins补建id索引
+--
+-- 与0006相同：分区版本的stk_mins没有主键，按id查询时会扫描全部分区。
+-- 未分区的stk_mins以id为主键，不需要调整；表不存在时跳过。
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_catalog.pg_class WHERE oid = to_regclass('stk_mins')) = 'p' THEN
+        CREATE INDEX IF NOT EXISTS idx_stk_mins_id ON stk_mins (id);
+    END IF;
+END $$;
@@ -0,0 +1,78 @@
+-- 香港股票分钟行情表（hk_mins）- 按月分区版本
+--
+-- 与hk_mins.sql字段相同，按trade_time做月度范围分区：
+--   1. 每个分区只维护一个唯一索引和一个BRIN索引，写入时的索引维护量远小于原表的6个B-tree索引
+--      原表的ts_code、(ts_code, freq)、(ts_code, trade_time, freq)索引都是唯一键(ts_code, freq, trade_time)的前缀或重复，
+--      trade_time的范围查询由分区裁剪和BRIN索引完成
+--   2. 历史数据按月分离（DETACH PARTITION），不需要大范围DELETE和VACUUM
+--   3. 分区键必须包含在唯一约束中，id不再作为主键，仍由序列生成并用作排序的唯一兜底列，
+--      单独建索引供按id查询、更新和删除
+--
+-- 分区由 python -m app.db.partitions 维护（提前创建未来月份的分区、分离超出保留期的分区），
+-- 批量写入（app.db.bulk_upsert）时会自动补建数据所在月份缺失的分区。
+--
+-- 从未分区的hk_mins迁移：
+--   ALTER TABLE hk_mins RENAME TO hk_mins_legacy;
+--   -- 原表的约束和索引不随表名改名，先改名以免与本文件创建的同名对象冲突（改名约束的索引时约束一并改名）
+--   ALTER INDEX IF EXISTS hk_mins_unique_key RENAME TO hk_mins_legacy_unique_key;
+--   ALTER INDEX IF EXISTS idx_hk_mins_trade_time_brin RENAME TO idx_hk_mins_legacy_trade_time_brin;
+--   -- 执行本文件
+--   python -m app.db.partitions --table hk_mins --from <最早月份，如2020-01>
+--   INSERT INTO hk_mins (ts_code, trade_time, freq, open, high, low, close, vol, amount)
+--   SELECT ts_code, trade_time, freq, open, high, low, close, vol, amount FROM hk_mins_legacy;
+--   DROP TABLE hk_mins_legacy;
+CREATE TABLE hk_mins (
+    -- Primary key and identification fields
+    id BIGSERIAL,
+    ts_code VARCHAR(12) NOT NULL,
+    trade_time TIMESTAMP NOT NULL,
+    freq VARCHAR(10) NOT NULL,
+
+    -- Price data
+    open FLOAT,
+    high FLOAT,
+    low FLOAT,
+    close FLOAT,
+
+    -- Volume and amount
+    vol BIGINT,
+    amount FLOAT,
+
+    -- 唯一键顺序与默认排序(ts_code, freq, trade_time)一致，ON CONFLICT (ts_code, trade_time, freq)同样可以匹配
+    CONSTRAINT hk_mins_unique_key UNIQUE (ts_code, freq, trade_time)
+) PARTITION BY RANGE (trade_time);
+
+-- 在分区表上创建的索引会自动创建到每个分区
+CREATE INDEX idx_hk_mins_trade_time_brin ON hk_mins USING BRIN (trade_time);
+CREATE INDEX idx_hk_mins_id ON hk_mins (id);
+
+-- 创建当月及之后3个月的分区，之后由分区维护工具提前创建
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(date_trunc('month', CURRENT_DATE), date_trunc('month', CURRENT_DATE) + INTERVAL '3 months', INTERVAL '1 month')::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF hk_mins FOR VALUES FROM (%L) TO (%L)',
+            'hk_mins_' || to_char(month_start, '"y"YYYY"m"MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+-- Add table comment
+COMMENT ON TABLE hk_mins IS '香港股票分钟行情（按月分区）';
+
+-- Add column comments
+COMMENT ON COLUMN hk_mins.ts_code IS '股票代码';
+COMMENT ON COLUMN hk_mins.trade_time IS '交易时间';
+COMMENT ON COLUMN hk_mins.freq IS '分钟频度（1min/5min/15min/30min/60min）';
+COMMENT ON COLUMN hk_mins.open IS '开盘价';
+COMMENT ON COLUMN hk_mins.high IS '最高价';
+COMMENT ON COLUMN hk_mins.low IS '最低价';
+COMMENT ON COLUMN hk_mins.close IS '收盘价';
+COMMENT ON COLUMN hk_mins.vol IS '成交量';
+COMMENT ON COLUMN hk_mins.amount IS '成交金额';
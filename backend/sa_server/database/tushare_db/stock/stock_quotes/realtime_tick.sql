@@ -43,35 +43,7 @@ ADD CONSTRAINT fk_realtime_tick_stock_basic
 FOREIGN KEY (ts_code) 
 REFERENCES stock_basic (ts_code);
 
--- 可选：分区表设置（强烈建议用于tick数据，因为数据量非常大）
-/*
-CREATE TABLE realtime_tick (
-    id SERIAL,
-    ts_code VARCHAR(20) NOT NULL,
-    trade_date DATE NOT NULL,
-    time TIME NOT NULL,
-    price NUMERIC(12,4) NOT NULL,
-    change NUMERIC(12,4),
-    volume INT NOT NULL,
-    amount NUMERIC(20,4) NOT NULL,
-    type VARCHAR(10) NOT NULL,
-    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT ck_realtime_tick_type CHECK (type IN ('买入', '卖出', '中性'))
-) PARTITION BY RANGE (trade_date);
-
--- 创建分区（按日）
-CREATE TABLE realtime_tick_y2025m03d21 PARTITION OF realtime_tick
-    FOR VALUES FROM ('2025-03-21') TO ('2025-03-22');
-
-CREATE TABLE realtime_tick_y2025m03d22 PARTITION OF realtime_tick
-    FOR VALUES FROM ('2025-03-22') TO ('2025-03-23');
-
--- 在分区上创建索引
-CREATE INDEX idx_realtime_tick_y2025m03d21_ts_code ON realtime_tick_y2025m03d21(ts_code);
-CREATE INDEX idx_realtime_tick_y2025m03d21_time ON realtime_tick_y2025m03d21(time);
-CREATE INDEX idx_realtime_tick_y2025m03d22_ts_code ON realtime_tick_y2025m03d22(ts_code);
-CREATE INDEX idx_realtime_tick_y2025m03d22_time ON realtime_tick_y2025m03d22(time);
-*/
+-- 可选：按月分区版本见 realtime_tick_partitioned.sql（数据量大时推荐），分区由 python -m app.db.partitions 维护
 
 
 -- 名称	类型	描述
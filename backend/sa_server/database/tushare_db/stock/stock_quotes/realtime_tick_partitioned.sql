@@ -0,0 +1,75 @@
+-- 股票数据 - 行情数据
+
+-- 实时成交数据(爬虫版)（realtime_tick）- 按月分区版本
+--
+-- 与realtime_tick.sql字段相同，按trade_date做月度范围分区：
+--   - 每个分区只维护(ts_code, trade_date, time)一个B-tree索引，
+--     原表的ts_code、trade_date、(ts_code, trade_date)索引是它的前缀，
+--     type、created_at的单列索引在逐笔数据上选择性很低，写入代价大于查询收益
+--   - 历史逐笔数据按月分离（DETACH PARTITION），不需要大范围DELETE
+--   - 分区键必须包含在主键中，主键改为(id, trade_date)
+--
+-- 分区由 python -m app.db.partitions 维护，批量写入时会自动补建缺失的分区。
+--
+-- 从未分区的realtime_tick迁移：
+--   ALTER TABLE realtime_tick RENAME TO realtime_tick_legacy;
+--   -- 执行本文件
+--   python -m app.db.partitions --table realtime_tick --from <最早月份，如2025-01>
+--   INSERT INTO realtime_tick (ts_code, trade_date, time, price, change, volume, amount, type, created_at)
+--   SELECT ts_code, trade_date, time, price, change, volume, amount, type, created_at FROM realtime_tick_legacy;
+--   DROP TABLE realtime_tick_legacy;
+CREATE TABLE realtime_tick (
+    id BIGSERIAL,                         -- 自增序号
+    ts_code VARCHAR(20) NOT NULL,         -- 股票代码
+    trade_date DATE NOT NULL,             -- 交易日期
+    time TIME NOT NULL,                   -- 交易时间
+    price NUMERIC(12,4) NOT NULL,         -- 现价
+    change NUMERIC(12,4),                 -- 价格变动
+    volume INT NOT NULL,                  -- 成交量（单位：手）
+    amount NUMERIC(20,4) NOT NULL,        -- 成交金额（元）
+    type VARCHAR(10) NOT NULL,            -- 类型：买入/卖出/中性
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- 记录创建时间
+    CONSTRAINT pk_realtime_tick PRIMARY KEY (id, trade_date),
+    CONSTRAINT ck_realtime_tick_type CHECK (type IN ('买入', '卖出', '中性'))
+) PARTITION BY RANGE (trade_date);
+
+-- 在分区表上创建的索引会自动创建到每个分区
+CREATE INDEX idx_realtime_tick_ts_code_trade_date_time ON realtime_tick(ts_code, trade_date, time);
+
+-- 添加外键关联到股票基本信息表
+ALTER TABLE realtime_tick
+ADD CONSTRAINT fk_realtime_tick_stock_basic
+FOREIGN KEY (ts_code)
+REFERENCES stock_basic (ts_code);
+
+-- 创建当月及之后3个月的分区，之后由分区维护工具提前创建
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(date_trunc('month', CURRENT_DATE), date_trunc('month', CURRENT_DATE) + INTERVAL '3 months', INTERVAL '1 month')::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF realtime_tick FOR VALUES FROM (%L) TO (%L)',
+            'realtime_tick_' || to_char(month_start, '"y"YYYY"m"MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+-- 表注释
+COMMENT ON TABLE realtime_tick IS '实时逐笔交易（按月分区）';
+
+-- 列注释
+COMMENT ON COLUMN realtime_tick.id IS '自增序号';
+COMMENT ON COLUMN realtime_tick.ts_code IS '股票代码';
+COMMENT ON COLUMN realtime_tick.trade_date IS '交易日期';
+COMMENT ON COLUMN realtime_tick.time IS '交易时间';
+COMMENT ON COLUMN realtime_tick.price IS '现价';
+COMMENT ON COLUMN realtime_tick.change IS '价格变动';
+COMMENT ON COLUMN realtime_tick.volume IS '成交量（单位：手）';
+COMMENT ON COLUMN realtime_tick.amount IS '成交金额（元）';
+COMMENT ON COLUMN realtime_tick.type IS '类型：买入/卖出/中性';
+COMMENT ON COLUMN realtime_tick.created_at IS '记录创建时间';
@@ -39,33 +39,7 @@ ADD CONSTRAINT fk_stk_mins_stock_basic
 FOREIGN KEY (ts_code) 
 REFERENCES stock_basic (ts_code);
 
--- 可选：创建分区表（如果数据量很大）
--- 以下是基于时间范围的分区示例，实际使用时可根据需求调整
-/*
-CREATE TABLE stk_mins (
-    id SERIAL,
-    ts_code VARCHAR(20) NOT NULL,
-    trade_time TIMESTAMP NOT NULL,
-    open NUMERIC(12,4),
-    close NUMERIC(12,4),
-    high NUMERIC(12,4),
-    low NUMERIC(12,4),
-    vol BIGINT,
-    amount NUMERIC(20,4),
-    CONSTRAINT uk_stk_mins_ts_code_trade_time UNIQUE (ts_code, trade_time)
-) PARTITION BY RANGE (trade_time);
-
--- 创建分区
-CREATE TABLE stk_mins_y2023 PARTITION OF stk_mins
-    FOR VALUES FROM ('2023-01-01') TO ('2024-01-01');
-
-CREATE TABLE stk_mins_y2024 PARTITION OF stk_mins
-    FOR VALUES FROM ('2024-01-01') TO ('2025-01-01');
-
--- 在每个分区上创建索引
-CREATE INDEX idx_stk_mins_y2023_ts_code_trade_time ON stk_mins_y2023(ts_code, trade_time);
-CREATE INDEX idx_stk_mins_y2024_ts_code_trade_time ON stk_mins_y2024(ts_code, trade_time);
-*/
+-- 可选：按月分区版本见 stk_mins_partitioned.sql（数据量大时推荐），分区由 python -m app.db.partitions 维护
 
 
 -- 名称	类型	默认显示	描述
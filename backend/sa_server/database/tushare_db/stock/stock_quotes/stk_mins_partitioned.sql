@@ -0,0 +1,75 @@
+-- 股票数据 - 行情数据
+
+-- 分钟线行情（stk_mins）- 按月分区版本
+--
+-- 与stk_mins.sql字段相同，按trade_time做月度范围分区：
+--   - 每个分区只维护唯一键(ts_code, trade_time)和trade_time上的BRIN索引，
+--     原表的ts_code、(ts_code, trade_time)索引与唯一键重复
+--   - 历史数据按月分离（DETACH PARTITION），不需要大范围DELETE
+--   - 分区键必须包含在唯一约束中，id不再作为主键，单独建索引供按id查询
+--
+-- 分区由 python -m app.db.partitions 维护，批量写入时会自动补建缺失的分区。
+--
+-- 从未分区的stk_mins迁移：
+--   ALTER TABLE stk_mins RENAME TO stk_mins_legacy;
+--   -- 原表的约束和索引不随表名改名，先改名以免与本文件创建的同名对象冲突（改名约束的索引时约束一并改名）
+--   ALTER INDEX IF EXISTS uk_stk_mins_ts_code_trade_time RENAME TO uk_stk_mins_legacy_ts_code_trade_time;
+--   ALTER INDEX IF EXISTS idx_stk_mins_trade_time_brin RENAME TO idx_stk_mins_legacy_trade_time_brin;
+--   -- 执行本文件
+--   python -m app.db.partitions --table stk_mins --from <最早月份，如2020-01>
+--   INSERT INTO stk_mins (ts_code, trade_time, open, close, high, low, vol, amount)
+--   SELECT ts_code, trade_time, open, close, high, low, vol, amount FROM stk_mins_legacy;
+--   DROP TABLE stk_mins_legacy;
+CREATE TABLE stk_mins (
+    id BIGSERIAL,                         -- 自增序号
+    ts_code VARCHAR(20) NOT NULL,         -- 股票代码
+    trade_time TIMESTAMP NOT NULL,        -- 交易时间
+    open NUMERIC(12,4),                   -- 开盘价
+    close NUMERIC(12,4),                  -- 收盘价
+    high NUMERIC(12,4),                   -- 最高价
+    low NUMERIC(12,4),                    -- 最低价
+    vol BIGINT,                           -- 成交量
+    amount NUMERIC(20,4),                 -- 成交金额
+    CONSTRAINT uk_stk_mins_ts_code_trade_time UNIQUE (ts_code, trade_time)
+) PARTITION BY RANGE (trade_time);
+
+-- 在分区表上创建的索引会自动创建到每个分区
+CREATE INDEX idx_stk_mins_trade_time_brin ON stk_mins USING BRIN (trade_time);
+CREATE INDEX idx_stk_mins_id ON stk_mins (id);
+
+-- 添加外键关联到股票基本信息表
+ALTER TABLE stk_mins
+ADD CONSTRAINT fk_stk_mins_stock_basic
+FOREIGN KEY (ts_code)
+REFERENCES stock_basic (ts_code);
+
+-- 创建当月及之后3个月的分区，之后由分区维护工具提前创建
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(date_trunc('month', CURRENT_DATE), date_trunc('month', CURRENT_DATE) + INTERVAL '3 months', INTERVAL '1 month')::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF stk_mins FOR VALUES FROM (%L) TO (%L)',
+            'stk_mins_' || to_char(month_start, '"y"YYYY"m"MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+-- 表注释
+COMMENT ON TABLE stk_mins IS '股票分钟行情（按月分区）';
+
+-- 列注释
+COMMENT ON COLUMN stk_mins.id IS '自增序号';
+COMMENT ON COLUMN stk_mins.ts_code IS '股票代码';
+COMMENT ON COLUMN stk_mins.trade_time IS '交易时间';
+COMMENT ON COLUMN stk_mins.open IS '开盘价';
+COMMENT ON COLUMN stk_mins.close IS '收盘价';
+COMMENT ON COLUMN stk_mins.high IS '最高价';
+COMMENT ON COLUMN stk_mins.low IS '最低价';
+COMMENT ON COLUMN stk_mins.vol IS '成交量';
+COMMENT ON COLUMN stk_mins.amount IS '成交金额';